@@ -0,0 +1,114 @@
+"""
+Bar Builder Process
+
+Turns the prices the OrderBook writes into OHLCV bars: it polls the
+SharedPriceBook with changes_since() and adds each batch of new prices
+to one SharedBarBook per frame in config.BAR_FRAMES, so a Strategy (or
+anything else) reads ready-made bars instead of rebuilding them from
+ticks. No socket, no parsing: only shared memory in and out.
+
+Bars are stamped with time.time_ns(), so time bars line up with the
+wall clock (a "1m" bar starts on the minute).
+"""
+
+# --- Make the "Play Button" work ---
+import sys
+import os
+current_file_path = os.path.abspath(__file__)
+project_root = os.path.dirname(current_file_path)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+import time
+
+from shared_memory_utils import SharedPriceBook, PollBackoff
+from bar_utils import SharedBarBook
+from latency_utils import LatencyTracer, now_ns, hop_name, SHM_WRITE, BAR_UPDATE
+from logging_utils import get_logger
+from metrics_utils import SharedMetrics, TICKS_RECEIVED
+from profiling_utils import install_profiler
+from tuning_utils import ProcessTuning
+from config import SHARED_MEMORY_NAME, BAR_FRAMES, BAR_POLL_INTERVAL, BAR_POLL_MAX_INTERVAL
+
+log = get_logger("BarBuilder")
+
+
+def run_bar_builder(ready_event=None, owns_shared_memory=True):
+    """
+    Main function for the bar builder stage.
+
+    Args:
+        ready_event: Optional multiprocessing.Event, set once every bar
+            block exists (used by the main.py supervisor).
+        owns_shared_memory: If False, someone else (the supervisor) owns
+            the bar blocks, so they are left in place on exit.
+    """
+    print("[BarBuilder] Starting...")
+    tuning = ProcessTuning("barbuilder")
+    tuning.apply()
+
+    try:
+        book = SharedPriceBook(name=SHARED_MEMORY_NAME, create=False)
+    except FileNotFoundError:
+        print(f"[BarBuilder] Shared memory '{SHARED_MEMORY_NAME}' not found. Is OrderBook running?")
+        return
+
+    metrics = SharedMetrics("barbuilder")
+    tracer = LatencyTracer("barbuilder")
+    install_profiler("barbuilder")
+    bar_books = []
+
+    try:
+        for frame in BAR_FRAMES:
+            bar_books.append(SharedBarBook(frame, create=True))
+        # Bar files outlive the run: check their rows against this price book
+        synced_symbols = len(book.symbols)
+        for bars in bar_books:
+            bars.sync_symbols(book.symbols)
+        print(f"[BarBuilder] Building {', '.join(BAR_FRAMES)} bars from '{SHARED_MEMORY_NAME}'.")
+        tuning.finish_warmup()
+        if ready_event:
+            ready_event.set()
+
+        # Only prices written from now on make bars
+        version = book.version()
+        backoff = PollBackoff(BAR_POLL_INTERVAL, BAR_POLL_MAX_INTERVAL)
+        while True:
+            current, rows, prices = book.changes_since(version)
+            if current == version:
+                backoff.idle()
+                continue
+            backoff.reset()
+            version = current
+            if not len(rows):
+                continue
+            timestamp_ns = time.time_ns()
+            if len(book.symbols) != synced_symbols:
+                synced_symbols = len(book.symbols)
+                for bars in bar_books:
+                    bars.sync_symbols(book.symbols)
+            for bars in bar_books:
+                bars.add_ticks(rows, prices, timestamp_ns)
+
+            update_ns = now_ns()
+            write_ns = book.read_trace()["write_ns"]
+            if write_ns:
+                # Age of the newest price when its bars were updated
+                tracer.record(hop_name(SHM_WRITE, BAR_UPDATE), write_ns, update_ns)
+                metrics.observe(update_ns - write_ns)
+            metrics.inc(TICKS_RECEIVED, len(rows))
+            log.count("ticks", len(rows))
+
+    except KeyboardInterrupt:
+        print("\n[BarBuilder] Shutting down...")
+    finally:
+        for bars in bar_books:
+            if owns_shared_memory:
+                bars.unlink()
+            bars.close()
+        book.close()
+        print("[BarBuilder] Closed.")
+
+
+if __name__ == "__main__":
+    run_bar_builder()
@@ -0,0 +1,357 @@
+"""
+OHLCV bars per symbol, kept in shared memory (or a memory-mapped file).
+
+The bar builder stage (bar_builder.py) is the only writer: it polls the
+price book's changes_since() and hands every batch of new prices to
+SharedBarBook.add_ticks() of each frame, which extends the bar in
+progress or starts the next one, vectorized over the batch.
+
+A frame is either a time frame ("250ms", "1s", "1m": bars aligned to the
+wall clock) or a tick frame ("100t": a bar closes after 100 ticks). A tick
+is one price update the builder saw; the price book conflates, so several
+writes of a symbol between two polls count once. A time bar is closed by
+the first tick of a later period; a symbol without ticks gets no bar.
+
+Layout of a frame's block (one contiguous array per field):
+    header      int64 [8]   version, num_symbols, capacity, depth,
+                            period_ns, ticks_per_bar, updates, resets
+    symbols     S10 [capacity]          rows in price book order
+    bar_count   int64 [capacity]        bars started (the last is in progress)
+    open, high, low, close   float64 [capacity, depth]
+    volume, start_ns, end_ns int64 [capacity, depth]
+
+Bar k of a symbol is in column k % depth: each row is a ring of the last
+depth bars. start_ns is the period start (time frames) or the first
+tick's time.time_ns() (tick frames); end_ns is the last tick's.
+
+'version' is a sequence lock (shared_memory_utils.SeqlockBlock).
+
+With config.BAR_DIR set, the same layout lives in a file
+"<BAR_DIR>/<frame>.bars" mapped with mmap instead: readers map it just
+the same, and the bars outlive the run (a new builder appends to them).
+"""
+
+import os
+import re
+
+import numpy as np
+
+from config import BAR_SHM_NAME, BAR_CAPACITY, BAR_HISTORY, BAR_DIR
+from shared_memory_utils import SeqlockBlock, symbols_bytes
+
+BAR_HEADER_BYTES = 64
+
+# Slots of the int64 header
+VERSION, NUM_SYMBOLS, CAPACITY, DEPTH, PERIOD_NS, TICKS_PER_BAR, UPDATES, RESETS = range(8)
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+INT_FIELDS = ('volume', 'start_ns', 'end_ns')
+BAR_FIELDS = PRICE_FIELDS + INT_FIELDS
+
+_FRAME_UNITS = {'ms': 1_000_000, 's': 1_000_000_000, 'm': 60_000_000_000}
+
+
+def parse_bar_frame(frame):
+    """
+    Parses a frame name.
+
+    Returns:
+        tuple: (period_ns, ticks_per_bar); exactly one of them is non-zero.
+
+    Raises:
+        ValueError: If the frame is not "<n>ms", "<n>s", "<n>m" or "<n>t".
+    """
+    match = re.fullmatch(r'([1-9][0-9]*)(ms|s|m|t)', frame)
+    if not match:
+        raise ValueError(f"Bad bar frame {frame!r}: expected e.g. '500ms', '1s', '1m' or '100t'.")
+    count, unit = int(match.group(1)), match.group(2)
+    if unit == 't':
+        return 0, count
+    return count * _FRAME_UNITS[unit], 0
+
+
+def bar_block_path(frame, directory=BAR_DIR):
+    """The file a frame's bars live in, or None when they live in shared memory."""
+    return os.path.join(directory, f"{frame}.bars") if directory else None
+
+
+def bar_block_size(capacity, depth):
+    """Bytes of a bar block for capacity symbols and depth bars each."""
+    return BAR_HEADER_BYTES + symbols_bytes(capacity) + 8 * capacity * (1 + len(BAR_FIELDS) * depth)
+
+
+class SharedBarBook(SeqlockBlock):
+    """
+    The bars of one frame for every symbol. Row i is the symbol in row i
+    of the price book; rows never move.
+    """
+    KIND = 'Bars'
+    HEADER_BYTES = BAR_HEADER_BYTES
+
+    # Batches up to this size are added row by row (see add_ticks)
+    ROW_BY_ROW_MAX = 16
+
+    def __init__(self, frame, name=None, create=False, capacity=BAR_CAPACITY, depth=BAR_HISTORY,
+                 path=None):
+        """
+        Args:
+            frame (str): The frame, e.g. '1s' or '100t' (see parse_bar_frame).
+            name (str): The shared memory block name; defaults to
+                "<BAR_SHM_NAME>_<frame>".
+            create (bool): Create the block (or attach to a leftover one)
+                as the writer; False attaches as a reader. A leftover
+                block carries on with the bars so far.
+            capacity (int): Number of symbol rows (fixed for the block's life).
+            depth (int): Bars kept per symbol, the one in progress included.
+            path (str): Use this memory-mapped file instead of shared
+                memory; defaults to bar_block_path(frame), which is None
+                unless config.BAR_DIR is set.
+
+        Raises:
+            FileNotFoundError: If a reader attaches before the block exists.
+            ValueError: For a bad frame, or a block with an unexpected size
+                or frame.
+        """
+        period_ns, ticks_per_bar = parse_bar_frame(frame)
+        self.frame = frame
+        super().__init__(name or f"{BAR_SHM_NAME}_{frame}", create, bar_block_size(capacity, depth),
+                         path=path if path is not None else bar_block_path(frame))
+        if self.created:
+            self.header[:] = (0, 0, capacity, depth, period_ns, ticks_per_bar, 0, 0)
+        self.capacity = int(self.header[CAPACITY])
+        self.depth = int(self.header[DEPTH])
+        self.period_ns = int(self.header[PERIOD_NS])
+        self.ticks_per_bar = int(self.header[TICKS_PER_BAR])
+        if (self.period_ns, self.ticks_per_bar) != (period_ns, ticks_per_bar):
+            raise ValueError(f"Bar block '{self.location}' holds another frame than {frame!r}.")
+        self.check_size(bar_block_size(self.capacity, self.depth))
+
+        cap, depth = self.capacity, self.depth
+        offset = self.map_symbols(cap)
+        self.bar_count = np.ndarray((cap,), dtype=np.int64, buffer=self.shm.buf, offset=offset)
+        offset += 8 * cap
+        self.columns = {}
+        for field in BAR_FIELDS:
+            dtype = np.float64 if field in PRICE_FIELDS else np.int64
+            self.columns[field] = np.ndarray((cap, depth), dtype=dtype, buffer=self.shm.buf, offset=offset)
+            offset += 8 * cap * depth
+        self.open, self.high, self.low, self.close_ = (self.columns[field] for field in PRICE_FIELDS)
+        self.volume, self.start_ns, self.end_ns = (self.columns[field] for field in INT_FIELDS)
+        self._resets = int(self.header[RESETS])
+        self.finish_attach()
+
+    def repair(self):
+        """
+        The interrupted batch may have left a bar in progress with a new
+        close (or open) but not the high or low that goes with it: widen
+        every bar in progress to cover its open and close.
+        """
+        rows = np.flatnonzero(self.bar_count[:self.num_symbols] > 0)
+        cols = (self.bar_count[rows] - 1) % self.depth
+        ends = (self.open[rows, cols], self.close_[rows, cols])
+        self.high[rows, cols] = np.maximum.reduce([self.high[rows, cols], *ends])
+        self.low[rows, cols] = np.minimum.reduce([self.low[rows, cols], *ends])
+
+    # --- Writer side ---
+
+    def end_write(self):
+        """Publishes the batch of ticks opened by begin_write()."""
+        self.header[UPDATES] += 1
+        super().end_write()
+
+    def sync_symbols(self, names):
+        """
+        Makes the rows follow names (the price book's symbols, in row
+        order): appends the ones this block does not have yet, leaving
+        out rows past the capacity. A bar file outlives the run, and a new
+        price book may number runtime symbols differently: from the first
+        row that holds another symbol, the block's rows and their bars
+        are dropped and rebuilt from names.
+
+        Returns:
+            int: The number of rows the block has.
+        """
+        num_symbols = self.num_symbols
+        overlap = min(num_symbols, len(names))
+        stored = [raw.decode('utf-8') for raw in self.symbols[:overlap].tolist()]
+        if stored != list(names[:overlap]):
+            first = next(i for i, (ours, theirs) in enumerate(zip(stored, names)) if ours != theirs)
+            print(f"[Bars] Block '{self.location}' has {stored[first]!r} in row {first} where the price book "
+                  f"has {names[first]!r}; dropping the bars of rows {first} to {num_symbols - 1}.")
+            self.begin_write()
+            self.header[NUM_SYMBOLS] = num_symbols = first
+            # Readers forget their row numbers (see index_of)
+            self.header[RESETS] += 1
+            self.end_write()
+            self.symbol_to_index = dict(zip(stored[:first], range(first)))
+            self._resets = int(self.header[RESETS])
+        if len(names) > num_symbols:
+            added = names[num_symbols:self.capacity]
+            self.symbols[num_symbols:num_symbols + len(added)] = [name.encode('utf-8') for name in added]
+            self.bar_count[num_symbols:num_symbols + len(added)] = 0
+            # Publish the rows last, so readers never see a half-written symbol
+            self.header[NUM_SYMBOLS] = num_symbols + len(added)
+            self.symbol_to_index.update(zip(added, range(num_symbols, num_symbols + len(added))))
+        return self.num_symbols
+
+    def add_ticks(self, rows, prices, timestamp_ns):
+        """
+        Adds one tick per row: extends each row's bar in progress, or
+        starts its next bar when the period (or tick count) is over.
+
+        Args:
+            rows: Int array of distinct rows (as changes_since() returns them).
+            prices: Float array of their new prices; rows without a
+                price (0 or NaN) are skipped.
+            timestamp_ns (int): time.time_ns() of the ticks.
+
+        Returns:
+            int: The number of bars started.
+        """
+        num_symbols = self.num_symbols
+        if len(rows) <= self.ROW_BY_ROW_MAX:
+            # Numpy's per-call overhead dwarfs a few rows' worth of work
+            ticks = [(row, price) for row, price in zip(np.asarray(rows).tolist(), np.asarray(prices).tolist())
+                     if price > 0 and row < num_symbols]
+            if not ticks:
+                return 0
+            self.begin_write()
+            started = 0
+            for row, price in ticks:
+                started += self._add_tick(row, price, timestamp_ns)
+            self.end_write()
+            return started
+
+        rows = np.asarray(rows, dtype=np.intp)
+        prices = np.asarray(prices, dtype=np.float64)
+        keep = (prices > 0) & (rows < num_symbols)
+        if not keep.all():
+            rows, prices = rows[keep], prices[keep]
+        if not len(rows):
+            return 0
+
+        n = self.bar_count[rows]
+        current = (n - 1) % self.depth
+        if self.period_ns:
+            start_ns = timestamp_ns - timestamp_ns % self.period_ns
+            new = (n == 0) | (self.start_ns[rows, current] != start_ns)
+        else:
+            start_ns = timestamp_ns
+            new = (n == 0) | (self.volume[rows, current] >= self.ticks_per_bar)
+
+        self.begin_write()
+        extend = ~new
+        if extend.any():
+            ext_rows, cols, ext_prices = rows[extend], current[extend], prices[extend]
+            self.high[ext_rows, cols] = np.maximum(self.high[ext_rows, cols], ext_prices)
+            self.low[ext_rows, cols] = np.minimum(self.low[ext_rows, cols], ext_prices)
+            self.close_[ext_rows, cols] = ext_prices
+            self.volume[ext_rows, cols] += 1
+            self.end_ns[ext_rows, cols] = timestamp_ns
+        started = int(new.sum())
+        if started:
+            new_rows, new_n, new_prices = rows[new], n[new], prices[new]
+            cols = new_n % self.depth
+            for column in (self.open, self.high, self.low, self.close_):
+                column[new_rows, cols] = new_prices
+            self.volume[new_rows, cols] = 1
+            self.start_ns[new_rows, cols] = start_ns
+            self.end_ns[new_rows, cols] = timestamp_ns
+            self.bar_count[new_rows] = new_n + 1
+        self.end_write()
+        return started
+
+    def _add_tick(self, row, price, timestamp_ns):
+        """[Internal] add_ticks() for one row, with Python scalars; returns 1 if a bar started."""
+        n = self.bar_count.item(row)
+        col = (n - 1) % self.depth
+        if self.period_ns:
+            start_ns = timestamp_ns - timestamp_ns % self.period_ns
+            new = n == 0 or self.start_ns.item(row, col) != start_ns
+        else:
+            start_ns = timestamp_ns
+            new = n == 0 or self.volume.item(row, col) >= self.ticks_per_bar
+        if new:
+            col = n % self.depth
+            self.open[row, col] = self.high[row, col] = self.low[row, col] = self.close_[row, col] = price
+            self.volume[row, col] = 1
+            self.start_ns[row, col] = start_ns
+            self.end_ns[row, col] = timestamp_ns
+            self.bar_count[row] = n + 1
+            return 1
+        if price > self.high.item(row, col):
+            self.high[row, col] = price
+        elif price < self.low.item(row, col):
+            self.low[row, col] = price
+        self.close_[row, col] = price
+        self.volume[row, col] += 1
+        self.end_ns[row, col] = timestamp_ns
+        return 0
+
+    # --- Reader side ---
+
+    def index_of(self, symbol):
+        """A symbol's row, or None if the writer never saw it."""
+        resets = self.header.item(RESETS)
+        if resets != self._resets:
+            # The writer renumbered rows: look every symbol up again
+            self._resets = resets
+            self.symbol_to_index = {}
+        return super().index_of(symbol)
+
+    def history(self, symbol, count=None, retries=1000):
+        """
+        Reads a symbol's most recent bars, oldest first; the last one is
+        the bar in progress.
+
+        Args:
+            count (int): Bars wanted (at most depth); None for all kept.
+
+        Returns:
+            dict: One array per BAR_FIELDS field (empty before the first
+            tick), or None for an unknown symbol.
+
+        Raises:
+            RuntimeError: If the writer never paused long enough to read.
+        """
+        idx = self.index_of(symbol)
+        if idx is None:
+            return None
+        depth = self.depth if count is None else min(count, self.depth)
+
+        def read():
+            n = self.bar_count.item(idx)
+            cols = np.arange(n - min(n, depth), n) % self.depth
+            return {field: column[idx, cols] for field, column in self.columns.items()}
+
+        return self.consistent_read(read, retries)
+
+    def latest(self, symbol, retries=1000):
+        """
+        The bar in progress of a symbol.
+
+        Returns:
+            dict: BAR_FIELDS values, or None for an unknown symbol or one
+            without ticks yet.
+
+        Raises:
+            RuntimeError: If the writer never paused long enough to read.
+        """
+        idx = self.index_of(symbol)
+        if idx is None:
+            return None
+        columns = self.columns.items()
+
+        def read():
+            n = self.bar_count.item(idx)
+            col = (n - 1) % self.depth
+            return n, {field: column.item(idx, col) for field, column in columns}
+
+        n, bar = self.consistent_read(read, retries)
+        return bar if n else None
+
+    def close(self):
+        self.bar_count = None
+        self.open = self.high = self.low = self.close_ = self.volume = self.start_ns = self.end_ns = None
+        self.columns = {}
+        super().close()
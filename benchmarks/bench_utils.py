@@ -0,0 +1,164 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Handles timing loops, writing machine-readable JSON results and
+comparing a run against a stored baseline.
+"""
+
+import json
+import os
+import platform
+import statistics
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCHMARKS_DIR)
+RESULTS_DIR = os.path.join(BENCHMARKS_DIR, 'results')
+
+# A metric regresses if it gets worse by more than this fraction
+DEFAULT_TOLERANCE = 0.20
+
+
+def time_per_op(func, iterations, repeat=5):
+    """
+    Times func() in a tight loop.
+
+    Args:
+        func: A zero-argument callable.
+        iterations (int): Calls per timed run.
+        repeat (int): Number of timed runs.
+
+    Returns:
+        dict: 'min_ns' and 'median_ns' per call across the runs.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            func()
+        samples.append((time.perf_counter_ns() - start) / iterations)
+    return {'min_ns': min(samples), 'median_ns': statistics.median(samples)}
+
+
+def higher_is_better(metric):
+    """Throughput-style metrics improve upwards, everything else downwards."""
+    return metric.endswith('_per_sec')
+
+
+def flatten(results, prefix=''):
+    """Flattens nested result dicts into {'a.b.c': number}."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)):
+            flat[name] = value
+    return flat
+
+
+def write_results(name, results, path=None):
+    """
+    Writes a result set to benchmarks/results/<name>.json.
+
+    Returns:
+        str: The path written.
+    """
+    path = path or os.path.join(RESULTS_DIR, f"{name}.json")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = {
+        'benchmark': name,
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+    return path
+
+
+def baseline_path(name):
+    """Returns the stored baseline file for a benchmark."""
+    return os.path.join(RESULTS_DIR, f"{name}.baseline.json")
+
+
+def load_baseline(name, path=None):
+    """Loads a stored baseline result set, or None if there is none."""
+    path = path or baseline_path(name)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def compare_to_baseline(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compares every numeric metric against the baseline.
+
+    Returns:
+        list: (metric, baseline_value, current_value, change) for every
+        metric that got worse by more than the tolerance.
+    """
+    current = flatten(results)
+    regressions = []
+    for metric, old in flatten(baseline).items():
+        new = current.get(metric)
+        if new is None or old == 0:
+            continue
+        change = (new - old) / abs(old)
+        worse = -change if higher_is_better(metric) else change
+        if worse > tolerance:
+            regressions.append((metric, old, new, change))
+    return regressions
+
+
+def report_regressions(name, results, baseline_file=None, tolerance=DEFAULT_TOLERANCE):
+    """
+    Prints the baseline comparison for a run.
+
+    Returns:
+        bool: True if no metric regressed (or there is no baseline).
+    """
+    baseline = load_baseline(name, baseline_file)
+    if baseline is None:
+        print(f"[Bench] No baseline stored for '{name}'. Use --save-baseline to create one.")
+        return True
+
+    regressions = compare_to_baseline(results, baseline, tolerance)
+    if not regressions:
+        print(f"[Bench] '{name}': no regressions beyond {tolerance:.0%} of baseline.")
+        return True
+
+    print(f"[Bench] '{name}': {len(regressions)} regression(s) beyond {tolerance:.0%}:")
+    for metric, old, new, change in regressions:
+        print(f"  {metric}: {old:.3f} -> {new:.3f} ({change:+.1%})")
+    return False
+
+
+def add_common_arguments(parser):
+    """Adds the --baseline / --save-baseline / --tolerance options."""
+    parser.add_argument('--baseline', help='Baseline JSON to compare against '
+                        '(default: benchmarks/results/<name>.baseline.json)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='Store this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed fractional slowdown before a metric counts as a regression')
+
+
+def finish(name, results, args):
+    """
+    Writes the results, handles --save-baseline and compares to the baseline.
+
+    Returns:
+        int: Process exit code (1 if a regression was found).
+    """
+    path = write_results(name, results)
+    print(f"[Bench] Results written to {path}")
+
+    if args.save_baseline:
+        write_results(name, results, args.baseline or baseline_path(name))
+        print(f"[Bench] Stored as baseline for '{name}'.")
+        return 0
+
+    return 0 if report_regressions(name, results, args.baseline, args.tolerance) else 1
@@ -0,0 +1,137 @@
+"""
+Jitter benchmark for the runtime tuning in tuning_utils.
+
+Runs a Strategy-like hot loop (price history update, decision, order
+dict, JSON encoding) next to a large long-lived heap, once per tuning
+profile, each in a fresh interpreter so GC state does not leak between
+runs. Reports the per-iteration p50 / p99 / p99.9 / max.
+
+Profiles:
+- untuned:     CPython defaults
+- gc_freeze:   warm-up objects frozen, gen0 threshold raised
+- gc_disable:  as gc_freeze, plus no GC inside the hot loop
+- pinned:      as gc_disable, plus pinned to --cpus (only with --cpus)
+
+Usage:
+    python benchmarks/jitter.py [--iterations N] [--cpus 2] [--save-baseline] [--baseline PATH]
+"""
+
+import argparse
+import json
+import random
+import subprocess
+from collections import deque
+
+# --- Make the "Play Button" work ---
+import sys
+import os
+current_file_path = os.path.abspath(__file__)
+benchmarks_dir = os.path.dirname(current_file_path)
+project_root = os.path.dirname(benchmarks_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, benchmarks_dir)
+# --- End of fix ---
+
+os.environ.setdefault('TRADING_LATENCY_TRACE', '0')
+
+from bench_utils import add_common_arguments, finish
+
+BENCH_NAME = 'jitter'
+
+PROFILES = {
+    'untuned': None,
+    'gc_freeze': {'gc': 'freeze', 'gc_threshold': (50_000, 20, 100)},
+    'gc_disable': {'gc': 'disable', 'gc_threshold': (50_000, 20, 100)},
+    'pinned': {'gc': 'disable', 'gc_threshold': (50_000, 20, 100)},
+}
+
+# Long-lived objects standing in for a process's state (books, caches, history)
+HEAP_OBJECTS = 300_000
+
+
+def run_worker(profile, iterations, cpus=None):
+    """
+    Runs the hot loop under one tuning profile in this process.
+
+    Returns:
+        dict: p50_us, p99_us, p99_9_us and max_us per iteration.
+    """
+    from tuning_utils import ProcessTuning
+    from latency_utils import LatencyHistogram, now_ns
+    from strategy import ma_news_strategy_decision
+    from config import LONG_WINDOW
+
+    settings = PROFILES[profile]
+    if settings is not None:
+        settings = dict(settings, cpus=cpus if profile == 'pinned' else None)
+    tuning = ProcessTuning('strategy', settings=settings, enabled=settings is not None)
+    tuning.apply()
+
+    random.seed(0)
+    heap = [{'id': i, 'tags': [i, str(i)]} for i in range(HEAP_OBJECTS)]
+    recent_orders = deque(maxlen=10_000)  # Some per-tick objects survive a while
+    price_history = [100.0] * LONG_WINDOW
+    tuning.finish_warmup()
+
+    hist = LatencyHistogram()
+    price = 100.0
+    for i in range(iterations):
+        start = now_ns()
+        with tuning.hot_loop():
+            price += random.uniform(-0.5, 0.5)
+            price_history.append(price)
+            price_history.pop(0)
+            decision = ma_news_strategy_decision(price_history, price, 80 if i % 2 else 20, None)
+            order = {
+                'symbol': 'AAPL',
+                'price': price,
+                'decision': decision,
+                'trace': {'tick_id': i, 'read_ns': start},
+            }
+            json.dumps(order)
+            recent_orders.append(order)
+        hist.record(now_ns() - start)
+
+    del heap
+    return {
+        'p50_us': hist.percentile(50) / 1000,
+        'p99_us': hist.percentile(99) / 1000,
+        'p99_9_us': hist.percentile(99.9) / 1000,
+        'max_us': hist.max() / 1000,
+    }
+
+
+def run_profile(profile, iterations, cpus):
+    """Runs one profile in a fresh interpreter and returns its result dict."""
+    cmd = [sys.executable, current_file_path, '--worker', profile, '--iterations', str(iterations)]
+    if cpus:
+        cmd += ['--cpus', cpus]
+    output = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    # The worker's result is its last line; anything before is log output
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200_000, help='Hot-loop iterations per profile')
+    parser.add_argument('--cpus', help='CPU list for the pinned profile, e.g. "2" or "2-3"')
+    parser.add_argument('--worker', choices=sorted(PROFILES), help=argparse.SUPPRESS)
+    add_common_arguments(parser)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.iterations, args.cpus)))
+        return 0
+
+    results = {}
+    for profile in PROFILES:
+        if profile == 'pinned' and not args.cpus:
+            continue
+        print(f"[Bench] Running {profile}...")
+        results[profile] = run_profile(profile, args.iterations, args.cpus)
+        print(f"[Bench]   {results[profile]}")
+    return finish(BENCH_NAME, results, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,797 @@
+"""
+Micro-benchmarks for the hot functions of the pipeline.
+
+Covers:
+- network_utils.receive_messages (framing/parsing throughput)
+- SharedPriceBook.update / read / get_all_prices / changes_since
+- gateway.generate_price_data
+- strategy.ma_news_strategy_decision
+- ConsolidatedQuotes.best for 1-16 venues (cost should stay flat)
+- Gateway fan-out of one tick: TCP sendall per client vs one multicast send
+- Order encode + decode for every available order codec
+- Loopback round trips under each socket option (NODELAY, buffers, busy poll)
+- Round trips and message throughput over TCP, Unix stream and Unix seqpacket links
+- PositionKeeper.apply_fill and mark_to_market for 4-1000 held symbols
+- SharedSentimentBook update / read / changes_since against reading news off a socket
+- Encoding one tick for 100 clients subscribed to 50 of 5000 symbols
+- FeatureEngine.update for 4-1000 symbols and SharedFeatureBook.read, against recomputing the averages
+
+Usage:
+    python benchmarks/micro.py [--save-baseline] [--baseline PATH] [--tolerance 0.2]
+"""
+
+import argparse
+import contextlib
+import itertools
+import random
+import socket
+import threading
+import time
+
+# --- Make the "Play Button" work ---
+import sys
+import os
+current_file_path = os.path.abspath(__file__)
+benchmarks_dir = os.path.dirname(current_file_path)
+project_root = os.path.dirname(benchmarks_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, benchmarks_dir)
+# --- End of fix ---
+
+# Keep the components from writing trace files while we benchmark them
+os.environ.setdefault('TRADING_LATENCY_TRACE', '0')
+
+from bench_utils import time_per_op, add_common_arguments, finish
+
+BENCH_NAME = 'micro'
+
+
+def bench_receive_messages(num_messages=200_000):
+    """Measures how fast receive_messages can frame a stream of price updates."""
+    from network_utils import receive_messages
+    from config import MESSAGE_DELIMITER
+
+    reader, writer = socket.socketpair()
+    payload = b"AAPL,150.23" + MESSAGE_DELIMITER
+    # Send in 4 KB-ish batches, like a busy feed would arrive
+    batch = payload * 256
+    batches = num_messages // 256
+
+    def write_all():
+        for _ in range(batches):
+            writer.sendall(batch)
+        writer.close()
+
+    writer_thread = threading.Thread(target=write_all, daemon=True)
+    start = time.perf_counter_ns()
+    writer_thread.start()
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        count = sum(1 for _ in receive_messages(reader))
+    elapsed_ns = time.perf_counter_ns() - start
+    writer_thread.join()
+
+    return {
+        'messages': count,
+        'ns_per_message': elapsed_ns / max(count, 1),
+        'messages_per_sec': count / (elapsed_ns / 1e9),
+    }
+
+
+def bench_shared_price_book(iterations=100_000):
+    """Measures update / read / get_all_prices on a private SharedPriceBook."""
+    from shared_memory_utils import SharedPriceBook
+    from config import SYMBOLS
+
+    name = f"bench_book_{os.getpid()}"
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        book = SharedPriceBook(name=name, create=True)
+    try:
+        symbol = SYMBOLS[0]
+        return {
+            'update': time_per_op(lambda: book.update(symbol, 150.25), iterations),
+            'read': time_per_op(lambda: book.read(symbol), iterations),
+            'get_all_prices': time_per_op(book.get_all_prices, iterations // 10),
+            # A poll where one row changed since the reader's last version
+            'changes_since': time_per_op(
+                lambda: book.changes_since(book.version() - 1), iterations // 10
+            ),
+        }
+    finally:
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            book.close()
+            book.unlink()
+
+
+def bench_generate_price_data(iterations=100_000):
+    """Measures building one tick's price payload."""
+    from gateway import generate_price_data
+    return time_per_op(generate_price_data, iterations)
+
+
+def bench_strategy_decision(iterations=50_000):
+    """Measures one strategy evaluation with a full price history."""
+    from strategy import ma_news_strategy_decision
+    from config import LONG_WINDOW
+
+    random.seed(0)
+    history = [100 + random.uniform(-1, 1) for _ in range(LONG_WINDOW)]
+    price = history[-1]
+
+    def decide():
+        ma_news_strategy_decision(history, price, 80, None)
+
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        return time_per_op(decide, iterations)
+
+
+def bench_consolidation(iterations=20_000, num_symbols=500, batch=4):
+    """
+    Measures merging one tick's batch of quotes into a best bid / offer
+    for a growing number of venues.
+    """
+    import numpy as np
+    from consolidation_utils import ConsolidatedQuotes
+
+    rng = np.random.default_rng(0)
+    indices = np.arange(batch, dtype=np.intp)
+    results = {}
+    for num_venues in (1, 2, 4, 8, 16):
+        quotes = ConsolidatedQuotes(num_venues, num_symbols, stale_after_ns=10**12)
+        for venue in range(num_venues):
+            bids = 100 + rng.random(num_symbols)
+            quotes.set_quotes(venue, np.arange(num_symbols), bids, bids + 0.1, 1)
+        results[f"venues_{num_venues}"] = time_per_op(lambda: quotes.best(indices, 2), iterations)
+    return results
+
+
+def bench_fanout(iterations=2_000, port=19500):
+    """
+    Measures the Gateway's cost of sending one tick to 1-16 subscribers:
+    a sendall() per TCP client against a single multicast sendto().
+    Receivers are drained by a background thread.
+    """
+    import selectors
+    from gateway import generate_price_data
+    from network_utils import create_multicast_sender, create_multicast_receiver
+    from config import MESSAGE_DELIMITER, MULTICAST_GROUP
+
+    payload = generate_price_data().encode('utf-8') + MESSAGE_DELIMITER
+    results = {}
+    for num_clients in (1, 4, 16):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(('127.0.0.1', port))
+        server.listen(num_clients)
+        readers = [socket.create_connection(('127.0.0.1', port)) for _ in range(num_clients)]
+        clients = [server.accept()[0] for _ in range(num_clients)]
+        readers += [create_multicast_receiver(MULTICAST_GROUP, port) for _ in range(num_clients)]
+        sender = create_multicast_sender()
+
+        stop = threading.Event()
+        selector = selectors.DefaultSelector()
+        for reader in readers:
+            reader.setblocking(False)
+            selector.register(reader, selectors.EVENT_READ)
+
+        def drain():
+            while not stop.is_set():
+                for key, _ in selector.select(timeout=0.05):
+                    try:
+                        key.fileobj.recv(65536)
+                    except BlockingIOError:
+                        pass
+
+        drain_thread = threading.Thread(target=drain, daemon=True)
+        drain_thread.start()
+        try:
+            def tcp():
+                for client in clients:
+                    client.sendall(payload)
+
+            results[f"clients_{num_clients}"] = {
+                'tcp': time_per_op(tcp, iterations),
+                'multicast': time_per_op(lambda: sender.sendto(payload, (MULTICAST_GROUP, port)), iterations),
+            }
+        finally:
+            stop.set()
+            drain_thread.join()
+            selector.close()
+            for sock in readers + clients + [server, sender]:
+                sock.close()
+    return results
+
+
+def bench_order_codecs(iterations=50_000):
+    """Measures encode_frame + decode of one order, and the encoded size, per codec."""
+    from order_codec_utils import get_order_codec, available_codecs
+    from config import SYMBOLS, TRADE_QUANTITY
+
+    order = {
+        "symbol": SYMBOLS[0], "side": "BUY", "quantity": TRADE_QUANTITY, "price": 150.25,
+        "sentiment": 80, "short_ma": 150.1, "long_ma": 149.8, "position_before": None,
+        "position_after": "LONG", "reason": "Both price and news signals indicate BUY",
+        "timestamp_ns": time.time_ns(),
+        "trace": {"tick_id": 42, "generate_ns": 1, "read_ns": 2, "send_ns": 3},
+    }
+    results = {}
+    for name in available_codecs():
+        codec = get_order_codec(name)
+        payload = codec.encode(order)
+        results[name] = {
+            'bytes': len(payload),
+            'encode': time_per_op(lambda: codec.encode_frame(order), iterations),
+            'decode': time_per_op(lambda: codec.decode(payload), iterations),
+        }
+    return results
+
+
+def bench_socket_options(port=19600):
+    """
+    Measures loopback round trips with each socket option of the profile
+    applied to both ends (network_utils.apply_socket_options):
+
+    - one_write:  a 24-byte request in one send, 24-byte reply
+    - two_writes: the same request as 4-byte header + body (where Nagle's
+      algorithm meets delayed ACKs)
+    - burst_64k:  64 x 1 KB sends, then a 1-byte reply once all arrived
+
+    The echo server is a thread in this process.
+    """
+    from network_utils import apply_socket_options, SO_BUSY_POLL
+
+    profiles = {
+        'nagle': {'nodelay': False},
+        'nodelay': {'nodelay': True},
+        'nodelay_buf_16k': {'nodelay': True, 'sndbuf': 16 * 1024, 'rcvbuf': 16 * 1024},
+        'nodelay_buf_1m': {'nodelay': True, 'sndbuf': 1024 * 1024, 'rcvbuf': 1024 * 1024},
+    }
+    if SO_BUSY_POLL is not None:
+        profiles['nodelay_busy_poll_50us'] = {'nodelay': True, 'busy_poll_us': 50}
+
+    def read_exactly(sock, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("closed")
+            data += chunk
+        return data
+
+    request = b"x" * 24
+    chunk_1k = b"y" * 1024
+    results = {}
+    for name, options in profiles.items():
+        # Before listen / connect: the TCP window is sized at the handshake
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        apply_socket_options(server, **options)
+        server.bind(('127.0.0.1', port))
+        server.listen(1)
+        client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        apply_socket_options(client, **options)
+        client.connect(('127.0.0.1', port))
+        conn = server.accept()[0]
+
+        def echo():
+            try:
+                while True:
+                    kind = read_exactly(conn, 1)
+                    if kind == b"r":
+                        conn.sendall(read_exactly(conn, len(request)))
+                    else:
+                        read_exactly(conn, 64 * len(chunk_1k))
+                        conn.sendall(b"k")
+            except (ConnectionError, OSError):
+                pass
+
+        echo_thread = threading.Thread(target=echo, daemon=True)
+        echo_thread.start()
+        try:
+            def one_write():
+                client.sendall(b"r" + request)
+                read_exactly(client, len(request))
+
+            def two_writes():
+                client.sendall(b"r" + request[:3])
+                client.sendall(request[3:])
+                read_exactly(client, len(request))
+
+            def burst():
+                client.sendall(b"b")
+                for _ in range(64):
+                    client.sendall(chunk_1k)
+                read_exactly(client, 1)
+
+            # Nagle + delayed ACK can stall ~40 ms per round trip, so few iterations
+            slow = not options['nodelay']
+            results[name] = {
+                'one_write': time_per_op(one_write, 5_000),
+                'two_writes': time_per_op(two_writes, 10 if slow else 5_000, repeat=3),
+                'burst_64k': time_per_op(burst, 10 if slow else 1_000, repeat=3),
+            }
+        finally:
+            client.close()
+            conn.close()
+            server.close()
+            echo_thread.join()
+    return results
+
+
+def bench_transports(iterations=5_000, num_messages=100_000, port=19700):
+    """
+    Compares the link transports (config.LINK_TRANSPORT) on this host:
+
+    - round_trip: a 24-byte request and its echo, one send each way
+    - throughput: tick-sized messages sent one send() each, counted by a
+      reader thread with receive_messages()
+    """
+    import tempfile
+    from network_utils import create_server_socket, create_client_socket, link_address, send_message, receive_messages
+
+    def read_exactly(sock, size):
+        data = bytearray()
+        while len(data) < size:
+            chunk = sock.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("closed")
+            data += chunk
+        return data
+
+    request = b"x" * 24
+    message = b"AAPL,150.18,150.28*MSFT,310.40,310.51*GOOG,140.01,140.09"
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_sockets_") as socket_dir:
+        for transport in ('tcp', 'unix', 'seqpacket'):
+            results[transport] = {}
+            for test in ('round_trip', 'throughput'):
+                address = link_address(port, transport, socket_dir=socket_dir)
+                server = create_server_socket(address)
+                client = create_client_socket(address)
+                conn, _ = server.accept()
+                try:
+                    if test == 'round_trip':
+                        def echo():
+                            try:
+                                while True:
+                                    conn.sendall(read_exactly(conn, len(request)))
+                            except (ConnectionError, OSError):
+                                pass
+
+                        echo_thread = threading.Thread(target=echo, daemon=True)
+                        echo_thread.start()
+
+                        def round_trip():
+                            client.sendall(request)
+                            read_exactly(client, len(request))
+
+                        results[transport]['round_trip'] = time_per_op(round_trip, iterations)
+                        client.close()
+                        echo_thread.join()
+                    else:
+                        received = []
+                        reader = threading.Thread(
+                            target=lambda: received.append(sum(1 for _ in receive_messages(conn, 65536))))
+                        reader.start()
+                        start = time.perf_counter_ns()
+                        for _ in range(num_messages):
+                            send_message(client, message)
+                        client.close()
+                        reader.join()
+                        elapsed_ns = time.perf_counter_ns() - start
+                        results[transport]['messages_per_sec'] = received[0] / (elapsed_ns / 1e9)
+                finally:
+                    client.close()
+                    conn.close()
+                    server.close()
+    return results
+
+
+def bench_positions(iterations=2_000):
+    """
+    Measures booking one fill and marking the whole portfolio, for a few
+    portfolio sizes. 'mark_loop' values the same positions one symbol at a
+    time in Python, for comparison with the vectorized mark_to_market.
+    """
+    from shared_memory_utils import SharedPriceBook
+    from position_utils import SharedPositionBook, PositionKeeper
+
+    results = {}
+    for num_symbols in (4, 100, 1000):
+        symbols = [f"S{i:04d}" for i in range(num_symbols)]
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            book = SharedPriceBook(name=f"bench_pos_book_{os.getpid()}", create=True, capacity=num_symbols)
+            book.add_symbols(symbols)
+        positions = SharedPositionBook(name=f"bench_positions_{os.getpid()}", create=True, capacity=num_symbols)
+        try:
+            keeper = PositionKeeper(positions, book)
+            for i, symbol in enumerate(symbols):
+                book.update(symbol, 100.0 + i)
+                keeper.apply_fill(symbol, 'BUY' if i % 2 else 'SELL', 10, 100.0)
+
+            def mark_loop():
+                total = 0.0
+                for row, symbol in enumerate(symbols):
+                    mark = book.prices[book.symbol_to_index[symbol]]
+                    total += positions.quantity[row] * (mark - positions.avg_price[row])
+                return total
+
+            results[num_symbols] = {
+                'apply_fill': time_per_op(lambda: keeper.apply_fill(symbols[0], 'BUY', 10, 101.0), iterations),
+                'mark_to_market': time_per_op(keeper.mark_to_market, iterations),
+                'mark_loop': time_per_op(mark_loop, max(iterations // num_symbols, 10)),
+                'snapshot': time_per_op(positions.snapshot, iterations),
+            }
+        finally:
+            positions.close()
+            positions.unlink()
+            with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                book.close()
+                book.unlink()
+    return results
+
+
+def bench_sentiment(iterations=100_000):
+    """
+    Measures the sentiment block, and for comparison the Strategy's old
+    news path: one "SCORE" message through a socket pair, received,
+    decoded and parsed.
+    """
+    from sentiment_utils import SharedSentimentBook
+    from config import SYMBOLS
+
+    name = f"bench_sentiment_{os.getpid()}"
+    writer = SharedSentimentBook(name=name, create=True)
+    reader = SharedSentimentBook(name=name)
+    reader_sock, writer_sock = socket.socketpair()
+    try:
+        symbol = SYMBOLS[0]
+        writer.update(symbol, 50, 1)
+
+        def socket_news():
+            writer_sock.sendall(b"72*")
+            return int(reader_sock.recv(64)[:-1].decode('utf-8'))
+
+        return {
+            'update': time_per_op(lambda: writer.update(symbol, 72, 1), iterations),
+            'read': time_per_op(lambda: reader.read(symbol), iterations),
+            'version': time_per_op(reader.version, iterations),
+            'changes_since': time_per_op(lambda: reader.changes_since(reader.version() - 2), iterations // 10),
+            'socket_news': time_per_op(socket_news, iterations // 10),
+        }
+    finally:
+        reader_sock.close()
+        writer_sock.close()
+        reader.close()
+        writer.unlink()
+        writer.close()
+
+
+def bench_subscriptions(iterations=20, num_symbols=5000, num_clients=100, per_client=50, distinct=10):
+    """
+    Encodes one tick of num_symbols quotes for num_clients clients that
+    each want per_client symbols, with the Gateway's fragment joins
+    ('filtered': every client has its own subset; 'filtered_shared': the
+    clients share 'distinct' subsets). 'reencode' builds each client's
+    subset from the quote strings instead, and 'full' is the one payload
+    everyone got before. Bytes are per tick, summed over the clients.
+    """
+    import gateway
+
+    rng = random.Random(0)
+    quotes = [f"S{i:04d},{100 + i * 0.01:.2f},{100.1 + i * 0.01:.2f}" for i in range(num_symbols)]
+    fragments = [quote.encode('utf-8') for quote in quotes]
+    header = b"#1,2,3"
+    full = b"*".join([header, *fragments])
+
+    def masks_for(count):
+        masks = []
+        for _ in range(count):
+            mask = 0
+            for i in rng.sample(range(num_symbols), per_client):
+                mask |= 1 << i
+            masks.append(mask)
+        return masks
+
+    own_masks = masks_for(num_clients)
+    shared_masks = [mask for mask in masks_for(distinct) for _ in range(num_clients // distinct)]
+    client_symbols = [set(gateway.subscribed_indices(mask)) for mask in own_masks]
+
+    def filtered(masks):
+        cache = {}
+        return [gateway.filtered_payload(mask, full, header, fragments, cache) for mask in masks]
+
+    def reencode():
+        return [f"{header.decode()}*{'*'.join(q for i, q in enumerate(quotes) if i in wanted)}".encode('utf-8')
+                for wanted in client_symbols]
+
+    def full_payload():
+        return b"*".join([header, *(quote.encode('utf-8') for quote in quotes)])
+
+    return {
+        'filtered': time_per_op(lambda: filtered(own_masks), iterations),
+        'filtered_shared': time_per_op(lambda: filtered(shared_masks), iterations),
+        'reencode': time_per_op(reencode, iterations),
+        'full': time_per_op(full_payload, iterations),
+        'filtered_bytes': sum(map(len, filtered(own_masks))),
+        'full_bytes': len(full) * num_clients,
+    }
+
+
+def bench_features(iterations=2_000):
+    """
+    Measures moving every feature of a batch of symbols forward by one
+    sample (the OrderBook's cost per book write) and reading one symbol's
+    row (a Strategy's cost per decision). 'recompute' is what each
+    Strategy did before: statistics.mean over its own short and long
+    price history, for one symbol.
+    """
+    from statistics import mean
+    import numpy as np
+    from shared_memory_utils import SharedPriceBook
+    from feature_utils import SharedFeatureBook, FeatureEngine
+    from config import SHORT_WINDOW, LONG_WINDOW, FEATURE_WINDOWS
+
+    results = {}
+    for num_symbols in (4, 100, 1000):
+        symbols = [f"S{i:04d}" for i in range(num_symbols)]
+        with contextlib.redirect_stdout(open(os.devnull, 'w')):
+            book = SharedPriceBook(name=f"bench_feat_book_{os.getpid()}", create=True, capacity=num_symbols)
+            book.add_symbols(symbols)
+        features = SharedFeatureBook(name=f"bench_features_{os.getpid()}", create=True, capacity=num_symbols)
+        try:
+            engine = FeatureEngine(features, book)
+            rows = np.arange(num_symbols)
+            mids = 100.0 + np.random.default_rng(0).random(num_symbols)
+            for _ in range(max(FEATURE_WINDOWS)):
+                engine.update(rows, mids)
+            one_row, one_mid = rows[:1], mids[:1]
+            history = [100.0 + i for i in range(LONG_WINDOW)]
+
+            results[num_symbols] = {
+                'update_all': time_per_op(lambda: engine.update(rows, mids), iterations),
+                'update_one': time_per_op(lambda: engine.update(one_row, one_mid), iterations),
+                'read': time_per_op(lambda: features.read(symbols[0]), iterations),
+                'recompute': time_per_op(
+                    lambda: (mean(history[-SHORT_WINDOW:]), mean(history[-LONG_WINDOW:])), iterations),
+            }
+        finally:
+            features.close()
+            features.unlink()
+            with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                book.close()
+                book.unlink()
+    return results
+
+
+def bench_bars(iterations=2_000):
+    """
+    Measures adding one batch of ticks to a frame's bars (the bar
+    builder's cost per poll, per frame) against a plain Python loop that
+    keeps the bar in progress of each symbol in a dict.
+    """
+    import numpy as np
+    from bar_utils import SharedBarBook
+
+    period_ns = 1_000_000_000
+    results = {}
+    for num_symbols in (1, 100, 5000):
+        symbols = [f"S{i:04d}" for i in range(num_symbols)]
+        bars = SharedBarBook('1s', name=f"bench_bars_{os.getpid()}", create=True, capacity=num_symbols,
+                             path='')
+        try:
+            bars.sync_symbols(symbols)
+            rows = np.arange(num_symbols)
+            prices = 100.0 + np.random.default_rng(0).random(num_symbols)
+            clock = itertools.count(0, period_ns // 100)  # 100 batches per bar
+
+            python_bars = {}
+
+            def python_loop():
+                timestamp_ns = next(clock)
+                start_ns = timestamp_ns - timestamp_ns % period_ns
+                for symbol, price in zip(symbols, prices.tolist()):
+                    bar = python_bars.get(symbol)
+                    if bar is None or bar[5] != start_ns:
+                        python_bars[symbol] = [price, price, price, price, 1, start_ns, timestamp_ns]
+                    else:
+                        bar[1] = max(bar[1], price)
+                        bar[2] = min(bar[2], price)
+                        bar[3] = price
+                        bar[4] += 1
+                        bar[6] = timestamp_ns
+
+            results[num_symbols] = {
+                'add_ticks': time_per_op(lambda: bars.add_ticks(rows, prices, next(clock)), iterations),
+                'python_loop': time_per_op(python_loop, iterations),
+                'latest': time_per_op(lambda: bars.latest(symbols[0]), iterations),
+            }
+        finally:
+            bars.close()
+            bars.unlink()
+    return results
+
+
+def scan_bandwidth(book, repeats=5):
+    """
+    How fast this process reads a book's whole price column (the best of
+    a few copies).
+
+    Returns:
+        float: Bytes of prices read per second.
+    """
+    import numpy as np
+
+    column = book.prices[:book.capacity]
+    out = np.empty(len(column), dtype=column.dtype)
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        np.copyto(out, column)
+        elapsed = time.perf_counter_ns() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return out.nbytes / max(best, 1) * 1e9
+
+
+def bench_book_layouts(sizes=(1_000, 1_000_000), iterations=20):
+    """
+    Compares the 'records' and 'compact' price book layouts for large
+    symbol universes: bytes per row, and reading every price as a dict
+    (get_all_prices), as an array copy (price_view) and as the changed
+    rows of a full poll (changes_since(0)).
+    """
+    import numpy as np
+    from shared_memory_utils import SharedPriceBook
+
+    results = {}
+    for num_symbols in sizes:
+        symbols = [f"X{i:07d}" for i in range(num_symbols)]
+        rows = np.arange(num_symbols)
+        mids = 100.0 + np.random.default_rng(0).random(num_symbols)
+        for layout in ('records', 'compact'):
+            with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                book = SharedPriceBook(name=f"bench_layout_{os.getpid()}", create=True, capacity=num_symbols,
+                                       layout=layout)
+                book.add_symbols(symbols)
+            try:
+                book.update_quotes(rows, mids - 0.01, mids + 0.01)
+                footprint = book.data_shm.size + (book.symbol_shm.size if book.symbol_shm else 0)
+                results[f"{num_symbols}_{layout}"] = {
+                    'bytes_per_row': footprint / book.capacity,
+                    'scan_mb_per_sec': scan_bandwidth(book) / 1e6,
+                    'get_all_prices': time_per_op(book.get_all_prices, max(1, iterations // 5)),
+                    'price_view_copy': time_per_op(lambda: book.price_view().copy(), iterations),
+                    'changes_since': time_per_op(lambda: book.changes_since(0), iterations),
+                    'update_quotes': time_per_op(lambda: book.update_quotes(rows, mids, mids), iterations),
+                }
+            finally:
+                with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                    book.close()
+                    book.unlink()
+    return results
+
+
+def bench_order_store(num_orders=1_000_000, num_symbols=1_000, num_strategies=8, iterations=200):
+    """
+    OrderStore at a million orders: add + fill per order (the
+    OrderManager's hot path), lookup by client order id, and the index
+    and time-range queries a risk check would run.
+    """
+    import numpy as np
+    from order_store_utils import OrderStore
+
+    store = OrderStore()
+    orders = [
+        {'symbol': f"S{i % num_symbols:04d}", 'side': 'BUY' if i % 2 else 'SELL', 'quantity': 10,
+         'price': 100.0, 'client_order_id': i + 1, 'strategy_id': i % num_strategies}
+        for i in range(num_orders)
+    ]
+    start = time.perf_counter_ns()
+    for i, order in enumerate(orders):
+        row = store.add(order, i * 1_000)
+        if i % 10:  # Every tenth order stays open
+            store.fill(row, 10, i * 1_000)
+    ingest_ns = (time.perf_counter_ns() - start) / num_orders
+
+    ids = np.random.default_rng(0).integers(1, num_orders + 1, iterations).tolist()
+    lookups = itertools.cycle(ids)
+    return {
+        'orders': num_orders,
+        'add_and_fill_ns': ingest_ns,
+        'row_of': time_per_op(lambda: store.row_of(next(lookups)), iterations),
+        'get': time_per_op(lambda: store.get(next(lookups)), iterations),
+        'by_symbol': time_per_op(lambda: store.by_symbol('S0042'), iterations),
+        'by_strategy': time_per_op(lambda: store.by_strategy(3), iterations // 10),
+        'open_orders': time_per_op(store.open_orders, iterations // 10),
+        'open_exposure': time_per_op(store.open_exposure, iterations // 10),
+        'between_1s': time_per_op(lambda: store.between(500_000_000, 501_000_000), iterations),
+        'linear_scan_by_symbol': time_per_op(
+            lambda: [i for i, order in enumerate(orders) if order['symbol'] == 'S0042'], 2),
+    }
+
+
+def bench_book_restart(num_symbols=100_000, iterations=20):
+    """
+    Restarting the OrderBook's writer on a book of num_symbols: a new
+    shared memory book warm-started from its snapshot, against resuming
+    a file-backed book in place. Also the cost of the heartbeat and of a
+    reader's writer_alive() check, and of a write to either backing.
+    """
+    import tempfile
+    import numpy as np
+    from shared_memory_utils import SharedPriceBook
+
+    symbols = [f"X{i:07d}" for i in range(num_symbols)]
+    rows = np.arange(num_symbols)
+    mids = 100.0 + np.random.default_rng(0).random(num_symbols)
+    batch = rows[:100]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir, contextlib.redirect_stdout(open(os.devnull, 'w')):
+        snapshot = os.path.join(tmp_dir, 'book.npz')
+        for backing, directory in (('shm', ''), ('file', os.path.join(tmp_dir, 'book'))):
+            name = f"bench_restart_{os.getpid()}"
+            book = SharedPriceBook(name=name, create=True, capacity=num_symbols, directory=directory)
+            book.add_symbols(symbols)
+            book.update_quotes(rows, mids - 0.01, mids + 0.01)
+            book.save_snapshot(snapshot)
+            reader = SharedPriceBook(name=name, directory=directory)
+
+            def restart():
+                if directory:
+                    writer = SharedPriceBook(name=name, create=True, directory=directory)
+                else:
+                    # What a restart without the file costs: a new book, filled from the snapshot
+                    writer = SharedPriceBook(name=f"{name}_new", create=True, capacity=num_symbols)
+                    writer.load_snapshot(snapshot)
+                    writer.unlink()
+                writer.close()
+
+            results[backing] = {
+                'restart_ms': time_per_op(restart, max(1, iterations // 10))['min_ns'] / 1e6,
+                'update_quotes_100': time_per_op(lambda: book.update_quotes(batch, mids[:100], mids[:100]),
+                                                 iterations * 100),
+                'heartbeat': time_per_op(book.heartbeat, iterations * 100),
+                'writer_alive': time_per_op(reader.writer_alive, iterations * 100),
+            }
+            book.heartbeat()
+            reader.close()
+            book.close()
+            book.unlink()
+    return results
+
+
+def run_all():
+    results = {}
+    for name, bench in [
+        ('receive_messages', bench_receive_messages),
+        ('shared_price_book', bench_shared_price_book),
+        ('generate_price_data', bench_generate_price_data),
+        ('ma_news_strategy_decision', bench_strategy_decision),
+        ('consolidation', bench_consolidation),
+        ('fanout', bench_fanout),
+        ('order_codecs', bench_order_codecs),
+        ('socket_options', bench_socket_options),
+        ('transports', bench_transports),
+        ('positions', bench_positions),
+        ('sentiment', bench_sentiment),
+        ('subscriptions', bench_subscriptions),
+        ('features', bench_features),
+        ('bars', bench_bars),
+        ('book_layouts', bench_book_layouts),
+        ('order_store', bench_order_store),
+        ('book_restart', bench_book_restart),
+    ]:
+        print(f"[Bench] Running {name}...")
+        results[name] = bench()
+        print(f"[Bench]   {results[name]}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_common_arguments(parser)
+    args = parser.parse_args()
+    return finish(BENCH_NAME, run_all(), args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""
+Full-pipeline benchmark.
+
+Launches the real Gateway, OrderBook, Strategy and OrderManager processes
+(like main.py does) on their own ports and shared memory name, drives the
+Gateway at fixed tick rates and measures, for every rate:
+- throughput (ticks sent / received per second, orders per second)
+- latency percentiles per hop (from the built-in latency traces)
+- CPU usage and peak RSS of every process (read from /proc on Linux)
+
+Usage:
+    python benchmarks/pipeline.py --rates 1,10,100 --duration 10
+    python benchmarks/pipeline.py --save-baseline
+    python benchmarks/pipeline.py --price-transport multicast
+"""
+
+import argparse
+import importlib
+import multiprocessing as mp
+import signal
+import tempfile
+import time
+
+# --- Make the "Play Button" work ---
+import sys
+import os
+current_file_path = os.path.abspath(__file__)
+benchmarks_dir = os.path.dirname(current_file_path)
+project_root = os.path.dirname(benchmarks_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, benchmarks_dir)
+# --- End of fix ---
+
+from bench_utils import add_common_arguments, finish
+
+BENCH_NAME = 'pipeline'
+
+# (name, module, entry point) in start-up order: servers first, then the
+# OrderBook that creates the shared memory, then the Strategy that needs both
+STAGES = [
+    ('ordermanager', 'order_manager', 'run_ordermanager'),
+    ('gateway', 'gateway', 'run_gateway'),
+    ('orderbook', 'orderbook', 'run_orderbook'),
+    ('newsingest', 'news_ingest', 'run_news_ingest'),
+    ('strategy', 'strategy', 'run_strategy'),
+]
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def _run_stage(module_name, function_name, log_path):
+    """
+    Child process entry point: runs one stage with its output sent to a log
+    file, so console printing does not distort the measurement.
+    """
+    log_file = open(log_path, 'w', buffering=1)
+    sys.stdout = sys.stderr = log_file
+    module = importlib.import_module(module_name)
+    getattr(module, function_name)()
+
+
+def read_proc_stats(pid):
+    """
+    Reads CPU time and RSS of a process from /proc.
+
+    Returns:
+        tuple: (cpu_seconds, rss_bytes), or None if unavailable.
+    """
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name may contain spaces, so split after its ')'
+            fields = f.read().rsplit(')', 1)[1].split()
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+        rss_bytes = 0
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    rss_bytes = int(line.split()[1]) * 1024
+                    break
+        return cpu_seconds, rss_bytes
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def wait_for_shared_memory(name, timeout):
+    """Waits until the OrderBook has created the shared memory block."""
+    path = f"/dev/shm/{name}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if not os.path.isdir('/dev/shm') or os.path.exists(path):
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def run_at_rate(rate, args, port, log_dir):
+    """
+    Runs the whole pipeline at one tick rate.
+
+    Returns:
+        dict: The measurements for this rate.
+    """
+    from latency_utils import load_trace_dir, HOPS
+    from shared_memory_utils import unlink_untracked_shared_memory
+
+    trace_dir = tempfile.mkdtemp(prefix=f"trace_{rate:g}_", dir=log_dir)
+    shm_name = f"{args.shm_name}_{rate:g}"
+
+    # Children are spawned fresh, so they import config with these settings
+    os.environ.update({
+        'TRADING_PRICE_PORT': str(port),
+        'TRADING_VENUE_PORTS': str(port),
+        'TRADING_NEWS_PORT': str(port + 1),
+        'TRADING_ORDER_PORT': str(port + 2),
+        'TRADING_SHM_NAME': shm_name,
+        'TRADING_PRICE_INTERVAL': str(1.0 / rate),
+        'TRADING_NEWS_INTERVAL': str(args.news_interval),
+        'TRADING_LATENCY_TRACE': '1',
+        'TRADING_LATENCY_DIR': trace_dir,
+        # Keep the run's book snapshot with its logs, out of snapshots/
+        'TRADING_BOOK_SNAPSHOT': os.path.join(trace_dir, 'book.npz'),
+        'TRADING_PRICE_TRANSPORT': args.price_transport,
+        'TRADING_LINK_TRANSPORT': args.link_transport,
+    })
+
+    ctx = mp.get_context('spawn')
+    processes = {}
+    launch_time = time.time()
+    print(f"[Bench] rate={rate} ticks/s ports={port}-{port + 2} shm={shm_name}")
+
+    for name, module_name, function_name in STAGES:
+        log_path = os.path.join(log_dir, f"{name}_{rate:g}.log")
+        p = ctx.Process(target=_run_stage, args=(module_name, function_name, log_path), name=name)
+        p.start()
+        processes[name] = p
+        if name == 'orderbook':
+            if not wait_for_shared_memory(shm_name, args.startup_timeout):
+                print("[Bench] OrderBook did not create shared memory in time.")
+        elif name == 'newsingest':
+            if not wait_for_shared_memory(f"{shm_name}_sentiment", args.startup_timeout):
+                print("[Bench] NewsIngest did not create shared memory in time.")
+        else:
+            time.sleep(args.startup_delay)
+
+    # Sample CPU and RSS while the pipeline runs
+    first = {name: read_proc_stats(p.pid) for name, p in processes.items()}
+    peak_rss = {name: 0 for name in processes}
+    start = time.time()
+    last = dict(first)
+    while time.time() - start < args.duration:
+        time.sleep(args.sample_interval)
+        for name, p in processes.items():
+            stats = read_proc_stats(p.pid)
+            if stats:
+                last[name] = stats
+                peak_rss[name] = max(peak_rss[name], stats[1])
+    elapsed = time.time() - start
+    # Traces cover the whole run, including start-up
+    run_elapsed = time.time() - launch_time
+
+    # Ctrl+C every process so they clean up and flush their latency traces
+    for name, _, _ in reversed(STAGES):
+        p = processes[name]
+        if p.is_alive():
+            os.kill(p.pid, signal.SIGINT)
+    for p in processes.values():
+        p.join(timeout=5)
+        if p.is_alive():
+            p.terminate()
+    # Created by whichever stage started first; no stage owns it
+    unlink_untracked_shared_memory(f"{shm_name}_metrics")
+
+    histograms = load_trace_dir(trace_dir)
+
+    def count(hop):
+        return histograms[hop].total() if hop in histograms else 0
+
+    results = {
+        'ticks_sent_per_sec': count(HOPS[0]) / run_elapsed,
+        'ticks_received_per_sec': count(HOPS[1]) / run_elapsed,
+        'orders_per_sec': count(HOPS[-1]) / run_elapsed,
+        'latency_us': {},
+        'processes': {},
+    }
+    for hop, hist in histograms.items():
+        results['latency_us'][hop] = {
+            'p50': hist.percentile(50) / 1000.0,
+            'p99': hist.percentile(99) / 1000.0,
+            'p99.9': hist.percentile(99.9) / 1000.0,
+        }
+    for name in processes:
+        if first[name] and last[name]:
+            cpu_seconds = last[name][0] - first[name][0]
+            results['processes'][name] = {
+                'cpu_percent': 100.0 * cpu_seconds / elapsed,
+                'peak_rss_mb': peak_rss[name] / (1024 * 1024),
+            }
+
+    print(
+        f"[Bench]   sent={results['ticks_sent_per_sec']:.1f}/s "
+        f"received={results['ticks_received_per_sec']:.1f}/s "
+        f"orders={results['orders_per_sec']:.2f}/s"
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rates', default='1,10,100', help='Comma-separated tick rates (ticks/sec)')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to measure at each rate')
+    parser.add_argument('--news-interval', type=float, default=0.05,
+                        help='Seconds between news ticks (drives the Strategy)')
+    parser.add_argument('--base-port', type=int, default=19000,
+                        help='First port to use; each rate uses 3 ports from here')
+    parser.add_argument('--price-transport', choices=['tcp', 'multicast'], default='tcp',
+                        help='How the Gateway distributes prices (config.PRICE_TRANSPORT)')
+    parser.add_argument('--link-transport', choices=['tcp', 'unix', 'seqpacket'], default='tcp',
+                        help='Socket type of every stream link (config.LINK_TRANSPORT)')
+    parser.add_argument('--shm-name', default='bench_trading_shm', help='Shared memory name prefix')
+    parser.add_argument('--startup-delay', type=float, default=0.3,
+                        help='Seconds to wait after starting each server process')
+    parser.add_argument('--startup-timeout', type=float, default=5.0)
+    parser.add_argument('--sample-interval', type=float, default=0.5)
+    parser.add_argument('--log-dir', default=None, help='Where to keep process logs and traces')
+    add_common_arguments(parser)
+    args = parser.parse_args()
+
+    log_dir = args.log_dir or tempfile.mkdtemp(prefix='pipeline_bench_')
+    os.makedirs(log_dir, exist_ok=True)
+    print(f"[Bench] Process logs and traces in {log_dir}")
+
+    results = {}
+    for i, rate in enumerate(float(r) for r in args.rates.split(',')):
+        results[f"rate_{rate:g}"] = run_at_rate(rate, args, args.base_port + 3 * i, log_dir)
+
+    return finish(BENCH_NAME, results, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,20 +6,63 @@ to ensure all components use the same settings.
 """
 
 import os
+import tempfile
 
 # --- Network Settings ---
 # Use '0.0.0.0' to allow connections from other machines in the network
 # Use '127.0.0.1' (localhost) to only allow connections from this machine
 HOST = '127.0.0.1'
 
+# Ports can be overridden through environment variables so several
+# pipelines (e.g. benchmark runs) can share one machine.
+
 # Port for the Gateway to broadcast price data
-PRICE_PORT = 9000
+PRICE_PORT = int(os.environ.get('TRADING_PRICE_PORT', 9000))
 
 # Port for the Gateway to broadcast news sentiment data
-NEWS_PORT = 9001
+NEWS_PORT = int(os.environ.get('TRADING_NEWS_PORT', 9001))
 
 # Port for the Strategy to send orders to the OrderManager
-ORDER_PORT = 9002
+ORDER_PORT = int(os.environ.get('TRADING_ORDER_PORT', 9002))
+
+# --- Link Transport Settings ---
+# Every stream link (price, news, orders, retransmit) is known by its port
+# number; LINK_TRANSPORT decides what socket that port stands for
+# (network_utils.link_address):
+#   'tcp':       tcp://HOST:<port>
+#   'unix':      a Unix domain stream socket, unix://<UNIX_SOCKET_DIR>/trading-<port>.sock
+#   'seqpacket': a Unix SOCK_SEQPACKET socket (same path), which keeps
+#                message boundaries: every send arrives as one record
+# Unix sockets skip the TCP/IP stack, so they only work on one host
+# (which is how main.py runs the pipeline). UNIX_SOCKET_DIR '@' uses
+# Linux's abstract namespace instead: no socket files to clean up.
+LINK_TRANSPORT = os.environ.get('TRADING_LINK_TRANSPORT', 'tcp')
+UNIX_SOCKET_DIR = os.environ.get('TRADING_UNIX_SOCKET_DIR', os.path.join(tempfile.gettempdir(), 'trading_system'))
+
+# --- Venue Settings ---
+# Every venue is one Gateway process streaming quotes on its own port.
+# The OrderBook subscribes to all of them and writes the consolidated best
+# bid / offer. The first venue is the main Gateway on PRICE_PORT, which
+# also serves the news feed. e.g. TRADING_VENUE_PORTS=9000,9010,9020
+VENUE_PORTS = [int(p) for p in os.environ.get('TRADING_VENUE_PORTS', str(PRICE_PORT)).split(',')]
+# Quotes older than this (seconds) are left out of the best bid / offer
+VENUE_STALE_AFTER = float(os.environ.get('TRADING_VENUE_STALE_AFTER', 5.0))
+
+# --- Price Transport Settings ---
+# 'tcp': the Gateway sends every tick to each price client over its own
+#     TCP connection, so the cost grows with the number of subscribers.
+# 'multicast': the Gateway sends each tick once, as a UDP datagram to
+#     MULTICAST_GROUP on the venue's price port, and every subscriber on
+#     the host joins the group. Ticks carry their tick id as sequence
+#     number; lost ones are fetched again over a TCP retransmit channel
+#     on the price port + RETRANSMIT_PORT_OFFSET.
+PRICE_TRANSPORT = os.environ.get('TRADING_PRICE_TRANSPORT', 'tcp')
+MULTICAST_GROUP = os.environ.get('TRADING_MULTICAST_GROUP', '239.255.0.1')
+# Interface to send on and join from; 127.0.0.1 keeps the feed on this host
+MULTICAST_INTERFACE = os.environ.get('TRADING_MULTICAST_INTERFACE', '127.0.0.1')
+MULTICAST_TTL = 0  # 0 = never leaves the host; raise it to cross routers
+RETRANSMIT_PORT_OFFSET = 50
+RETRANSMIT_BUFFER_TICKS = 4096  # Recent ticks the Gateway can send again
 
 # --- Message Protocol ---
 # A consistent delimiter to mark the end of one message and the start of another.
@@ -35,9 +78,285 @@ SHARED_MEMORY_NAME = os.environ.get('TRADING_SHM_NAME', 'trading_system_shm')
 # Keeping this in config makes it easy to add/remove symbols
 SYMBOLS = ['AAPL', 'MSFT', 'GOOGL', 'AMZN']
 
+# The OrderBook saves the book (symbols and prices) to this file every
+# BOOK_SNAPSHOT_INTERVAL seconds and on exit, and warm-starts a new book
+# from it, so readers never see 0.0 prices after a restart.
+# Set TRADING_BOOK_SNAPSHOT to an empty string to turn this off.
+BOOK_SNAPSHOT_PATH = os.environ.get(
+    'TRADING_BOOK_SNAPSHOT',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'snapshots', f"{SHARED_MEMORY_NAME}.npz")
+)
+BOOK_SNAPSHOT_INTERVAL = 5.0
+
+# Rows the price book starts with. The OrderBook adds symbols it has not
+# seen before at runtime; the book doubles its data block when full.
+BOOK_INITIAL_CAPACITY = 64
+
+# Row layout of a new price book (readers follow the block's):
+# 'records': one (symbol S10, price, bid, ask) float64 record per row.
+# 'compact': float32 price / bid / ask columns (struct of arrays) with the
+#     symbol names in their own block: 30 instead of 42 bytes per row,
+#     for very large symbol universes (e.g. options chains).
+BOOK_LAYOUT = os.environ.get('TRADING_BOOK_LAYOUT', 'records')
+
+# If set, the price book's blocks are memory-mapped files in this
+# directory ("<name>.book", "<name>_data<n>.book", ...; tmpfs or disk)
+# instead of POSIX shared memory. They outlive every process: a restarted
+# OrderBook validates the header and resumes the book in place.
+BOOK_DIR = os.environ.get('TRADING_BOOK_DIR', '')
+# The OrderBook stamps the book header this often (CLOCK_MONOTONIC);
+# readers treat a writer whose process is gone, or whose last stamp is
+# older than BOOK_WRITER_TIMEOUT seconds, as dead (and its prices as
+# stale). The timeout sits well above the writer's longest blocking step
+# between two stamps (a snapshot save: about 0.13 s for 1M rows here).
+BOOK_HEARTBEAT_INTERVAL = 0.25
+BOOK_WRITER_TIMEOUT = float(os.environ.get('TRADING_BOOK_WRITER_TIMEOUT', 3.0))
+
+# The news ingest stage writes the latest per-symbol sentiment into this
+# block (see sentiment_utils). The Strategy polls it instead of waiting on
+# the news socket: every SENTIMENT_POLL_INTERVAL seconds after a change,
+# backing off to SENTIMENT_POLL_MAX_INTERVAL while nothing happens.
+SENTIMENT_SHM_NAME = os.environ.get('TRADING_SENTIMENT_SHM_NAME', f"{SHARED_MEMORY_NAME}_sentiment")
+SENTIMENT_CAPACITY = 1024  # Symbol rows (fixed for the block's life)
+SENTIMENT_POLL_INTERVAL = float(os.environ.get('TRADING_SENTIMENT_POLL_INTERVAL', 0.001))
+SENTIMENT_POLL_MAX_INTERVAL = float(os.environ.get('TRADING_SENTIMENT_POLL_MAX_INTERVAL', 0.002))
+
+# --- Gateway Settings ---
+# Each venue quotes bid / ask at about this distance around its price
+QUOTE_HALF_SPREAD = 0.05
+# Seconds between price ticks / news broadcasts.
+# Lower PRICE_INTERVAL (0.1, 0.01, ...) for throughput tests.
+PRICE_INTERVAL = float(os.environ.get('TRADING_PRICE_INTERVAL', 1.0))
+NEWS_INTERVAL = float(os.environ.get('TRADING_NEWS_INTERVAL', 3.0))
+
+# Symbols the OrderBook / news ingest ask the Gateway for (comma-separated,
+# e.g. "AAPL,MSFT"); empty means every symbol. The Gateway then encodes and
+# sends only those quotes / events to that connection (TCP only: multicast
+# ticks always carry every symbol).
+PRICE_SUBSCRIPTION = [s for s in os.environ.get('TRADING_PRICE_SUBSCRIPTION', '').split(',') if s]
+NEWS_SUBSCRIPTION = [s for s in os.environ.get('TRADING_NEWS_SUBSCRIPTION', '').split(',') if s]
+
+# --- Order Settings ---
+# How orders are encoded between Strategy and OrderManager (see
+# order_codec_utils): 'binary' (fixed struct, default), 'json', or the
+# optional 'orjson' / 'msgpack' packages. Both ends must agree.
+ORDER_CODEC = os.environ.get('TRADING_ORDER_CODEC', 'binary')
+
 # --- Strategy Settings ---
+# Moving average windows, in price samples: one per write of the traded
+# symbol's mid to the price book, whether the averages come from the
+# feature block or from the Strategy's own history
 SHORT_WINDOW = 5  # Short moving average window
 LONG_WINDOW = 20  # Long moving average window
 BULLISH_THRESHOLD = 70  # Sentiment score > 70 is bullish
 BEARISH_THRESHOLD = 30  # Sentiment score < 30 is bearish
-TRADE_QUANTITY = 10  # Quantity of shares to trade
\ No newline at end of file
+TRADE_QUANTITY = 10  # Quantity of shares to trade
+
+# The OrderBook keeps a rolling SMA, EMA and volatility of every symbol's
+# mid price for each of these windows (in samples, as SHORT_WINDOW) in
+# this block (see feature_utils), so strategies read
+# their indicators instead of recomputing them. The Strategy uses the
+# SMAs of SHORT_WINDOW and LONG_WINDOW when they are in the list.
+FEATURE_SHM_NAME = os.environ.get('TRADING_FEATURE_SHM_NAME', f"{SHARED_MEMORY_NAME}_features")
+FEATURE_CAPACITY = 1024  # Symbol rows (fixed for the block's life)
+FEATURE_WINDOWS = [int(w) for w in os.environ.get(
+    'TRADING_FEATURE_WINDOWS', f"{SHORT_WINDOW},{LONG_WINDOW},100").split(',') if w]
+
+# --- Bar Settings ---
+# The bar builder (bar_builder.py) turns the price book's updates into
+# OHLCV bars per symbol for each frame: "<n>ms", "<n>s" or "<n>m" time bars,
+# or "<n>t" bars of n ticks. Volume counts the book updates it saw.
+BAR_FRAMES = [f for f in os.environ.get('TRADING_BAR_FRAMES', '1s,1m,100t').split(',') if f]
+# One block per frame, named "<BAR_SHM_NAME>_<frame>"
+BAR_SHM_NAME = os.environ.get('TRADING_BAR_SHM_NAME', f"{SHARED_MEMORY_NAME}_bars")
+BAR_CAPACITY = 1024  # Symbol rows (fixed for the block's life)
+BAR_HISTORY = 64  # Bars kept per symbol and frame, the one in progress included
+# The builder polls the price book every BAR_POLL_INTERVAL seconds after a
+# change, backing off to BAR_POLL_MAX_INTERVAL while prices stand still
+BAR_POLL_INTERVAL = float(os.environ.get('TRADING_BAR_POLL_INTERVAL', 0.001))
+BAR_POLL_MAX_INTERVAL = float(os.environ.get('TRADING_BAR_POLL_MAX_INTERVAL', 0.005))
+# If set, every frame's block is a memory-mapped file "<frame>.bars" in
+# this directory instead of shared memory, and outlives the run
+BAR_DIR = os.environ.get('TRADING_BAR_DIR', '')
+
+# --- Simulation Settings ---
+# simulation.py runs the Gateway, OrderBook, Strategy and OrderManager code
+# in one process on a virtual clock (PRICE_INTERVAL / NEWS_INTERVAL apply).
+SIM_DURATION = float(os.environ.get('TRADING_SIM_DURATION', 6.5 * 3600))  # Virtual seconds: one trading day
+SIM_SEED = int(os.environ.get('TRADING_SIM_SEED', 0))
+SIM_LINK_LATENCY = float(os.environ.get('TRADING_SIM_LINK_LATENCY', 0.0001))  # Virtual seconds per hop
+# Private blocks of a run, named "<SIM_SHM_NAME>_<pid>_prices" etc.
+SIM_SHM_NAME = os.environ.get('TRADING_SIM_SHM_NAME', f"{SHARED_MEMORY_NAME}_sim")
+
+# --- Latency Tracing Settings ---
+# Every tick carries an id and CLOCK_MONOTONIC nanosecond stamps through the
+# pipeline. Each process records its hops into histograms and dumps them
+# into LATENCY_TRACE_DIR, where latency_report.py merges them. Off by
+# default (set TRADING_LATENCY_TRACE=1): the report merges every file in
+# the directory, so clear it between runs that should not be mixed.
+LATENCY_TRACE_ENABLED = os.environ.get('TRADING_LATENCY_TRACE', '0') == '1'
+LATENCY_TRACE_DIR = os.environ.get(
+    'TRADING_LATENCY_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'latency_traces')
+)
+LATENCY_DUMP_INTERVAL = 5.0  # Seconds between histogram dumps
+
+# --- Logging Settings ---
+# Hot paths log through logging_utils.AsyncLogger. Per-tick lines are at
+# DEBUG level; at INFO you get one summary line per LOG_SUMMARY_INTERVAL.
+LOG_LEVEL = os.environ.get('TRADING_LOG_LEVEL', 'INFO')
+LOG_RING_SIZE = 65536  # Pending records per process before the oldest are dropped
+LOG_FLUSH_INTERVAL = 0.05  # Seconds between background writes
+LOG_SUMMARY_INTERVAL = 5.0  # Seconds between summary lines
+
+# --- Metrics Settings ---
+# Live counters and latency histograms of all processes live in this
+# shared memory block; metrics_viewer.py reads them.
+METRICS_SHM_NAME = os.environ.get('TRADING_METRICS_SHM_NAME', f"{SHARED_MEMORY_NAME}_metrics")
+METRICS_HTTP_PORT = 9100  # Default port for 'metrics_viewer.py --http'
+
+# --- Position Settings ---
+# The OrderManager books every order it receives as a fill and keeps
+# per-symbol positions and PnL in this shared memory block (see
+# position_utils), marked to market whenever the price book changes.
+POSITION_SHM_NAME = os.environ.get('TRADING_POSITION_SHM_NAME', f"{SHARED_MEMORY_NAME}_positions")
+POSITION_CAPACITY = 1024  # Symbol rows (fixed for the block's life)
+POSITION_MARK_INTERVAL = 0.005  # Seconds between price book version checks
+
+# --- Order Store Settings ---
+# The OrderManager keeps every order it receives in an in-memory columnar
+# store (see order_store_utils) with indexes by client order id, symbol,
+# strategy and open state. Its arrays start at ORDER_STORE_CAPACITY rows
+# and double when full.
+ORDER_STORE_CAPACITY = int(os.environ.get('TRADING_ORDER_STORE_CAPACITY', 65_536))
+# Sent with every order so the store can index it by strategy, and put in
+# the top bits of its client order ids; give each Strategy process its own
+# id when several trade at once.
+STRATEGY_ID = int(os.environ.get('TRADING_STRATEGY_ID', 0))
+
+# --- Profiling Settings ---
+# Profiling is opt-in: set TRADING_PROFILE_SECONDS=N to profile the first
+# N seconds of every process, or send SIGUSR1 to a running process to
+# profile the next PROFILE_SECONDS. Output goes to PROFILE_DIR.
+PROFILE_START_SECONDS = float(os.environ.get('TRADING_PROFILE_SECONDS', 0))
+PROFILE_SECONDS = 10.0
+PROFILE_SAMPLE_INTERVAL = 0.005  # 200 samples per second
+PROFILE_DIR = os.environ.get(
+    'TRADING_PROFILE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'profiles')
+)
+
+# --- Supervisor / Reconnect Settings ---
+# main.py starts the stages in dependency order and waits for each to
+# report ready (listening socket / shared memory created) before the next.
+STARTUP_TIMEOUT = 5.0  # Seconds to wait for a stage to become ready
+# Crashed stages are restarted after a jittered exponential backoff,
+# starting at RESTART_BASE_DELAY and capped at RESTART_MAX_DELAY.
+RESTART_BASE_DELAY = 0.05
+RESTART_MAX_DELAY = 5.0
+RESTART_STABLE_AFTER = 10.0  # Seconds of uptime before the backoff resets
+# Client sockets reconnect with the same kind of backoff
+RECONNECT_BASE_DELAY = 0.05
+RECONNECT_MAX_DELAY = 2.0
+
+# --- Heartbeat Settings ---
+# Servers send an empty message (a bare delimiter) to each client after
+# HEARTBEAT_INTERVAL seconds without data. A client that hears nothing,
+# not even a heartbeat, for HEARTBEAT_TIMEOUT seconds treats the peer as
+# dead and reconnects.
+HEARTBEAT_INTERVAL = float(os.environ.get('TRADING_HEARTBEAT_INTERVAL', 0.05))
+HEARTBEAT_TIMEOUT = float(os.environ.get('TRADING_HEARTBEAT_TIMEOUT', 0.3))
+# The OrderManager acknowledges every order. Orders without an ack after
+# ORDER_ACK_TIMEOUT seconds are sent again over a new connection; up to
+# MAX_PENDING_ORDERS wait in memory while the OrderManager is away.
+ORDER_ACK_TIMEOUT = 0.3
+MAX_PENDING_ORDERS = 10_000
+# TCP keepalive on client sockets, for peers that vanish without a FIN
+# (seconds idle before probing, seconds between probes, failed probes)
+KEEPALIVE_IDLE = 1
+KEEPALIVE_INTERVAL = 1
+KEEPALIVE_COUNT = 3
+
+# --- Socket Options Profile ---
+# Applied by network_utils.apply_socket_options() to every TCP socket the
+# pipeline opens or accepts (and the buffer sizes to multicast sockets).
+# TCP_NODELAY: send small frames (one sentiment, one order) at once
+# instead of holding them back for Nagle's algorithm.
+SOCKET_NODELAY = os.environ.get('TRADING_SOCKET_NODELAY', '1') == '1'
+# SO_SNDBUF / SO_RCVBUF in bytes (0 = OS default, which autotunes)
+SOCKET_SNDBUF = int(os.environ.get('TRADING_SOCKET_SNDBUF', 0))
+SOCKET_RCVBUF = int(os.environ.get('TRADING_SOCKET_RCVBUF', 0))
+# SO_BUSY_POLL in microseconds (Linux only, 0 = off). Spins on the NIC
+# queue on a blocking read; needs CAP_NET_ADMIN above net.core.busy_read
+# and does nothing on loopback.
+SOCKET_BUSY_POLL_US = int(os.environ.get('TRADING_SOCKET_BUSY_POLL', 0))
+# Pending-connection queue of every listening socket
+LISTEN_BACKLOG = int(os.environ.get('TRADING_LISTEN_BACKLOG', 128))
+# SO_REUSEPORT on listening sockets, so several acceptors can share a
+# port and the kernel spreads connections across them. Off by default:
+# with it, a second Gateway started by mistake on the same port would
+# silently take half the clients instead of failing to bind.
+SOCKET_REUSEPORT = os.environ.get('TRADING_SOCKET_REUSEPORT', '0') == '1'
+# Accept threads in the OrderManager, each with its own listening socket
+# (more than 1 needs SOCKET_REUSEPORT)
+ORDER_ACCEPTORS = int(os.environ.get('TRADING_ORDER_ACCEPTORS', 1))
+
+# --- Runtime Tuning Settings ---
+# Applied by tuning_utils.ProcessTuning at the start of each process.
+# Set TRADING_TUNING=0 to leave every process at the OS/CPython defaults.
+TUNING_ENABLED = os.environ.get('TRADING_TUNING', '1') == '1'
+# Per process:
+#   cpus: CPU list like "2" or "0-1,4" for os.sched_setaffinity
+#       (None = float across all cores). TRADING_CPUS_<PROCESS> overrides it.
+#   realtime_priority: SCHED_FIFO priority 1-99 (0 = normal scheduling).
+#       Needs root or CAP_SYS_NICE; TRADING_RT_PRIORITY_<PROCESS> overrides it.
+#   nice: Added to the nice value when not running SCHED_FIFO.
+#   gc: 'default' leaves the collector alone, 'freeze' moves everything
+#       allocated during warm-up out of the collector's reach, 'disable'
+#       additionally keeps the collector out of each strategy decision
+#       (only the Strategy has such a hot-loop section).
+#   gc_threshold: gc.set_threshold() values, or None to keep CPython's.
+PROCESS_TUNING = {
+    'gateway': {
+        'cpus': os.environ.get('TRADING_CPUS_GATEWAY'),
+        'realtime_priority': int(os.environ.get('TRADING_RT_PRIORITY_GATEWAY', 0)),
+        'nice': 0,
+        'gc': 'freeze',
+        'gc_threshold': None,
+    },
+    'orderbook': {
+        'cpus': os.environ.get('TRADING_CPUS_ORDERBOOK'),
+        'realtime_priority': int(os.environ.get('TRADING_RT_PRIORITY_ORDERBOOK', 0)),
+        'nice': 0,
+        'gc': 'freeze',
+        'gc_threshold': (50_000, 20, 100),
+    },
+    'strategy': {
+        'cpus': os.environ.get('TRADING_CPUS_STRATEGY'),
+        'realtime_priority': int(os.environ.get('TRADING_RT_PRIORITY_STRATEGY', 0)),
+        'nice': 0,
+        'gc': 'disable',
+        'gc_threshold': (50_000, 20, 100),
+    },
+    'newsingest': {
+        'cpus': os.environ.get('TRADING_CPUS_NEWSINGEST'),
+        'realtime_priority': int(os.environ.get('TRADING_RT_PRIORITY_NEWSINGEST', 0)),
+        'nice': 0,
+        'gc': 'freeze',
+        'gc_threshold': None,
+    },
+    'barbuilder': {
+        'cpus': os.environ.get('TRADING_CPUS_BARBUILDER'),
+        'realtime_priority': int(os.environ.get('TRADING_RT_PRIORITY_BARBUILDER', 0)),
+        'nice': 0,
+        'gc': 'freeze',
+        'gc_threshold': None,
+    },
+    'ordermanager': {
+        'cpus': os.environ.get('TRADING_CPUS_ORDERMANAGER'),
+        'realtime_priority': int(os.environ.get('TRADING_RT_PRIORITY_ORDERMANAGER', 0)),
+        'nice': 0,
+        'gc': 'freeze',
+        'gc_threshold': None,
+    },
+}
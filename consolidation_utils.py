@@ -0,0 +1,113 @@
+"""
+Consolidation of per-venue quotes into a best bid / offer.
+
+The OrderBook keeps the latest quote of every venue for every symbol in
+2-D NumPy arrays (venue x symbol). Merging a batch of symbols is one
+masked max / min down the venue axis, so its cost barely moves as
+venues are added.
+"""
+
+import numpy as np
+
+
+class ConsolidatedQuotes:
+    """
+    Latest bid / ask per (venue, symbol) and the merge into a BBO.
+
+    Rows follow the SharedPriceBook row indices; call ensure_capacity()
+    when the book grows.
+    """
+    def __init__(self, num_venues, capacity, stale_after_ns):
+        """
+        Args:
+            num_venues (int): Number of venues (rows of the arrays).
+            capacity (int): Number of symbols to start with.
+            stale_after_ns (int): Quotes older than this are ignored by best().
+        """
+        self.num_venues = num_venues
+        self.stale_after_ns = stale_after_ns
+        self.bids = np.full((num_venues, capacity), np.nan)
+        self.asks = np.full((num_venues, capacity), np.nan)
+        self.quote_ns = np.zeros((num_venues, capacity), dtype=np.int64)
+        # Tick id each quote came with, so recovered (older) ticks never
+        # overwrite newer quotes
+        self.quote_seq = np.zeros((num_venues, capacity), dtype=np.int64)
+        # When each venue last sent anything, for staleness reporting
+        self.last_update_ns = np.zeros(num_venues, dtype=np.int64)
+
+    @property
+    def capacity(self):
+        return self.bids.shape[1]
+
+    def ensure_capacity(self, capacity):
+        """Grows the arrays to at least this many symbols."""
+        if capacity <= self.capacity:
+            return
+        extra = capacity - self.capacity
+        self.bids = np.hstack([self.bids, np.full((self.num_venues, extra), np.nan)])
+        self.asks = np.hstack([self.asks, np.full((self.num_venues, extra), np.nan)])
+        self.quote_ns = np.hstack([self.quote_ns, np.zeros((self.num_venues, extra), dtype=np.int64)])
+        self.quote_seq = np.hstack([self.quote_seq, np.zeros((self.num_venues, extra), dtype=np.int64)])
+
+    def set_quotes(self, venue, indices, bids, asks, now_ns, seqs=None, recovered=False):
+        """
+        Stores a batch of quotes from one venue.
+
+        Args:
+            venue (int): Venue row.
+            indices: Int array of symbol rows.
+            bids, asks: Float arrays of the same length.
+            now_ns (int): Receive time of the batch.
+            seqs: Optional int array with the tick id of each quote.
+            recovered (bool): The quotes were fetched again after a gap;
+                only those newer than what we already hold are stored.
+
+        Returns:
+            numpy.ndarray: The symbol rows that were stored.
+        """
+        if seqs is not None:
+            seqs = np.asarray(seqs, dtype=np.int64)
+            if recovered:
+                newer = seqs > self.quote_seq[venue, indices]
+                indices, seqs = indices[newer], seqs[newer]
+                bids, asks = np.asarray(bids)[newer], np.asarray(asks)[newer]
+            self.quote_seq[venue, indices] = seqs
+        self.bids[venue, indices] = bids
+        self.asks[venue, indices] = asks
+        self.quote_ns[venue, indices] = now_ns
+        self.last_update_ns[venue] = now_ns
+        return indices
+
+    def clear_venue(self, venue):
+        """Drops all quotes of a venue (e.g. on disconnect)."""
+        self.bids[venue] = np.nan
+        self.asks[venue] = np.nan
+        self.quote_ns[venue] = 0
+        self.quote_seq[venue] = 0
+
+    def best(self, indices, now_ns):
+        """
+        Best bid / offer across the venues with a fresh quote.
+
+        Args:
+            indices: Int array of symbol rows.
+            now_ns (int): Current time, for the staleness cut-off.
+
+        Returns:
+            tuple: (best_bids, best_asks) float arrays, NaN where no
+            venue has a fresh quote.
+        """
+        fresh = (now_ns - self.quote_ns[:, indices]) <= self.stale_after_ns
+        bids = np.where(fresh, self.bids[:, indices], np.nan)
+        asks = np.where(fresh, self.asks[:, indices], np.nan)
+        # fmax / fmin skip NaNs and give NaN only if the whole column is NaN
+        return np.fmax.reduce(bids, axis=0), np.fmin.reduce(asks, axis=0)
+
+    def venue_age_ns(self, now_ns):
+        """
+        Time since each venue last sent a quote.
+
+        Returns:
+            numpy.ndarray: One int64 per venue; -1 for venues that never quoted.
+        """
+        return np.where(self.last_update_ns > 0, now_ns - self.last_update_ns, -1)
@@ -0,0 +1,411 @@
+"""
+Rolling per-symbol indicators, kept in shared memory next to the price book.
+
+The OrderBook is the only writer: after every book write it feeds the new
+mid prices into FeatureEngine.update(), which moves a simple moving
+average, an exponential moving average and a volatility per configured
+window forward by one sample in O(1) per symbol (ring buffers and running
+sums; row by row for small batches, vectorized for large ones).
+Strategies read the results instead of keeping their own price history:
+one row per symbol, as many readers as there are strategies, no
+recomputation.
+
+A sample is one write of a symbol's consolidated mid price to the price
+book; windows count samples, not seconds. Volatility is the standard deviation of the simple
+returns between samples over the window (not annualized).
+
+Layout of the block (one contiguous array per field):
+    header      int64 [8]   version, num_symbols, capacity, num_windows,
+                            depth (largest window), updates
+    windows     int64 [8]   the windows, in config order
+    symbols     S10 [capacity]         rows in price book order
+    count       int64 [capacity]       samples seen
+    updated_ns  int64 [capacity]       now_ns() of the last sample
+    values      float64 [capacity, 6 * num_windows + 1], per row:
+                    features  [3, num_windows]   sma / ema / vol
+                    sums      [3, num_windows]   prices, returns, returns^2
+                    last price
+    history     float64 [capacity, 2, depth]     ring buffers of prices, returns
+
+The sums, the last price and the history are the writer's state, kept in
+the block so a restarted OrderBook carries on where the last one stopped.
+
+'version' is a sequence lock (shared_memory_utils.SeqlockBlock): odd while the
+writer is in the middle of a batch.
+"""
+
+import math
+
+import numpy as np
+
+from config import FEATURE_SHM_NAME, FEATURE_CAPACITY, FEATURE_WINDOWS
+from shared_memory_utils import SeqlockBlock, symbols_bytes, MAX_SYMBOL_BYTES
+
+FEATURE_HEADER_BYTES = 128
+MAX_FEATURE_WINDOWS = 8
+
+# Slots of the int64 header
+VERSION, NUM_SYMBOLS, CAPACITY, NUM_WINDOWS, DEPTH, UPDATES = range(6)
+
+# Feature kinds, in the order of the features array's middle axis
+FEATURE_KINDS = ('sma', 'ema', 'vol')
+SMA, EMA, VOL = range(3)
+
+
+def _row_width(num_windows):
+    """[Internal] Floats per row of the values array."""
+    return 2 * len(FEATURE_KINDS) * num_windows + 1
+
+
+def feature_block_size(capacity, num_windows, depth):
+    """Bytes of a feature block for capacity symbols."""
+    per_row = 2 + _row_width(num_windows) + 2 * depth
+    return FEATURE_HEADER_BYTES + symbols_bytes(capacity) + 8 * per_row * capacity
+
+
+class SharedFeatureBook(SeqlockBlock):
+    """
+    SMA / EMA / volatility of every symbol for each window. Row i is the
+    symbol in row i of the price book; rows never move.
+    """
+    KIND = 'Features'
+    HEADER_BYTES = FEATURE_HEADER_BYTES
+
+    def __init__(self, name=FEATURE_SHM_NAME, create=False, capacity=FEATURE_CAPACITY, windows=FEATURE_WINDOWS):
+        """
+        Args:
+            name (str): The shared memory block name.
+            create (bool): Create the block (or attach to a leftover one)
+                as the writer; False attaches as a reader. A leftover
+                block carries on from the last sample.
+            capacity (int): Number of symbol rows (fixed for the block's life).
+            windows (list): Window lengths in samples (writer only; readers
+                take them from the block).
+
+        Raises:
+            FileNotFoundError: If a reader attaches before the block exists.
+            ValueError: For bad windows, or a block with an unexpected
+                size or other windows.
+        """
+        size = 0
+        if create:
+            windows = [int(w) for w in windows]
+            if not 0 < len(windows) <= MAX_FEATURE_WINDOWS or min(windows) < 1:
+                raise ValueError(f"Need 1-{MAX_FEATURE_WINDOWS} windows of at least 1 sample, got {windows}.")
+            size = feature_block_size(capacity, len(windows), max(windows))
+        super().__init__(name, create, size)
+
+        window_view = np.ndarray((MAX_FEATURE_WINDOWS,), dtype=np.int64, buffer=self.shm.buf, offset=64)
+        if self.created:
+            self.header[:] = (0, 0, capacity, len(windows), max(windows), 0, 0, 0)
+            window_view[:len(windows)] = windows
+        self.capacity = int(self.header[CAPACITY])
+        self.windows = tuple(int(w) for w in window_view[:int(self.header[NUM_WINDOWS])])
+        self.depth = int(self.header[DEPTH])
+        if create and list(self.windows) != windows:
+            raise ValueError(
+                f"Feature block '{name}' has windows {list(self.windows)}, expected {windows}. "
+                "Is a process from an older version still running?"
+            )
+        self.check_size(feature_block_size(self.capacity, len(self.windows), self.depth))
+
+        cap, num_windows = self.capacity, len(self.windows)
+        offset = self.map_symbols(cap)
+
+        def view(shape, dtype=np.float64):
+            nonlocal offset
+            array = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            offset += array.nbytes
+            return array
+
+        self.count = view((cap,), np.int64)
+        self.updated_ns = view((cap,), np.int64)
+        self.values = view((cap, _row_width(num_windows)))
+        self.history = view((cap, 2, self.depth))
+        # Views into values
+        num_features = len(FEATURE_KINDS) * num_windows
+        self.features = self.values[:, :num_features].reshape(cap, len(FEATURE_KINDS), num_windows)
+        self.sums = self.values[:, num_features:2 * num_features].reshape(cap, 3, num_windows)
+        self.last_price = self.values[:, -1]
+
+        self.window_index = {w: j for j, w in enumerate(self.windows)}
+        self.finish_attach()
+
+    def column(self, kind, window):
+        """
+        Returns the (kind, window) position of one feature in a row.
+
+        Raises:
+            KeyError: For an unknown kind or a window the block does not keep.
+        """
+        if kind not in FEATURE_KINDS or window not in self.window_index:
+            raise KeyError(f"No {kind!r} of window {window} in feature block '{self.name}' "
+                           f"(kinds {FEATURE_KINDS}, windows {list(self.windows)}).")
+        return FEATURE_KINDS.index(kind), self.window_index[window]
+
+    def repair(self):
+        """
+        The interrupted batch may have left rows with their running sums,
+        features and last price half moved. Rebuilds all of them from the
+        history rings and counts, i.e. from scratch as in _update_rows();
+        the EMA cannot be rebuilt from the last depth samples and is kept.
+        A sample whose ring slot was written but whose count was not is
+        dropped, except where it overwrote the oldest sample of a window
+        as long as the ring: that window is off until the slot leaves it.
+        """
+        n = self.num_symbols
+        count = self.count[:n]
+        # Sample held by each slot of a row's ring (negative: never written)
+        last = count[:, None] - 1
+        sample = last - (last - np.arange(self.depth)) % self.depth
+        prices, returns = self.history[:n, 0], self.history[:n, 1]
+        for j, w in enumerate(self.windows):
+            in_window = sample >= count[:, None] - w
+            sum_p = np.where(in_window & (sample >= 0), prices, 0.0).sum(axis=1)
+            # Return 0 does not exist: it would be the first price's
+            with_return = in_window & (sample >= 1)
+            sum_r = np.where(with_return, returns, 0.0).sum(axis=1)
+            sum_r2 = np.where(with_return, returns * returns, 0.0).sum(axis=1)
+            self.sums[:n, :, j] = np.stack([sum_p, sum_r, sum_r2], axis=1)
+
+            returns_in_window = np.minimum(count - 1, w)
+            divisor = np.maximum(returns_in_window, 1)
+            mean_return = sum_r / divisor
+            variance = np.maximum(sum_r2 / divisor - mean_return ** 2, 0.0)
+            self.features[:n, SMA, j] = np.where(count > 0, sum_p / np.maximum(np.minimum(count, w), 1), np.nan)
+            self.features[:n, VOL, j] = np.where(returns_in_window >= 2, np.sqrt(variance), np.nan)
+        self.last_price[:n] = np.where(count > 0, prices[np.arange(n), np.maximum(last[:, 0], 0) % self.depth], 0.0)
+
+    # --- Writer side ---
+
+    def add_symbol(self, symbol):
+        """
+        Appends the next row (writer only); rows must follow the price book.
+
+        Raises:
+            ValueError: For a symbol that does not fit, or a full block.
+        """
+        encoded = symbol.encode('utf-8')
+        if not encoded or len(encoded) > MAX_SYMBOL_BYTES:
+            raise ValueError(f"Symbol '{symbol}' must be 1-{MAX_SYMBOL_BYTES} bytes.")
+        idx = self.num_symbols
+        if idx >= self.capacity:
+            raise ValueError(f"Feature book is full ({self.capacity} symbols); raise FEATURE_CAPACITY.")
+        self.symbols[idx] = encoded
+        self.count[idx] = self.updated_ns[idx] = 0
+        self.values[idx] = 0.0
+        self.features[idx] = np.nan
+        # Publish the row last, so readers never see a half-written symbol
+        self.header[NUM_SYMBOLS] = idx + 1
+        self.symbol_to_index[symbol] = idx
+        return idx
+
+    def end_write(self):
+        """Publishes the batch of row updates opened by begin_write()."""
+        self.header[UPDATES] += 1
+        super().end_write()
+
+    # --- Reader side ---
+
+    def read(self, symbol, retries=1000):
+        """
+        Reads one symbol's features.
+
+        Returns:
+            tuple: (features, count) where features is a copy of the row,
+            shape (3, num_windows), indexed by SMA / EMA / VOL and the
+            position of the window in self.windows (see column()). Until
+            count reaches a window, its SMA averages the samples there are;
+            its volatility is NaN below two returns. None for an unknown
+            symbol.
+
+        Raises:
+            RuntimeError: If the writer never paused long enough to read.
+        """
+        idx = self.index_of(symbol)
+        if idx is None:
+            return None
+        features, count = self.features, self.count
+        return self.consistent_read(lambda: (features[idx].copy(), count.item(idx)), retries)
+
+    def value(self, symbol, kind, window):
+        """One feature of one symbol, e.g. value('AAPL', 'sma', 20); None for an unknown symbol."""
+        k, j = self.column(kind, window)
+        result = self.read(symbol)
+        return None if result is None else float(result[0][k, j])
+
+    def close(self):
+        self.count = self.updated_ns = self.values = self.history = None
+        self.features = self.sums = self.last_price = None
+        super().close()
+
+
+class FeatureEngine:
+    """
+    Moves the features of a SharedFeatureBook forward, one sample per
+    symbol per batch. Used by the OrderBook right after each book write.
+    """
+    # Batches up to this many rows are updated one row at a time in plain
+    # Python: below it, numpy's per-call overhead costs more than the loop
+    ROW_BY_ROW_MAX = 16
+
+    def __init__(self, features, price_book):
+        """
+        Args:
+            features (SharedFeatureBook): The block, attached as the writer.
+            price_book (SharedPriceBook): Where row names come from.
+        """
+        self.features = features
+        self.price_book = price_book
+        self.windows = np.array(features.windows, dtype=np.int64)
+        self.alphas = 2.0 / (self.windows + 1.0)
+        # Per window for the row-by-row path: the window, its EMA weight and
+        # the positions of its SMA, EMA, volatility and three sums in a values row
+        num_windows = len(features.windows)
+        self.window_params = [
+            (w, 2.0 / (w + 1.0), *(slot * num_windows + j for slot in range(6)))
+            for j, w in enumerate(features.windows)
+        ]
+        self.full_warned = False
+
+    def _sync_symbols(self, last_row):
+        """[Internal] Appends the price book's rows up to last_row; returns the rows we have."""
+        features = self.features
+        names = self.price_book.symbols
+        while features.num_symbols <= last_row:
+            if features.num_symbols >= features.capacity:
+                if not self.full_warned:
+                    print(f"[Features] Feature book is full ({features.capacity} symbols); "
+                          "later symbols get no features. Raise FEATURE_CAPACITY.")
+                    self.full_warned = True
+                break
+            features.add_symbol(names[features.num_symbols])
+        return features.num_symbols
+
+    def update(self, rows, mids, timestamp_ns=0):
+        """
+        Adds one sample per row.
+
+        Args:
+            rows: Int array of price book rows.
+            mids: Float array of their new mid prices; NaN (no quote) rows
+                are skipped, and of a row that appears more than once only
+                the last mid counts.
+            timestamp_ns (int): now_ns() of the samples.
+
+        Returns:
+            int: Number of symbols updated.
+        """
+        features = self.features
+        if len(rows) <= self.ROW_BY_ROW_MAX:
+            # Last mid of every quoted row (False for NaN too)
+            latest = {row: mid for row, mid in zip(np.asarray(rows).tolist(), np.asarray(mids).tolist()) if mid > 0}
+            if latest and max(latest) >= features.num_symbols:
+                have = self._sync_symbols(max(latest))
+                latest = {row: mid for row, mid in latest.items() if row < have}
+            if not latest:
+                return 0
+            features.begin_write()
+            for row, mid in latest.items():
+                self._update_row(row, mid, timestamp_ns)
+            features.end_write()
+            return len(latest)
+
+        rows = np.asarray(rows, dtype=np.intp)
+        mids = np.asarray(mids, dtype=np.float64)
+        quoted = mids > 0
+        if not quoted.all():
+            rows, mids = rows[quoted], mids[quoted]
+        # Last occurrence of each row: first in the reversed batch
+        unique_rows, first = np.unique(rows[::-1], return_index=True)
+        if len(unique_rows) < len(rows):
+            rows, mids = unique_rows, mids[::-1][first]
+        if len(rows) and rows.max() >= features.num_symbols:
+            keep = rows < self._sync_symbols(int(rows.max()))
+            rows, mids = rows[keep], mids[keep]
+        if not len(rows):
+            return 0
+        features.begin_write()
+        self._update_rows(rows, mids, timestamp_ns)
+        features.end_write()
+        return len(rows)
+
+    def _update_row(self, row, mid, timestamp_ns):
+        """[Internal] One sample of one row, in plain Python floats."""
+        book = self.features
+        depth = book.depth
+        history = book.history
+        n = book.count.item(row)
+        values = book.values[row].tolist()
+        ret = mid / values[-1] - 1.0 if n else 0.0
+
+        for w, alpha, i_sma, i_ema, i_vol, i_prices, i_returns, i_squares in self.window_params:
+            # The samples that leave the window: price n - w, return n - w
+            # (return 0 does not exist: it would be the first price's)
+            k = n - w
+            sum_p = values[i_prices] + mid
+            if k >= 0:
+                sum_p -= history.item(row, 0, k % depth)
+            old_r = history.item(row, 1, k % depth) if k >= 1 else 0.0
+            sum_r = values[i_returns] + ret - old_r
+            sum_r2 = values[i_squares] + ret * ret - old_r * old_r
+            values[i_prices] = sum_p
+            values[i_returns] = sum_r
+            values[i_squares] = sum_r2
+
+            values[i_sma] = sum_p / (n + 1 if n < w else w)
+            values[i_ema] = values[i_ema] + alpha * (mid - values[i_ema]) if n else mid
+            m = n if n < w else w
+            if m >= 2:
+                mean_r = sum_r / m
+                variance = sum_r2 / m - mean_r * mean_r
+                values[i_vol] = math.sqrt(variance) if variance > 0.0 else 0.0
+            else:
+                values[i_vol] = math.nan
+
+        values[-1] = mid
+        history[row, 0, n % depth] = mid
+        history[row, 1, n % depth] = ret
+        book.values[row] = values
+        book.count[row] = n + 1
+        book.updated_ns[row] = timestamp_ns
+
+    def _update_rows(self, rows, mids, timestamp_ns):
+        """[Internal] One sample of each of many (distinct) rows, vectorized."""
+        book = self.features
+        windows, depth = self.windows, book.depth
+        n = book.count[rows]
+        slot = n % depth
+        has_prev = n > 0
+        prev = book.last_price[rows]
+        returns = np.where(has_prev, mids / np.where(has_prev, prev, 1.0) - 1.0, 0.0)
+
+        # The samples that leave each window, as in _update_row()
+        leaving = (n[:, None] - windows) % depth
+        row_grid = rows[:, None]
+        old_prices = np.where(n[:, None] >= windows, book.history[row_grid, 0, leaving], 0.0)
+        old_returns = np.where(n[:, None] - windows >= 1, book.history[row_grid, 1, leaving], 0.0)
+
+        sums = book.sums[rows]
+        sums[:, 0] += mids[:, None] - old_prices
+        sums[:, 1] += returns[:, None] - old_returns
+        sums[:, 2] += returns[:, None] ** 2 - old_returns ** 2
+
+        samples = n + 1
+        returns_in_window = np.minimum(n[:, None], windows)
+        values = book.features[rows]
+        values[:, SMA] = sums[:, 0] / np.minimum(samples[:, None], windows)
+        values[:, EMA] = np.where(has_prev[:, None], values[:, EMA] + self.alphas * (mids[:, None] - values[:, EMA]),
+                                  mids[:, None])
+        divisor = np.maximum(returns_in_window, 1)
+        mean_return = sums[:, 1] / divisor
+        variance = np.maximum(sums[:, 2] / divisor - mean_return ** 2, 0.0)
+        values[:, VOL] = np.where(returns_in_window >= 2, np.sqrt(variance), np.nan)
+
+        book.history[rows, 0, slot] = mids
+        book.history[rows, 1, slot] = returns
+        book.sums[rows] = sums
+        book.features[rows] = values
+        book.last_price[rows] = mids
+        book.count[rows] = samples
+        book.updated_ns[rows] = timestamp_ns
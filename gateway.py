@@ -2,13 +2,30 @@
 Data Gateway Process
 
 Acts as a TCP server on two ports:
-- Price Port: Streams random-walk price data.
-- News Port: Streams random market sentiment data.
+- Price Port: Streams random-walk bid / ask quotes.
+- News Port: Streams random per-symbol sentiment events.
+
+A new price client first gets a snapshot of the full book (every
+symbol's latest quote), then the ticks that follow.
+
+Clients get every symbol until they send a SUB / UNSUB control message
+(see network_utils.format_subscription) on the same connection; from then
+on the Gateway sends each client only the quotes / news of its symbols.
+Every symbol's encoded quote is kept as its own fragment, so a tick is
+one join per distinct subscription, not one re-encode per client.
+
+With config.PRICE_TRANSPORT = 'multicast' each tick is additionally sent
+once as a UDP multicast datagram, and a retransmit channel on the price
+port + RETRANSMIT_PORT_OFFSET serves lost ticks and snapshots.
+
+Run one Gateway per venue (see config.VENUE_PORTS); only the main one
+serves news.
 
 Uses threading to handle multiple clients and broadcast data concurrently.
 """
 
-import socket
+import functools
+import selectors
 import threading
 import time
 import random
@@ -22,8 +39,22 @@ project_root = os.path.dirname(current_file_path)
 sys.path.insert(0, project_root)
 # --- End of fix ---
 
-from network_utils import send_message
-from config import HOST, PRICE_PORT, NEWS_PORT, SYMBOLS
+from network_utils import (
+    send_message, format_tick_header, socket_send_queue_bytes, MessageFramer,
+    create_multicast_sender, RetransmitBuffer, parse_recovery_request, HEARTBEAT,
+    create_server_socket, apply_socket_options, link_address, send_all,
+    parse_subscription, SUBSCRIBE,
+)
+from latency_utils import LatencyTracer, now_ns, hop_name, GATEWAY_GENERATE, GATEWAY_SEND
+from logging_utils import get_logger
+from metrics_utils import SharedMetrics, TICKS_SENT, CLIENT_COUNT, SEND_QUEUE_DEPTH
+from profiling_utils import install_profiler
+from tuning_utils import ProcessTuning
+from config import (
+    PRICE_PORT, NEWS_PORT, SYMBOLS, PRICE_INTERVAL, NEWS_INTERVAL, QUOTE_HALF_SPREAD,
+    MESSAGE_DELIMITER, PRICE_TRANSPORT, MULTICAST_GROUP, RETRANSMIT_PORT_OFFSET,
+    HEARTBEAT_INTERVAL,
+)
 
 # --- Global Storage for Clients ---
 # We need to store all connected clients so our broadcaster
@@ -34,76 +65,311 @@ price_clients_lock = threading.Lock()
 news_clients = []
 news_clients_lock = threading.Lock()
 
-# Store the last price to create a "random walk"
-current_prices = {symbol: random.uniform(100, 300) for symbol in SYMBOLS}
+# Store the last price to create a "random walk".
+# The walk uses a fixed seed so every venue follows the same fair price;
+# only the quoted spread around it differs per venue.
+price_walk = random.Random(0)
+current_prices = {symbol: price_walk.uniform(100, 300) for symbol in SYMBOLS}
+# Spreads and news scores have their own generators (seeded from the OS,
+# so venues differ), which seed_price_walk() can seed without touching
+# the process-wide random module
+spread_noise = random.Random()
+news_scores = random.Random()
+# The last quote sent for each symbol ("AAPL,150.18,150.28"), for snapshots
+latest_quotes = {}
+# The same quotes encoded, in SYMBOLS order: the pieces filtered ticks are joined from
+quote_fragments = [b""] * len(SYMBOLS)
 # ------------------------------------
 
+# --- Subscriptions ---
+# Each client's symbols are a bitset over SYMBOLS (bit i = SYMBOLS[i]).
+# A client without an entry gets every symbol.
+SYMBOL_BITS = {symbol: 1 << i for i, symbol in enumerate(SYMBOLS)}
+ALL_SYMBOLS = (1 << len(SYMBOLS)) - 1
+subscriptions = {}
+
+# Watches every price / news client for SUB / UNSUB messages (and hang-ups)
+control_selector = selectors.DefaultSelector()
+
 tick_counter = 0
 gateway_start_time = time.time()
 
+# Records the gateway_generate -> gateway_send hop of every tick
+tracer = LatencyTracer("gateway")
+
+# Per-tick lines go through the async logger so stdout never blocks a broadcast
+log = get_logger("Gateway")
+
+# Live counters in shared memory (created in run_gateway)
+metrics = None
+
+# Recently sent ticks, for the retransmit channel (multicast mode)
+sent_ticks = RetransmitBuffer()
+
+def update_client_count():
+    """Publishes the total number of price + news clients."""
+    if metrics:
+        metrics.set(CLIENT_COUNT, len(price_clients) + len(news_clients))
+
+def drop_client(client_socket, client_list, lock, server_name):
+    """Removes and closes a client whose connection broke."""
+    log.info("[%s] Client disconnected. Removing.", server_name)
+    with lock:
+        if client_socket in client_list:
+            client_list.remove(client_socket)
+            subscriptions.pop(client_socket, None)
+            try:
+                control_selector.unregister(client_socket)
+            except (KeyError, ValueError):
+                pass
+            client_socket.close()
+    update_client_count()
+
+@functools.lru_cache(maxsize=4096)
+def subscribed_indices(mask):
+    """The SYMBOLS indices set in a subscription bitset, in ascending order."""
+    indices = []
+    while mask:
+        low_bit = mask & -mask
+        indices.append(low_bit.bit_length() - 1)
+        mask ^= low_bit
+    return tuple(indices)
+
+def apply_subscription(client_socket, message, server_name):
+    """
+    Updates a client's bitset from one SUB / UNSUB message. Symbols the
+    Gateway does not publish are ignored.
+    """
+    try:
+        action, symbols = parse_subscription(message)
+    except (ValueError, UnicodeDecodeError) as e:
+        log.warning("[%s] Bad control message %r: %s", server_name, message, e)
+        return
+    bits = ALL_SYMBOLS
+    if symbols:
+        bits = 0
+        for symbol in symbols:
+            bits |= SYMBOL_BITS.get(symbol, 0)
+    mask = subscriptions.get(client_socket, ALL_SYMBOLS)
+    mask = mask | bits if action == SUBSCRIBE else mask & ~bits
+    subscriptions[client_socket] = mask
+    log.info("[%s] Client subscribed to %d of %d symbol(s).", server_name,
+             len(subscribed_indices(mask)), len(SYMBOLS))
+
+def filtered_payload(mask, full_payload, prefix, fragments, cache):
+    """
+    Returns what a client with the given bitset gets this tick: the full
+    payload for every symbol, else prefix plus its symbols' fragments.
+    Payloads are cached per bitset, so clients sharing one share the join.
+
+    Args:
+        prefix (bytes): The tick header, or None (news has no header).
+        fragments (list): Encoded per-symbol fragments in SYMBOLS order.
+        cache (dict): Payloads built so far this tick, by bitset.
+    """
+    if mask == ALL_SYMBOLS:
+        return full_payload
+    payload = cache.get(mask)
+    if payload is None:
+        parts = [fragments[i] for i in subscribed_indices(mask)]
+        if prefix is not None:
+            parts.insert(0, prefix)
+        payload = cache[mask] = MESSAGE_DELIMITER.join(parts)
+    return payload
+
+def control_loop():
+    """
+    A thread target function.
+    Reads the SUB / UNSUB messages clients send on the price and news
+    ports, and drops clients that hang up.
+    """
+    while True:
+        try:
+            events = control_selector.select(timeout=1.0)
+        except OSError:
+            continue  # A socket was closed under us
+        for key, _ in events:
+            client_socket = key.fileobj
+            framer, client_list, lock, server_name = key.data
+            try:
+                chunk = client_socket.recv(4096)
+            except OSError:
+                chunk = b""
+            if not chunk:
+                drop_client(client_socket, client_list, lock, server_name)
+                continue
+            for message in framer.feed(chunk):
+                if message:
+                    apply_subscription(client_socket, message, server_name)
+
+def sleep_with_heartbeats(interval, client_list, lock, server_name):
+    """
+    Sleeps for interval seconds, sending a heartbeat (a bare delimiter)
+    to every client each HEARTBEAT_INTERVAL in between, so clients can
+    tell a quiet feed from a dead one. Dead clients are dropped on the way.
+    """
+    deadline = time.monotonic() + interval
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= HEARTBEAT_INTERVAL:
+            if remaining > 0:
+                time.sleep(remaining)
+            return
+        time.sleep(HEARTBEAT_INTERVAL)
+        with lock:
+            current_clients = list(client_list)
+        for client_socket in current_clients:
+            try:
+                client_socket.sendall(HEARTBEAT)
+            except OSError:
+                drop_client(client_socket, client_list, lock, server_name)
+
+def seed_price_walk(seed=0):
+    """
+    Restarts the price walk, the spreads and the news scores from a seed,
+    so generate_price_data() / generate_news_data() repeat exactly (used
+    by the simulation).
+    """
+    price_walk.seed(seed)
+    spread_noise.seed(seed)
+    news_scores.seed(seed)
+    current_prices.update({symbol: price_walk.uniform(100, 300) for symbol in SYMBOLS})
+    latest_quotes.clear()
+
 def generate_price_data():
-    """Generates a new random-walk price for each symbol."""
+    """Generates a new random-walk price and a bid / ask quote for each symbol."""
     global current_prices
     messages = []
     for symbol in SYMBOLS:
         # Create a small random change
-        change = random.uniform(-0.5, 0.5)
+        change = price_walk.uniform(-0.5, 0.5)
         # Ensure price doesn't go negative
-        current_prices[symbol] = max(0.01, current_prices[symbol] + change)
-        # Format: "AAPL,150.23"
-        messages.append(f"{symbol},{current_prices[symbol]:.2f}")
-    
-    # Join all messages with our delimiter: "AAPL,150.23*MSFT,310.45"
+        price = current_prices[symbol] = max(0.01, current_prices[symbol] + change)
+        bid = max(0.01, price - QUOTE_HALF_SPREAD * spread_noise.uniform(0.5, 1.5))
+        ask = price + QUOTE_HALF_SPREAD * spread_noise.uniform(0.5, 1.5)
+        # Format: "AAPL,150.18,150.28"
+        message = latest_quotes[symbol] = f"{symbol},{bid:.2f},{ask:.2f}"
+        messages.append(message)
+
+    # Encoded once per symbol: full and filtered ticks are joined from these
+    quote_fragments[:] = [message.encode('utf-8') for message in messages]
+
+    # Join all messages with our delimiter: "AAPL,150.18,150.28*MSFT,310.40,310.51"
     return "*".join(messages)
 
-def broadcast_prices():
+def build_snapshot():
+    """
+    Builds a full-book snapshot: every symbol's latest quote under a
+    header flagged as snapshot and carrying the id of the last tick sent.
+
+    Returns:
+        bytes: The payload (without delimiter), or None before the first tick.
+    """
+    quotes = list(latest_quotes.values())
+    if not quotes:
+        return None
+    stamp = now_ns()
+    header = format_tick_header(tick_counter, stamp, stamp, snapshot=True)
+    return f"{header}*{'*'.join(quotes)}".encode('utf-8')
+
+def broadcast_prices(price_port=PRICE_PORT):
     """
     Periodically generates and broadcasts price data to all
     connected price clients.
+
+    In multicast mode, one datagram to the group on price_port also
+    reaches every subscriber, whether or not any TCP client is connected.
     """
     global tick_counter, gateway_start_time
 
+    multicast_sock = None
+    if PRICE_TRANSPORT == 'multicast':
+        multicast_sock = create_multicast_sender()
+        print(f"[Gateway-Price] Publishing to multicast group {MULTICAST_GROUP}:{price_port}")
+
     while True:
         try:
-            time.sleep(1)  # You will change this to 0.1, 0.01 etc for throughput tests
+            # Set TRADING_PRICE_INTERVAL to 0.1, 0.01 etc for throughput tests
+            sleep_with_heartbeats(PRICE_INTERVAL, price_clients, price_clients_lock, "Gateway-Price")
             
+            generate_ns = now_ns()
             message_data = generate_price_data()
             if not message_data:
                 continue
 
             with price_clients_lock:
                 current_clients = list(price_clients)
+                publishing = bool(current_clients) or multicast_sock is not None
+                if publishing:
+                    # Counted under the lock, so a client connecting right now
+                    # either gets this tick or a snapshot tagged with its id
+                    tick_counter += 1
 
-            if not current_clients:
-                print(f"[Gateway-Price] No price clients connected. Skipping broadcast.", end='\r')
+            if not publishing:
+                log.count("price_ticks_skipped")
                 continue
 
             # Performance: timestamp before sending (t1) and tick count
-            tick_counter += 1
             t1 = time.time()
             elapsed = t1 - gateway_start_time
             throughput = tick_counter / elapsed if elapsed > 0 else 0.0
 
-            print(
-                f"\n[Gateway-Perf] tick={tick_counter} t1={t1:.6f} "
-                f"throughput_est={throughput:.2f} ticks/sec "
-                f"msg={message_data}"
+            log.debug(
+                "[Gateway-Perf] tick=%d t1=%.6f throughput_est=%.2f ticks/sec msg=%s",
+                tick_counter, t1, throughput, message_data
             )
+            log.count("price_ticks")
+            log.gauge("throughput_est", f"{throughput:.2f}")
+
+            # Prefix the tick with its trace header so downstream stages
+            # can measure their latency back to the Gateway
+            send_ns = now_ns()
+            header = format_tick_header(tick_counter, generate_ns, send_ns)
+            # Clients with no symbols still get the header, so tick ids stay gap-free
+            header_bytes = header.encode('utf-8')
+            payload = MESSAGE_DELIMITER.join([header_bytes, *quote_fragments])
+            filtered = {}
+            tracer.record(hop_name(GATEWAY_GENERATE, GATEWAY_SEND), generate_ns, send_ns)
+
+            if multicast_sock is not None:
+                # One send serves every subscriber
+                datagram = payload + MESSAGE_DELIMITER
+                sent_ticks.append(tick_counter, datagram)
+                try:
+                    multicast_sock.sendto(datagram, (MULTICAST_GROUP, price_port))
+                except OSError as e:
+                    log.warning("[Gateway-Price] Multicast send failed: %s", e)
 
+            queued_bytes = 0
             for client_socket in current_clients:
                 try:
-                    send_message(client_socket, message_data.encode('utf-8'))
-                except (BrokenPipeError, ConnectionResetError):
-                    print(f"\n[Gateway-Price] Client disconnected. Removing.")
-                    with price_clients_lock:
-                        if client_socket in price_clients:
-                            price_clients.remove(client_socket)
-                            client_socket.close()
+                    mask = subscriptions.get(client_socket, ALL_SYMBOLS)
+                    send_message(client_socket,
+                                 filtered_payload(mask, payload, header_bytes, quote_fragments, filtered))
+                    queued_bytes += socket_send_queue_bytes(client_socket)
+                except OSError:
+                    drop_client(client_socket, price_clients, price_clients_lock, "Gateway-Price")
+
+            if metrics:
+                metrics.inc(TICKS_SENT)
+                metrics.set(SEND_QUEUE_DEPTH, queued_bytes)
+                metrics.observe(now_ns() - send_ns)
 
         except Exception as e:
-            print(f"\n[Gateway-Price] Error in broadcast: {e}")
+            log.error("[Gateway-Price] Error in broadcast: %s", e)
 
 
+def generate_news_data():
+    """
+    Generates one sentiment event per symbol.
+
+    Returns:
+        list: Encoded "AAPL,72,event_ns" events in SYMBOLS order, where
+        each score is 0-100 and event_ns is the now_ns() of the event.
+    """
+    event_ns = now_ns()
+    return [f"{symbol},{news_scores.randint(0, 100)},{event_ns}".encode('utf-8') for symbol in SYMBOLS]
+
 def broadcast_news():
     """
     A thread target function.
@@ -112,56 +378,72 @@ def broadcast_news():
     """
     while True:
         try:
-            time.sleep(3) # Broadcast news every 3 seconds
+            # Broadcast news every 3 seconds by default
+            sleep_with_heartbeats(NEWS_INTERVAL, news_clients, news_clients_lock, "Gateway-News")
             
-            # Generate a sentiment score from 0 to 100
-            sentiment = random.randint(0, 100)
-            message_data = str(sentiment)
+            events = generate_news_data()
             
             with news_clients_lock:
                 current_clients = list(news_clients)
             
             if not current_clients:
-                print(f"[Gateway-News] No news clients connected. Skipping broadcast.", end='\r')
+                log.count("news_ticks_skipped")
                 continue
                 
-            print(f"\n[Gateway-News] Broadcasting sentiment to {len(current_clients)} client(s): {message_data}")
+            message_data = MESSAGE_DELIMITER.join(events)
+            log.debug("[Gateway-News] Broadcasting sentiment to %d client(s): %s", len(current_clients), message_data)
+            log.count("news_ticks")
 
+            filtered = {}
             for client_socket in current_clients:
+                payload = filtered_payload(subscriptions.get(client_socket, ALL_SYMBOLS),
+                                           message_data, None, events, filtered)
+                if not payload:
+                    continue  # Subscribed to nothing
                 try:
-                    send_message(client_socket, message_data.encode('utf-8'))
-                except (BrokenPipeError, ConnectionResetError):
-                    print(f"\n[Gateway-News] Client disconnected. Removing.")
-                    with news_clients_lock:
-                        if client_socket in news_clients:
-                            news_clients.remove(client_socket)
-                            client_socket.close()
+                    send_message(client_socket, payload)
+                except OSError:
+                    drop_client(client_socket, news_clients, news_clients_lock, "Gateway-News")
 
         except Exception as e:
-            print(f"\n[Gateway-News] Error in broadcast: {e}")
+            log.error("[Gateway-News] Error in broadcast: %s", e)
 
-def server_loop(port, client_list, lock, server_name):
+def server_loop(port, client_list, lock, server_name, ready=None, snapshot=None):
     """
     A thread target function.
     Listens on a specific port and adds new clients to the
     appropriate list.
+
+    Sets the optional 'ready' event once the socket is listening.
+    If given, snapshot() builds the payload each new client gets first.
     """
     server_socket = None
     try:
-        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        # This allows us to re-use the address (port) immediately after stopping the program
-        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        server_socket.bind((HOST, port))
-        server_socket.listen(5)
-        print(f"[{server_name}] Server is live, listening on {HOST}:{port}...")
+        address = link_address(port)
+        server_socket = create_server_socket(address)
+        print(f"[{server_name}] Server is live, listening on {address}...")
+        if ready:
+            ready.set()
 
         while True:
             # This line "blocks" (waits) until a client connects
             client_socket, client_address = server_socket.accept()
+            apply_socket_options(client_socket)
             
             # Safely add the new client to our shared list
             with lock:
+                # Under the lock, so no tick goes out between snapshot and subscribe
+                payload = snapshot() if snapshot else None
+                if payload:
+                    try:
+                        send_message(client_socket, payload)
+                    except OSError:
+                        client_socket.close()
+                        continue
                 client_list.append(client_socket)
+                control_selector.register(client_socket, selectors.EVENT_READ,
+                                          (MessageFramer(), client_list, lock, server_name))
+            update_client_count()
             
             print(f"\n[{server_name}] Client connected from {client_address}. Total clients: {len(client_list)}")
 
@@ -171,56 +453,158 @@ def server_loop(port, client_list, lock, server_name):
         if server_socket:
             server_socket.close()
 
-def run_gateway():
+def handle_recovery_request(client_socket):
+    """
+    A thread target function.
+    Answers one request on the retransmit channel and closes the
+    connection: the requested ticks, or a full-book snapshot if they are
+    gone or none were asked for.
+    """
+    try:
+        client_socket.settimeout(1.0)
+        framer = MessageFramer()
+        messages = []
+        while not messages:
+            chunk = client_socket.recv(4096)
+            if not chunk:
+                return
+            messages = framer.feed(chunk)
+
+        wanted = parse_recovery_request(messages[0])
+        ticks = sent_ticks.get(*wanted) if wanted else None
+        if ticks is None:
+            snapshot = build_snapshot()
+            ticks = [snapshot + MESSAGE_DELIMITER] if snapshot else []
+        # The stored ticks already end with the delimiter
+        send_all(client_socket, b"".join(ticks))
+        log.count("recovery_requests")
+    except (OSError, ValueError) as e:
+        log.warning("[Gateway-Retransmit] Bad request or client error: %s", e)
+    finally:
+        client_socket.close()
+
+def retransmit_server_loop(port, ready=None):
+    """
+    A thread target function.
+    Serves the retransmit / snapshot channel, one thread per request.
+    """
+    server_socket = None
+    try:
+        address = link_address(port)
+        server_socket = create_server_socket(address)
+        print(f"[Gateway-Retransmit] Server is live, listening on {address}...")
+        if ready:
+            ready.set()
+
+        while True:
+            client_socket, _ = server_socket.accept()
+            apply_socket_options(client_socket)
+            threading.Thread(target=handle_recovery_request, args=(client_socket,), daemon=True).start()
+
+    except OSError as e:
+        print(f"[Gateway-Retransmit] Socket error: {e}")
+    finally:
+        if server_socket:
+            server_socket.close()
+
+def run_gateway(ready_event=None, price_port=PRICE_PORT, news_port=NEWS_PORT):
     """
 Setting up 'gateway.py' - This file acts as the central data broadcaster for our trading system.
+
+    Every venue is one Gateway process. The main Gateway also serves the
+    news feed and the live metrics; extra venues (news_port=None) only
+    stream quotes.
+
+    Args:
+        ready_event: Optional multiprocessing.Event, set once both the price
+            and the news ports (and in multicast mode the retransmit
+            channel) are listening (used by the main.py supervisor).
+        price_port: Port to stream quotes on.
+        news_port: Port to stream news on, or None for a quotes-only venue.
     """
-    print("[Gateway] Starting all services...")
+    global metrics
+    print(f"[Gateway] Starting all services (price port {price_port})...")
+    # Before any thread starts, so all four inherit the affinity and policy
+    tuning = ProcessTuning("gateway")
+    tuning.apply()
+    if news_port is not None:
+        # One metrics row for the gateways: the main one owns it
+        metrics = SharedMetrics("gateway")
+    install_profiler("gateway")
     
-    # --- Create our 4 threads ---
+    # --- Create our 4 threads (2 for a quotes-only venue, +1 for multicast, +1 for subscriptions) ---
+    price_ready = threading.Event()
+    news_ready = threading.Event()
     
     # 1. Price Acceptor Thread
     price_server_thread = threading.Thread(
         target=server_loop, 
-        args=(PRICE_PORT, price_clients, price_clients_lock, "Gateway-Price"),
+        args=(price_port, price_clients, price_clients_lock, "Gateway-Price", price_ready, build_snapshot),
         daemon=True # Run as background thread
     )
     
-    # 2. News Acceptor Thread
-    news_server_thread = threading.Thread(
-        target=server_loop, 
-        args=(NEWS_PORT, news_clients, news_clients_lock, "Gateway-News"),
-        daemon=True
-    )
-    
-    # 3. Price Broadcaster Thread
+    # 2. Price Broadcaster Thread
     price_broadcast_thread = threading.Thread(
         target=broadcast_prices,
+        args=(price_port,),
         daemon=True
     )
-    
-    # 4. News Broadcaster Thread
-    news_broadcast_thread = threading.Thread(
-        target=broadcast_news,
-        daemon=True
-    )
+    # Subscription reader for the clients of both ports
+    control_thread = threading.Thread(target=control_loop, daemon=True)
+    threads = [price_server_thread, price_broadcast_thread, control_thread]
+    listeners = [price_server_thread]
+
+    retransmit_ready = threading.Event()
+    if PRICE_TRANSPORT == 'multicast':
+        retransmit_thread = threading.Thread(
+            target=retransmit_server_loop,
+            args=(price_port + RETRANSMIT_PORT_OFFSET, retransmit_ready),
+            daemon=True
+        )
+        threads.append(retransmit_thread)
+        listeners.append(retransmit_thread)
+    else:
+        retransmit_ready.set()
+
+    if news_port is not None:
+        # 3. News Acceptor Thread
+        news_server_thread = threading.Thread(
+            target=server_loop, 
+            args=(news_port, news_clients, news_clients_lock, "Gateway-News", news_ready),
+            daemon=True
+        )
+        
+        # 4. News Broadcaster Thread
+        news_broadcast_thread = threading.Thread(
+            target=broadcast_news,
+            daemon=True
+        )
+        threads += [news_server_thread, news_broadcast_thread]
+        listeners.append(news_server_thread)
+    else:
+        news_ready.set()
 
     # --- Start all threads ---
-    price_server_thread.start()
-    news_server_thread.start()
-    price_broadcast_thread.start()
-    news_broadcast_thread.start()
+    for thread in threads:
+        thread.start()
     
     print("[Gateway] All services running.")
     
     # Keep the main thread alive.
     # If the main thread exits, all daemon threads stop.
     try:
-        while True:
+        if all(event.wait(timeout=5) for event in (price_ready, news_ready, retransmit_ready)):
+            tuning.finish_warmup()
+            if ready_event:
+                ready_event.set()
+
+        # Exit if a listener dies (e.g. port in use) so a supervisor can restart us
+        while all(thread.is_alive() for thread in listeners):
             time.sleep(1)
+        print("[Gateway] A server thread stopped. Exiting.")
     except KeyboardInterrupt:
         print("\n[Gateway] Shutting down...")
         # Threads are daemons, so they will exit automatically
 
 if __name__ == "__main__":
-    run_gateway()
\ No newline at end of file
+    run_gateway()
@@ -0,0 +1,83 @@
+"""
+Latency Report Tool
+
+Merges the per-process latency trace files written by LatencyTracer
+and prints p50 / p99 / p99.9 / max for every hop of the pipeline.
+
+Usage:
+    python latency_report.py [trace_dir] [--json]
+"""
+
+import json
+
+# --- Make the "Play Button" work ---
+import sys
+import os
+current_file_path = os.path.abspath(__file__)
+project_root = os.path.dirname(current_file_path)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+from latency_utils import HOPS, load_trace_dir
+from config import LATENCY_TRACE_DIR
+
+PERCENTILES = [50.0, 99.0, 99.9]
+
+
+def summarize(histograms):
+    """
+    Builds a summary row for every hop.
+
+    Args:
+        histograms (dict): hop name -> LatencyHistogram
+
+    Returns:
+        dict: hop name -> {'count', 'p50_us', 'p99_us', 'p99.9_us', 'max_us'}
+    """
+    # Known hops first in pipeline order, then anything else alphabetically
+    ordered = [hop for hop in HOPS if hop in histograms]
+    ordered += sorted(hop for hop in histograms if hop not in HOPS)
+
+    summary = {}
+    for hop in ordered:
+        hist = histograms[hop]
+        row = {'count': hist.total()}
+        for pct in PERCENTILES:
+            row[f"p{pct:g}_us"] = hist.percentile(pct) / 1000.0
+        row['max_us'] = hist.max() / 1000.0
+        summary[hop] = row
+    return summary
+
+
+def print_report(summary):
+    """Prints the summary as a fixed-width table."""
+    if not summary:
+        print("[LatencyReport] No trace data found.")
+        return
+
+    width = max(len(hop) for hop in summary)
+    header = f"{'hop':<{width}} {'count':>8} {'p50 (us)':>12} {'p99 (us)':>12} {'p99.9 (us)':>12} {'max (us)':>12}"
+    print(header)
+    print("-" * len(header))
+    for hop, row in summary.items():
+        print(
+            f"{hop:<{width}} {row['count']:>8} {row['p50_us']:>12.1f} "
+            f"{row['p99_us']:>12.1f} {row['p99.9_us']:>12.1f} {row['max_us']:>12.1f}"
+        )
+
+
+def main(argv):
+    as_json = '--json' in argv
+    args = [arg for arg in argv if arg != '--json']
+    trace_dir = args[0] if args else LATENCY_TRACE_DIR
+
+    summary = summarize(load_trace_dir(trace_dir))
+    if as_json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print(f"[LatencyReport] Trace directory: {trace_dir}")
+        print_report(summary)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
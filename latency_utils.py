@@ -0,0 +1,263 @@
+"""
+Latency tracing utilities for the trading system.
+
+Provides:
+- now_ns(): a CLOCK_MONOTONIC nanosecond clock that is comparable
+  between all processes running on the same host.
+- LatencyHistogram: an HDR-style (log-linear) histogram of nanosecond
+  latencies with a fixed number of buckets.
+- LatencyTracer: a per-process collection of histograms, one per hop,
+  that is periodically dumped to disk so latency_report.py can merge
+  the dumps from every process into p50/p99/p99.9 per hop.
+"""
+
+import atexit
+import json
+import os
+import time
+
+import numpy as np
+
+from config import LATENCY_TRACE_ENABLED, LATENCY_TRACE_DIR, LATENCY_DUMP_INTERVAL
+
+# --- Clock ---
+# CLOCK_MONOTONIC is system-wide on Linux, so a stamp taken in the Gateway
+# can be subtracted from a stamp taken in the OrderManager.
+if hasattr(time, 'clock_gettime_ns') and hasattr(time, 'CLOCK_MONOTONIC'):
+    _MONOTONIC = time.CLOCK_MONOTONIC
+
+    def now_ns():
+        """Returns the current CLOCK_MONOTONIC time in nanoseconds."""
+        return time.clock_gettime_ns(_MONOTONIC)
+else:
+    now_ns = time.perf_counter_ns
+
+# --- Pipeline stages ---
+# Every tick is stamped at each of these stages, in this order.
+GATEWAY_GENERATE = 'gateway_generate'
+GATEWAY_SEND = 'gateway_send'
+ORDERBOOK_RECEIVE = 'orderbook_receive'
+SHM_WRITE = 'shm_write'
+STRATEGY_READ = 'strategy_read'
+ORDER_SEND = 'order_send'
+ORDERMANAGER_RECEIVE = 'ordermanager_receive'
+
+STAGES = [
+    GATEWAY_GENERATE,
+    GATEWAY_SEND,
+    ORDERBOOK_RECEIVE,
+    SHM_WRITE,
+    STRATEGY_READ,
+    ORDER_SEND,
+    ORDERMANAGER_RECEIVE,
+]
+
+END_TO_END = 'end_to_end'
+
+# News events take a side path: Gateway -> news ingest -> sentiment block
+NEWS_EVENT = 'news_event'
+SENTIMENT_WRITE = 'sentiment_write'
+
+# Prices also feed the bar builder: shm_write -> bar_update
+BAR_UPDATE = 'bar_update'
+
+
+def hop_name(start_stage, end_stage):
+    """Returns the name used for the hop between two stages, e.g. 'a->b'."""
+    return f"{start_stage}->{end_stage}"
+
+
+# All hops in pipeline order (used to sort the report)
+HOPS = [hop_name(a, b) for a, b in zip(STAGES, STAGES[1:])] + [END_TO_END]
+
+# --- Histogram bucket layout ---
+# Values below SUB_BUCKET_COUNT ns get their own bucket. Above that, every
+# power of two is split into SUB_BUCKET_HALF linear buckets, which keeps
+# the relative error below 1/64 (~1.6%) across the whole range.
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+MAX_EXPONENT = 36  # Largest tracked value is ~2**43 ns (~2.4 hours)
+NUM_BUCKETS = SUB_BUCKET_COUNT + MAX_EXPONENT * SUB_BUCKET_HALF
+
+
+def bucket_index(value_ns):
+    """Maps a latency in nanoseconds to its histogram bucket index."""
+    if value_ns < SUB_BUCKET_COUNT:
+        return value_ns if value_ns > 0 else 0
+    shift = value_ns.bit_length() - SUB_BUCKET_BITS
+    if shift > MAX_EXPONENT:
+        return NUM_BUCKETS - 1
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + ((value_ns >> shift) - SUB_BUCKET_HALF)
+
+
+def bucket_upper_bound(index):
+    """Returns the highest latency (ns) that falls into a bucket."""
+    if index < SUB_BUCKET_COUNT:
+        return index
+    offset = index - SUB_BUCKET_COUNT
+    shift = offset // SUB_BUCKET_HALF + 1
+    mantissa = offset % SUB_BUCKET_HALF + SUB_BUCKET_HALF
+    return ((mantissa + 1) << shift) - 1
+
+
+_BUCKET_UPPER_BOUNDS = np.array(
+    [bucket_upper_bound(i) for i in range(NUM_BUCKETS)], dtype=np.int64
+)
+
+
+class LatencyHistogram:
+    """
+    A fixed-size, log-linear histogram of nanosecond latencies.
+
+    Recording is a single array increment, so there is no lock: each
+    process owns its histograms and only merges them at report time.
+    """
+    def __init__(self, counts=None):
+        """
+        Args:
+            counts (np.ndarray): Optional int64 array of NUM_BUCKETS counts
+                to record into (e.g. a view on shared memory). A new zeroed
+                array is allocated if omitted.
+        """
+        if counts is None:
+            counts = np.zeros(NUM_BUCKETS, dtype=np.int64)
+        self.counts = counts
+
+    def record(self, value_ns):
+        """Records one latency sample (in nanoseconds)."""
+        self.counts[bucket_index(value_ns)] += 1
+
+    def merge(self, other):
+        """Adds all samples from another histogram into this one."""
+        self.counts += other.counts
+
+    def total(self):
+        """Returns the number of recorded samples."""
+        return int(self.counts.sum())
+
+    def percentile(self, pct):
+        """
+        Returns the latency (ns) at the given percentile (0-100).
+        Like HdrHistogram, this is the upper bound of the bucket the
+        percentile falls into. Returns 0 for an empty histogram.
+        """
+        total = self.total()
+        if total == 0:
+            return 0
+        target = max(1, int(np.ceil(total * pct / 100.0)))
+        index = int(np.searchsorted(np.cumsum(self.counts), target))
+        return int(_BUCKET_UPPER_BOUNDS[index])
+
+    def max(self):
+        """Returns the upper bound of the highest non-empty bucket."""
+        nonzero = np.nonzero(self.counts)[0]
+        if len(nonzero) == 0:
+            return 0
+        return int(_BUCKET_UPPER_BOUNDS[nonzero[-1]])
+
+    def to_dict(self):
+        """Sparse, JSON-serializable form of the histogram."""
+        nonzero = np.nonzero(self.counts)[0]
+        return {
+            'indices': nonzero.tolist(),
+            'counts': self.counts[nonzero].tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuilds a histogram from to_dict() output."""
+        hist = cls()
+        hist.counts[np.asarray(data['indices'], dtype=np.int64)] = data['counts']
+        return hist
+
+
+class LatencyTracer:
+    """
+    Per-process collection of hop histograms.
+
+    Each process records the hops it can observe (e.g. the OrderBook
+    records gateway_send->orderbook_receive) and dumps them to
+    '<trace_dir>/<process_name>_<pid>.json' every dump_interval seconds
+    and on exit.
+    """
+    def __init__(self, process_name, enabled=LATENCY_TRACE_ENABLED,
+                 trace_dir=LATENCY_TRACE_DIR, dump_interval=LATENCY_DUMP_INTERVAL):
+        self.process_name = process_name
+        self.enabled = enabled
+        self.trace_dir = trace_dir
+        self.dump_interval_ns = int(dump_interval * 1e9)
+        self.histograms = {}
+        self._next_dump_ns = now_ns() + self.dump_interval_ns
+
+        if self.enabled:
+            atexit.register(self.dump)
+
+    def record(self, hop, start_ns, end_ns):
+        """Records the latency of one hop from two now_ns() stamps."""
+        if not self.enabled:
+            return
+
+        hist = self.histograms.get(hop)
+        if hist is None:
+            hist = self.histograms[hop] = LatencyHistogram()
+        hist.record(end_ns - start_ns)
+
+        if end_ns >= self._next_dump_ns:
+            self._next_dump_ns = end_ns + self.dump_interval_ns
+            self.dump()
+
+    def dump_path(self):
+        """Returns the file this process dumps its histograms to."""
+        return os.path.join(self.trace_dir, f"{self.process_name}_{os.getpid()}.json")
+
+    def dump(self):
+        """Writes all histograms to this process's trace file."""
+        if not self.enabled or not self.histograms:
+            return
+        try:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            data = {
+                'process': self.process_name,
+                'pid': os.getpid(),
+                'hops': {hop: hist.to_dict() for hop, hist in self.histograms.items()},
+            }
+            path = self.dump_path()
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            # Atomic rename so the report never sees a half-written file
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[LatencyTracer] Could not write trace file: {e}")
+
+
+def load_trace_dir(trace_dir=LATENCY_TRACE_DIR):
+    """
+    Loads and merges every trace file in a directory.
+
+    Returns:
+        dict: hop name -> merged LatencyHistogram
+    """
+    merged = {}
+    if not os.path.isdir(trace_dir):
+        return merged
+
+    for filename in sorted(os.listdir(trace_dir)):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(trace_dir, filename)) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[LatencyTracer] Skipping unreadable trace file {filename}: {e}")
+            continue
+
+        for hop, hist_data in data.get('hops', {}).items():
+            hist = LatencyHistogram.from_dict(hist_data)
+            if hop in merged:
+                merged[hop].merge(hist)
+            else:
+                merged[hop] = hist
+
+    return merged
@@ -0,0 +1,206 @@
+"""
+Low-overhead asynchronous logging for the trading system.
+
+Hot paths (one call per tick, per symbol or per order) must not block on
+stdout. An AsyncLogger only appends a small record - (level, timestamp,
+format string, args) - to a bounded per-process ring. A background thread
+formats the records and writes them out in batches.
+
+It also keeps rate-limited summaries: hot paths call count()/gauge() and
+the background thread prints one summary line per interval instead of
+one line per event.
+"""
+
+import atexit
+import collections
+import os
+import sys
+import threading
+import time
+
+from config import LOG_LEVEL, LOG_RING_SIZE, LOG_FLUSH_INTERVAL, LOG_SUMMARY_INTERVAL
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVELS = {'DEBUG': DEBUG, 'INFO': INFO, 'WARNING': WARNING, 'ERROR': ERROR}
+
+
+def _noop(*args, **kwargs):
+    """Stands in for a disabled log level: no record, no formatting."""
+
+
+class AsyncLogger:
+    """
+    A per-process logger whose hot-path methods only enqueue a record.
+
+    Messages use %-style formatting, which is deferred to the background
+    thread:
+        log.debug("[OrderBook] Updated %s -> $%.2f", symbol, price)
+    """
+    def __init__(self, name, level=LOG_LEVEL, ring_size=LOG_RING_SIZE,
+                 flush_interval=LOG_FLUSH_INTERVAL, summary_interval=LOG_SUMMARY_INTERVAL,
+                 stream=None):
+        """
+        Args:
+            name (str): Component name, used in summary lines.
+            level (int or str): Lowest level that is recorded.
+            ring_size (int): Maximum number of pending records. When the
+                ring is full the oldest records are dropped (and counted).
+            flush_interval (float): Seconds between background flushes.
+            summary_interval (float): Seconds between summary lines
+                (0 disables summaries).
+            stream: File-like object to write to (default: sys.stdout).
+        """
+        self.name = name
+        self.flush_interval = flush_interval
+        self.summary_interval = summary_interval
+        self.stream = stream
+
+        self._ring = collections.deque(maxlen=ring_size)
+        self._ring_size = ring_size
+        self.dropped = 0
+
+        # Rate-limited summaries: key -> count since last summary / last value
+        self._counters = {}
+        self._gauges = {}
+        self._last_summary = time.monotonic()
+
+        self._drain_lock = threading.Lock()
+        self._thread = None
+
+        self.set_level(level)
+        atexit.register(self.flush)
+
+    def set_level(self, level):
+        """
+        Sets the lowest recorded level. Methods for disabled levels are
+        replaced by a no-op, so disabled logging costs one empty call.
+        """
+        if isinstance(level, str):
+            level = LEVELS[level.upper()]
+        self.level = level
+        self.debug_enabled = level <= DEBUG
+
+        for method_level, method_name in ((DEBUG, 'debug'), (INFO, 'info'),
+                                          (WARNING, 'warning'), (ERROR, 'error')):
+            if method_level >= level:
+                setattr(self, method_name, self._make_emitter(method_level))
+            else:
+                setattr(self, method_name, _noop)
+
+    def _make_emitter(self, level):
+        ring = self._ring
+        ring_size = self._ring_size
+        monotonic_ns = time.monotonic_ns
+
+        def emit(fmt, *args):
+            if len(ring) == ring_size:
+                self.dropped += 1
+            ring.append((level, monotonic_ns(), fmt, args))
+            if self._thread is None:
+                self._start()
+        return emit
+
+    def count(self, key, n=1):
+        """Adds n to a summary counter (reported as total and rate)."""
+        self._counters[key] = self._counters.get(key, 0) + n
+        if self._thread is None:
+            self._start()
+
+    def gauge(self, key, value):
+        """Sets a summary value (the latest value is reported)."""
+        self._gauges[key] = value
+
+    # --- Background side ---
+
+    def _start(self):
+        """Starts the writer thread (lazily, in whichever process logs first)."""
+        with self._drain_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._run, name=f"{self.name}-logger", daemon=True
+            )
+            self._thread.start()
+
+    def _after_fork(self):
+        """
+        Threads do not survive fork(): forget the parent's writer thread
+        and its pending records, which the parent will write itself.
+        """
+        self._thread = None
+        self._drain_lock = threading.Lock()
+        self._ring.clear()
+        self._counters = {}
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def _format(self, record):
+        level, _, fmt, args = record
+        try:
+            return fmt % args if args else fmt
+        except (TypeError, ValueError) as e:
+            return f"[{self.name}] Bad log record {fmt!r} {args!r}: {e}"
+
+    def _summary_line(self, now):
+        elapsed = now - self._last_summary
+        counters, self._counters = self._counters, {}
+        self._last_summary = now
+
+        parts = [f"{key}={n} ({n / elapsed:.1f}/s)" for key, n in counters.items()]
+        parts += [f"{key}={value}" for key, value in self._gauges.items()]
+        if self.dropped:
+            parts.append(f"log_dropped={self.dropped}")
+        if not parts:
+            return None
+        return f"[{self.name}] summary over {elapsed:.1f}s: " + " ".join(parts)
+
+    def flush(self):
+        """Formats and writes every pending record (and a due summary)."""
+        with self._drain_lock:
+            lines = []
+            ring = self._ring
+            while ring:
+                lines.append(self._format(ring.popleft()))
+
+            now = time.monotonic()
+            if (self.summary_interval and self.level <= INFO
+                    and now - self._last_summary >= self.summary_interval):
+                line = self._summary_line(now)
+                if line:
+                    lines.append(line)
+
+            if lines:
+                stream = self.stream or sys.stdout
+                try:
+                    stream.write("\n".join(lines) + "\n")
+                    stream.flush()
+                except (OSError, ValueError):
+                    pass  # stdout closed during shutdown
+
+
+# One logger per component name and process
+_loggers = {}
+
+
+def get_logger(name):
+    """Returns the AsyncLogger for a component, creating it on first use."""
+    logger = _loggers.get(name)
+    if logger is None:
+        logger = _loggers[name] = AsyncLogger(name)
+    return logger
+
+
+def _reset_after_fork():
+    for logger in _loggers.values():
+        logger._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
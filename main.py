@@ -1,32 +1,217 @@
 # main.py
+"""
+Starts and supervises the trading system processes.
 
-from multiprocessing import Process
+- Stages start in dependency order: the OrderManager and Gateway servers
+  (one Gateway per venue) first, then the OrderBook (which needs the
+  Gateways) and the NewsIngest (which needs the main Gateway), then the
+  BarBuilder (which reads the OrderBook's prices) and the Strategy (which needs both shared memory blocks and the OrderManager). Each stage sets
+  a ready event (listening socket / shared memory created) and the next
+  stage only starts once it is set, so nobody has to give up or sleep.
+- A stage that exits or crashes is restarted after a jittered
+  exponential backoff.
+- The supervisor owns the SharedPriceBook, so a restarted OrderBook
+  picks up the warm book instead of starting from zeros. A new book is
+  filled from the OrderBook's last saved snapshot. With BOOK_DIR set the
+  book files even outlive the supervisor, and the next run resumes them.
+- It also owns the position, sentiment, feature and bar blocks, so a
+  restarted OrderManager keeps its positions and PnL, a restarted
+  NewsIngest the last sentiment of every symbol, a restarted OrderBook
+  carries on with the rolling indicators and a restarted BarBuilder
+  with the bars in progress.
+"""
+
+import os
+import signal
+import time
+from multiprocessing import Process, Event
+from multiprocessing.shared_memory import SharedMemory
 
 from gateway import run_gateway
-from orderbook import run_orderbook
+from orderbook import run_orderbook, warm_start
 from strategy import run_strategy
+from news_ingest import run_news_ingest
 from order_manager import run_ordermanager
+from bar_builder import run_bar_builder
+from shared_memory_utils import SharedPriceBook
+from position_utils import SharedPositionBook
+from sentiment_utils import SharedSentimentBook
+from feature_utils import SharedFeatureBook
+from bar_utils import SharedBarBook
+from network_utils import backoff_delay
+from config import (
+    PRICE_PORT,
+    VENUE_PORTS,
+    SHARED_MEMORY_NAME,
+    METRICS_SHM_NAME,
+    BAR_FRAMES,
+    STARTUP_TIMEOUT,
+    RESTART_BASE_DELAY,
+    RESTART_MAX_DELAY,
+    RESTART_STABLE_AFTER,
+)
+
+
+class Stage:
+    """One supervised process: how to start it and what it depends on."""
+    def __init__(self, name, target, depends_on=(), kwargs=None):
+        self.name = name
+        self.target = target
+        self.depends_on = list(depends_on)
+        self.kwargs = kwargs or {}
+
+        self.process = None
+        self.ready = None
+        self.started_at = 0.0
+        self.failures = 0       # Consecutive restarts, drives the backoff
+        self.restart_at = None  # When a pending restart is due
+
+
+class Supervisor:
+    """Starts stages in order and keeps them running."""
+    def __init__(self, stages):
+        self.stages = stages  # Already in dependency order
+        self.by_name = {stage.name: stage for stage in stages}
+
+    def start_stage(self, stage):
+        stage.ready = Event()
+        stage.process = Process(
+            target=stage.target,
+            kwargs=dict(stage.kwargs, ready_event=stage.ready),
+            name=stage.name,
+        )
+        stage.process.start()
+        stage.started_at = time.monotonic()
+        stage.restart_at = None
+
+    def wait_ready(self, stage, timeout=STARTUP_TIMEOUT):
+        """Waits for a stage's ready event; gives up early if it dies."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if stage.ready.wait(0.005):
+                return True
+            if not stage.process.is_alive():
+                return False
+        return False
+
+    def dependencies_ready(self, stage):
+        for name in stage.depends_on:
+            dependency = self.by_name[name]
+            if not (dependency.process.is_alive() and dependency.ready.is_set()):
+                return False
+        return True
+
+    def start_all(self):
+        start = time.perf_counter()
+        for stage in self.stages:
+            self.start_stage(stage)
+            if self.wait_ready(stage):
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                print(f"[Main] {stage.name} ready after {elapsed_ms:.1f} ms")
+            else:
+                print(f"[Main] {stage.name} not ready within {STARTUP_TIMEOUT}s; supervising anyway.")
+        print(f"[Main] All stages started in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    def check(self):
+        """Schedules restarts for dead stages and performs the due ones."""
+        now = time.monotonic()
+        for stage in self.stages:
+            if stage.process.is_alive():
+                continue
+
+            if stage.restart_at is None:
+                # A stage that ran for a while before dying starts a fresh backoff
+                if now - stage.started_at > RESTART_STABLE_AFTER:
+                    stage.failures = 0
+                delay = backoff_delay(stage.failures, RESTART_BASE_DELAY, RESTART_MAX_DELAY)
+                stage.failures += 1
+                stage.restart_at = now + delay
+                print(
+                    f"[Main] {stage.name} exited (code {stage.process.exitcode}). "
+                    f"Restarting in {delay * 1000:.0f} ms (attempt {stage.failures})."
+                )
+            elif now >= stage.restart_at and self.dependencies_ready(stage):
+                stage.process.join()
+                self.start_stage(stage)
+                print(f"[Main] {stage.name} restarted (pid {stage.process.pid}).")
+
+    def run(self, poll_interval=0.01):
+        while True:
+            self.check()
+            time.sleep(poll_interval)
+
+    def stop(self):
+        """Lets children finish their own Ctrl+C handling, then forces the rest."""
+        processes = [stage.process for stage in reversed(self.stages) if stage.process]
+        for p in processes:
+            p.join(timeout=1)
+        for p in processes:
+            if p.is_alive():
+                os.kill(p.pid, signal.SIGINT)
+        for p in processes:
+            p.join(timeout=2)
+            if p.is_alive():
+                p.terminate()
 
 
 def main():
-    processes = [
-        Process(target=run_gateway),
-        Process(target=run_orderbook),
-        Process(target=run_strategy),
-        Process(target=run_ordermanager),
+    # The supervisor owns the price book so it stays warm across OrderBook restarts
+    book = SharedPriceBook(name=SHARED_MEMORY_NAME, create=True)
+    if book.created:
+        warm_start(book)
+    positions = SharedPositionBook(create=True)
+    sentiment = SharedSentimentBook(create=True)
+    features = SharedFeatureBook(create=True)
+    bar_books = [SharedBarBook(frame, create=True) for frame in BAR_FRAMES]
+
+    # The main Gateway serves PRICE_PORT and news; every other venue
+    # is a quotes-only Gateway on its own port
+    venue_stages = [
+        Stage(f"gateway-{port}", run_gateway, kwargs={"price_port": port, "news_port": None})
+        for port in VENUE_PORTS if port != PRICE_PORT
     ]
 
-    for p in processes:
-        p.start()
+    supervisor = Supervisor([
+        Stage("ordermanager", run_ordermanager, kwargs={"owns_positions": False}),
+        Stage("gateway", run_gateway),
+        *venue_stages,
+        Stage("orderbook", run_orderbook,
+              depends_on=["gateway"] + [stage.name for stage in venue_stages],
+              kwargs={"owns_shared_memory": False}),
+        Stage("newsingest", run_news_ingest, depends_on=["gateway"],
+              kwargs={"owns_shared_memory": False}),
+        Stage("barbuilder", run_bar_builder, depends_on=["orderbook"],
+              kwargs={"owns_shared_memory": False}),
+        Stage("strategy", run_strategy, depends_on=["orderbook", "newsingest", "ordermanager"]),
+    ])
 
     try:
-        # Wait for all processes
-        for p in processes:
-            p.join()
+        supervisor.start_all()
+        supervisor.run()
     except KeyboardInterrupt:
-        print("\n[Main] Caught KeyboardInterrupt, terminating child processes...")
-        for p in processes:
-            p.terminate()
+        print("\n[Main] Caught KeyboardInterrupt, stopping child processes...")
+        supervisor.stop()
+    finally:
+        book.unlink()
+        book.close()
+        positions.unlink()
+        positions.close()
+        sentiment.unlink()
+        sentiment.close()
+        features.unlink()
+        features.close()
+        for bars in bar_books:
+            bars.unlink()
+            bars.close()
+        # The metrics block is created by whichever child starts first.
+        # Attach with plain SharedMemory: the children share our resource
+        # tracker, and unlink() must find the block registered there.
+        try:
+            metrics_shm = SharedMemory(name=METRICS_SHM_NAME)
+            metrics_shm.close()
+            metrics_shm.unlink()
+        except FileNotFoundError:
+            pass
 
 
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+"""
+Live metrics for the trading system, kept in shared memory.
+
+Every process owns one row of counters and one latency histogram in a
+shared "metrics" block. Updates are plain array writes with no lock:
+each counter has a single writer (its own process), and readers such as
+metrics_viewer.py only ever read.
+
+Layout of the block (all int64):
+    info       [process, (pid, last_update_ns)]
+    counters   [process, counter]
+    histograms [process, bucket]   (LatencyHistogram buckets, ns)
+"""
+
+import os
+
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+
+from config import METRICS_SHM_NAME
+from latency_utils import LatencyHistogram, NUM_BUCKETS, now_ns
+from shared_memory_utils import untrack_shared_memory
+
+# --- Processes (one row each) ---
+# New processes go at the end, so the rows of the others do not move
+PROCESSES = ['gateway', 'orderbook', 'strategy', 'ordermanager', 'newsingest', 'barbuilder']
+
+# --- Counters (one column each) ---
+TICKS_SENT = 0
+TICKS_RECEIVED = 1
+PARSE_ERRORS = 2
+ORDERS_SENT = 3
+ORDERS_RECEIVED = 4
+RECONNECTS = 5
+CLIENT_COUNT = 6
+SEND_QUEUE_DEPTH = 7
+SEQUENCE_GAPS = 8
+ORDERS_REJECTED = 9
+ORDER_CONFLICTS = 10
+
+COUNTERS = [
+    'ticks_sent',
+    'ticks_received',
+    'parse_errors',
+    'orders_sent',
+    'orders_received',
+    'reconnects',
+    'client_count',
+    'send_queue_depth',
+    'sequence_gaps',
+    'orders_rejected',
+    'order_conflicts',
+]
+
+# These are current values (set), the others only ever go up (inc)
+GAUGES = {'client_count', 'send_queue_depth'}
+
+# What each process records into its latency histogram
+HISTOGRAM_DESCRIPTIONS = {
+    'gateway': 'fan-out of one tick to all price clients',
+    'orderbook': 'gateway_send -> orderbook_receive',
+    'newsingest': 'news_event -> sentiment_write',
+    'barbuilder': 'shm_write -> bar_update',
+    'strategy': 'strategy_read -> order_send',
+    'ordermanager': 'order_send -> ordermanager_receive',
+}
+
+_INFO_FIELDS = 2  # pid, last_update_ns
+
+
+def _block_size():
+    rows = len(PROCESSES)
+    return 8 * rows * (_INFO_FIELDS + len(COUNTERS) + NUM_BUCKETS)
+
+
+class SharedMetrics:
+    """
+    A view on the shared metrics block.
+
+    Writers pass their process name and get cheap inc()/set()/observe()
+    methods that touch only their own row. Readers (process_name=None)
+    can read every row through snapshot().
+    """
+    def __init__(self, process_name=None, name=METRICS_SHM_NAME):
+        """
+        Args:
+            process_name (str): One of PROCESSES for a writer, or None
+                for a read-only viewer.
+            name (str): The shared memory block name.
+
+        Raises:
+            FileNotFoundError: If a viewer attaches before any process
+                has created the block.
+        """
+        self.name = name
+        self.process_name = process_name
+        size = _block_size()
+
+        if process_name is not None:
+            # Whichever process starts first creates the block; the rest attach
+            try:
+                self.shm = SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                self.shm = SharedMemory(name=name, create=False)
+                untrack_shared_memory(self.shm)
+        else:
+            self.shm = SharedMemory(name=name, create=False)
+            untrack_shared_memory(self.shm)
+
+        if self.shm.size < size:
+            raise ValueError(
+                f"Metrics block '{name}' is {self.shm.size} bytes, expected {size}. "
+                "Is a process from an older version still running?"
+            )
+
+        rows = len(PROCESSES)
+        buf = self.shm.buf
+        offset = 0
+        self.info = np.ndarray((rows, _INFO_FIELDS), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self.info.nbytes
+        self.counters = np.ndarray((rows, len(COUNTERS)), dtype=np.int64, buffer=buf, offset=offset)
+        offset += self.counters.nbytes
+        self.histograms = np.ndarray((rows, NUM_BUCKETS), dtype=np.int64, buffer=buf, offset=offset)
+
+        if process_name is not None:
+            row = PROCESSES.index(process_name)
+            # A restarted process starts its row from zero
+            self.counters[row] = 0
+            self.histograms[row] = 0
+            self.info[row] = (os.getpid(), now_ns())
+            self._row = self.counters[row]
+            self._info = self.info[row]
+            self.histogram = LatencyHistogram(self.histograms[row])
+
+    # --- Writer side (hot path) ---
+
+    def inc(self, counter, n=1):
+        """Adds n to one of this process's counters."""
+        self._row[counter] += n
+
+    def set(self, counter, value):
+        """Sets one of this process's gauges."""
+        self._row[counter] = value
+
+    def observe(self, value_ns):
+        """Records one latency sample into this process's histogram."""
+        self.histogram.record(value_ns)
+        self._info[1] = now_ns()
+
+    # --- Reader side ---
+
+    def snapshot(self):
+        """
+        Copies the current values of every process.
+
+        Returns:
+            dict: process -> {'pid', 'last_update_ns', 'counters': {name: value},
+            'histogram': LatencyHistogram}
+        """
+        info = self.info.copy()
+        counters = self.counters.copy()
+        histograms = self.histograms.copy()
+
+        result = {}
+        for row, process in enumerate(PROCESSES):
+            result[process] = {
+                'pid': int(info[row, 0]),
+                'last_update_ns': int(info[row, 1]),
+                'counters': dict(zip(COUNTERS, counters[row].tolist())),
+                'histogram': LatencyHistogram(histograms[row]),
+            }
+        return result
+
+    def close(self):
+        """Detach from the metrics block."""
+        # Drop the numpy views first so the buffer can be released
+        self.info = self.counters = self.histograms = None
+        self._row = self._info = self.histogram = None
+        self.shm.close()
+
+    def unlink(self):
+        """Destroy the metrics block (e.g. to reset all counters)."""
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def format_prometheus(snapshot):
+    """
+    Renders a snapshot in the Prometheus text exposition format.
+
+    Counters become trading_<name>_total, gauges trading_<name>, and each
+    latency histogram a summary with p50 / p99 / p99.9 quantiles in seconds.
+    """
+    lines = []
+    for counter in COUNTERS:
+        if counter in GAUGES:
+            metric, kind = f"trading_{counter}", 'gauge'
+        else:
+            metric, kind = f"trading_{counter}_total", 'counter'
+        lines.append(f"# TYPE {metric} {kind}")
+        for process, data in snapshot.items():
+            if data['pid']:
+                lines.append(f'{metric}{{process="{process}"}} {data["counters"][counter]}')
+
+    lines.append("# TYPE trading_latency_seconds summary")
+    for process, data in snapshot.items():
+        if not data['pid']:
+            continue
+        hist = data['histogram']
+        for quantile in (0.5, 0.99, 0.999):
+            value = hist.percentile(quantile * 100) / 1e9
+            lines.append(f'trading_latency_seconds{{process="{process}",quantile="{quantile}"}} {value:.9f}')
+        lines.append(f'trading_latency_seconds_count{{process="{process}"}} {hist.total()}')
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,162 @@
+"""
+Metrics Viewer
+
+Reads the shared metrics block written by all four processes, and the
+OrderManager's positions and PnL when that block exists.
+
+Usage:
+    python metrics_viewer.py              # top-style view, refreshed every second
+    python metrics_viewer.py --once       # print one snapshot and exit
+    python metrics_viewer.py --http 9100  # serve Prometheus text on http://HOST:9100/metrics
+"""
+
+import argparse
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Make the "Play Button" work ---
+import sys
+import os
+current_file_path = os.path.abspath(__file__)
+project_root = os.path.dirname(current_file_path)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+from metrics_utils import SharedMetrics, COUNTERS, GAUGES, HISTOGRAM_DESCRIPTIONS, format_prometheus
+from position_utils import SharedPositionBook
+from latency_utils import now_ns
+from config import HOST, METRICS_SHM_NAME, METRICS_HTTP_PORT
+
+
+def render_table(snapshot, previous=None, interval=None):
+    """
+    Renders a snapshot as a table, one row per process.
+    Counters show their rate since the previous snapshot when given.
+    """
+    lines = []
+    header = f"{'process':<13} {'pid':>7} " + " ".join(f"{c:>16}" for c in COUNTERS)
+    lines.append(header)
+    lines.append("-" * len(header))
+
+    for process, data in snapshot.items():
+        if not data['pid']:
+            lines.append(f"{process:<13} {'-':>7}  (not running)")
+            continue
+        cells = []
+        for counter in COUNTERS:
+            value = data['counters'][counter]
+            if previous and interval and counter not in GAUGES:
+                rate = (value - previous[process]['counters'][counter]) / interval
+                cells.append(f"{value:>8}{rate:>7.0f}/s")
+            else:
+                cells.append(f"{value:>16}")
+        lines.append(f"{process:<13} {data['pid']:>7} " + " ".join(cells))
+
+    lines.append("")
+    lines.append(f"{'latency':<13} {'count':>8} {'p50 (us)':>10} {'p99 (us)':>10} {'p99.9 (us)':>11}  stage")
+    current_ns = now_ns()
+    for process, data in snapshot.items():
+        hist = data['histogram']
+        if not data['pid'] or hist.total() == 0:
+            continue
+        age_s = (current_ns - data['last_update_ns']) / 1e9
+        lines.append(
+            f"{process:<13} {hist.total():>8} {hist.percentile(50) / 1000:>10.1f} "
+            f"{hist.percentile(99) / 1000:>10.1f} {hist.percentile(99.9) / 1000:>11.1f}  "
+            f"{HISTOGRAM_DESCRIPTIONS[process]} (last sample {age_s:.1f}s ago)"
+        )
+    return "\n".join(lines)
+
+
+def render_positions(snapshot):
+    """Renders a SharedPositionBook snapshot, one row per traded symbol."""
+    lines = [
+        f"{'position':<13} {'qty':>8} {'avg':>10} {'mark':>10} {'unrealized':>12} {'realized':>12}",
+    ]
+    for row, symbol in enumerate(snapshot['symbols']):
+        lines.append(
+            f"{symbol:<13} {snapshot['quantity'][row]:>8} {snapshot['avg_price'][row]:>10.2f} "
+            f"{snapshot['mark'][row]:>10.2f} {snapshot['unrealized_pnl'][row]:>12.2f} "
+            f"{snapshot['realized_pnl'][row]:>12.2f}"
+        )
+    totals = snapshot['totals']
+    lines.append(
+        f"{'total':<13} {snapshot['fills']:>8} fills  gross {totals['gross_exposure']:.2f}  "
+        f"net {totals['net_exposure']:.2f}  {totals['unrealized_pnl']:>12.2f} {totals['realized_pnl']:>12.2f}"
+    )
+    return "\n".join(lines)
+
+
+def run_top(metrics, interval, once):
+    """Prints the table, refreshing it in place like 'top'."""
+    previous = None
+    positions = None
+    while True:
+        snapshot = metrics.snapshot()
+        table = render_table(snapshot, previous, interval)
+        if positions is None:
+            try:
+                positions = SharedPositionBook()
+            except FileNotFoundError:
+                pass  # No OrderManager yet
+        if positions is not None:
+            table += "\n\n" + render_positions(positions.snapshot())
+        if once:
+            print(table)
+            return
+        # Clear the screen and move the cursor home
+        print("\033[2J\033[H" + f"[Metrics] {METRICS_SHM_NAME}  (Ctrl+C to exit)\n" + table, flush=True)
+        previous = snapshot
+        time.sleep(interval)
+
+
+def run_http(metrics, port):
+    """Serves the Prometheus text format on /metrics."""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = format_prometheus(metrics.snapshot()).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # Keep the console quiet on every scrape
+
+    server = ThreadingHTTPServer((HOST, port), MetricsHandler)
+    print(f"[Metrics] Serving http://{HOST}:{port}/metrics")
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--http', type=int, nargs='?', const=METRICS_HTTP_PORT, default=None,
+                        help='Serve Prometheus metrics on this port instead of the top view')
+    parser.add_argument('--interval', type=float, default=1.0, help='Refresh interval in seconds')
+    parser.add_argument('--once', action='store_true', help='Print one snapshot and exit')
+    args = parser.parse_args()
+
+    try:
+        metrics = SharedMetrics()
+    except FileNotFoundError:
+        print(f"[Metrics] Metrics block '{METRICS_SHM_NAME}' not found. Is the system running?")
+        return 1
+
+    try:
+        if args.http is not None:
+            run_http(metrics, args.http)
+        else:
+            run_top(metrics, args.interval, args.once)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        metrics.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,10 +3,126 @@ Network utility functions for the trading system.
 
 Provides robust methods for sending and receiving messages over TCP sockets,
 handling message framing with a custom delimiter.
+
+Links are addressed by transport URIs (see parse_address), so the same
+code runs over TCP or Unix domain sockets.
 """
 
+import errno
+import os
+import random
 import socket
-from config import MESSAGE_DELIMITER, HOST, PRICE_PORT, NEWS_PORT, ORDER_PORT
+import sys
+import struct
+import threading
+import time
+from collections import deque, namedtuple
+from itertools import islice
+from config import (
+    MESSAGE_DELIMITER, HOST, PRICE_PORT, NEWS_PORT, ORDER_PORT,
+    RECONNECT_BASE_DELAY, RECONNECT_MAX_DELAY,
+    MULTICAST_INTERFACE, MULTICAST_TTL, RETRANSMIT_BUFFER_TICKS,
+    HEARTBEAT_TIMEOUT, ORDER_ACK_TIMEOUT, MAX_PENDING_ORDERS,
+    KEEPALIVE_IDLE, KEEPALIVE_INTERVAL, KEEPALIVE_COUNT,
+    SOCKET_NODELAY, SOCKET_SNDBUF, SOCKET_RCVBUF, SOCKET_BUSY_POLL_US,
+    LISTEN_BACKLOG, SOCKET_REUSEPORT, LINK_TRANSPORT, UNIX_SOCKET_DIR,
+)
+
+try:
+    # On Linux, TIOCOUTQ is the same request as SIOCOUTQ for sockets
+    import fcntl
+    import termios
+    _SIOCOUTQ = termios.TIOCOUTQ
+except (ImportError, AttributeError):
+    _SIOCOUTQ = None
+
+# --- Transport Addresses ---
+# A link is addressed by a URI:
+#   tcp://host:port
+#   unix:///path/to.sock          Unix domain stream socket
+#   unix://@name                  the same in Linux's abstract namespace
+#   unix+seqpacket:///path or unix+seqpacket://@name
+#                                 SOCK_SEQPACKET: every send is one record
+Endpoint = namedtuple('Endpoint', ['family', 'type', 'address'])
+
+# Records on a SOCK_SEQPACKET link are at most this big; larger payloads
+# are split (the framing reassembles them) and every reader receives
+# with at least this buffer, so no record is ever truncated.
+SEQPACKET_RECORD_SIZE = 65536
+
+def parse_address(uri: str) -> Endpoint:
+    """
+    Parses a transport URI.
+
+    Returns:
+        Endpoint: (family, type, address) ready for socket() and
+        bind() / connect().
+
+    Raises:
+        ValueError: For an unknown scheme or a malformed address.
+    """
+    scheme, sep, rest = uri.partition('://')
+    if not sep or not rest:
+        raise ValueError(f"Bad transport address '{uri}' (expected scheme://...)")
+    if scheme == 'tcp':
+        host, _, port = rest.rpartition(':')
+        if not host or not port.isdigit():
+            raise ValueError(f"Bad TCP address '{uri}' (expected tcp://host:port)")
+        return Endpoint(socket.AF_INET, socket.SOCK_STREAM, (host, int(port)))
+    if scheme in ('unix', 'unix+seqpacket'):
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError("Unix domain sockets are not supported on this platform")
+        sock_type = socket.SOCK_SEQPACKET if scheme == 'unix+seqpacket' else socket.SOCK_STREAM
+        # '@name' is an abstract socket: a leading NUL byte, no file
+        address = '\0' + rest[1:] if rest.startswith('@') else rest
+        return Endpoint(socket.AF_UNIX, sock_type, address)
+    raise ValueError(f"Unknown transport '{scheme}' in '{uri}' (expected tcp, unix or unix+seqpacket)")
+
+def link_address(port: int, transport: str = LINK_TRANSPORT, host: str = HOST,
+                 socket_dir: str = UNIX_SOCKET_DIR) -> str:
+    """
+    The URI of the link known by a port number under config.LINK_TRANSPORT.
+
+    Args:
+        port: The link's port (e.g. PRICE_PORT).
+        transport: 'tcp', 'unix' or 'seqpacket'.
+
+    Returns:
+        str: e.g. "tcp://127.0.0.1:9000" or "unix:///tmp/trading_system/trading-9000.sock".
+
+    Raises:
+        ValueError: For an unknown transport.
+    """
+    if transport == 'tcp':
+        return f"tcp://{host}:{port}"
+    schemes = {'unix': 'unix', 'seqpacket': 'unix+seqpacket'}
+    if transport not in schemes:
+        raise ValueError(f"Unknown LINK_TRANSPORT '{transport}' (expected tcp, unix or seqpacket)")
+    if socket_dir == '@':
+        return f"{schemes[transport]}://@trading-{port}"
+    return f"{schemes[transport]}://{os.path.join(socket_dir, f'trading-{port}.sock')}"
+
+def is_seqpacket(sock: socket.socket) -> bool:
+    return sock.type == socket.SOCK_SEQPACKET
+
+def recv_size(sock: socket.socket, buffer_size: int) -> int:
+    """The recv() size to use on sock: never below a whole record on seqpacket links."""
+    return max(buffer_size, SEQPACKET_RECORD_SIZE) if is_seqpacket(sock) else buffer_size
+
+def send_all(sock: socket.socket, data: bytes):
+    """
+    sendall() that keeps every SOCK_SEQPACKET record within
+    SEQPACKET_RECORD_SIZE. On stream sockets it is plain sendall().
+
+    Raises:
+        OSError: If the socket connection is broken or closed.
+    """
+    if len(data) <= SEQPACKET_RECORD_SIZE or not is_seqpacket(sock):
+        sock.sendall(data)
+        return
+    view = memoryview(data)
+    for start in range(0, len(view), SEQPACKET_RECORD_SIZE):
+        sock.sendall(view[start:start + SEQPACKET_RECORD_SIZE])
 
 def send_message(sock: socket.socket, message: bytes):
     """
@@ -24,7 +140,7 @@ def send_message(sock: socket.socket, message: bytes):
         
     try:
         # Append the delimiter to frame the message
-        sock.sendall(message + MESSAGE_DELIMITER)
+        send_all(sock, message + MESSAGE_DELIMITER)
     except OSError as e:
         print(f"Error sending message: {e}")
         # Re-raise the exception so the caller can handle it (e.g., disconnect client)
@@ -50,7 +166,7 @@ def receive_messages(sock: socket.socket, buffer_size: int = 4096):
     try:
         while True:
             # Read a chunk of data from the socket
-            chunk = sock.recv(buffer_size)
+            chunk = sock.recv(recv_size(sock, buffer_size))
             
             if not chunk:
                 # Socket was closed cleanly by the other side
@@ -81,4 +197,852 @@ def receive_messages(sock: socket.socket, buffer_size: int = 4096):
     finally:
         # This generator is done
         print("Socket closed or error. Exiting receive_messages.")
-        sock.close()
\ No newline at end of file
+        sock.close()
+
+class MessageFramer:
+    """
+    Incremental version of receive_messages() for non-blocking sockets
+    served from one event loop: feed it whatever recv() returned and get
+    back the complete messages, keeping any partial one for the next call.
+    """
+    def __init__(self):
+        self.buffer = b""
+
+    def feed(self, chunk: bytes):
+        """
+        Args:
+            chunk: Bytes just read from the socket.
+
+        Returns:
+            list: Complete messages (bytes, without the delimiter).
+        """
+        buffer = self.buffer + chunk
+        if MESSAGE_DELIMITER not in buffer:
+            self.buffer = buffer
+            return []
+        # One split for the whole chunk; the last piece is the partial message
+        *messages, self.buffer = buffer.split(MESSAGE_DELIMITER)
+        return messages
+
+# --- Length-Prefixed Frames ---
+# Binary payloads (e.g. encoded orders) may contain the delimiter byte, so
+# links that carry them prefix every message with its length instead.
+FRAME_HEADER = struct.Struct('<I')
+
+def send_frame(sock: socket.socket, payload: bytes):
+    """
+    Sends one length-prefixed frame.
+
+    Args:
+        sock: The socket.socket object to send data through.
+        payload: The message bytes (without the length prefix).
+
+    Raises:
+        OSError: If the socket connection is broken or closed.
+    """
+    send_all(sock, FRAME_HEADER.pack(len(payload)) + payload)
+
+def receive_frames(sock: socket.socket, buffer_size: int = 65536):
+    """
+    A generator that yields the payloads of length-prefixed frames
+    (see send_frame) until the socket is closed.
+
+    Args:
+        sock: The socket.socket object to read data from.
+        buffer_size: The number of bytes to read at a time.
+
+    Yields:
+        bytes: A single, complete payload (without the length prefix).
+    """
+    buffer = bytearray()
+    header_size = FRAME_HEADER.size
+    try:
+        while True:
+            chunk = sock.recv(recv_size(sock, buffer_size))
+            if not chunk:
+                if buffer:
+                    print(f"Incomplete frame in buffer (socket closed): {len(buffer)} bytes")
+                break
+            buffer += chunk
+
+            # Walk the complete frames, then drop them from the buffer once
+            pos = 0
+            while len(buffer) - pos >= header_size:
+                (length,) = FRAME_HEADER.unpack_from(buffer, pos)
+                end = pos + header_size + length
+                if end > len(buffer):
+                    break
+                yield bytes(buffer[pos + header_size:end])
+                pos = end
+            del buffer[:pos]
+
+    except ConnectionResetError:
+        print("Socket connection reset by peer.")
+    except OSError as e:
+        print(f"Error receiving data: {e}")
+    finally:
+        print("Socket closed or error. Exiting receive_frames.")
+        sock.close()
+
+def backoff_delay(attempt: int, base: float = RECONNECT_BASE_DELAY, cap: float = RECONNECT_MAX_DELAY) -> float:
+    """
+    Jittered exponential backoff.
+
+    Args:
+        attempt: How many times in a row we have already failed (0 = first retry).
+        base: Delay for the first retry, in seconds.
+        cap: Largest delay, in seconds.
+
+    Returns:
+        float: Seconds to wait, between 50% and 100% of min(cap, base * 2**attempt),
+        so that many clients retrying at once do not stay in lock-step.
+    """
+    delay = min(cap, base * (2 ** min(attempt, 30)))
+    return delay * random.uniform(0.5, 1.0)
+
+def socket_send_queue_bytes(sock: socket.socket) -> int:
+    """
+    Returns the number of bytes still queued in the kernel for sending
+    on a TCP socket (SIOCOUTQ). Returns 0 where this is not supported.
+    """
+    if _SIOCOUTQ is None:
+        return 0
+    try:
+        result = fcntl.ioctl(sock.fileno(), _SIOCOUTQ, b'\0\0\0\0')
+        return struct.unpack('I', result)[0]
+    except (OSError, ValueError):
+        return 0
+
+
+# --- Tick Trace Header ---
+# The Gateway prefixes every price tick with a small header fragment,
+# e.g. "#42,1234567890,1234568000*AAPL,150.23*MSFT,310.45", carrying the
+# tick id and the gateway_generate / gateway_send nanosecond stamps.
+# A full-book snapshot (sent to a new subscriber) has ",S" appended and
+# the id of the last tick sent, so the ticks that follow line up with it.
+TICK_HEADER_PREFIX = '#'
+SNAPSHOT_FLAG = 'S'
+
+def format_tick_header(tick_id: int, generate_ns: int, send_ns: int, snapshot: bool = False) -> str:
+    """
+    Builds the trace header fragment for one price tick.
+
+    Args:
+        tick_id: Monotonically increasing id of the tick.
+        generate_ns: now_ns() stamp taken when the tick was generated.
+        send_ns: now_ns() stamp taken just before the tick was sent.
+        snapshot: Flag the tick as a full-book snapshot.
+
+    Returns:
+        str: The header fragment, e.g. "#42,1234567890,1234568000".
+    """
+    header = f"{TICK_HEADER_PREFIX}{tick_id},{generate_ns},{send_ns}"
+    return f"{header},{SNAPSHOT_FLAG}" if snapshot else header
+
+def parse_tick_header(fragment: str):
+    """
+    Parses a trace header fragment built by format_tick_header().
+
+    Returns:
+        tuple: (tick_id, generate_ns, send_ns) as ints.
+
+    Raises:
+        ValueError: If the fragment is not a valid header.
+    """
+    if not fragment.startswith(TICK_HEADER_PREFIX):
+        raise ValueError(f"Not a tick header: {fragment!r}")
+    fields = fragment[1:].split(',')
+    if len(fields) == 4 and fields[3] == SNAPSHOT_FLAG:
+        fields.pop()
+    tick_id, generate_ns, send_ns = fields
+    return int(tick_id), int(generate_ns), int(send_ns)
+
+def is_snapshot_header(fragment: str) -> bool:
+    """True if a header fragment is flagged as a full-book snapshot."""
+    return fragment.endswith(f",{SNAPSHOT_FLAG}")
+
+
+# --- Multicast Price Feed ---
+# In multicast mode (config.PRICE_TRANSPORT) every tick is one datagram,
+# framed exactly like on TCP ("#header*AAPL,bid,ask*...*"), so receivers
+# can reuse MessageFramer. The tick id doubles as the sequence number.
+
+def create_multicast_sender(interface: str = MULTICAST_INTERFACE, ttl: int = MULTICAST_TTL) -> socket.socket:
+    """
+    Creates a UDP socket for publishing to a multicast group.
+
+    Args:
+        interface: IPv4 address of the interface to send on.
+        ttl: Multicast TTL; 0 keeps the datagrams on this host.
+
+    Returns:
+        socket.socket: Use sendto(payload, (group, port)).
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+    # Deliver to subscribers on this host as well
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+    apply_socket_options(sock)
+    return sock
+
+def create_multicast_receiver(group: str, port: int, interface: str = MULTICAST_INTERFACE) -> socket.socket:
+    """
+    Creates a UDP socket that has joined a multicast group.
+
+    Several receivers on one host can join the same group and port.
+
+    Args:
+        group: Multicast group address, e.g. "239.255.0.1".
+        port: UDP port the group is published on.
+        interface: IPv4 address of the interface to join on.
+
+    Raises:
+        OSError: If the socket cannot be bound or the group joined.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        # Binding to the group (not '') filters out other groups on this port
+        sock.bind((group, port))
+        membership = socket.inet_aton(group) + socket.inet_aton(interface)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        # A bigger SO_RCVBUF rides out bursts without gaps
+        apply_socket_options(sock)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class SequenceTracker:
+    """
+    Gap detection for a sequenced feed.
+
+    Feed it the sequence number of every live message in arrival order;
+    it reports the range that went missing in between.
+    """
+    def __init__(self):
+        self.last_seq = 0  # 0 = nothing seen yet
+        self.missed = 0  # Messages lost so far
+        self.restarts = 0
+
+    def observe(self, seq: int):
+        """
+        Args:
+            seq: Sequence number of the message just received.
+
+        Returns:
+            tuple: (first, last) of the missing sequence numbers, or None
+            if nothing was lost. A sequence number that does not move
+            forward means the publisher restarted its numbering; tracking
+            starts over from it.
+        """
+        last_seq = self.last_seq
+        self.last_seq = seq
+        if not last_seq or seq == last_seq + 1:
+            return None
+        if seq <= last_seq:
+            self.restarts += 1
+            return None
+        self.missed += seq - last_seq - 1
+        return last_seq + 1, seq - 1
+
+
+class RetransmitBuffer:
+    """
+    The publisher's ring of recently sent messages, by sequence number.
+
+    Thread-safe: the broadcaster appends while the retransmit server reads.
+    """
+    def __init__(self, size: int = RETRANSMIT_BUFFER_TICKS):
+        self._messages = deque(maxlen=size)  # (seq, payload), seq ascending
+        self._lock = threading.Lock()
+
+    def append(self, seq: int, payload: bytes):
+        """Stores a sent message. Sequence numbers must be consecutive."""
+        with self._lock:
+            if self._messages and seq != self._messages[-1][0] + 1:
+                # Numbering restarted; older messages no longer match it
+                self._messages.clear()
+            self._messages.append((seq, payload))
+
+    def get(self, first: int, last: int):
+        """
+        Returns:
+            list: The payloads of first..last (inclusive), or None if any
+            of them is no longer (or not yet) in the buffer.
+        """
+        with self._lock:
+            if not self._messages or last < first:
+                return None
+            oldest = self._messages[0][0]
+            if first < oldest or last > self._messages[-1][0]:
+                return None
+            return [payload for _, payload in islice(self._messages, first - oldest, last - oldest + 1)]
+
+    def latest(self):
+        """Returns: tuple (seq, payload) of the last message, or None."""
+        with self._lock:
+            return self._messages[-1] if self._messages else None
+
+
+# Requests on the retransmit channel, one per connection:
+# "R,first,last" for a range of ticks, "S" for the latest one (a snapshot)
+RETRANSMIT_REQUEST = 'R'
+SNAPSHOT_REQUEST = 'S'
+
+def format_recovery_request(first: int = None, last: int = None) -> bytes:
+    """
+    Builds a retransmit request for first..last, or a snapshot request
+    when no range is given.
+    """
+    if first is None:
+        return SNAPSHOT_REQUEST.encode('utf-8')
+    return f"{RETRANSMIT_REQUEST},{first},{last}".encode('utf-8')
+
+def parse_recovery_request(message: bytes):
+    """
+    Parses a request built by format_recovery_request().
+
+    Returns:
+        tuple: (first, last) for a retransmit, or None for a snapshot.
+
+    Raises:
+        ValueError: If the message is not a valid request.
+    """
+    text = message.decode('utf-8')
+    if text == SNAPSHOT_REQUEST:
+        return None
+    kind, first, last = text.split(',')
+    if kind != RETRANSMIT_REQUEST:
+        raise ValueError(f"Unknown recovery request: {text!r}")
+    return int(first), int(last)
+
+
+# Subscription control messages, sent by clients on the price and news
+# ports: "SUB,AAPL,MSFT" adds symbols and "UNSUB,AAPL" removes them; with
+# no symbols they mean every symbol / none. A new client gets every symbol.
+SUBSCRIBE = 'SUB'
+UNSUBSCRIBE = 'UNSUB'
+
+def format_subscription(action: str, symbols=()) -> bytes:
+    """Builds a SUB / UNSUB control message (without delimiter)."""
+    return ",".join([action, *symbols]).encode('utf-8')
+
+def parse_subscription(message: bytes):
+    """
+    Parses a message built by format_subscription().
+
+    Returns:
+        tuple: (action, symbols); an empty list means every symbol.
+
+    Raises:
+        ValueError: If the message is not a valid control message.
+    """
+    action, *symbols = message.decode('utf-8').split(',')
+    if action not in (SUBSCRIBE, UNSUBSCRIBE):
+        raise ValueError(f"Unknown control message: {message!r}")
+    return action, [symbol for symbol in symbols if symbol]
+
+def send_subscription(sock: socket.socket, symbols):
+    """
+    Replaces what a Gateway sends on this connection with exactly these
+    symbols (UNSUB everything, then SUB them).
+
+    Raises:
+        OSError: If the socket connection is broken or closed.
+    """
+    send_all(sock, format_subscription(UNSUBSCRIBE) + MESSAGE_DELIMITER
+             + format_subscription(SUBSCRIBE, symbols) + MESSAGE_DELIMITER)
+
+
+# --- Socket Options Profile ---
+# Not every Python build exposes SO_BUSY_POLL; its Linux value is 46
+SO_BUSY_POLL = getattr(socket, 'SO_BUSY_POLL', 46 if sys.platform.startswith('linux') else None)
+_busy_poll_warned = False
+
+def apply_socket_options(sock: socket.socket, nodelay: bool = SOCKET_NODELAY,
+                         sndbuf: int = SOCKET_SNDBUF, rcvbuf: int = SOCKET_RCVBUF,
+                         busy_poll_us: int = SOCKET_BUSY_POLL_US):
+    """
+    Applies the config socket options profile to one socket.
+
+    TCP_NODELAY only applies to TCP sockets. Buffer sizes and busy poll
+    apply to any socket; 0 leaves the OS default. A busy-poll value the
+    process may not set (no CAP_NET_ADMIN) is reported once and skipped.
+
+    Apply it before connect() / listen(): the TCP window is sized at the
+    handshake, and shrinking the buffers of an open connection can stall
+    it. Accepted sockets inherit the options of the listening socket.
+
+    Args:
+        sock: A connected, accepted or listening socket.
+        nodelay, sndbuf, rcvbuf, busy_poll_us: Override the config values.
+    """
+    global _busy_poll_warned
+    if sock.type == socket.SOCK_STREAM and sock.family in (socket.AF_INET, socket.AF_INET6):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 if nodelay else 0)
+    if sndbuf:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+    if rcvbuf:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+    if busy_poll_us and SO_BUSY_POLL is not None:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, SO_BUSY_POLL, busy_poll_us)
+        except OSError as e:
+            if not _busy_poll_warned:
+                print(f"[Network] SO_BUSY_POLL={busy_poll_us} not allowed ({e}). Continuing without it.")
+                _busy_poll_warned = True
+
+def create_server_socket(address: str, backlog: int = LISTEN_BACKLOG,
+                         reuseport: bool = SOCKET_REUSEPORT) -> socket.socket:
+    """
+    Creates a listening socket with the socket options profile.
+    Accepted sockets inherit the options on Linux; servers still call
+    apply_socket_options() on them for other platforms.
+
+    A stale socket file left at a Unix path is replaced; a path a live
+    server still answers on is refused, so a second server cannot take
+    it over.
+
+    Args:
+        address: Transport URI to bind (see parse_address).
+        backlog: Pending-connection queue length.
+        reuseport: Set SO_REUSEPORT so other acceptors can bind the same
+            port (TCP only; Unix acceptors share one socket instead).
+
+    Returns:
+        socket.socket: The bound, listening socket.
+
+    Raises:
+        OSError: If the address cannot be bound.
+        ValueError: For a malformed address.
+    """
+    endpoint = parse_address(address)
+    server_socket = socket.socket(endpoint.family, endpoint.type)
+    try:
+        if endpoint.family == socket.AF_UNIX:
+            path = endpoint.address
+            if not path.startswith('\0'):
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+                if os.path.exists(path):
+                    if _unix_path_in_use(endpoint):
+                        raise OSError(errno.EADDRINUSE, f"A server is already listening on {path}")
+                    os.unlink(path)
+        else:
+            # This allows us to re-use the address (port) immediately after stopping the program
+            server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if reuseport:
+                if not hasattr(socket, 'SO_REUSEPORT'):
+                    raise OSError("SO_REUSEPORT is not supported on this platform")
+                server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        apply_socket_options(server_socket)
+        server_socket.bind(endpoint.address)
+        server_socket.listen(backlog)
+    except OSError:
+        server_socket.close()
+        raise
+    return server_socket
+
+def _unix_path_in_use(endpoint: Endpoint) -> bool:
+    """[Internal] True if a server answers on a Unix socket path (rather than a stale file)."""
+    probe = socket.socket(endpoint.family, endpoint.type)
+    try:
+        probe.settimeout(0.5)
+        probe.connect(endpoint.address)
+    except (ConnectionRefusedError, FileNotFoundError):
+        return False
+    except OSError:
+        # Not a socket, or no permission: leave it to bind() to report
+        return False
+    finally:
+        probe.close()
+    return True
+
+def create_client_socket(address: str, timeout: float = 1.0) -> socket.socket:
+    """
+    Connects to a transport URI with the client socket options applied.
+
+    Args:
+        address: Transport URI (see parse_address).
+        timeout: Connect timeout in seconds; the returned socket is blocking.
+
+    Returns:
+        socket.socket: The connected socket.
+
+    Raises:
+        OSError: If the connection fails.
+        ValueError: For a malformed address.
+    """
+    endpoint = parse_address(address)
+    sock = socket.socket(endpoint.family, endpoint.type)
+    try:
+        tune_client_socket(sock)
+        sock.settimeout(timeout)
+        sock.connect(endpoint.address)
+        sock.settimeout(None)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def start_client_connect(address: str) -> socket.socket:
+    """
+    Starts a non-blocking connect to a transport URI, for event loops
+    that cannot wait for the handshake. Register the socket for
+    EVENT_WRITE and call finish_client_connect() once it is writable.
+
+    Returns:
+        socket.socket: The non-blocking socket, connected or connecting.
+
+    Raises:
+        OSError: If the connect fails at once (e.g. nobody listens on a
+            Unix socket path).
+        ValueError: For a malformed address.
+    """
+    endpoint = parse_address(address)
+    sock = socket.socket(endpoint.family, endpoint.type)
+    try:
+        tune_client_socket(sock)
+        sock.setblocking(False)
+        error = sock.connect_ex(endpoint.address)
+        if error not in (0, errno.EINPROGRESS):
+            raise OSError(error, os.strerror(error))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+def finish_client_connect(sock: socket.socket):
+    """
+    Completes a connect begun by start_client_connect(), once the socket
+    is writable.
+
+    Raises:
+        OSError: If the connect failed (refused, unreachable, ...).
+    """
+    error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+    if error:
+        raise OSError(error, os.strerror(error))
+
+# --- Resilient Client Connections ---
+# Heartbeats on delimiter-framed links are empty messages (a bare
+# delimiter), which every reader already skips. On length-prefixed links
+# a heartbeat is a zero-length frame.
+HEARTBEAT = MESSAGE_DELIMITER
+
+# Acknowledgement frame payload: the id of the last order received
+ACK_STRUCT = struct.Struct('<q')
+
+def format_ack_frame(message_id: int) -> bytes:
+    """Builds the length-prefixed ack frame for one message id."""
+    return FRAME_HEADER.pack(ACK_STRUCT.size) + ACK_STRUCT.pack(message_id)
+
+def tune_client_socket(sock: socket.socket):
+    """
+    Applies the socket options profile and turns on aggressive TCP
+    keepalive (where the platform supports it) on a client socket.
+    Call it before connect(), see apply_socket_options().
+    """
+    apply_socket_options(sock)
+    if sock.family == socket.AF_UNIX:
+        return  # The kernel closes a Unix socket whose peer died
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for option, value in (('TCP_KEEPIDLE', KEEPALIVE_IDLE),
+                          ('TCP_KEEPINTVL', KEEPALIVE_INTERVAL),
+                          ('TCP_KEEPCNT', KEEPALIVE_COUNT)):
+        if hasattr(socket, option):
+            sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, option), value)
+
+
+class ResilientConnection:
+    """
+    A client connection that survives its server going away.
+
+    - Connects with tune_client_socket() and retries with backoff_delay().
+    - messages() treats the link as dead when the peer closes it or sends
+      nothing, not even a heartbeat, for heartbeat_timeout seconds, and
+      reconnects on its own.
+    - Frames sent while disconnected are queued (up to max_pending) and
+      go out in order after the reconnect. A frame that finds the queue
+      full is dropped and counted in `dropped`; queued ones never are.
+    - on_connect(self), if given, runs after every successful connect,
+      e.g. to subscribe again.
+    """
+    def __init__(self, address, name, heartbeat_timeout=HEARTBEAT_TIMEOUT,
+                 max_pending=MAX_PENDING_ORDERS, on_connect=None):
+        """
+        Args:
+            address: Transport URI of the server (see parse_address).
+            name: Component name for log lines, e.g. "Strategy".
+        """
+        parse_address(address)  # Fail now on a malformed address
+        self.address = address
+        self.name = name
+        self.heartbeat_timeout = heartbeat_timeout
+        self.on_connect = on_connect
+        self.sock = None
+        self.failures = 0  # Consecutive failed connection attempts
+        self.retry_at = 0.0
+        self.connects = 0
+        # Unbounded: the limit is checked before appending, so nothing
+        # already queued is pushed out
+        self.pending = deque()
+        self.max_pending = max_pending
+        self.dropped = 0  # Frames that found the queue full
+
+    @property
+    def connected(self):
+        return self.sock is not None
+
+    def try_connect(self):
+        """
+        Makes one connection attempt if the backoff allows it.
+
+        Returns:
+            bool: True if connected (now or already).
+        """
+        if self.sock is not None:
+            return True
+        if time.monotonic() < self.retry_at:
+            return False
+        try:
+            sock = create_client_socket(self.address)
+        except OSError as e:
+            delay = backoff_delay(self.failures)
+            self.failures += 1
+            self.retry_at = time.monotonic() + delay
+            print(f"[{self.name}] Could not connect to {self.address} ({e}). Retrying in {delay:.2f}s...")
+            return False
+
+        self.sock = sock
+        self.failures = 0
+        self.connects += 1
+        verb = "Reconnected" if self.connects > 1 else "Connected"
+        print(f"[{self.name}] {verb} to {self.address}.")
+        if self.on_connect:
+            self.on_connect(self)
+        self.flush()
+        return self.sock is not None
+
+    def connect(self, timeout=None):
+        """
+        Blocks until connected, retrying with backoff.
+
+        Args:
+            timeout: Seconds to keep trying, or None for no limit.
+
+        Returns:
+            bool: True if connected.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.try_connect():
+            wait = max(0.0, self.retry_at - time.monotonic())
+            if deadline is not None:
+                if time.monotonic() + wait > deadline:
+                    return False
+            time.sleep(wait)
+        return True
+
+    def disconnect(self, reason):
+        """Closes the socket; the next send / receive reconnects."""
+        if self.sock is not None:
+            print(f"[{self.name}] Connection to {self.address} lost: {reason}")
+            self.sock.close()
+            self.sock = None
+
+    def _queue(self, item):
+        """
+        [Internal] Appends an item to pending, unless the queue is full:
+        then the new item is dropped and counted.
+
+        Returns:
+            bool: True if queued.
+        """
+        if len(self.pending) >= self.max_pending:
+            self.dropped += 1
+            print(f"[{self.name}] Send queue full ({self.max_pending}): dropped the newest message.")
+            return False
+        self.pending.append(item)
+        return True
+
+    def send(self, frame):
+        """
+        Sends one complete frame, or queues it while disconnected.
+
+        Returns:
+            bool: True if it went out now, False if it is queued (or
+            dropped, with the queue full).
+        """
+        if not self._queue(bytes(frame)):
+            return False
+        if self.sock is None:
+            self.try_connect()
+        else:
+            self.flush()
+        return not self.pending
+
+    def flush(self):
+        """Sends the queued frames, oldest first."""
+        while self.pending and self.sock is not None:
+            try:
+                send_all(self.sock, self.pending[0])
+            except OSError as e:
+                self.disconnect(f"send failed ({e})")
+                return
+            self.pending.popleft()
+
+    def messages(self):
+        """
+        A generator over the delimiter-framed messages of the link,
+        reconnecting whenever it dies. Heartbeats are yielded as b"" so
+        the caller gets control back at least every heartbeat interval.
+
+        Yields:
+            bytes: A single message (without the delimiter).
+        """
+        framer = MessageFramer()
+        while True:
+            if self.sock is None:
+                self.connect()
+                framer = MessageFramer()
+            try:
+                self.sock.settimeout(self.heartbeat_timeout)
+                chunk = self.sock.recv(recv_size(self.sock, 65536))
+            except socket.timeout:
+                self.disconnect(f"no data or heartbeat for {self.heartbeat_timeout * 1000:.0f} ms")
+                continue
+            except OSError as e:
+                self.disconnect(f"receive failed ({e})")
+                continue
+            if not chunk:
+                self.disconnect("closed by peer")
+                continue
+            yield from framer.feed(chunk)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+class AcknowledgedSender(ResilientConnection):
+    """
+    A ResilientConnection for length-prefixed messages the peer
+    acknowledges (orders).
+
+    Each message keeps its frame until an ack frame (format_ack_frame)
+    with its own id comes back; acks are not cumulative, so a message the
+    peer skipped (e.g. an order it could not book) stays unacknowledged
+    even when later ones are acked. If the oldest ack does not arrive
+    within ack_timeout, or the link drops, the sender reconnects and sends
+    every unacknowledged message again before anything new, so nothing is lost
+    while fewer than max_pending messages are outstanding; past that the
+    newest queued ones are dropped and counted in `dropped`. The peer may
+    see a message twice if only its ack was lost. Message ids must increase.
+    """
+    def __init__(self, address, name, ack_timeout=ORDER_ACK_TIMEOUT, **kwargs):
+        super().__init__(address, name, **kwargs)
+        self.ack_timeout = ack_timeout
+        # pending holds (message_id, frame) not yet written to a socket;
+        # unacked holds (message_id, frame, sent_at), oldest first
+        self.unacked = deque()
+        self._ack_buffer = bytearray()
+        self.resent = 0
+
+    def try_connect(self):
+        if self.sock is None and self.unacked and time.monotonic() >= self.retry_at:
+            # What the old connection did not confirm goes out first. The
+            # queue is bounded, so what does not fit is the newest, counted
+            queued = [(message_id, frame) for message_id, frame, _ in self.unacked]
+            queued.extend(self.pending)
+            overflow = len(queued) - self.max_pending
+            if overflow > 0:
+                self.dropped += overflow
+                print(f"[{self.name}] Send queue full: dropped the {overflow} newest message(s).")
+                del queued[self.max_pending:]
+            self.resent += len(self.unacked)
+            self.pending = deque(queued)
+            self.unacked.clear()
+        self._ack_buffer.clear()
+        return super().try_connect()
+
+    def send_message(self, frame, message_id):
+        """
+        Sends (or queues) one message and tracks it until acknowledged.
+
+        Args:
+            frame: The complete frame; copied, so a reused buffer is fine.
+            message_id (int): Id the peer will acknowledge.
+
+        Returns:
+            bool: True if it went out now, False if it is queued (or
+            dropped, with the queue full).
+        """
+        queued = self._queue((message_id, bytes(frame)))
+        self.poll()
+        return queued and not self.pending
+
+    def flush(self):
+        while self.pending and self.sock is not None:
+            message_id, frame = self.pending[0]
+            try:
+                send_all(self.sock, frame)
+            except OSError as e:
+                self.disconnect(f"send failed ({e})")
+                return
+            self.pending.popleft()
+            self.unacked.append((message_id, frame, time.monotonic()))
+
+    def poll(self):
+        """
+        Reads the acks that have arrived (without blocking), reconnects if
+        the link is down or an ack is overdue, and sends what is queued.
+        Call it regularly, e.g. on every incoming message.
+
+        Returns:
+            int: Number of messages still waiting for an ack.
+        """
+        if self.sock is not None:
+            self._read_acks()
+        if self.sock is not None and self.unacked:
+            waited = time.monotonic() - self.unacked[0][2]
+            if waited > self.ack_timeout:
+                self.disconnect(f"no ack for {waited * 1000:.0f} ms")
+        if self.sock is None:
+            self.try_connect()
+        else:
+            self.flush()
+        return len(self.unacked)
+
+    def _read_acks(self):
+        while True:
+            try:
+                chunk = self.sock.recv(recv_size(self.sock, 4096), socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                self.disconnect(f"receive failed ({e})")
+                return
+            if not chunk:
+                self.disconnect("closed by peer")
+                return
+            self._ack_buffer += chunk
+
+        # Walk the frames by their length prefix: heartbeats (empty frames)
+        # and anything that is not an ack are skipped
+        buffer = self._ack_buffer
+        acked = set()
+        pos = 0
+        while len(buffer) - pos >= FRAME_HEADER.size:
+            (length,) = FRAME_HEADER.unpack_from(buffer, pos)
+            end = pos + FRAME_HEADER.size + length
+            if end > len(buffer):
+                break  # The rest of this frame has not arrived yet
+            if length == ACK_STRUCT.size:
+                acked.add(ACK_STRUCT.unpack_from(buffer, pos + FRAME_HEADER.size)[0])
+            pos = end
+        del buffer[:pos]
+        if acked:
+            # Each ack confirms its own message only
+            self.unacked = deque(entry for entry in self.unacked if entry[0] not in acked)
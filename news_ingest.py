@@ -0,0 +1,123 @@
+"""
+News Ingest Process
+
+Connects to the Gateway's news feed as a client and writes every
+per-symbol sentiment event ("SYMBOL,SCORE,EVENT_NS") into the shared
+SharedSentimentBook, where the Strategy reads it next to the prices.
+It does for news what the OrderBook does for quotes, so no Strategy has
+a socket on its hot path.
+
+The feed reconnects on its own when it goes quiet for HEARTBEAT_TIMEOUT.
+With config.NEWS_SUBSCRIPTION set, only those symbols' events are sent.
+"""
+
+# --- Make the "Play Button" work ---
+import sys
+import os
+current_file_path = os.path.abspath(__file__)
+project_root = os.path.dirname(current_file_path)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+from network_utils import ResilientConnection, link_address, send_subscription
+from sentiment_utils import SharedSentimentBook
+from latency_utils import LatencyTracer, now_ns, hop_name, NEWS_EVENT, SENTIMENT_WRITE
+from logging_utils import get_logger
+from metrics_utils import SharedMetrics, TICKS_RECEIVED, PARSE_ERRORS, RECONNECTS
+from profiling_utils import install_profiler
+from tuning_utils import ProcessTuning
+from config import NEWS_PORT, SENTIMENT_SHM_NAME, NEWS_SUBSCRIPTION
+
+log = get_logger("NewsIngest")
+
+
+def parse_news_event(message):
+    """
+    Parses one news event.
+
+    Returns:
+        tuple: (symbol, score, event_ns); event_ns is 0 for the older
+        "SYMBOL,SCORE" form.
+
+    Raises:
+        ValueError: If the message is not a news event.
+    """
+    fields = message.decode('utf-8').split(',')
+    if len(fields) == 3:
+        return fields[0], int(fields[1]), int(fields[2])
+    if len(fields) == 2:
+        return fields[0], int(fields[1]), 0
+    raise ValueError(f"expected 2 or 3 fields, got {len(fields)}")
+
+
+def run_news_ingest(ready_event=None, owns_shared_memory=True):
+    """
+    Main function for the news ingest stage.
+
+    Args:
+        ready_event: Optional multiprocessing.Event, set once the
+            SharedSentimentBook exists (used by the main.py supervisor).
+        owns_shared_memory: If False, someone else (the supervisor) owns
+            the sentiment block, so it is left in place on exit.
+    """
+    print("[NewsIngest] Starting...")
+    tuning = ProcessTuning("newsingest")
+    tuning.apply()
+    metrics = SharedMetrics("newsingest")
+    tracer = LatencyTracer("newsingest")
+    install_profiler("newsingest")
+    sentiment = None
+    news_conn = None
+
+    def on_connect(connection):
+        if connection.connects > 1:
+            metrics.inc(RECONNECTS)
+        if NEWS_SUBSCRIPTION:
+            # Again on every connect: the Gateway forgets us when we hang up
+            try:
+                send_subscription(connection.sock, NEWS_SUBSCRIPTION)
+            except OSError as e:
+                connection.disconnect(f"subscribe failed ({e})")
+
+    try:
+        sentiment = SharedSentimentBook(create=True)
+        print(f"[NewsIngest] SharedSentimentBook '{SENTIMENT_SHM_NAME}' ready ({sentiment.num_symbols} symbols).")
+        if ready_event:
+            ready_event.set()
+
+        news_conn = ResilientConnection(link_address(NEWS_PORT), "NewsIngest", on_connect=on_connect)
+        news_conn.connect()
+        tuning.finish_warmup()
+
+        for message in news_conn.messages():
+            if not message:
+                continue  # Heartbeat
+            try:
+                symbol, score, event_ns = parse_news_event(message)
+                sentiment.update(symbol, score, event_ns or now_ns())
+            except (ValueError, UnicodeDecodeError) as e:
+                metrics.inc(PARSE_ERRORS)
+                log.warning("[NewsIngest] Could not parse news event %r: %s", message, e)
+                continue
+            if event_ns:
+                write_ns = now_ns()
+                tracer.record(hop_name(NEWS_EVENT, SENTIMENT_WRITE), event_ns, write_ns)
+                metrics.observe(write_ns - event_ns)
+            metrics.inc(TICKS_RECEIVED)
+            log.debug("[NewsIngest] %s sentiment=%d", symbol, score)
+            log.count("events")
+
+    except KeyboardInterrupt:
+        print("\n[NewsIngest] Shutting down...")
+    finally:
+        if news_conn:
+            news_conn.close()
+        if sentiment:
+            if owns_shared_memory:
+                sentiment.unlink()
+            sentiment.close()
+        print("[NewsIngest] Closed.")
+
+
+if __name__ == "__main__":
+    run_news_ingest()
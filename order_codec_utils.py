@@ -0,0 +1,316 @@
+"""
+Order serialization between the Strategy and the OrderManager.
+
+Orders travel as length-prefixed frames (network_utils.send_frame /
+receive_frames), encoded by one of these codecs (config.ORDER_CODEC):
+
+- 'binary':  a fixed 91-byte struct with enum codes for side, positions
+             and reason, a symbol id instead of the name and int64 ns
+             timestamps. No dependencies; the default.
+- 'json':    the original json.dumps / json.loads of the order dict.
+- 'orjson':  the same dict through orjson (optional package).
+- 'msgpack': the same dict through msgpack (optional package).
+
+Every codec turns the same order dict into bytes and back, so callers do
+not care which one is configured. Codec objects are created once and
+reused; BinaryOrderCodec encodes into a preallocated buffer.
+"""
+
+import json
+import struct
+
+from network_utils import FRAME_HEADER
+from config import SYMBOLS, ORDER_CODEC
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# --- Enum codes of the binary layout (index = code) ---
+SIDES = (None, 'BUY', 'SELL')
+POSITIONS = (None, 'LONG', 'SHORT')
+# Free text does not fit a fixed-size message; the strategy's reasons
+# are listed here and anything else decodes as ''
+REASONS = (
+    '',
+    'Both price and news signals indicate BUY',
+    'Both price and news signals indicate SELL',
+)
+
+# Message type byte, so other kinds can share the link later. It also
+# versions the layout: bump it whenever ORDER_STRUCT changes, so a peer
+# on another version is told so instead of failing to unpack.
+ORDER_MESSAGE = 2
+# Earlier order layouts, by their type byte
+RETIRED_ORDER_MESSAGES = {
+    1: "89-byte orders without a strategy_id",
+}
+
+# type, side, position_before, position_after, reason, strategy_id,
+# symbol_id, quantity, sentiment,
+# price, short_ma, long_ma,
+# client_order_id, timestamp_ns, tick_id, generate_ns, read_ns, send_ns
+ORDER_STRUCT = struct.Struct('<BBBBBHIIidddqqqqqq')
+
+# client_order_id layout (a positive int64): the strategy id in the top
+# bits, so concurrent Strategy processes never hand out the same ids, and
+# below it a counter starting at the start-up time in microseconds, so a
+# restarted Strategy continues above its previous ids (see order_id_sequence
+# for the wrap every ~8.9 years)
+ORDER_ID_COUNTER_BITS = 48
+ORDER_ID_COUNTER_MASK = (1 << ORDER_ID_COUNTER_BITS) - 1
+MAX_STRATEGY_ID = (1 << (63 - ORDER_ID_COUNTER_BITS)) - 1
+
+
+def first_order_id(strategy_id, now_ns):
+    """
+    The first client_order_id a Strategy process hands out (see
+    order_id_sequence for the ones after it).
+
+    Args:
+        strategy_id (int): The process's config.STRATEGY_ID.
+        now_ns (int): Start-up time (time.time_ns()).
+
+    Returns:
+        int: The first id, unique to this strategy id.
+
+    Raises:
+        ValueError: If strategy_id does not fit the id's top bits.
+    """
+    if not 0 <= strategy_id <= MAX_STRATEGY_ID:
+        raise ValueError(f"Strategy id {strategy_id} out of range (0-{MAX_STRATEGY_ID})")
+    # 0 means "no id", so the counter never is
+    counter = (now_ns // 1000) & ORDER_ID_COUNTER_MASK or 1
+    return (strategy_id << ORDER_ID_COUNTER_BITS) | counter
+
+
+def order_id_sequence(strategy_id, now_ns):
+    """
+    The client_order_ids of a Strategy process, from first_order_id() up.
+
+    The counter stays within its ORDER_ID_COUNTER_BITS: rather than carry
+    into the strategy id (and collide with the next strategy's ids), it
+    wraps back to 1. That happens every 2**48 us (~8.9 years of start-up
+    times); a Strategy started shortly before a wrap hands out lower ids
+    after it, and one restarted after it starts below its earlier ids.
+    Both only matter to an OrderManager still holding the ids from
+    before the wrap.
+
+    Args:
+        strategy_id (int): The process's config.STRATEGY_ID.
+        now_ns (int): Start-up time (time.time_ns()).
+
+    Yields:
+        int: The next id, unique to this strategy id.
+
+    Raises:
+        ValueError: If strategy_id does not fit the id's top bits.
+    """
+    first = first_order_id(strategy_id, now_ns)
+    prefix = strategy_id << ORDER_ID_COUNTER_BITS
+    counter = first & ORDER_ID_COUNTER_MASK
+    while True:
+        yield prefix | counter
+        counter = (counter + 1) & ORDER_ID_COUNTER_MASK or 1
+
+
+class BinaryOrderCodec:
+    """
+    Fixed-size binary orders. Symbols are sent as their index in the
+    symbol list, which both ends must share (config.SYMBOLS by default).
+    """
+    name = 'binary'
+
+    def __init__(self, symbols=SYMBOLS):
+        """
+        Args:
+            symbols (list): Symbol names; a symbol's id is its index.
+        """
+        self.symbols = list(symbols)
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._side_codes = {side: code for code, side in enumerate(SIDES)}
+        self._position_codes = {position: code for code, position in enumerate(POSITIONS)}
+        self._reason_codes = {reason: code for code, reason in enumerate(REASONS)}
+        # One frame (length prefix + order), reused by every encode_frame()
+        self._frame = bytearray(FRAME_HEADER.size + ORDER_STRUCT.size)
+        FRAME_HEADER.pack_into(self._frame, 0, ORDER_STRUCT.size)
+        self._frame_view = memoryview(self._frame)
+
+    def _pack_into(self, buffer, offset, order):
+        trace = order.get('trace') or {}
+        try:
+            ORDER_STRUCT.pack_into(
+                buffer, offset,
+                ORDER_MESSAGE,
+                self._side_codes[order['side']],
+                self._position_codes[order.get('position_before')],
+                self._position_codes[order.get('position_after')],
+                self._reason_codes.get(order.get('reason'), 0),
+                order.get('strategy_id') or 0,
+                self.symbol_ids[order['symbol']],
+                order['quantity'],
+                order.get('sentiment') or 0,
+                order['price'],
+                order.get('short_ma') or 0.0,
+                order.get('long_ma') or 0.0,
+                order.get('client_order_id') or 0,
+                order.get('timestamp_ns') or 0,
+                trace.get('tick_id') or 0,
+                trace.get('generate_ns') or 0,
+                trace.get('read_ns') or 0,
+                trace.get('send_ns') or 0,
+            )
+        except (KeyError, struct.error) as e:
+            raise ValueError(f"Cannot encode order field: {e}") from e
+
+    def encode(self, order):
+        """
+        Returns:
+            bytes: The encoded order (without the length prefix).
+
+        Raises:
+            ValueError: For an unknown symbol, side or position, or a
+                field out of range.
+        """
+        buffer = bytearray(ORDER_STRUCT.size)
+        self._pack_into(buffer, 0, order)
+        return bytes(buffer)
+
+    def encode_frame(self, order):
+        """
+        Encodes an order as a complete frame into the preallocated buffer.
+
+        Returns:
+            memoryview: The frame, ready for sendall(); only valid until
+            the next call.
+        """
+        self._pack_into(self._frame, FRAME_HEADER.size, order)
+        return self._frame_view
+
+    def decode(self, payload):
+        """
+        Returns:
+            dict: The order, with the same keys the Strategy sends.
+
+        Raises:
+            ValueError: If the payload is not a valid binary order (or
+                one of another version).
+        """
+        kind = payload[0] if payload else None
+        if kind != ORDER_MESSAGE:
+            if kind in RETIRED_ORDER_MESSAGES:
+                raise ValueError(f"Order message version {kind} ({RETIRED_ORDER_MESSAGES[kind]}) is no "
+                                 f"longer read; this side speaks version {ORDER_MESSAGE}. "
+                                 f"Is a Strategy from an older version still running?")
+            raise ValueError(f"Unknown message type {kind}")
+        try:
+            (kind, side, position_before, position_after, reason, strategy_id,
+             symbol_id, quantity, sentiment, price, short_ma, long_ma,
+             client_order_id, timestamp_ns, tick_id, generate_ns, read_ns, send_ns) = ORDER_STRUCT.unpack(payload)
+            return {
+                'symbol': self.symbols[symbol_id],
+                'side': SIDES[side],
+                'quantity': quantity,
+                'price': price,
+                'sentiment': sentiment,
+                'short_ma': short_ma,
+                'long_ma': long_ma,
+                'position_before': POSITIONS[position_before],
+                'position_after': POSITIONS[position_after],
+                'reason': REASONS[reason] if reason < len(REASONS) else '',
+                'client_order_id': client_order_id,
+                'strategy_id': strategy_id,
+                'timestamp_ns': timestamp_ns,
+                'trace': {
+                    'tick_id': tick_id,
+                    'generate_ns': generate_ns,
+                    'read_ns': read_ns,
+                    'send_ns': send_ns,
+                },
+            }
+        except (struct.error, IndexError) as e:
+            raise ValueError(f"Malformed binary order: {e}") from e
+
+
+class JsonOrderCodec:
+    """The order dict as JSON text, through json or orjson."""
+    def __init__(self, backend='json'):
+        """
+        Args:
+            backend (str): 'json' (standard library) or 'orjson'.
+        """
+        if backend == 'orjson':
+            if orjson is None:
+                raise ValueError("ORDER_CODEC 'orjson' needs the orjson package (pip install orjson).")
+            self._dumps, self._loads = orjson.dumps, orjson.loads
+        else:
+            self._dumps = lambda order: json.dumps(order).encode('utf-8')
+            self._loads = json.loads
+        self.name = backend
+
+    def encode(self, order):
+        return self._dumps(order)
+
+    def encode_frame(self, order):
+        payload = self._dumps(order)
+        return FRAME_HEADER.pack(len(payload)) + payload
+
+    def decode(self, payload):
+        # Both json.JSONDecodeError and orjson.JSONDecodeError are ValueErrors
+        return self._loads(payload)
+
+
+class MsgpackOrderCodec:
+    """The order dict through msgpack, with one reused Packer."""
+    name = 'msgpack'
+
+    def __init__(self):
+        if msgpack is None:
+            raise ValueError("ORDER_CODEC 'msgpack' needs the msgpack package (pip install msgpack).")
+        self._packer = msgpack.Packer()
+
+    def encode(self, order):
+        return self._packer.pack(order)
+
+    def encode_frame(self, order):
+        payload = self._packer.pack(order)
+        return FRAME_HEADER.pack(len(payload)) + payload
+
+    def decode(self, payload):
+        try:
+            return msgpack.unpackb(payload)
+        except (msgpack.exceptions.UnpackException, ValueError) as e:
+            raise ValueError(f"Malformed msgpack order: {e}") from e
+
+
+def available_codecs():
+    """Names of the codecs that can be created here (optional packages installed)."""
+    names = ['binary', 'json']
+    if orjson is not None:
+        names.append('orjson')
+    if msgpack is not None:
+        names.append('msgpack')
+    return names
+
+
+def get_order_codec(name=ORDER_CODEC, symbols=SYMBOLS):
+    """
+    Creates the codec for a config.ORDER_CODEC name.
+
+    Raises:
+        ValueError: For an unknown name, or an optional package that is
+            not installed.
+    """
+    if name == 'binary':
+        return BinaryOrderCodec(symbols)
+    if name in ('json', 'orjson'):
+        return JsonOrderCodec(name)
+    if name == 'msgpack':
+        return MsgpackOrderCodec()
+    raise ValueError(f"Unknown order codec '{name}' (expected binary, json, orjson or msgpack).")
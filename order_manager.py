@@ -3,11 +3,22 @@ Order Manager Process
 
 Acts as a TCP server, listening for order messages from the
 Strategy process. It deserializes and logs any orders it receives.
+Orders arrive as length-prefixed frames in the config.ORDER_CODEC encoding.
+Every order carrying a client_order_id is acknowledged, so the Strategy
+can send again what a broken connection swallowed; orders seen twice
+that way are dropped here.
+
+Every new order counts as filled at its price: a PositionKeeper books it
+into the shared position block and a background thread marks the whole
+portfolio to market whenever the SharedPriceBook changes. Every order is
+also kept in an OrderStore (order_store_utils), indexed by client order
+id, symbol, strategy and open state for risk and position queries.
 """
 
 import socket
-import json
 import threading
+import time
+from collections import deque
 
 # --- Make the "Play Button" work ---
 import sys
@@ -17,82 +28,291 @@ project_root = os.path.dirname(current_file_path)
 sys.path.insert(0, project_root)
 # --- End of fix ---
 
-from network_utils import receive_messages
-from config import HOST, ORDER_PORT
+from network_utils import (
+    receive_frames, format_ack_frame, create_server_socket, apply_socket_options, link_address, parse_address,
+)
+from order_codec_utils import get_order_codec
+from latency_utils import (
+    LatencyTracer, now_ns, hop_name, ORDER_SEND, ORDERMANAGER_RECEIVE, END_TO_END
+)
+from logging_utils import get_logger
+from metrics_utils import (
+    SharedMetrics, ORDERS_RECEIVED, ORDERS_REJECTED, ORDER_CONFLICTS, PARSE_ERRORS, CLIENT_COUNT
+)
+from position_utils import SharedPositionBook, PositionKeeper
+from order_store_utils import OrderStore, REJECTED, STATES
+from shared_memory_utils import SharedPriceBook
+from profiling_utils import install_profiler
+from tuning_utils import ProcessTuning
+from config import (
+    ORDER_PORT, MAX_PENDING_ORDERS, ORDER_ACCEPTORS, SOCKET_REUSEPORT, SHARED_MEMORY_NAME, POSITION_MARK_INTERVAL,
+)
+
+# Shared by all client threads; each order records two samples
+tracer = LatencyTracer("ordermanager")
+
+log = get_logger("OrderManager")
+
+# Live counters in shared memory (created in run_ordermanager)
+metrics = None
+
+# Positions and PnL in shared memory (created in run_ordermanager)
+keeper = None
+
+# Every order received, with its indexes (shared by all client threads)
+order_store = OrderStore()
+
+# Number of connected strategies (only changes on connect/disconnect)
+active_clients = 0
+active_clients_lock = threading.Lock()
+
+# Recent client_order_ids (across connections), to drop resent duplicates
+recent_order_ids = set()
+recent_order_order = deque()
+recent_order_lock = threading.Lock()
+
+def is_duplicate(client_order_id):
+    """
+    Remembers an order id and tells whether it was seen before. Keeps the
+    last MAX_PENDING_ORDERS ids, as many as a Strategy can have in flight.
+    """
+    with recent_order_lock:
+        if client_order_id in recent_order_ids:
+            return True
+        recent_order_ids.add(client_order_id)
+        recent_order_order.append(client_order_id)
+        if len(recent_order_order) > MAX_PENDING_ORDERS:
+            recent_order_ids.discard(recent_order_order.popleft())
+        return False
+
+def forget_order_id(client_order_id):
+    """Lets a resend of an order that could not be booked be tried again."""
+    with recent_order_lock:
+        recent_order_ids.discard(client_order_id)
+
+def mark_loop(keeper):
+    """
+    Marks the portfolio to market whenever the price book version moves.
+    Attaches to the book lazily, so it does not matter who starts first.
+    The book instance is shared with the client threads' fills, so every
+    call into it holds keeper.lock.
+    """
+    book = None
+    version = 0
+    while True:
+        if book is None:
+            try:
+                book = SharedPriceBook(name=SHARED_MEMORY_NAME)
+            except FileNotFoundError:
+                time.sleep(1.0)
+                continue
+            keeper.attach_price_book(book)
+            version = 0
+        with keeper.lock:
+            current, changed, _ = book.changes_since(version)
+        if len(changed):
+            keeper.mark_to_market(current)
+            version = current
+        time.sleep(POSITION_MARK_INTERVAL)
+
+def change_client_count(delta):
+    """Adjusts and publishes the number of connected clients."""
+    global active_clients
+    with active_clients_lock:
+        active_clients += delta
+        metrics.set(CLIENT_COUNT, active_clients)
+
+def apply_order(order, receive_ns, keeper, store, metrics):
+    """
+    Traces, logs and fills one decoded (and not duplicate) order.
+    The simulation (simulation.py) calls it directly, without a socket,
+    with its own keeper, store and metrics.
+
+    Args:
+        order (dict): The decoded order.
+        receive_ns (int): now_ns() when it arrived.
+        keeper (PositionKeeper): Books the fill.
+        store (OrderStore): Keeps the order.
+        metrics (SharedMetrics): Counts it.
+
+    Returns:
+        bool: False if the store already holds the order (a resend older
+        than is_duplicate() remembers), which is then not booked again.
+
+    Raises:
+        ValueError: If the order cannot be booked; it is stored as REJECTED.
+    """
+    client_order_id = order.get('client_order_id')
+    if client_order_id:
+        row = store.row_of(client_order_id)
+        if row is not None:
+            state = int(store.column_values([row], ['state'])['state'][0])
+            if state != REJECTED:
+                metrics.inc(ORDER_CONFLICTS)
+                log.warning("[OrderManager] Order %s is already stored (%s); not booking it again.",
+                            client_order_id, STATES[state])
+                return False
+
+    trace = order.get('trace')
+    if trace:
+        tracer.record(hop_name(ORDER_SEND, ORDERMANAGER_RECEIVE), trace['send_ns'], receive_ns)
+        metrics.observe(receive_ns - trace['send_ns'])
+        if trace.get('generate_ns'):
+            tracer.record(END_TO_END, trace['generate_ns'], receive_ns)
+
+    # Log the trade confirmation (one line, formatted off the hot path)
+    log.info(
+        "[OrderManager] Received Trade: %s %s x%s @ $%.2f (%s)",
+        order.get('side'), order.get('symbol'), order.get('quantity'),
+        order.get('price'), order.get('reason')
+    )
+    log.count("orders")
+    metrics.inc(ORDERS_RECEIVED)
+    row = store.add(order, receive_ns)
+    try:
+        keeper.apply_fill(order['symbol'], order['side'], order['quantity'], order['price'])
+    except Exception:
+        # Not open: it would count in open_exposure() for good
+        store.cancel(row, receive_ns, REJECTED)
+        raise
+    store.fill(row, order['quantity'], receive_ns)
+    return True
 
 def handle_client(client_socket: socket.socket):
     """
     Handles a single client connection in a separate thread.
     Listens for messages, deserializes them, and logs them.
+
+    An order is acknowledged once it is booked (or was booked before,
+    for a resend; one the store already holds also counts as an order
+    conflict). One that cannot be decoded, including one of another
+    order message version, counts as a parse error; one that decodes but
+    cannot be booked (e.g. the position book is full) counts as rejected
+    and is not acknowledged, so the Strategy sends it again once its ack
+    is overdue (acks confirm one id each, not the ones before it).
     """
     print(f"[OrderManager] Client connected from {client_socket.getpeername()}")
+    change_client_count(+1)
+    # One decoder per connection, reused for every order
+    codec = get_order_codec()
     
-    # Use our reliable message receiver
+    # Use our reliable frame receiver
     # This loop will run until the client disconnects
-    for message in receive_messages(client_socket):
+    for message in receive_frames(client_socket):
+        if not message:
+            continue  # Heartbeat
+        receive_ns = now_ns()
         try:
-            # Assume the message is JSON, decode it from bytes
-            order = json.loads(message.decode('utf-8'))
-            
-            # Log the trade confirmation
-            print("\n" + "=" * 30)
-            print(f"[OrderManager] Received Trade:")
-            print(f"  Symbol: {order.get('symbol')}")
-            print(f"  Side:   {order.get('side')}")
-            print(f"  Price:  ${order.get('price'):.2f}")
-            print(f"  Qty:    {order.get('quantity')}")
-            print(f"  Reason: {order.get('reason')}")
-            print("=" * 30 + "\n")
-            
-        except json.JSONDecodeError:
-            print(f"[OrderManager] Received malformed data: {message}")
+            order = codec.decode(message)
+        except ValueError as e:
+            metrics.inc(PARSE_ERRORS)
+            log.warning("[OrderManager] Could not decode %r: %s", bytes(message[:16]), e)
+            continue
+
+        client_order_id = order.get('client_order_id')
+        try:
+            if client_order_id and is_duplicate(client_order_id):
+                log.info("[OrderManager] Ignoring resent order %s", client_order_id)
+                log.count("duplicates")
+            else:
+                apply_order(order, receive_ns, keeper, order_store, metrics)
         except Exception as e:
-            print(f"[OrderManager] Error processing message: {e}")
+            if client_order_id:
+                forget_order_id(client_order_id)
+            metrics.inc(ORDERS_REJECTED)
+            log.warning("[OrderManager] Could not book order %s: %s", client_order_id, e)
+            continue
+
+        if client_order_id:
+            try:
+                client_socket.sendall(format_ack_frame(client_order_id))
+            except OSError as e:
+                log.warning("[OrderManager] Could not acknowledge order %s: %s", client_order_id, e)
+
+    change_client_count(-1)
+
+def accept_loop(server_socket):
+    """
+    Accepts strategies on one listening socket and spawns a thread for
+    each client. Several of these can share the port via SO_REUSEPORT.
+    """
+    while True:
+        # Wait for a new client to connect
+        # This line "blocks" (pauses) until a connection happens
+        client_socket, client_address = server_socket.accept()
+        apply_socket_options(client_socket)
+
+        # When a client connects, create a new thread to handle it.
+        # This way, we can handle multiple strategies at once
+        # without the main server loop getting stuck.
+        client_thread = threading.Thread(
+            target=handle_client,
+            args=(client_socket,)
+        )
+        client_thread.daemon = True # Run as a background thread
+        client_thread.start()
 
-def run_ordermanager():
+def run_ordermanager(ready_event=None, owns_positions=True):
     """
     Starts the Order Manager server.
     Listens for connections and spawns a thread for each client.
+
+    Args:
+        ready_event: Optional multiprocessing.Event, set once the order
+            port is listening (used by the main.py supervisor).
+        owns_positions (bool): Unlink the position block on exit. The
+            supervisor passes False: it owns the block, so positions
+            survive an OrderManager restart.
     """
-    server_socket = None
+    global metrics, keeper
+    server_sockets = []
+    positions = None
+    tuning = ProcessTuning("ordermanager")
+    tuning.apply()
+    metrics = SharedMetrics("ordermanager")
+    install_profiler("ordermanager")
     try:
-        # Create a TCP socket
-        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        
-        # This allows us to reuse the address if we restart the server quickly
-        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        
-        # Bind to our host and port
-        server_socket.bind((HOST, ORDER_PORT))
-        
-        # Start listening for connections (allow up to 5 in the queue)
-        server_socket.listen(5)
-        
-        print(f"[OrderManager] Server is live, listening on {HOST}:{ORDER_PORT}...")
+        positions = SharedPositionBook(create=True)
+        keeper = PositionKeeper(positions)
+        threading.Thread(target=mark_loop, args=(keeper,), daemon=True).start()
+
+        address = link_address(ORDER_PORT)
+        unix = parse_address(address).family != socket.AF_INET
+        # One listening socket per acceptor; the kernel spreads new
+        # connections across them when they share the port. Unix sockets
+        # cannot share a path, so there the acceptors share one socket.
+        acceptors = ORDER_ACCEPTORS if SOCKET_REUSEPORT or unix else 1
+        if ORDER_ACCEPTORS > 1 and acceptors == 1:
+            print("[OrderManager] ORDER_ACCEPTORS > 1 needs TRADING_SOCKET_REUSEPORT=1. Using one acceptor.")
+        for _ in range(acceptors):
+            if unix and server_sockets:
+                server_sockets.append(server_sockets[0])
+            else:
+                server_sockets.append(create_server_socket(address))
         
-        while True:
-            # Wait for a new client to connect
-            # This line "blocks" (pauses) until a connection happens
-            client_socket, client_address = server_socket.accept()
-            
-            # When a client connects, create a new thread to handle it.
-            # This way, we can handle multiple strategies at once
-            # without the main server loop getting stuck.
-            client_thread = threading.Thread(
-                target=handle_client, 
-                args=(client_socket,)
-            )
-            client_thread.daemon = True # Run as a background thread
-            client_thread.start()
+        print(f"[OrderManager] Server is live, listening on {address} ({acceptors} acceptor(s))...")
+        tuning.finish_warmup()
+        if ready_event:
+            ready_event.set()
+
+        for server_socket in server_sockets[1:]:
+            threading.Thread(target=accept_loop, args=(server_socket,), daemon=True).start()
+        accept_loop(server_sockets[0])
             
     except OSError as e:
         print(f"[OrderManager] Socket error: {e}")
     except KeyboardInterrupt:
         print("\n[OrderManager] Shutting down...")
     finally:
-        if server_socket:
+        if server_sockets:
             print("[OrderManager] Closing server socket.")
+        print(f"[OrderManager] Order store: {len(order_store)} orders {order_store.state_counts()}")
+        for server_socket in set(server_sockets):
             server_socket.close()
+        if positions is not None:
+            if owns_positions:
+                positions.unlink()
+            positions.close()
 
 if __name__ == "__main__":
     run_ordermanager()
\ No newline at end of file
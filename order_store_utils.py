@@ -0,0 +1,366 @@
+"""
+In-memory order store of the OrderManager.
+
+Every order the OrderManager receives becomes one row of a set of
+preallocated NumPy columns (one array per field), appended in arrival
+order. Next to the columns sit the indexes the queries need:
+
+    client order id -> row              dict, O(1) lookup
+    symbol          -> rows             append-only int64 arrays
+    strategy        -> rows             append-only int64 arrays
+    state           -> open rows        only NEW and PARTIALLY_FILLED
+
+Rows are appended in receive order, so a time range is a binary search
+over the receive_ns column. The columns double when full; rows never
+move.
+
+Writers (the client threads) and readers (risk checks, the position
+keeper, tools) share one lock. Every query returns copies, so a caller
+can keep a result while orders keep arriving.
+"""
+
+import threading
+
+import numpy as np
+
+from config import ORDER_STORE_CAPACITY
+
+# Order states (the value stored in the 'state' column)
+NEW, PARTIALLY_FILLED, FILLED, CANCELED, REJECTED = range(5)
+STATES = ('NEW', 'PARTIALLY_FILLED', 'FILLED', 'CANCELED', 'REJECTED')
+OPEN_STATES = (NEW, PARTIALLY_FILLED)
+
+SIDE_SIGNS = {'BUY': 1, 'SELL': -1}
+SIDE_NAMES = {1: 'BUY', -1: 'SELL'}
+
+COLUMNS = {
+    'client_order_id': np.int64,
+    'strategy_id': np.int32,
+    'symbol_id': np.int32,
+    'side': np.int8,                # +1 buy, -1 sell
+    'state': np.int8,
+    'quantity': np.int64,
+    'filled_quantity': np.int64,
+    'price': np.float64,
+    'timestamp_ns': np.int64,       # When the Strategy decided
+    'receive_ns': np.int64,         # When the OrderManager received it (non-decreasing)
+    'update_ns': np.int64,          # Last state change
+}
+
+
+class _RowList:
+    """[Internal] An append-only int64 array of row numbers that doubles when full."""
+    __slots__ = ('rows', 'count')
+
+    def __init__(self, capacity=64):
+        self.rows = np.empty(capacity, dtype=np.int64)
+        self.count = 0
+
+    def append(self, row):
+        if self.count == len(self.rows):
+            self.rows = np.concatenate([self.rows, np.empty_like(self.rows)])
+        self.rows[self.count] = row
+        self.count += 1
+
+    def copy(self):
+        return self.rows[:self.count].copy()
+
+
+class OrderStore:
+    """
+    Columnar, indexed store of every order of a run.
+    """
+    def __init__(self, capacity=ORDER_STORE_CAPACITY):
+        """
+        Args:
+            capacity (int): Rows to preallocate; the columns double when full.
+        """
+        self.count = 0
+        self.columns = {field: np.zeros(capacity, dtype=dtype) for field, dtype in COLUMNS.items()}
+        self.symbols = []
+        self.symbol_ids = {}
+        self._by_client_id = {}
+        self._by_symbol = {}
+        self._by_strategy = {}
+        # Open rows per open state; dicts keep insertion order and remove in O(1)
+        self._open = {state: {} for state in OPEN_STATES}
+        self._last_receive_ns = 0
+        self._lock = threading.Lock()
+        self._bind_columns()
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def capacity(self):
+        return len(self.columns['state'])
+
+    def _grow(self):
+        """[Internal] Doubles every column, keeping the rows."""
+        for field, column in self.columns.items():
+            grown = np.zeros(2 * len(column), dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            self.columns[field] = grown
+        self._bind_columns()
+
+    def _bind_columns(self):
+        """[Internal] Plain attributes for the columns, saving a dict lookup per field on the hot path."""
+        columns = self.columns
+        self._client_order_id = columns['client_order_id']
+        self._strategy_id = columns['strategy_id']
+        self._symbol_column = columns['symbol_id']
+        self._side = columns['side']
+        self._state = columns['state']
+        self._quantity = columns['quantity']
+        self._filled_quantity = columns['filled_quantity']
+        self._price = columns['price']
+        self._timestamp_ns = columns['timestamp_ns']
+        self._receive_ns = columns['receive_ns']
+        self._update_ns = columns['update_ns']
+
+    def _symbol_id(self, symbol):
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self.symbol_ids[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+        return symbol_id
+
+    # --- Writer side ---
+
+    def add(self, order, receive_ns, state=NEW):
+        """
+        Stores a new order.
+
+        Args:
+            order (dict): The decoded order (symbol, side, quantity, price,
+                and optionally client_order_id, strategy_id, timestamp_ns).
+            receive_ns (int): When the order arrived. Clamped to the last
+                stored receive time, so the column stays sorted when
+                client threads race by a few microseconds.
+            state (int): Initial state.
+
+        Returns:
+            int: The order's row.
+
+        A client_order_id whose order was REJECTED may be added again
+        (its resend); the id then points at the new row, and the old one
+        stays as the rejected attempt.
+
+        Raises:
+            ValueError: For an unknown side, or a client_order_id that is
+                already stored (and not rejected).
+        """
+        side = SIDE_SIGNS.get(order.get('side'))
+        if side is None:
+            raise ValueError(f"Unknown order side {order.get('side')!r}")
+        client_order_id = order.get('client_order_id') or 0
+        strategy_id = order.get('strategy_id') or 0
+        with self._lock:
+            if client_order_id:
+                stored = self._by_client_id.get(client_order_id)
+                if stored is not None and self._state[stored] != REJECTED:
+                    raise ValueError(f"Order {client_order_id} is already stored")
+            if self.count == self.capacity:
+                self._grow()
+            row = self.count
+            receive_ns = max(receive_ns, self._last_receive_ns)
+            self._last_receive_ns = receive_ns
+            symbol_id = self._symbol_id(order['symbol'])
+
+            self._client_order_id[row] = client_order_id
+            self._strategy_id[row] = strategy_id
+            self._symbol_column[row] = symbol_id
+            self._side[row] = side
+            self._state[row] = state
+            self._quantity[row] = order['quantity']
+            self._price[row] = order['price']
+            self._timestamp_ns[row] = order.get('timestamp_ns') or 0
+            self._receive_ns[row] = receive_ns
+            self._update_ns[row] = receive_ns
+            self.count = row + 1
+
+            if client_order_id:
+                self._by_client_id[client_order_id] = row
+            rows = self._by_symbol.get(symbol_id)
+            if rows is None:
+                rows = self._by_symbol[symbol_id] = _RowList()
+            rows.append(row)
+            rows = self._by_strategy.get(strategy_id)
+            if rows is None:
+                rows = self._by_strategy[strategy_id] = _RowList()
+            rows.append(row)
+            if state in self._open:
+                self._open[state][row] = None
+        return row
+
+    def _set_state(self, row, state, now_ns):
+        """[Internal] Moves a row to a new state and keeps the open index current. Holds the lock."""
+        old = self._open.get(int(self._state[row]))
+        if old is not None:
+            old.pop(row, None)
+        new = self._open.get(state)
+        if new is not None:
+            new[row] = None
+        self._state[row] = state
+        self._update_ns[row] = now_ns
+
+    def fill(self, row, quantity, now_ns):
+        """
+        Books a (partial) fill of an open order.
+
+        Returns:
+            int: The order's new state (PARTIALLY_FILLED or FILLED).
+
+        Raises:
+            ValueError: If the order is not open.
+        """
+        with self._lock:
+            self._check_open(row)
+            filled = int(self._filled_quantity[row]) + quantity
+            self._filled_quantity[row] = filled
+            state = FILLED if filled >= self._quantity[row] else PARTIALLY_FILLED
+            self._set_state(row, state, now_ns)
+        return state
+
+    def cancel(self, row, now_ns, state=CANCELED):
+        """
+        Closes an open order without filling the rest (CANCELED or REJECTED).
+
+        Raises:
+            ValueError: If the order is not open.
+        """
+        with self._lock:
+            self._check_open(row)
+            self._set_state(row, state, now_ns)
+
+    def _check_open(self, row):
+        if not 0 <= row < self.count:
+            raise ValueError(f"No order in row {row}")
+        state = int(self._state[row])
+        if state not in self._open:
+            raise ValueError(f"Order in row {row} is {STATES[state]}, not open")
+
+    # --- Reader side ---
+
+    def row_of(self, client_order_id):
+        """
+        Returns:
+            int: The row of a client order id, or None if not stored.
+        """
+        return self._by_client_id.get(client_order_id)
+
+    def get(self, client_order_id):
+        """
+        One order by client order id.
+
+        Returns:
+            dict: The order's fields (symbol, side and state as names),
+            or None if not stored.
+        """
+        with self._lock:
+            row = self._by_client_id.get(client_order_id)
+            if row is None:
+                return None
+            return self._record(row)
+
+    def _record(self, row):
+        record = {field: column.item(row) for field, column in self.columns.items()}
+        record['row'] = row
+        record['symbol'] = self.symbols[record.pop('symbol_id')]
+        record['side'] = SIDE_NAMES[record['side']]
+        record['state'] = STATES[record['state']]
+        return record
+
+    def records(self, rows):
+        """
+        Returns:
+            list: The orders of some rows (from the queries below) as dicts.
+        """
+        with self._lock:
+            return [self._record(int(row)) for row in rows]
+
+    def by_symbol(self, symbol):
+        """
+        Returns:
+            numpy.ndarray: The rows of every order in a symbol, oldest first.
+        """
+        with self._lock:
+            rows = self._by_symbol.get(self.symbol_ids.get(symbol))
+            return rows.copy() if rows is not None else np.empty(0, dtype=np.int64)
+
+    def by_strategy(self, strategy_id):
+        """
+        Returns:
+            numpy.ndarray: The rows of every order of a strategy, oldest first.
+        """
+        with self._lock:
+            rows = self._by_strategy.get(strategy_id)
+            return rows.copy() if rows is not None else np.empty(0, dtype=np.int64)
+
+    def open_orders(self, state=None):
+        """
+        Args:
+            state (int): One of OPEN_STATES, or None for every open order.
+
+        Returns:
+            numpy.ndarray: The rows of the open orders, oldest first.
+        """
+        with self._lock:
+            return self._open_rows(OPEN_STATES if state is None else (state,))
+
+    def _open_rows(self, states):
+        """[Internal] Sorted rows of the open orders in some states. Holds the lock."""
+        open_rows = [self._open[state] for state in states if state in self._open]
+        rows = np.concatenate([np.fromiter(rows, dtype=np.int64, count=len(rows)) for rows in open_rows]
+                              or [np.empty(0, dtype=np.int64)])
+        rows.sort()
+        return rows
+
+    def between(self, start_ns, end_ns):
+        """
+        Returns:
+            numpy.ndarray: The rows received in [start_ns, end_ns), oldest first.
+        """
+        with self._lock:
+            receive_ns = self.columns['receive_ns'][:self.count]
+            first, last = np.searchsorted(receive_ns, (start_ns, end_ns))
+        return np.arange(first, last, dtype=np.int64)
+
+    def column_values(self, rows, fields=None):
+        """
+        The values of some rows, one array per field.
+
+        Args:
+            rows: Row numbers (from the queries above).
+            fields: Field names (see COLUMNS); all of them if None.
+
+        Returns:
+            dict: field -> numpy.ndarray, in the order of rows.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        with self._lock:
+            return {field: self.columns[field][rows] for field in (fields or COLUMNS)}
+
+    def open_exposure(self):
+        """
+        The signed quantity still open per symbol (buys positive, sells
+        negative), what a pre-trade risk check adds to the positions.
+
+        Returns:
+            dict: symbol -> open quantity, for symbols with open orders.
+        """
+        with self._lock:
+            rows = self._open_rows(OPEN_STATES)
+            columns = self.columns
+            remaining = (columns['quantity'][rows] - columns['filled_quantity'][rows]) * columns['side'][rows]
+            totals = np.bincount(columns['symbol_id'][rows], weights=remaining, minlength=len(self.symbols))
+            return {self.symbols[i]: int(totals[i]) for i in np.flatnonzero(totals)}
+
+    def state_counts(self):
+        """
+        Returns:
+            dict: state name -> number of orders in it.
+        """
+        with self._lock:
+            counts = np.bincount(self.columns['state'][:self.count], minlength=len(STATES))
+        return dict(zip(STATES, counts.tolist()))
@@ -1,15 +1,32 @@
 """
 Order Book Process
 
-Connects to the Gateway's price feed as a TCP client.
-It is the *creator* of the SharedPriceBook.
-It receives price data, parses it, and updates the shared memory
-for the Strategy process to read.
+Connects to the price feeds of all venues (one Gateway per port in
+config.VENUE_PORTS) as a client, from a single selector-based
+event loop. It is the *creator* of the SharedPriceBook.
+It receives quotes, parses them, merges them into a consolidated best
+bid / offer and updates the shared memory for the Strategy process to read.
+A new book is warm-started from the last saved snapshot file. With
+config.BOOK_DIR the book lives in files instead, which a restarted
+OrderBook resumes in place; its heartbeat in the book header tells
+readers the prices are live.
+
+With config.PRICE_TRANSPORT = 'multicast' it joins each venue's multicast
+group instead, checks the tick ids for gaps and fetches lost ticks (and a
+snapshot on joining) over the venue's TCP retransmit channel.
+Over TCP, config.PRICE_SUBSCRIPTION limits the quotes each venue sends.
+
+Every book write also moves the rolling indicators of the written rows
+forward (feature_utils.FeatureEngine), right after the prices are
+published, so strategies read SMA / EMA / volatility from shared memory.
 """
 
+import selectors
 import socket
 import time
 
+import numpy as np
+
 # --- Make the "Play Button" work ---
 import sys
 import os
@@ -18,100 +35,589 @@ project_root = os.path.dirname(current_file_path)
 sys.path.insert(0, project_root)
 # --- End of fix ---
 
-from network_utils import receive_messages
+from network_utils import (
+    MessageFramer, parse_tick_header, is_snapshot_header, backoff_delay, TICK_HEADER_PREFIX, send_all, send_subscription,
+    SequenceTracker, create_multicast_receiver, format_recovery_request, start_client_connect,
+    finish_client_connect, link_address,
+)
 from shared_memory_utils import SharedPriceBook
-from config import HOST, PRICE_PORT, SHARED_MEMORY_NAME, SYMBOLS
+from feature_utils import SharedFeatureBook, FeatureEngine
+from consolidation_utils import ConsolidatedQuotes
+from latency_utils import (
+    LatencyTracer, now_ns, hop_name, GATEWAY_SEND, ORDERBOOK_RECEIVE, SHM_WRITE
+)
+from logging_utils import get_logger
+from metrics_utils import SharedMetrics, TICKS_RECEIVED, PARSE_ERRORS, RECONNECTS, SEQUENCE_GAPS
+from profiling_utils import (
+    install_profiler, stage_timers, STAGE_PARSE, STAGE_CONSOLIDATE, STAGE_SHM_WRITE, STAGE_FEATURES
+)
+from tuning_utils import ProcessTuning
+from config import (
+    VENUE_PORTS, VENUE_STALE_AFTER, SHARED_MEMORY_NAME, BOOK_SNAPSHOT_PATH, BOOK_SNAPSHOT_INTERVAL,
+    BOOK_HEARTBEAT_INTERVAL,
+    PRICE_TRANSPORT, MULTICAST_GROUP, RETRANSMIT_PORT_OFFSET, HEARTBEAT_TIMEOUT, PRICE_SUBSCRIPTION,
+    FEATURE_SHM_NAME, MESSAGE_DELIMITER,
+)
+
+log = get_logger("OrderBook")
+
+RECV_BUFFER_SIZE = 65536
+# How often stale venues are swept out of the best bid / offer
+STALE_SWEEP_INTERVAL = 1.0
+# How long a non-blocking venue / recovery connect may take
+CONNECT_TIMEOUT = 1.0
+
+# Moves the rolling indicators forward after each book write (created in run_orderbook)
+feature_engine = None
+
+
+class VenueFeed:
+    """Connection state of one venue's price feed."""
+    def __init__(self, index, port):
+        self.index = index
+        self.port = port
+        self.address = link_address(port)
+        self.name = f"venue{index}({self.address})"
+        self.sock = None
+        self.connect_deadline = None  # Set while a stream connect is in flight
+        self.framer = MessageFramer()
+        self.failures = 0  # Consecutive failed connection attempts
+        self.retry_at = 0.0
+        self.connected_before = False
+        self.last_receive = 0.0  # time.monotonic() of the last chunk (or connect)
+        # Trace of the tick currently being written:
+        # [tick_id, generate_ns, send_ns, receive_ns, write_ns]
+        self.trace = None
+        # Per-venue wire latency, next to the all-venue hop
+        self.receive_hop = f"{hop_name(GATEWAY_SEND, ORDERBOOK_RECEIVE)}@{port}"
+        self.sequence = SequenceTracker()
+        self.missing = []  # (first, last) tick id ranges not yet recovered
+        self.recovery = None  # Recovery in flight, if any
+
+
+class Recovery:
+    """A retransmit / snapshot request in flight on a venue's TCP channel."""
+    def __init__(self, venue, sock, description, request):
+        self.venue = venue
+        self.sock = sock
+        self.description = description
+        self.request = request  # Sent once the connect completes, then None
+        self.connect_deadline = time.monotonic() + CONNECT_TIMEOUT
+        self.framer = MessageFramer()
+        self.ticks = set()
+
+
+def connect_venue(venue, selector):
+    """
+    Starts connecting to one venue and registers it with the event loop.
+    A stream connect is non-blocking: the socket is registered for
+    EVENT_WRITE and finish_venue_connect() completes it, so an unreachable
+    venue never stalls the other feeds. In multicast mode this joins the
+    venue's group and asks for a snapshot.
 
-def run_orderbook():
+    Returns:
+        bool: True if connected now; False while a stream connect is in
+        flight, or if a retry was scheduled.
+    """
+    multicast = PRICE_TRANSPORT == 'multicast'
+    try:
+        if multicast:
+            sock = create_multicast_receiver(MULTICAST_GROUP, venue.port)
+        else:
+            sock = start_client_connect(venue.address)
+    except OSError as e:
+        schedule_retry(venue, f"Could not connect ({e})")
+        return False
+
+    sock.setblocking(False)
+    venue.sock = sock
+    if not multicast:
+        venue.connect_deadline = time.monotonic() + CONNECT_TIMEOUT
+        selector.register(sock, selectors.EVENT_WRITE, venue)
+        return False
+
+    venue_connected(venue)
+    selector.register(sock, selectors.EVENT_READ, venue)
+    print(f"[OrderBook] Joined {venue.name} multicast feed {MULTICAST_GROUP}:{venue.port}.")
+    start_recovery(venue, selector)
+    return True
+
+
+def finish_venue_connect(venue, selector):
+    """
+    Completes a stream connect once its socket is writable and switches
+    it to reading the feed.
+
+    Returns:
+        bool: True if connected; otherwise a retry is scheduled.
+    """
+    try:
+        finish_client_connect(venue.sock)
+        if PRICE_SUBSCRIPTION:
+            send_subscription(venue.sock, PRICE_SUBSCRIPTION)
+    except OSError as e:
+        disconnect_venue(venue, selector, f"Could not connect ({e})")
+        return False
+    venue.connect_deadline = None
+    venue_connected(venue)
+    selector.modify(venue.sock, selectors.EVENT_READ, venue)
+    print(f"[OrderBook] Connected to {venue.name} price feed.")
+    return True
+
+
+def venue_connected(venue):
+    """Resets a venue's feed state for a fresh connection."""
+    venue.framer = MessageFramer()
+    venue.trace = None
+    venue.failures = 0
+    venue.last_receive = time.monotonic()
+    venue.sequence = SequenceTracker()
+    venue.missing = []
+
+
+def has_pending_data(sock):
+    """
+    True if a non-blocking socket has data (or a FIN) waiting. select()
+    can return nothing after a stall, when its timeout expired while the
+    process was not running, so a silent-looking feed is checked here.
+    """
+    try:
+        sock.recv(1, socket.MSG_PEEK)
+    except BlockingIOError:
+        return False
+    except OSError:
+        pass  # The next read reports the error
+    return True
+
+
+def schedule_retry(venue, reason):
+    delay = backoff_delay(venue.failures)
+    venue.failures += 1
+    venue.retry_at = time.monotonic() + delay
+    print(f"[OrderBook] {venue.name}: {reason}. Retrying in {delay:.2f}s...")
+
+
+def disconnect_venue(venue, selector, reason):
+    """Unregisters a venue's socket and schedules a reconnect."""
+    if venue.sock:
+        selector.unregister(venue.sock)
+        venue.sock.close()
+        venue.sock = None
+    venue.connect_deadline = None
+    schedule_retry(venue, reason)
+
+
+def drop_venue(venue, selector, book, quotes, reason):
+    """
+    Disconnects a venue and takes its quotes out of the best bid / offer
+    at once, rather than waiting for them to go stale.
+    """
+    disconnect_venue(venue, selector, reason)
+    quotes.clear_venue(venue.index)
+    rows = np.arange(book.num_symbols)
+    if len(rows):
+        publish_best(book, quotes, rows, now_ns())
+
+
+def start_recovery(venue, selector, first=None, last=None):
+    """
+    Asks the venue's retransmit channel for ticks first..last, or for a
+    snapshot (its latest tick) when no range is given. The answer is read
+    by the event loop like any other feed.
+    """
+    description = f"retransmit of ticks {first}-{last}" if first is not None else "snapshot"
+    try:
+        sock = start_client_connect(link_address(venue.port + RETRANSMIT_PORT_OFFSET))
+    except OSError as e:
+        log.warning("[OrderBook] %s: %s request failed: %s", venue.name, description, e)
+        return
+    venue.recovery = Recovery(venue, sock, description, format_recovery_request(first, last) + MESSAGE_DELIMITER)
+    selector.register(sock, selectors.EVENT_WRITE, venue.recovery)
+
+
+def end_recovery(recovery, selector):
+    selector.unregister(recovery.sock)
+    recovery.sock.close()
+    recovery.venue.recovery = None
+
+
+def send_recovery_request(recovery, selector):
+    """Completes a recovery connect once it is writable and sends the request."""
+    try:
+        finish_client_connect(recovery.sock)
+        send_all(recovery.sock, recovery.request)
+    except OSError as e:
+        end_recovery(recovery, selector)
+        log.warning("[OrderBook] %s: %s request failed: %s", recovery.venue.name, recovery.description, e)
+        return
+    recovery.request = None
+    recovery.connect_deadline = None
+    selector.modify(recovery.sock, selectors.EVENT_READ, recovery)
+
+
+def handle_recovery(recovery, selector, book, quotes, tracer, metrics):
+    """Reads (part of) the answer to a recovery request and merges it."""
+    venue = recovery.venue
+    if recovery.request is not None:
+        send_recovery_request(recovery, selector)
+        return
+    try:
+        chunk = recovery.sock.recv(RECV_BUFFER_SIZE)
+    except BlockingIOError:
+        return
+    except OSError as e:
+        chunk = b""
+        log.warning("[OrderBook] %s: recovery receive error: %s", venue.name, e)
+
+    if not chunk:
+        # The Gateway closes the connection once it has answered
+        end_recovery(recovery, selector)
+        log.info("[OrderBook] %s: %s done, %d tick(s) received.",
+                 venue.name, recovery.description, len(recovery.ticks))
+        return
+
+    receive_ns = now_ns()
+    fragments = recovery.framer.feed(chunk)
+    indices, bids, asks, seqs = parse_fragments(
+        venue, fragments, book, tracer, metrics, receive_ns, live=False
+    )
+    recovery.ticks.update(seqs)
+    if not indices:
+        return
+    quotes.ensure_capacity(book.capacity)
+    indices = quotes.set_quotes(
+        venue.index, np.array(indices, dtype=np.intp), bids, asks, receive_ns, seqs, recovered=True
+    )
+    if len(indices):
+        publish_best(book, quotes, indices, receive_ns)
+
+
+def parse_fragments(venue, fragments, book, tracer, metrics, receive_ns, live=True):
+    """
+    Parses one recv() worth of fragments from a venue.
+
+    The Gateway sends "#tick_id,generate_ns,send_ns*AAPL,bid,ask*MSFT,bid,ask"
+    and our delimiter is also the separator, so every fragment arrives on
+    its own. "SYMBOL,PRICE" (no spread) is accepted as well. A snapshot
+    (header flagged ",S") is merged like a tick but not traced.
+
+    Args:
+        live: False for ticks fetched again after a gap; those are
+            neither traced nor checked for gaps.
+
+    Returns:
+        tuple: (indices, bids, asks, seqs) lists for the quotes in the
+        batch; seqs holds the tick id of each quote.
+    """
+    indices, bids, asks, seqs = [], [], [], []
+    # Quotes before the first header belong to the tick the last batch started
+    seq = venue.sequence.last_seq if live else 0
+    for fragment in fragments:
+        if not fragment:
+            continue
+        try:
+            update_str = fragment.decode('utf-8')
+
+            # A "#tick_id,generate_ns,send_ns" header starts a new tick
+            if update_str.startswith(TICK_HEADER_PREFIX):
+                tick_id, generate_ns, send_ns = parse_tick_header(update_str)
+                seq = tick_id
+                if not live:
+                    continue
+                gap = venue.sequence.observe(tick_id)
+                if gap:
+                    venue.missing.append(gap)
+                    metrics.inc(SEQUENCE_GAPS, gap[1] - gap[0] + 1)
+                    log.warning("[OrderBook] %s: missed tick(s) %d-%d", venue.name, *gap)
+                if is_snapshot_header(update_str):
+                    venue.trace = None
+                    log.info("[OrderBook] %s: snapshot at tick %d", venue.name, tick_id)
+                    continue
+                venue.trace = [tick_id, generate_ns, send_ns, receive_ns, 0]
+                tracer.record(hop_name(GATEWAY_SEND, ORDERBOOK_RECEIVE), send_ns, receive_ns)
+                tracer.record(venue.receive_hop, send_ns, receive_ns)
+                metrics.inc(TICKS_RECEIVED)
+                metrics.observe(receive_ns - send_ns)
+                continue
+
+            # Parse the individual "SYMBOL,BID,ASK" string
+            parse_start_ns = now_ns()
+            fields = update_str.split(',')
+            if len(fields) == 3:
+                bid, ask = float(fields[1]), float(fields[2])
+            elif len(fields) == 2:
+                bid = ask = float(fields[1])
+            else:
+                raise ValueError(f"expected 2 or 3 fields, got {len(fields)}")
+            symbol = fields[0]
+            idx = book.symbol_to_index.get(symbol)
+            if idx is None:
+                idx = book.add_symbol(symbol)
+            indices.append(idx)
+            bids.append(bid)
+            asks.append(ask)
+            seqs.append(seq)
+            stage_timers.add(STAGE_PARSE, now_ns() - parse_start_ns)
+
+        except (ValueError, IndexError, UnicodeDecodeError) as e:
+            metrics.inc(PARSE_ERRORS)
+            log.warning("[OrderBook] %s: error parsing data: %s. Data: '%s'", venue.name, e, fragment)
+    return indices, bids, asks, seqs
+
+
+def publish_best(book, quotes, indices, now, engine=None):
+    """
+    Merges the venues for the given rows and writes them to shared memory.
+    engine is the FeatureEngine to move forward; None for this process's
+    (the simulation passes its own).
+    """
+    consolidate_start_ns = now_ns()
+    best_bids, best_asks = quotes.best(indices, now)
+    write_start_ns = now_ns()
+    stage_timers.add(STAGE_CONSOLIDATE, write_start_ns - consolidate_start_ns)
+
+    # 4. Update the "bulletin board"
+    book.update_quotes(indices, best_bids, best_asks)
+    write_end_ns = now_ns()
+    stage_timers.add(STAGE_SHM_WRITE, write_end_ns - write_start_ns)
+    update_features(indices, best_bids, best_asks, write_end_ns, engine)
+    return write_end_ns
+
+
+def update_features(indices, bids, asks, now, engine=None):
+    """Adds the new mids to the rolling indicators (after the prices are out)."""
+    if engine is None:
+        engine = feature_engine
+    if engine is None:
+        return
+    start_ns = now_ns()
+    engine.update(indices, (bids + asks) * 0.5, now)
+    stage_timers.add(STAGE_FEATURES, now_ns() - start_ns)
+
+
+def sweep_stale(book, quotes, venues):
+    """
+    Rewrites the rows whose best bid / offer changed because a venue's
+    quotes went stale, and publishes each venue's age.
+    """
+    now = now_ns()
+    rows = np.arange(book.num_symbols)
+    best_bids, best_asks = quotes.best(rows, now)
+    changed = ~(np.isclose(best_bids, book.bids[:book.num_symbols], equal_nan=True)
+                & np.isclose(best_asks, book.asks[:book.num_symbols], equal_nan=True))
+    if changed.any():
+        rows = rows[changed]
+        book.update_quotes(rows, best_bids[changed], best_asks[changed])
+        update_features(rows, best_bids[changed], best_asks[changed], now)
+        log.info("[OrderBook] Best bid / offer of %d symbol(s) changed by stale venues.", len(rows))
+
+    for venue, age_ns in zip(venues, quotes.venue_age_ns(now)):
+        log.gauge(f"{venue.name}_age_ms", f"{age_ns / 1e6:.0f}" if age_ns >= 0 else "never")
+
+
+def warm_start(book):
+    """Fills a newly created book from the last saved snapshot, if any."""
+    if not BOOK_SNAPSHOT_PATH:
+        return
+    load_start_ns = now_ns()
+    restored, age = book.load_snapshot(BOOK_SNAPSHOT_PATH)
+    if restored:
+        print(f"[OrderBook] Warm start: {restored} price(s) from {BOOK_SNAPSHOT_PATH} "
+              f"({age:.1f}s old) in {(now_ns() - load_start_ns) / 1e6:.1f} ms.")
+
+
+def save_snapshot(book):
+    """Saves the book for the next warm start; a failure is only logged."""
+    try:
+        book.save_snapshot(BOOK_SNAPSHOT_PATH)
+    except OSError as e:
+        log.warning("[OrderBook] Could not save snapshot to %s: %s", BOOK_SNAPSHOT_PATH, e)
+
+
+def run_orderbook(ready_event=None, owns_shared_memory=True):
     """
     Main function for the OrderBook.
-    - Creates the SharedPriceBook
-    - Connects to the Gateway's price feed
-    - Loops forever, updating shared memory with new prices
+    - Creates the SharedPriceBook and the SharedFeatureBook
+    - Connects to every venue's price feed
+    - Loops forever, merging their quotes into the shared memory
+
+    Args:
+        ready_event: Optional multiprocessing.Event, set once the
+            SharedPriceBook exists (used by the main.py supervisor).
+        owns_shared_memory: If False, someone else (the supervisor) owns
+            the book and the feature block, so they are left in place on
+            exit to stay warm for the next OrderBook.
     """
-    
+    global feature_engine
+
     print("[OrderBook] Starting...")
     book = None
-    client_socket = None
+    features = None
+    selector = selectors.DefaultSelector()
+    venues = [VenueFeed(i, port) for i, port in enumerate(VENUE_PORTS)]
+    tracer = LatencyTracer("orderbook")
+    metrics = SharedMetrics("orderbook")
+    install_profiler("orderbook")
+    tuning = ProcessTuning("orderbook")
+    tuning.apply()
+    warmed_up = False
 
     try:
         # 1. Create the SharedPriceBook (as the creator)
         # This is the "bulletin board"
         book = SharedPriceBook(name=SHARED_MEMORY_NAME, create=True)
         print(f"[OrderBook] SharedPriceBook '{SHARED_MEMORY_NAME}' created.")
-        
-        while True: # Main loop for connection retries
-            try:
-                # 2. Connect to the Gateway's price feed
-                client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                print(f"[OrderBook] Attempting to connect to Gateway at {HOST}:{PRICE_PORT}...")
-                client_socket.connect((HOST, PRICE_PORT))
-                print("[OrderBook] Connected to Gateway price feed.")
-
-                # 3. Loop forever, receiving and processing messages
-                # Our utility function handles all the buffering
-                for message_block in receive_messages(client_socket):
-                    
-                    # The Gateway sends all symbols in one block, e.g. "AAPL,150*MSFT,300"
-                    # We must split them by the delimiter (which is also '*')
-                    # This is a bit of a quirk since our delimiter is also the separator.
-                    # A better protocol would use a different separator, but this works.
-                    
-                    # receive_messages() already yields one message at a time.
-                    # But our gateway *builds* one message with delimiters inside it.
-                    # Let's handle both cases.
-                    
-                    try:
-                        decoded_block = message_block.decode('utf-8')
-                        
-                        # Split by '*' just in case gateway sent "AAPL,150*MSFT,300"
-                        # as a single message payload (which it does)
-                        individual_updates = decoded_block.split('*')
-                        
-                        for update_str in individual_updates:
-                            if not update_str:
-                                continue
-                                
-                            # Parse the individual "SYMBOL,PRICE" string
-                            symbol, price_str = update_str.split(',')
-                            price = float(price_str)
-                            
-                            # 4. Update the "bulletin board"
-                            book.update(symbol, price)
-                            print(f"[OrderBook] Updated {symbol} -> ${price:.2f}", end=' | ')
-                        
-                        print() # Newline after a full batch of updates
-
-                    except (ValueError, IndexError) as e:
-                        print(f"\n[OrderBook] Error parsing data: {e}. Data: '{message_block}'")
-                    except Exception as e:
-                        print(f"\n[OrderBook] Generic error processing message: {e}")
-
-            except ConnectionRefusedError:
-                print("[OrderBook] Connection refused. Is Gateway running? Retrying in 5s...")
-                time.sleep(5)
-            except (ConnectionResetError, BrokenPipeError):
-                print("[OrderBook] Gateway disconnected. Retrying in 5s...")
-                time.sleep(5)
-            except Exception as e:
-                print(f"[OrderBook] An unexpected error occurred: {e}. Retrying in 5s...")
-                time.sleep(5)
-            finally:
-                if client_socket:
-                    client_socket.close()
-                    client_socket = None # Ensure we create a new socket
-    
+        if book.created:
+            warm_start(book)
+        book.heartbeat()  # Readers see a live writer from here on
+        quotes = ConsolidatedQuotes(len(venues), book.capacity, int(VENUE_STALE_AFTER * 1e9))
+        features = SharedFeatureBook(create=True)
+        feature_engine = FeatureEngine(features, book)
+        print(f"[OrderBook] SharedFeatureBook '{FEATURE_SHM_NAME}' ready (windows {list(features.windows)}).")
+        if ready_event:
+            ready_event.set()
+        print(f"[OrderBook] Consolidating {len(venues)} venue(s): {', '.join(v.name for v in venues)}")
+
+        next_sweep = time.monotonic() + STALE_SWEEP_INTERVAL
+        next_snapshot = time.monotonic() + BOOK_SNAPSHOT_INTERVAL
+        next_heartbeat = time.monotonic() + BOOK_HEARTBEAT_INTERVAL
+
+        def on_connected(venue):
+            nonlocal warmed_up
+            if venue.connected_before:
+                metrics.inc(RECONNECTS)
+            venue.connected_before = True
+            if not warmed_up:
+                tuning.finish_warmup()
+                warmed_up = True
+
+        while True:
+            # 2. (Re)connect to any venue that is due; stream connects
+            # complete in the event loop below
+            now = time.monotonic()
+            for venue in venues:
+                if venue.sock is None and now >= venue.retry_at:
+                    if connect_venue(venue, selector):
+                        on_connected(venue)
+                elif venue.connect_deadline is not None and now >= venue.connect_deadline:
+                    disconnect_venue(venue, selector, f"Connect timed out after {CONNECT_TIMEOUT:.1f}s")
+                recovery = venue.recovery
+                if recovery is not None and recovery.connect_deadline is not None and now >= recovery.connect_deadline:
+                    end_recovery(recovery, selector)
+                    log.warning("[OrderBook] %s: %s request failed: connect timed out", venue.name, recovery.description)
+
+            now = time.monotonic()
+            if now >= next_sweep:
+                sweep_stale(book, quotes, venues)
+                next_sweep = now + STALE_SWEEP_INTERVAL
+            if BOOK_SNAPSHOT_PATH and now >= next_snapshot:
+                save_snapshot(book)
+                next_snapshot = now + BOOK_SNAPSHOT_INTERVAL
+            if now >= next_heartbeat:
+                book.heartbeat()
+                next_heartbeat = now + BOOK_HEARTBEAT_INTERVAL
+
+            live_streams = [v for v in venues if v.sock is not None and v.connect_deadline is None
+                            and PRICE_TRANSPORT != 'multicast']
+
+            # Sleep until data arrives, a reconnect is due, a feed times out
+            # or the next sweep
+            wake_at = min([next_sweep, next_heartbeat]
+                          + [v.retry_at for v in venues if v.sock is None]
+                          + [v.connect_deadline for v in venues if v.connect_deadline is not None]
+                          + [v.recovery.connect_deadline for v in venues
+                             if v.recovery is not None and v.recovery.connect_deadline is not None]
+                          + [v.last_receive + HEARTBEAT_TIMEOUT for v in live_streams if v.sock is not None])
+            events = selector.select(timeout=max(0.0, wake_at - time.monotonic()))
+            selected_at = time.monotonic()
+            ready = set()
+
+            # 3. Handle every venue that has data
+            for key, _ in events:
+                ready.add(key.data)
+                if isinstance(key.data, Recovery):
+                    handle_recovery(key.data, selector, book, quotes, tracer, metrics)
+                    continue
+                venue = key.data
+                if venue.connect_deadline is not None:
+                    if finish_venue_connect(venue, selector):
+                        on_connected(venue)
+                    continue
+                try:
+                    chunk = venue.sock.recv(RECV_BUFFER_SIZE)
+                except BlockingIOError:
+                    continue
+                except OSError as e:
+                    chunk = b""
+                    log.warning("[OrderBook] %s: receive error: %s", venue.name, e)
+
+                if not chunk:
+                    drop_venue(venue, selector, book, quotes, "Gateway disconnected")
+                    continue
+
+                venue.last_receive = time.monotonic()
+                receive_ns = now_ns()
+                fragments = venue.framer.feed(chunk)
+                indices, bids, asks, seqs = parse_fragments(venue, fragments, book, tracer, metrics, receive_ns)
+                if venue.missing and venue.recovery is None:
+                    if PRICE_TRANSPORT == 'multicast':
+                        # One request covers every gap seen so far
+                        start_recovery(venue, selector, venue.missing[0][0], venue.missing[-1][1])
+                    venue.missing.clear()
+                if not indices:
+                    continue
+
+                quotes.ensure_capacity(book.capacity)
+                indices = np.array(indices, dtype=np.intp)
+                quotes.set_quotes(venue.index, indices, bids, asks, receive_ns, seqs)
+                write_end_ns = publish_best(book, quotes, indices, receive_ns)
+
+                trace = venue.trace
+                if trace is not None:
+                    if not trace[4]:
+                        # First write of this tick
+                        tracer.record(hop_name(ORDERBOOK_RECEIVE, SHM_WRITE), trace[3], write_end_ns)
+                    trace[4] = write_end_ns
+                    book.write_trace(*trace)
+                log.debug("[OrderBook] %s: %d quote(s) merged", venue.name, len(indices))
+                log.count("updates", len(indices))
+
+            # 4. A stream feed sends at least a heartbeat every HEARTBEAT_INTERVAL;
+            # silence means the Gateway hung or the link died without a FIN.
+            # Only a feed with nothing to read counts as silent, so a stall of
+            # this loop (snapshot, recovery, the process being descheduled)
+            # does not drop venues whose data is waiting in the socket buffer.
+            for venue in live_streams:
+                if venue in ready or venue.sock is None:
+                    continue
+                silent = selected_at - venue.last_receive
+                if silent > HEARTBEAT_TIMEOUT and not has_pending_data(venue.sock):
+                    drop_venue(venue, selector, book, quotes,
+                               f"No data or heartbeat for {silent * 1000:.0f} ms")
+
     except KeyboardInterrupt:
         print("\n[OrderBook] Shutting down...")
     finally:
         # 5. CRITICAL: Clean up the shared memory
+        for venue in venues:
+            if venue.sock:
+                venue.sock.close()
+            if venue.recovery:
+                venue.recovery.sock.close()
+        selector.close()
+        feature_engine = None
+        if features:
+            if owns_shared_memory:
+                features.unlink()
+            features.close()
         if book:
-            print("[OrderBook] Unlinking shared memory...")
-            book.unlink() # Destroy the "bulletin board"
+            if BOOK_SNAPSHOT_PATH:
+                save_snapshot(book)
+            if owns_shared_memory:
+                print("[OrderBook] Unlinking shared memory...")
+                book.unlink() # Destroy the "bulletin board"
             book.close()
             print("[OrderBook] Closed.")
-        if client_socket:
-            client_socket.close()
 
 if __name__ == "__main__":
-    run_orderbook()
\ No newline at end of file
+    run_orderbook()
@@ -0,0 +1,365 @@
+"""
+Positions and PnL, kept in shared memory.
+
+The OrderManager is the only writer: every order it receives counts as
+filled at the order's price and goes through PositionKeeper.apply_fill().
+Whenever the price book moves, PositionKeeper.mark_to_market() values the
+whole portfolio against the SharedPriceBook mids in one vectorized pass.
+Strategies and risk tools attach a SharedPositionBook and read positions
+and PnL straight from memory, without asking anyone.
+
+Layout of the block (one contiguous array per field, so the mark is a
+handful of whole-array NumPy operations):
+    header      int64 [6]   version, num_symbols, capacity, fills,
+                            book_version, mark_ns
+                float64 [4] realized, unrealized, gross and net exposure
+    symbols     S10 [capacity]
+    quantity    int64 [capacity]    signed: > 0 long, < 0 short
+    avg_price   float64 [capacity]  average entry price of the open quantity
+    realized_pnl, unrealized_pnl, mark   float64 [capacity]
+
+A symbol without a price yet has a NaN mark and is valued at its average
+price (no unrealized PnL, exposure at cost).
+
+Readers get consistent copies through a sequence lock: the writer makes
+'version' odd while it writes and even again when done, and a reader
+retries until it saw the same even version before and after copying.
+"""
+
+import threading
+
+import numpy as np
+
+from config import POSITION_SHM_NAME, POSITION_CAPACITY
+from latency_utils import now_ns
+from shared_memory_utils import SeqlockBlock, symbols_bytes, MAX_SYMBOL_BYTES
+
+POSITION_HEADER_BYTES = 128
+
+# Slots of the int64 header
+VERSION, NUM_SYMBOLS, CAPACITY, FILLS, BOOK_VERSION, MARK_NS = range(6)
+COUNTER_FIELDS = ('version', 'num_symbols', 'capacity', 'fills', 'book_version', 'mark_ns')
+TOTALS_OFFSET = 64  # float64 totals follow the counters
+
+# Slots of the float64 totals
+REALIZED, UNREALIZED, GROSS, NET = range(4)
+TOTAL_FIELDS = ('realized_pnl', 'unrealized_pnl', 'gross_exposure', 'net_exposure')
+
+ROW_FIELDS = ('quantity', 'avg_price', 'realized_pnl', 'unrealized_pnl', 'mark')
+
+
+def position_block_size(capacity):
+    """Bytes of a position block with room for capacity symbols."""
+    return POSITION_HEADER_BYTES + symbols_bytes(capacity) + len(ROW_FIELDS) * 8 * capacity
+
+
+class SharedPositionBook(SeqlockBlock):
+    """
+    The shared-memory block holding every position and the portfolio
+    totals. Rows are appended as symbols are first traded and never move.
+    """
+    KIND = 'Positions'
+    HEADER_SLOTS = len(COUNTER_FIELDS)
+    HEADER_BYTES = POSITION_HEADER_BYTES
+
+    def __init__(self, name=POSITION_SHM_NAME, create=False, capacity=POSITION_CAPACITY):
+        """
+        Args:
+            name (str): The shared memory block name.
+            create (bool): Create the block (or attach to a leftover one)
+                as the writer; False attaches read-only. A leftover block
+                keeps the positions where they were.
+            capacity (int): Number of symbol rows (fixed for the block's life).
+
+        Raises:
+            FileNotFoundError: If a reader attaches before the block exists.
+            ValueError: If the block has an unexpected size.
+        """
+        super().__init__(name, create, position_block_size(capacity))
+        self.counters = self.header
+        self.totals = np.ndarray((len(TOTAL_FIELDS),), dtype=np.float64, buffer=self.shm.buf,
+                                 offset=TOTALS_OFFSET)
+        if self.created:
+            self.counters[:] = 0
+            self.counters[CAPACITY] = capacity
+            self.totals[:] = 0.0
+        self.capacity = int(self.counters[CAPACITY])
+        self.check_size(position_block_size(self.capacity))
+
+        offset = self.map_symbols(self.capacity)
+        self.columns = {}
+        for field in ROW_FIELDS:
+            dtype = np.int64 if field == 'quantity' else np.float64
+            self.columns[field] = np.ndarray((self.capacity,), dtype=dtype, buffer=self.shm.buf, offset=offset)
+            offset += 8 * self.capacity
+        # Plain views for the writer's hot path
+        self.quantity = self.columns['quantity']
+        self.avg_price = self.columns['avg_price']
+        self.realized = self.columns['realized_pnl']
+        self.unrealized = self.columns['unrealized_pnl']
+        self.marks = self.columns['mark']
+        self.finish_attach()
+
+    def repair(self):
+        """
+        The interrupted fill or mark may have left a row and the totals
+        half updated: make the totals agree with the rows again.
+        """
+        self.revalue()
+
+    # --- Writer side ---
+
+    def revalue(self):
+        """
+        Recomputes every row's unrealized PnL from its quantity, average
+        price and mark, and all the totals from the rows (writer only,
+        between begin_write() and end_write()). The fill count cannot be
+        rebuilt and is left as it is.
+        """
+        n = self.num_symbols
+        quantity = self.quantity[:n]
+        avg = self.avg_price[:n]
+        marks = self.marks[:n]
+        valuation = np.where(np.isnan(marks), avg, marks)
+        value = quantity * valuation
+        unrealized = self.unrealized[:n]
+        np.subtract(value, quantity * avg, out=unrealized)
+
+        totals = self.totals
+        totals[REALIZED] = self.realized[:n].sum()
+        totals[UNREALIZED] = unrealized.sum()
+        totals[GROSS] = np.abs(value).sum()
+        totals[NET] = value.sum()
+
+    # --- Reader side ---
+
+    def snapshot(self, retries=1000):
+        """
+        A consistent copy of every position and the totals.
+
+        Returns:
+            dict: 'symbols' (list), 'quantity', 'avg_price', 'realized_pnl',
+            'unrealized_pnl', 'mark' (arrays, one entry per symbol),
+            'totals' (dict of TOTAL_FIELDS), 'fills', 'book_version' and
+            'mark_ns'.
+
+        Raises:
+            RuntimeError: If the writer never paused long enough to copy.
+        """
+        def read():
+            counters = self.counters.copy()
+            n = int(counters[NUM_SYMBOLS])
+            columns = {field: column[:n].copy() for field, column in self.columns.items()}
+            return counters, self.totals.copy(), self.symbols[:n].tolist(), columns
+
+        counters, totals, symbols, columns = self.consistent_read(read, retries)
+        result = columns
+        result['symbols'] = [raw.decode('utf-8') for raw in symbols]
+        result['totals'] = dict(zip(TOTAL_FIELDS, totals.tolist()))
+        result['fills'] = int(counters[FILLS])
+        result['book_version'] = int(counters[BOOK_VERSION])
+        result['mark_ns'] = int(counters[MARK_NS])
+        return result
+
+    def position(self, symbol):
+        """
+        One symbol's position.
+
+        Returns:
+            dict: quantity, avg_price, realized_pnl, unrealized_pnl and
+            mark, or None if the symbol was never traded.
+        """
+        snapshot = self.snapshot()
+        if symbol not in snapshot['symbols']:
+            return None
+        row = snapshot['symbols'].index(symbol)
+        return {field: snapshot[field][row].item() for field in ROW_FIELDS}
+
+    def close(self):
+        self.counters = self.totals = None
+        self.columns = {}
+        self.quantity = self.avg_price = self.realized = self.unrealized = self.marks = None
+        super().close()
+
+
+class PositionKeeper:
+    """
+    Applies fills and marks to market, writing into a SharedPositionBook.
+
+    Quantities are signed and the cost basis is the average entry price.
+    A fill that reduces a position realizes (fill - average) on the closed
+    quantity; one that crosses zero opens the rest at the fill price.
+    """
+    def __init__(self, positions, price_book=None):
+        """
+        Args:
+            positions (SharedPositionBook): The block to write (create=True).
+            price_book (SharedPriceBook): Marks come from its mids; can be
+                attached later with attach_price_book().
+        """
+        self.positions = positions
+        self.price_book = price_book
+        # Fills come from every OrderManager client thread, marks from another.
+        # Both use the price book, which remaps itself on a new generation:
+        # touch it only while holding this lock.
+        self.lock = threading.Lock()
+        self.symbol_to_row = {
+            symbol: row for row, symbol in enumerate(positions.snapshot()['symbols'])
+        }
+        # Position row -> price book row (-1: not in the book), rebuilt on change
+        self._price_rows = None
+        self._price_rows_key = None
+        self._known = None
+        self._all_known = True
+
+    def attach_price_book(self, price_book):
+        with self.lock:
+            self.price_book = price_book
+            self._price_rows = None
+
+    def _row_for(self, symbol):
+        row = self.symbol_to_row.get(symbol)
+        if row is not None:
+            return row
+        positions = self.positions
+        row = positions.num_symbols
+        if row >= positions.capacity:
+            raise ValueError(f"Position book is full ({positions.capacity} symbols); raise POSITION_CAPACITY.")
+        encoded = symbol.encode('utf-8')
+        if len(encoded) > MAX_SYMBOL_BYTES:
+            raise ValueError(f"Symbol '{symbol}' is longer than {MAX_SYMBOL_BYTES} bytes.")
+        positions.symbols[row] = encoded
+        positions.quantity[row] = 0
+        positions.avg_price[row] = positions.realized[row] = positions.unrealized[row] = 0.0
+        positions.marks[row] = np.nan
+        positions.counters[NUM_SYMBOLS] = row + 1
+        self.symbol_to_row[symbol] = row
+        return row
+
+    def _current_mark(self, symbol, row):
+        """[Internal] The symbol's mid if it has one, else its last mark."""
+        book = self.price_book
+        if book is not None:
+            book.refresh()  # Follow the OrderBook adding symbols or growing the book
+            index = book.symbol_to_index.get(symbol)
+            if index is not None:
+                price = float(book.prices[index])
+                if price > 0:
+                    return price
+        return float(self.positions.marks[row])
+
+    def apply_fill(self, symbol, side, quantity, price):
+        """
+        Books one fill and revalues that symbol at its current mark.
+
+        Args:
+            symbol (str): The symbol traded.
+            side (str): 'BUY' or 'SELL'.
+            quantity (int): Filled quantity (> 0).
+            price (float): Fill price.
+
+        Returns:
+            float: PnL realized by this fill.
+
+        Raises:
+            ValueError: For a bad side or quantity, or a full position book.
+        """
+        if side not in ('BUY', 'SELL') or quantity <= 0:
+            raise ValueError(f"Cannot apply fill: side={side!r} quantity={quantity!r}")
+        signed = quantity if side == 'BUY' else -quantity
+        positions = self.positions
+        with self.lock:
+            positions.begin_write()
+            try:
+                row = self._row_for(symbol)
+                held = int(positions.quantity[row])
+                avg = float(positions.avg_price[row])
+                old_mark = float(positions.marks[row])
+                old_value = held * (avg if old_mark != old_mark else old_mark)  # NaN: valued at cost
+                old_unrealized = float(positions.unrealized[row])
+
+                realized = 0.0
+                new_held = held + signed
+                if held == 0 or (held > 0) == (signed > 0):
+                    # Opening or adding: new average entry price
+                    avg = (avg * abs(held) + price * quantity) / abs(new_held)
+                else:
+                    closed = min(quantity, abs(held))
+                    realized = closed * (price - avg) * (1 if held > 0 else -1)
+                    if new_held == 0:
+                        avg = 0.0
+                    elif (new_held > 0) != (held > 0):
+                        avg = price  # Crossed zero: the rest opens here
+
+                mark = self._current_mark(symbol, row)
+                valuation = avg if mark != mark else mark
+                value = new_held * valuation
+                unrealized = new_held * (valuation - avg)
+                positions.quantity[row] = new_held
+                positions.avg_price[row] = avg
+                positions.realized[row] += realized
+                positions.marks[row] = mark
+                positions.unrealized[row] = unrealized
+
+                # Only this row changed: adjust the totals instead of summing everything
+                totals = positions.totals
+                totals[REALIZED] += realized
+                totals[UNREALIZED] += unrealized - old_unrealized
+                totals[GROSS] += abs(value) - abs(old_value)
+                totals[NET] += value - old_value
+                positions.counters[FILLS] += 1
+            finally:
+                positions.end_write()
+        return realized
+
+    def _price_row_map(self, num_symbols):
+        """
+        [Internal] Position rows -> price book rows, cached until either
+        side adds symbols.
+
+        Returns:
+            tuple: (rows, all_known); unknown symbols map to row 0 and are
+            masked out when all_known is False.
+        """
+        book = self.price_book
+        book.refresh()
+        key = (num_symbols, book.generation, book.num_symbols)
+        if self._price_rows is None or key != self._price_rows_key:
+            symbols = self.positions.symbols[:num_symbols].tolist()
+            rows = np.array([book.symbol_to_index.get(raw.decode('utf-8'), -1) for raw in symbols], dtype=np.intp)
+            self._known = rows >= 0
+            self._all_known = bool(self._known.all())
+            self._price_rows = np.where(self._known, rows, 0)
+            self._price_rows_key = key
+        return self._price_rows, self._all_known
+
+    def mark_to_market(self, book_version=0):
+        """
+        Values every position at the current SharedPriceBook mids, in one
+        vectorized pass, and recomputes the totals from scratch.
+
+        Args:
+            book_version (int): The price book version the marks belong to.
+
+        Returns:
+            float: Total unrealized PnL.
+        """
+        positions = self.positions
+        with self.lock:
+            positions.begin_write()
+            try:
+                n = positions.num_symbols
+                if self.price_book is not None and n:
+                    price_rows, all_known = self._price_row_map(n)
+                    mids = self.price_book.prices[price_rows]
+                    if not all_known:
+                        mids[~self._known] = np.nan
+                    marks = positions.marks[:n]
+                    # 0.0 = never quoted, NaN = not in the book: keep the last mark
+                    np.copyto(marks, mids, where=mids > 0)
+                    positions.revalue()
+                positions.counters[BOOK_VERSION] = book_version
+                positions.counters[MARK_NS] = now_ns()
+                return float(positions.totals[UNREALIZED])
+            finally:
+                positions.end_write()
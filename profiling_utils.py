@@ -0,0 +1,197 @@
+"""
+Opt-in profiling for the trading system processes.
+
+Provides:
+- SamplingProfiler: signal-based stack sampling of every thread in the
+  process for N seconds, written out as collapsed stacks
+  ("frame;frame;frame count" per line) for flamegraph.pl or speedscope.
+- StageTimers: cheap per-stage timers for the hot path (parse, shared
+  memory write, strategy decision), summarised next to each profile.
+
+A process calls install_profiler() once from its main thread. Profiling
+then starts when:
+- TRADING_PROFILE_SECONDS=N is set in the environment (profiles the
+  first N seconds), or
+- the process receives SIGUSR1 (profiles the next PROFILE_SECONDS).
+"""
+
+import os
+import signal
+import sys
+import threading
+import time
+
+from config import PROFILE_DIR, PROFILE_SECONDS, PROFILE_START_SECONDS, PROFILE_SAMPLE_INTERVAL
+from latency_utils import LatencyHistogram
+from logging_utils import get_logger
+
+log = get_logger("Profiler")
+
+# --- Hot-path stages ---
+STAGE_PARSE = 'parse'
+STAGE_CONSOLIDATE = 'consolidate'
+STAGE_SHM_WRITE = 'shm_write'
+STAGE_FEATURES = 'features'
+STAGE_DECISION = 'decision'
+
+
+class StageTimers:
+    """
+    Per-process latency histograms for named hot-path stages.
+
+    Usage:
+        start = now_ns()
+        ... parse ...
+        stage_timers.add(STAGE_PARSE, now_ns() - start)
+    """
+    def __init__(self):
+        self.histograms = {}
+
+    def add(self, stage, elapsed_ns):
+        """Records how long one pass through a stage took."""
+        hist = self.histograms.get(stage)
+        if hist is None:
+            hist = self.histograms[stage] = LatencyHistogram()
+        hist.record(elapsed_ns)
+
+    def summary(self):
+        """Returns one line per stage with count and p50/p99/p99.9 in microseconds."""
+        lines = []
+        for stage, hist in sorted(self.histograms.items()):
+            lines.append(
+                f"{stage}: count={hist.total()} p50={hist.percentile(50) / 1000:.1f}us "
+                f"p99={hist.percentile(99) / 1000:.1f}us p99.9={hist.percentile(99.9) / 1000:.1f}us"
+            )
+        return lines
+
+
+# One set of stage timers per process
+stage_timers = StageTimers()
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all threads at a fixed interval.
+
+    A process-wide interval timer (setitimer) would deliver its signal to
+    an arbitrary thread and would not interrupt a main thread blocked in
+    recv(). Instead, a small timer thread sends SIGPROF to the main thread
+    with pthread_kill(); the handler then records the interrupted main
+    thread frame plus the current frame of every other thread.
+    """
+    def __init__(self, process_name, interval=PROFILE_SAMPLE_INTERVAL, output_dir=PROFILE_DIR):
+        self.process_name = process_name
+        self.interval = interval
+        self.output_dir = output_dir
+        self.stacks = {}
+        self.samples = 0
+        self.running = False
+        self._deadline = 0.0
+        self._main_thread_id = threading.main_thread().ident
+        self._timer_thread = None
+
+    def install(self):
+        """
+        Installs the SIGPROF (sampling) and SIGUSR1 (start) handlers.
+        Must be called from the main thread.
+        """
+        signal.signal(signal.SIGPROF, self._on_sample)
+        signal.signal(signal.SIGUSR1, lambda signum, frame: self.start(PROFILE_SECONDS))
+
+    def start(self, seconds):
+        """Starts sampling for the given number of seconds."""
+        if self.running:
+            return
+        self.stacks = {}
+        self.samples = 0
+        self._deadline = time.monotonic() + seconds
+        self.running = True
+        self._timer_thread = threading.Thread(
+            target=self._tick, name=f"{self.process_name}-profiler", daemon=True
+        )
+        self._timer_thread.start()
+        log.info("[Profiler] %s: sampling every %.1f ms for %.1f s", self.process_name, self.interval * 1000, seconds)
+
+    def _tick(self):
+        while self.running:
+            time.sleep(self.interval)
+            if time.monotonic() >= self._deadline:
+                self.running = False
+                self.write()
+                return
+            try:
+                signal.pthread_kill(self._main_thread_id, signal.SIGPROF)
+            except (ProcessLookupError, OSError):
+                self.running = False
+                return
+
+    def _on_sample(self, signum, frame):
+        """SIGPROF handler: runs in the main thread between bytecodes."""
+        if not self.running:
+            return
+        frames = sys._current_frames()
+        # For the main thread, the interrupted frame is the one that matters
+        frames[self._main_thread_id] = frame
+        names = {t.ident: t.name for t in threading.enumerate()}
+
+        for thread_id, thread_frame in frames.items():
+            stack = []
+            while thread_frame is not None:
+                stack.append(_frame_name(thread_frame))
+                thread_frame = thread_frame.f_back
+            stack.append(names.get(thread_id, f"thread-{thread_id}"))
+            key = ";".join(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+        self.samples += 1
+
+    def write(self):
+        """
+        Writes the collapsed stacks and the stage timer summary.
+
+        Returns:
+            str: Path of the collapsed-stack file, or None on error.
+        """
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        base = os.path.join(self.output_dir, f"{self.process_name}_{os.getpid()}_{stamp}")
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(base + '.collapsed', 'w') as f:
+                for stack, count in sorted(self.stacks.items()):
+                    f.write(f"{stack} {count}\n")
+            with open(base + '.stages.txt', 'w') as f:
+                f.write("\n".join(stage_timers.summary()) + "\n")
+        except OSError as e:
+            log.error("[Profiler] Could not write profile: %s", e)
+            return None
+
+        log.info("[Profiler] %s: %d samples written to %s.collapsed", self.process_name, self.samples, base)
+        for line in stage_timers.summary():
+            log.info("[Profiler] %s %s", self.process_name, line)
+        return base + '.collapsed'
+
+
+def install_profiler(process_name):
+    """
+    Sets up on-demand profiling for this process (see module docstring).
+    Call once from the process's main thread.
+
+    Returns:
+        SamplingProfiler: The installed profiler, or None if signals are
+        unavailable (e.g. not on the main thread, or on Windows).
+    """
+    if not hasattr(signal, 'pthread_kill') or not hasattr(signal, 'SIGPROF'):
+        return None
+    profiler = SamplingProfiler(process_name)
+    try:
+        profiler.install()
+    except ValueError:
+        return None  # Not the main thread
+
+    if PROFILE_START_SECONDS > 0:
+        profiler.start(PROFILE_START_SECONDS)
+    return profiler
@@ -0,0 +1,197 @@
+"""
+Per-symbol news sentiment, kept in shared memory next to the price book.
+
+The news ingest stage (news_ingest.py) is the only writer: every
+"SYMBOL,SCORE,EVENT_NS" event from the Gateway's news feed goes into
+SharedSentimentBook.update(). Strategies read sentiment the way they read
+prices: straight from memory, by symbol or as the rows that changed since
+their last poll, with no socket on their hot path.
+
+Layout of the block (one contiguous array per field):
+    header      int64 [3]   version, num_symbols, capacity
+    symbols     S10 [capacity]
+    value       int64 [capacity]   latest sentiment score (0-100)
+    timestamp   int64 [capacity]   now_ns() of the event at the Gateway
+    seq         int64 [capacity]   book version of the row's last update
+                                   (0: no event yet)
+
+'version' is a sequence lock: the writer makes it odd while it writes and
+even again when done, so a reader retries until it saw the same even
+version before and after copying. Each update leaves it two higher, and
+the row's seq is set to the new (even) version.
+"""
+
+import numpy as np
+
+from config import SENTIMENT_SHM_NAME, SENTIMENT_CAPACITY, SYMBOLS
+from shared_memory_utils import SeqlockBlock, symbols_bytes, MAX_SYMBOL_BYTES
+
+SENTIMENT_HEADER_BYTES = 64
+
+# Slots of the int64 header
+VERSION, NUM_SYMBOLS, CAPACITY = range(3)
+
+ROW_FIELDS = ('value', 'timestamp', 'seq')
+
+
+def sentiment_block_size(capacity):
+    """Bytes of a sentiment block with room for capacity symbols."""
+    return SENTIMENT_HEADER_BYTES + symbols_bytes(capacity) + len(ROW_FIELDS) * 8 * capacity
+
+
+class SharedSentimentBook(SeqlockBlock):
+    """
+    Latest sentiment, event time and sequence per symbol. The rows of
+    config.SYMBOLS come first, in that order; the writer appends symbols
+    it has not seen before and rows never move.
+    """
+    KIND = 'Sentiment'
+    HEADER_SLOTS = 3
+    HEADER_BYTES = SENTIMENT_HEADER_BYTES
+
+    def __init__(self, name=SENTIMENT_SHM_NAME, create=False, capacity=SENTIMENT_CAPACITY):
+        """
+        Args:
+            name (str): The shared memory block name.
+            create (bool): Create the block (or attach to a leftover one)
+                as the writer; False attaches as a reader. A leftover
+                block keeps the last sentiment of every symbol.
+            capacity (int): Number of symbol rows (fixed for the block's life).
+
+        Raises:
+            FileNotFoundError: If a reader attaches before the block exists.
+            ValueError: If the block has an unexpected size.
+        """
+        super().__init__(name, create, sentiment_block_size(capacity))
+        if self.created:
+            self.header[:] = (0, 0, capacity)
+        self.capacity = int(self.header[CAPACITY])
+        self.check_size(sentiment_block_size(self.capacity))
+
+        offset = self.map_symbols(self.capacity)
+        self.values, self.timestamps, self.seqs = (
+            np.ndarray((self.capacity,), dtype=np.int64, buffer=self.shm.buf,
+                       offset=offset + i * 8 * self.capacity)
+            for i in range(len(ROW_FIELDS))
+        )
+
+        self.finish_attach()
+        if self.writable:
+            for symbol in SYMBOLS:
+                self.add_symbol(symbol)
+
+    def repair(self):
+        """
+        The interrupted update may have left one row half written, and
+        which one is unknown: stamp every row that had an event with the
+        version about to be published, so every reader takes all of them
+        again on its next changes_since().
+        """
+        n = self.num_symbols
+        seqs = self.seqs[:n]
+        seqs[seqs > 0] = self.header[VERSION] + 1
+
+    # --- Writer side ---
+
+    def add_symbol(self, symbol):
+        """
+        Returns a symbol's row, appending it if it is new (writer only).
+
+        Raises:
+            ValueError: For a symbol that does not fit, or a full block.
+        """
+        idx = self.symbol_to_index.get(symbol)
+        if idx is not None:
+            return idx
+        encoded = symbol.encode('utf-8')
+        if not encoded or len(encoded) > MAX_SYMBOL_BYTES:
+            raise ValueError(f"Symbol '{symbol}' must be 1-{MAX_SYMBOL_BYTES} bytes.")
+        idx = self.num_symbols
+        if idx >= self.capacity:
+            raise ValueError(f"Sentiment book is full ({self.capacity} symbols); raise SENTIMENT_CAPACITY.")
+        self.symbols[idx] = encoded
+        self.values[idx] = self.timestamps[idx] = self.seqs[idx] = 0
+        # Publish the row last, so readers never see a half-written symbol
+        self.header[NUM_SYMBOLS] = idx + 1
+        self.symbol_to_index[symbol] = idx
+        return idx
+
+    def update(self, symbol, value, timestamp_ns):
+        """
+        Writes one sentiment event.
+
+        Args:
+            symbol (str): The symbol the news is about.
+            value (int): Sentiment score.
+            timestamp_ns (int): now_ns() of the event.
+
+        Returns:
+            int: The new version.
+        """
+        idx = self.symbol_to_index.get(symbol)
+        if idx is None:
+            idx = self.add_symbol(symbol)
+        self.begin_write()
+        self.values[idx] = value
+        self.timestamps[idx] = timestamp_ns
+        # The row's seq is the version this write publishes
+        version = self._version[0] + 1
+        self.seqs[idx] = version
+        self.end_write()
+        return version
+
+    # --- Reader side ---
+
+    def read(self, symbol, retries=1000):
+        """
+        Reads one symbol's latest event.
+
+        Returns:
+            tuple: (value, timestamp_ns, seq), seq 0 while there was no
+            event yet; or None for an unknown symbol.
+
+        Raises:
+            RuntimeError: If the writer never paused long enough to read.
+        """
+        idx = self.index_of(symbol)
+        if idx is None:
+            return None
+        values, timestamps, seqs = self.values, self.timestamps, self.seqs
+        return self.consistent_read(
+            lambda: (values.item(idx), timestamps.item(idx), seqs.item(idx)), retries)
+
+    def changes_since(self, version, retries=1000):
+        """
+        Returns the rows that changed after the given version. Conflating:
+        a symbol with several events since then shows up once, with the
+        latest.
+
+        Args:
+            version (int): The version returned by the previous call
+                (0 for everything that was ever written).
+
+        Returns:
+            tuple: (new_version, indices, values, timestamps) where
+            indices is an int array of rows (see symbol_to_index).
+
+        Raises:
+            RuntimeError: If the writer never paused long enough to read.
+        """
+        header = self.header
+
+        def read():
+            current = header.item(VERSION)
+            if current == version:
+                empty = np.empty(0, dtype=np.int64)
+                return current, empty.astype(np.intp), empty, empty
+            n = header.item(NUM_SYMBOLS)
+            indices = np.flatnonzero(self.seqs[:n] > version)
+            return current, indices, self.values[indices], self.timestamps[indices]
+
+        result = self.consistent_read(read, retries)
+        self._refresh_symbols()
+        return result
+
+    def close(self):
+        self.values = self.timestamps = self.seqs = None
+        super().close()
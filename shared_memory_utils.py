@@ -4,10 +4,149 @@ communication of market data using multiprocessing.shared_memory
 and NumPy structured arrays.
 """
 
+import mmap
+import os
+import re
+import time
 import numpy as np
 import multiprocessing as mp
+from multiprocessing import resource_tracker
 from multiprocessing.shared_memory import SharedMemory
-from config import SYMBOLS, SHARED_MEMORY_NAME
+from latency_utils import now_ns
+from config import (
+    SYMBOLS, SHARED_MEMORY_NAME, BOOK_INITIAL_CAPACITY, BOOK_LAYOUT, BOOK_DIR, BOOK_WRITER_TIMEOUT,
+)
+
+
+def untrack_shared_memory(shm):
+    """
+    Stop the resource tracker from destroying a block we only attached to.
+
+    On POSIX, Python registers *every* SharedMemory it opens with the
+    resource tracker, which unlinks it when the process exits. That is
+    right for the creator but wrong for a reader such as a metrics viewer,
+    whose exit would otherwise destroy the block for everyone.
+    """
+    if os.name == 'posix':
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass  # Tracker not running; nothing to undo
+
+
+def unlink_untracked_shared_memory(name):
+    """
+    Destroy a block that was opened untracked.
+
+    SharedMemory.unlink() also unregisters the block from the resource
+    tracker, which complains about names it does not know. Registering
+    first keeps the tracker's bookkeeping balanced.
+
+    Returns:
+        bool: True if the block existed.
+    """
+    try:
+        shm = SharedMemory(name=name, create=False)
+    except FileNotFoundError:
+        return False
+    shm.close()
+    shm.unlink()  # The attach above registered it
+    return True
+
+
+class FileBlock:
+    """A memory-mapped file with the buf / size / close() of a SharedMemory."""
+    def __init__(self, path, size=None, writable=False):
+        """
+        Args:
+            path (str): The file.
+            size: Create the file with this size if it is missing or empty
+                (writer); None maps an existing file.
+            writable (bool): Map an existing file (size None) read-write.
+
+        Raises:
+            FileNotFoundError: If size is None and the file does not exist.
+        """
+        self.path = path
+        self.created = False
+        if size is None:
+            fd = os.open(path, os.O_RDWR if writable else os.O_RDONLY)
+        else:
+            writable = True
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if size is not None and os.fstat(fd).st_size == 0:
+                os.ftruncate(fd, size)
+                self.created = True
+            self.size = os.fstat(fd).st_size
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            self._mmap = mmap.mmap(fd, self.size, access=access)
+        finally:
+            os.close(fd)
+        self.buf = memoryview(self._mmap)
+
+    def close(self):
+        self.buf.release()
+        self._mmap.close()
+
+
+def _process_exists(pid):
+    """[Internal] True if a process with this pid is running (possibly as another user)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+# Bytes reserved at the start of the directory block for the book header.
+# Keeping this a fixed size leaves room for new header fields.
+HEADER_BYTES = 128
+
+# Longest symbol a row can hold ('S10')
+MAX_SYMBOL_BYTES = 10
+
+# Identify a price book directory and its layout version, so a writer
+# only resumes a block it can read ("TSPRBOOK" as a little-endian int64)
+BOOK_MAGIC = int.from_bytes(b'TSPRBOOK', 'little')
+BOOK_FORMAT_VERSION = 1
+
+
+# Row layouts of the data blocks; the directory stores the index
+LAYOUT_RECORDS = 'records'
+LAYOUT_COMPACT = 'compact'
+LAYOUTS = (LAYOUT_RECORDS, LAYOUT_COMPACT)
+
+
+def data_segment_name(name, segment_id):
+    """Name of the shared memory block holding the rows of one generation."""
+    return f"{name}_data{segment_id}"
+
+
+def symbol_segment_name(name, segment_id):
+    """Name of the block holding the symbol table of one generation (compact layout)."""
+    return f"{name}_symbols{segment_id}"
+
+
+def book_block_path(block_name, directory=BOOK_DIR):
+    """The file a price book block lives in, or None when it lives in shared memory."""
+    return os.path.join(directory, f"{block_name}.book") if directory else None
+
+
+def _create_untracked_block(name, size):
+    """
+    [Internal] Creates a block whose ownership is explicit (the writer
+    switches and destroys it), so it is untracked.
+    """
+    # A stale block of a previous run may still use the name
+    unlink_untracked_shared_memory(name)
+    shm = SharedMemory(name=name, create=True, size=size)
+    untrack_shared_memory(shm)
+    return shm
+
 
 class SharedPriceBook:
     """
@@ -15,57 +154,146 @@ class SharedPriceBook:
     This provides a high-performance way for the OrderBook to write
     price data and for the Strategy to read it.
 
-    The structure is an array of:
-    [ ('AAPL', 0.0), ('MSFT', 0.0), ... ]
+    The book lives in two kinds of shared memory blocks:
+
+    - The directory block, at the public name, is a small fixed-size
+      header: the book version, the trace stamps of the last tick
+      written, and which data block is current (segment_id), how many
+      symbols it holds and its capacity. 'generation' goes up whenever
+      any of those change.
+    - A data block, '<name>_data<segment_id>', holds an array of:
+      [ ('AAPL', 0.0, bid, ask), ('MSFT', 0.0, bid, ask), ... ]
+      where bid / ask are the consolidated best bid and offer across
+      venues (NaN while there is none) and price is their mid
+      and a per-row sequence vector: the book version at which each row
+      last changed. Readers that poll many symbols use changes_since()
+      to get only the rows that changed, as NumPy arrays.
+
+    With layout='compact' (config.BOOK_LAYOUT) the data block holds one
+    contiguous float32 column each for price, bid and ask, then the
+    sequence vector, and the symbol names live in their own block,
+    '<name>_symbols<segment_id>'. A row's numbers are then 20 bytes (plus
+    10 in the symbol table) instead of 42, and a scan of the prices reads
+    4 bytes per symbol instead of striding over 34-byte records. float32 keeps about 7 significant digits, so prices
+    below 100,000 still round to the right cent. Either way, the row
+    index is the symbol id: symbol_ids() maps names to int32 ids, and
+    price_view() / quote_view() return the columns as array views.
+
+    New symbols are appended by the writer (add_symbol(), or update() on
+    an unknown symbol). When the data block is full, the writer copies
+    it into a new block of twice the capacity and switches the directory
+    over; the previous block is kept until the next growth, so readers
+    still mapping it stay safe. Readers notice the new generation on
+    their next call and remap on their own.
+
+    With a directory (config.BOOK_DIR) every block is a memory-mapped
+    file there instead, and unlink() keeps the files: the book outlives
+    any process. The directory header also carries a magic number and
+    format version, checked before a writer resumes an existing book in
+    place (otherwise it starts a new one), and the pid and heartbeat of
+    the process writing it, from which readers tell whether the prices
+    are still live (writer_alive()).
     """
-    def __init__(self, name=SHARED_MEMORY_NAME, create=False):
+    def __init__(self, name=SHARED_MEMORY_NAME, create=False, capacity=BOOK_INITIAL_CAPACITY,
+                 layout=BOOK_LAYOUT, directory=BOOK_DIR):
         """
         Initialize the SharedPriceBook.
 
         Args:
             name (str): The public name of the shared memory block.
             create (bool):
-                - If True: Create a new shared memory block.
+                - If True: Create a new shared memory block, or attach
+                  to an existing one, as the writer.
                   (Used by the OrderBook process)
                 - If False: Attach to an existing block.
                   (Used by the Strategy process)
-        """
-        self.symbols = SYMBOLS
-        self.symbol_to_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+            capacity (int): Initial number of rows (grows on demand).
+            layout (str): 'records' or 'compact' for a new book; an
+                existing book keeps the layout it was created with.
+            directory (str): Keep the blocks as files in this directory
+                instead of shared memory ('' for shared memory).
 
+        Raises:
+            ValueError: For an unknown layout, or a block that is not a
+                price book of this version.
+        """
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown book layout {layout!r}: expected one of {LAYOUTS}.")
         # Define the 'spreadsheet' structure:
         # 'S10' is a 10-byte string for the symbol
-        # 'f8' is a 64-bit float (double) for the price
-        self.dtype = [('symbol', 'S10'), ('price', 'f8')]
-        self.num_symbols = len(self.symbols)
-
-        # Calculate the total size needed for the array
-        item_size = np.dtype(self.dtype).itemsize
-        self.total_size_bytes = self.num_symbols * item_size
-
-        # memory footprint
-        approx_entry_bytes = 10 + 8  # 10 bytes for symbol, 8 for price
-        approx_total_bytes = approx_entry_bytes * self.num_symbols
-
-        print(
-            f"[SharedPriceBook-Perf] symbols={self.num_symbols} "
-            f"approx_footprint={approx_total_bytes} bytes "
-            f"(dtype_size={self.total_size_bytes} bytes)"
-        )
+        # 'f8' is a 64-bit float (double) for the price, bid and ask
+        self.dtype = [('symbol', f'S{MAX_SYMBOL_BYTES}'), ('price', 'f8'), ('bid', 'f8'), ('ask', 'f8')]
 
+        # The header holds the latency trace of the last tick written:
+        # its id and the now_ns() stamps of every stage up to the write.
+        # 'version' goes up by one with every update(); the rest
+        # describes the current data block.
+        self.header_dtype = [
+            ('tick_id', 'i8'),
+            ('generate_ns', 'i8'),
+            ('send_ns', 'i8'),
+            ('receive_ns', 'i8'),
+            ('write_ns', 'i8'),
+            ('version', 'i8'),
+            ('generation', 'i8'),
+            ('num_symbols', 'i8'),
+            ('capacity', 'i8'),
+            ('segment_id', 'i8'),
+            ('layout', 'i8'),  # Index into LAYOUTS
+            ('magic', 'i8'),
+            ('format_version', 'i8'),
+            ('writer_pid', 'i8'),  # Set by the first heartbeat() of the writing process
+            ('heartbeat_ns', 'i8'),  # now_ns() (CLOCK_MONOTONIC) of its last heartbeat()
+        ]
+        self.trace_dtype = self.header_dtype[:5]
 
         self.name = name
+        self.directory = directory or None
+        self.location = book_block_path(name, self.directory) or name
+        self.pid = os.getpid()
+        self.writable = create
+        self.layout = layout
         self.shm = None
+        self.data_shm = None
+        self.previous_data_shm = None  # Writer only: kept until the next growth
+        self.symbol_shm = None  # Compact layout only, like the two below
+        self.previous_symbol_shm = None
+        # Blocks a caller still holds views of; closed once they are gone
+        self.retired_shms = []
         self.price_array = None # This will be our NumPy "view"
+        self.symbol_array = None
+        self.symbols = []
+        self.symbol_to_index = {}
+        self.num_symbols = 0
+        self.capacity = 0
+        self.segment_id = -1
+        self.generation = -1
+        # True only if this instance actually created the block
+        self.created = False
 
-        if create:
+        if create and self.directory:
+            # Created empty if missing; a file left by an earlier run is resumed below
+            self.shm = FileBlock(self.location, HEADER_BYTES)
+            self.created = self.shm.created
+            print(f"{'Created' if self.created else 'Opened'} price book file '{self.location}'")
+        elif self.directory:
+            try:
+                self.shm = FileBlock(self.location)
+                print(f"Attached to price book file '{self.location}'")
+            except FileNotFoundError:
+                print(f"ERROR: Price book file '{self.location}' not found.")
+                print("Is the OrderBook process running?")
+                raise
+        elif create:
             # We are the OrderBook (creator)
             try:
                 # Create the shared memory block
-                self.shm = SharedMemory(name=self.name, create=True, size=self.total_size_bytes)
-                print(f"Created shared memory block '{self.name}' ({self.total_size_bytes} bytes)")
+                self.shm = SharedMemory(name=self.name, create=True, size=HEADER_BYTES)
+                self.created = True
+                print(f"Created shared memory block '{self.name}' ({HEADER_BYTES} byte directory)")
             except FileExistsError:
-                # This handles a messy shutdown from a previous run
+                # This handles a messy shutdown from a previous run, or a
+                # supervisor that keeps the book warm across restarts
                 print(f"Shared memory block '{self.name}' already exists. Attaching...")
                 self.shm = SharedMemory(name=self.name, create=False)
                 # Don't re-initialize, just attach
@@ -79,56 +307,543 @@ class SharedPriceBook:
                 print("Is the OrderBook process running?")
                 raise
 
-        # Now, create the NumPy array "view" on top of the shared memory buffer
-        self.price_array = np.ndarray(
-            shape=(self.num_symbols,),
-            dtype=self.dtype,
+        if self.shm.size < HEADER_BYTES:
+            raise ValueError(
+                f"Price book '{self.location}' is {self.shm.size} bytes, "
+                f"expected a {HEADER_BYTES} byte directory. Is an older version still running?"
+            )
+
+        # Now, create the NumPy "views" on top of the directory block
+        self.header = np.ndarray(
+            shape=(1,),
+            dtype=self.header_dtype,
             buffer=self.shm.buf
         )
+        # Plain views on parts of the header, so the hot path skips record lookups
+        self.trace_view = np.ndarray(shape=(1,), dtype=self.trace_dtype, buffer=self.shm.buf)
+        self.version_view = self._header_field('version')
+        self.generation_view = self._header_field('generation')
+        self.writer_pid_view = self._header_field('writer_pid')
+        self.heartbeat_view = self._header_field('heartbeat_ns')
         # A lock to prevent race conditions (e.g., writing while reading)
         # This lock is shared by all processes that use this class
         self.lock = mp.Lock()
 
-        if create:
+        if not self.created and self.writable:
+            # Left by an earlier writer (crashed, restarted, or the
+            # supervisor's): only a sound book is resumed
+            problem = self._resume_problem()
+            if problem:
+                print(f"[SharedPriceBook] Cannot resume '{self.location}' ({problem}). Starting a new book.")
+                self._unlink_segments()
+                self.created = True
+            else:
+                self._report_resume()
+
+        if self.created:
             # If we just created it, we need to fill in the symbol names
-            self._init_array_data()
+            self._init_array_data(max(capacity, len(SYMBOLS), 1))
+        else:
+            self._remap()
+            if self.writable and self.layout != layout:
+                print(f"[SharedPriceBook] '{self.name}' keeps its {self.layout} layout ({layout} asked for).")
+            if self.writable:
+                # Symbols added to config since the book was created
+                for symbol in SYMBOLS:
+                    if symbol not in self.symbol_to_index:
+                        self.add_symbol(symbol)
+
+        symbol_bytes = self.symbol_shm.size if self.symbol_shm else 0
+        footprint = self.data_shm.size + symbol_bytes
+        print(
+            f"[SharedPriceBook-Perf] layout={self.layout} symbols={self.num_symbols} capacity={self.capacity} "
+            f"data_bytes={self.data_shm.size} symbol_bytes={symbol_bytes} (+{HEADER_BYTES} byte directory) "
+            f"bytes_per_row={footprint / self.capacity:.0f}"
+        )
+
+    def _header_field(self, field):
+        """[Internal] A one-element int64 view on one header field."""
+        return np.ndarray(
+            shape=(1,),
+            dtype=np.int64,
+            buffer=self.shm.buf,
+            offset=np.dtype(self.header_dtype).fields[field][1]
+        )
+
+    def _data_layout(self, capacity, layout=None):
+        """
+        [Internal] Offset of the sequence vector and total size of a
+        data block with the given number of rows (in this book's layout,
+        or the one given).
+        """
+        if (layout or self.layout) == LAYOUT_COMPACT:
+            # Three float32 columns, each padded to keep the next one 8-byte aligned
+            seq_offset = 3 * self._column_bytes(capacity)
+        else:
+            item_size = np.dtype(self.dtype).itemsize
+            seq_offset = (capacity * item_size + 7) // 8 * 8
+        return seq_offset, seq_offset + capacity * 8
+
+    @staticmethod
+    def _column_bytes(capacity):
+        """[Internal] Bytes of one float32 column of the compact layout."""
+        return (capacity * 4 + 7) // 8 * 8
+
+    def _map_data(self, shm, capacity, symbol_shm=None):
+        """[Internal] Points the row and sequence views at a data block (and symbol table)."""
+        seq_offset, _ = self._data_layout(capacity)
+        if self.layout == LAYOUT_COMPACT:
+            column_bytes = self._column_bytes(capacity)
+            self.price_array = None
+            self.prices, self.bids, self.asks = (
+                np.ndarray(shape=(capacity,), dtype=np.float32, buffer=shm.buf, offset=i * column_bytes)
+                for i in range(3)
+            )
+            self.symbol_array = np.ndarray(
+                shape=(capacity,),
+                dtype=f'S{MAX_SYMBOL_BYTES}',
+                buffer=symbol_shm.buf
+            )
+        else:
+            self.price_array = np.ndarray(
+                shape=(capacity,),
+                dtype=self.dtype,
+                buffer=shm.buf
+            )
+            self.prices = self.price_array['price']
+            self.bids = self.price_array['bid']
+            self.asks = self.price_array['ask']
+            self.symbol_array = self.price_array['symbol']
+        self.seq_array = np.ndarray(
+            shape=(capacity,),
+            dtype=np.int64,
+            buffer=shm.buf,
+            offset=seq_offset
+        )
+        self.data_shm = shm
+        self.symbol_shm = symbol_shm
+        self.capacity = capacity
+
+    def _unmap_data(self):
+        """[Internal] Drops the views so the data block can be closed."""
+        self.price_array = self.seq_array = self.prices = self.bids = self.asks = None
+        self.symbol_array = None
+
+    def _create_data_segment(self, segment_id, capacity):
+        """
+        [Internal] Creates an empty data block, and its symbol table in
+        the compact layout.
+
+        Returns:
+            tuple: (data block, symbol block or None).
+        """
+        _, size = self._data_layout(capacity)
+        shm = self._new_block(data_segment_name(self.name, segment_id), size)
+        symbol_shm = None
+        if self.layout == LAYOUT_COMPACT:
+            symbol_shm = self._new_block(symbol_segment_name(self.name, segment_id), capacity * MAX_SYMBOL_BYTES)
+        return shm, symbol_shm
+
+    # --- Blocks: shared memory or files ---
+
+    def _new_block(self, block_name, size):
+        """[Internal] Creates an empty data or symbol block, replacing a stale one."""
+        path = book_block_path(block_name, self.directory)
+        if path is None:
+            return _create_untracked_block(block_name, size)
+        self._unlink_block(block_name)
+        return FileBlock(path, size)
+
+    def _attach_block(self, block_name):
+        """
+        [Internal] Maps an existing data or symbol block.
+
+        Raises:
+            FileNotFoundError: If it does not exist (any more).
+        """
+        path = book_block_path(block_name, self.directory)
+        if path is not None:
+            return FileBlock(path, writable=self.writable)
+        shm = SharedMemory(name=block_name, create=False)
+        untrack_shared_memory(shm)
+        return shm
+
+    def _block_size(self, block_name):
+        """[Internal] Size of a data or symbol block in bytes, or None if it does not exist."""
+        path = book_block_path(block_name, self.directory)
+        try:
+            if path is not None:
+                return os.path.getsize(path)
+            shm = SharedMemory(name=block_name, create=False)
+        except FileNotFoundError:
+            return None
+        untrack_shared_memory(shm)
+        size = shm.size
+        shm.close()
+        return size
+
+    def _unlink_block(self, block_name):
+        """[Internal] Destroys a data or symbol block, if it exists."""
+        path = book_block_path(block_name, self.directory)
+        if path is None:
+            unlink_untracked_shared_memory(block_name)
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _unlink_segments(self):
+        """
+        [Internal] Destroys every data and symbol block found at our name,
+        whatever generation left it: an unsound book's header cannot be
+        trusted to say which exist.
+        """
+        suffix = '.book' if self.directory else ''
+        # Shared memory blocks are the files of /dev/shm on Linux
+        directory = self.directory or '/dev/shm'
+        pattern = re.compile(rf"{re.escape(self.name)}_(data|symbols)\d+{re.escape(suffix)}$")
+        try:
+            entries = os.listdir(directory)
+        except FileNotFoundError:
+            return  # Elsewhere, creating segment 0 replaces only that one
+        for entry in entries:
+            if pattern.match(entry):
+                self._unlink_block(entry[:len(entry) - len(suffix)])
 
-        
+    def _release(self, shm):
+        """
+        [Internal] Closes a block this instance no longer maps. One a
+        caller still holds a view of (price_view()) waits in retired_shms.
+        """
+        self.retired_shms.append(shm)
+        still_held = []
+        for retired in self.retired_shms:
+            try:
+                retired.close()
+            except BufferError:
+                still_held.append(retired)
+        self.retired_shms = still_held
 
-    def _init_array_data(self):
+    def _init_array_data(self, capacity):
         """
         [Internal] Fills the array with initial symbol data.
         Only called by the creator process.
         """
         print("Initializing shared memory array with symbols...")
         with self.lock:
-            for i, symbol in enumerate(self.symbols):
-                self.price_array[i]['symbol'] = symbol.encode('utf-8')
-                self.price_array[i]['price'] = 0.0 # Start prices at 0
+            self.header[0] = (0,) * len(self.header_dtype)
+            shm, symbol_shm = self._create_data_segment(0, capacity)
+            self._map_data(shm, capacity, symbol_shm)
+            count = len(SYMBOLS)
+            self.symbol_array[:count] = [symbol.encode('utf-8') for symbol in SYMBOLS]
+            # Start prices at 0, with no quote yet
+            self.prices[:count] = 0.0
+            self.bids[:count] = self.asks[:count] = np.nan
+            self.seq_array[:] = 0
+
+            header = self.header[0]
+            header['magic'] = BOOK_MAGIC
+            header['format_version'] = BOOK_FORMAT_VERSION
+            header['layout'] = LAYOUTS.index(self.layout)
+            header['num_symbols'] = count
+            header['capacity'] = capacity
+            header['segment_id'] = 0
+            # Last: readers treat generation 0 as "not initialized yet"
+            self.generation_view[0] = 1
+        self._remap()
         print("Initialization complete.")
 
+    def _resume_problem(self):
+        """
+        [Internal] Checks that the book found at our name can be resumed
+        in place: our header, a finished initialization, sane counts and
+        data blocks of the right size.
+
+        Returns:
+            str: What is wrong, or None if the book is sound.
+        """
+        header = self.header[0]
+        if int(header['magic']) != BOOK_MAGIC:
+            return "no price book header"
+        if int(header['format_version']) != BOOK_FORMAT_VERSION:
+            return f"format version {int(header['format_version'])}, expected {BOOK_FORMAT_VERSION}"
+        if int(self.generation_view[0]) == 0:
+            return "its writer died while creating it"
+        if not 0 <= int(header['layout']) < len(LAYOUTS):
+            return f"unknown layout {int(header['layout'])}"
+        layout = LAYOUTS[int(header['layout'])]
+        num_symbols, capacity = int(header['num_symbols']), int(header['capacity'])
+        if not 0 <= num_symbols <= capacity:
+            return f"{num_symbols} symbols in {capacity} rows"
+        segment_id = int(header['segment_id'])
+        blocks = [(data_segment_name(self.name, segment_id), self._data_layout(capacity, layout)[1])]
+        if layout == LAYOUT_COMPACT:
+            blocks.append((symbol_segment_name(self.name, segment_id), capacity * MAX_SYMBOL_BYTES))
+        for block_name, expected in blocks:
+            size = self._block_size(block_name)
+            if size is None:
+                return f"block '{block_name}' is missing"
+            if size < expected:
+                return f"block '{block_name}' is {size} bytes, expected {expected}"
+        return None
+
+    def _report_resume(self):
+        """[Internal] Says whose book is being resumed."""
+        header = self.header[0]
+        status = self.writer_status()
+        if not status['pid']:
+            writer = "no writer attached"
+        elif status['pid'] == self.pid:
+            writer = "written by this process"
+        else:
+            state = 'still running' if _process_exists(status['pid']) else 'gone'
+            age = status['heartbeat_age']
+            heartbeat = f"heartbeat {age:.1f}s ago" if age is not None else "heartbeat from before a reboot"
+            writer = f"last writer pid {status['pid']} ({state}, {heartbeat})"
+        print(f"[SharedPriceBook] Resuming '{self.location}' in place: {int(header['num_symbols'])} symbols "
+              f"at version {int(header['version'])}, {writer}.")
+
+    def _remap(self, retries=1000):
+        """
+        [Internal] Brings this instance up to the directory's current
+        generation: maps the current data block and rebuilds the symbol
+        index. Cheap when only symbols were appended.
+        """
+        for _ in range(retries):
+            generation = int(self.generation_view[0])
+            header = self.header[0]
+            segment_id = int(header['segment_id'])
+            num_symbols = int(header['num_symbols'])
+            capacity = int(header['capacity'])
+            if generation == 0:
+                time.sleep(0.001)  # The creator is still initializing
+                continue
+            if int(header['magic']) != BOOK_MAGIC or int(header['format_version']) != BOOK_FORMAT_VERSION:
+                raise ValueError(
+                    f"'{self.location}' is not a price book of this version. Is an older version still running?")
+
+            if segment_id != self.segment_id:
+                # Fixed for the book's life; known once generation is set
+                self.layout = LAYOUTS[int(header['layout'])]
+                try:
+                    shm = self._attach_block(data_segment_name(self.name, segment_id))
+                except FileNotFoundError:
+                    continue  # Replaced while we looked; read the directory again
+                symbol_shm = None
+                if self.layout == LAYOUT_COMPACT:
+                    try:
+                        symbol_shm = self._attach_block(symbol_segment_name(self.name, segment_id))
+                    except FileNotFoundError:
+                        shm.close()
+                        continue
+                old_shm, old_symbol_shm = self.data_shm, self.symbol_shm
+                self._unmap_data()
+                if old_shm is not None and old_shm is not self.previous_data_shm:
+                    self._release(old_shm)
+                if old_symbol_shm is not None and old_symbol_shm is not self.previous_symbol_shm:
+                    self._release(old_symbol_shm)
+                self._map_data(shm, capacity, symbol_shm)
+                self.segment_id = segment_id
+                self.symbols = []
+                self.symbol_to_index = {}
+
+            # Decode only the rows added since the last remap
+            start = len(self.symbols)
+            new_symbols = [raw.decode('utf-8') for raw in self.symbol_array[start:num_symbols].tolist()]
+            self.symbol_to_index.update(zip(new_symbols, range(start, num_symbols)))
+            self.symbols.extend(new_symbols)
+            self.num_symbols = num_symbols
+
+            if int(self.generation_view[0]) == generation:
+                self.generation = generation
+                return
+        raise FileNotFoundError(f"No consistent data block for shared memory book '{self.name}'.")
+
+    def _check_generation(self):
+        """[Internal] Remaps if the writer added symbols or grew the book."""
+        if self.generation_view[0] != self.generation:
+            self._remap()
+
+    def refresh(self):
+        """
+        Follows the writer adding symbols or growing the book, for callers
+        that index self.symbol_to_index / self.prices directly. The other
+        read methods do this on their own. Not thread-safe: threads sharing
+        one instance must serialize their calls into it.
+        """
+        self._check_generation()
+
+    def add_symbol(self, symbol):
+        """
+        Appends a symbol to the book (writer only), growing the data
+        block if it is full. Readers pick it up on their next call.
+
+        Returns:
+            int: The symbol's row index.
+
+        Raises:
+            ValueError: If the symbol does not fit in a row, or this
+                instance is not the writer.
+        """
+        if symbol in self.symbol_to_index:
+            return self.symbol_to_index[symbol]
+        return self.add_symbols([symbol])[0]
+
+    def add_symbols(self, symbols):
+        """
+        Appends several symbols at once (writer only): at most one growth,
+        one generation bump and one remap for the whole batch.
+
+        Returns:
+            list: The row index of each symbol.
+
+        Raises:
+            ValueError: As add_symbol().
+        """
+        if not self.writable:
+            raise ValueError("Only the writer (create=True) can add symbols.")
+        new_symbols = []
+        for symbol in dict.fromkeys(symbols):
+            if symbol in self.symbol_to_index:
+                continue
+            encoded = symbol.encode('utf-8')
+            if not encoded or len(encoded) > MAX_SYMBOL_BYTES:
+                raise ValueError(f"Symbol '{symbol}' must be 1-{MAX_SYMBOL_BYTES} bytes.")
+            new_symbols.append(encoded)
+
+        if new_symbols:
+            with self.lock:
+                self._check_generation()
+                start = self.num_symbols
+                end = start + len(new_symbols)
+                if end > self.capacity:
+                    capacity = self.capacity
+                    while capacity < end:
+                        capacity *= 2
+                    self._grow(capacity)
+
+                self.symbol_array[start:end] = new_symbols
+                self.prices[start:end] = 0.0
+                self.bids[start:end] = self.asks[start:end] = np.nan
+                self.seq_array[start:end] = 0
+                self.header[0]['num_symbols'] = end
+                self.generation_view[0] += 1
+
+            self._remap()
+            if len(new_symbols) == 1:
+                print(f"[SharedPriceBook] Added symbol '{new_symbols[0].decode('utf-8')}' at row {start}.")
+            else:
+                print(f"[SharedPriceBook] Added {len(new_symbols)} symbols at rows {start}-{end - 1}.")
+        return [self.symbol_to_index[symbol] for symbol in symbols]
+
+    def _grow(self, capacity):
+        """
+        [Internal] Copies the rows into a new, larger data block and
+        switches the directory to it. Called with the lock held.
+        """
+        segment_id = self.segment_id + 1
+        new_shm, new_symbol_shm = self._create_data_segment(segment_id, capacity)
+        old_shm, old_symbol_shm = self.data_shm, self.symbol_shm
+        old_columns = self._columns()
+        count = self.num_symbols
+
+        self._map_data(new_shm, capacity, new_symbol_shm)
+        for new_column, old_column in zip(self._columns(), old_columns):
+            new_column[:count] = old_column[:count]
+        del old_columns
+
+        header = self.header[0]
+        header['segment_id'] = segment_id
+        header['capacity'] = capacity
+        self.generation_view[0] += 1
+        self.segment_id = segment_id
+
+        # Keep the block we just left for readers that have not remapped
+        # yet; the one before it has had a whole generation to go (also
+        # when it was left by the writer we resumed from).
+        if self.previous_data_shm is not None:
+            self._release(self.previous_data_shm)
+        if self.previous_symbol_shm is not None:
+            self._release(self.previous_symbol_shm)
+        if segment_id >= 2:
+            self._unlink_block(data_segment_name(self.name, segment_id - 2))
+            if self.layout == LAYOUT_COMPACT:
+                self._unlink_block(symbol_segment_name(self.name, segment_id - 2))
+        self.previous_data_shm = old_shm
+        self.previous_symbol_shm = old_symbol_shm
+        print(f"[SharedPriceBook] Grew to {capacity} rows (segment {segment_id}).")
+
+    def _columns(self):
+        """[Internal] The symbol, price, bid, ask and sequence arrays, in either layout."""
+        return self.symbol_array, self.prices, self.bids, self.asks, self.seq_array
+
     def update(self, symbol, price):
         """
         Update the price for a given symbol.
         This is the "write" operation, used by the OrderBook.
+        The writer adds symbols it has not seen before.
         """
-        if symbol not in self.symbol_to_index:
-            print(f"Warning: Symbol '{symbol}' not tracked in shared memory.")
-            return
+        idx = self.symbol_to_index.get(symbol)
+        if idx is None:
+            if not self.writable:
+                print(f"Warning: Symbol '{symbol}' not tracked in shared memory.")
+                return
+            idx = self.add_symbol(symbol)
 
-        idx = self.symbol_to_index[symbol]
-        
         # Hang the "Do Not Disturb" sign
         with self.lock:
-            # Update the price in the array
-            self.price_array[idx]['price'] = price
+            # Update the price, then its row sequence, then the version,
+            # so a reader that sees the new version also sees the row
+            version = self.version_view[0] + 1
+            self.prices[idx] = price
+            self.seq_array[idx] = version
+            self.version_view[0] = version
         # "Do Not Disturb" sign is automatically removed
 
+    def update_quotes(self, indices, bids, asks):
+        """
+        Writes the best bid / offer of several rows in one go.
+        This is the consolidated "write" operation, used by the OrderBook.
+
+        Rows with both sides quoted also get price = mid. A NaN side
+        means no venue has a live quote on it; the last price is kept.
+
+        Args:
+            indices: Int array of rows (see add_symbol / symbol_to_index).
+            bids, asks: Float arrays of the same length.
+        """
+        mids = (bids + asks) * 0.5
+        quoted = ~np.isnan(mids)
+        with self.lock:
+            version = self.version_view[0] + 1
+            self.bids[indices] = bids
+            self.asks[indices] = asks
+            self.prices[indices[quoted]] = mids[quoted]
+            self.seq_array[indices] = version
+            self.version_view[0] = version
+
+    def read_quote(self, symbol):
+        """
+        Read the consolidated best bid and offer for a symbol.
+
+        Returns:
+            tuple: (bid, ask), NaN for a side without a live quote, or
+            None if the symbol is not tracked.
+        """
+        self._check_generation()
+        idx = self.symbol_to_index.get(symbol)
+        if idx is None:
+            return None
+        with self.lock:
+            return float(self.bids[idx]), float(self.asks[idx])
+
     def read(self, symbol):
         """
         Read the price for a given symbol.
         This is the "read" operation, used by the Strategy.
         """
+        self._check_generation()
         if symbol not in self.symbol_to_index:
             print(f"Warning: Symbol '{symbol}' not tracked.")
             return None
@@ -138,41 +853,452 @@ class SharedPriceBook:
         # Wait if the "Do Not Disturb" sign is up
         with self.lock:
             # Read the price from the array
-            price = self.price_array[idx]['price']
+            price = self.prices[idx]
         # Sign is removed
-        
+
         return price
-    
+
+    def heartbeat(self):
+        """
+        Tells readers the writer is alive (writer only; the OrderBook calls
+        it every BOOK_HEARTBEAT_INTERVAL). The first call claims the book
+        for this process.
+        """
+        if self.writer_pid_view[0] != self.pid:
+            self.writer_pid_view[0] = self.pid
+        # Monotonic: readers share the host's clock, and an NTP step cannot age it
+        self.heartbeat_view[0] = now_ns()
+
+    def writer_status(self):
+        """
+        Returns:
+            dict: 'pid' of the process writing the book (0 before the first
+            heartbeat), 'heartbeat_age' in seconds (None without one, or for
+            one from before a reboot) and 'alive', as writer_alive().
+        """
+        pid = int(self.writer_pid_view[0])
+        heartbeat_ns = int(self.heartbeat_view[0])
+        now = now_ns()
+        # A book file can outlive a reboot, which restarts the monotonic clock
+        age = (now - heartbeat_ns) / 1e9 if 0 < heartbeat_ns <= now else None
+        alive = bool(pid) and age is not None and age <= BOOK_WRITER_TIMEOUT and _process_exists(pid)
+        return {'pid': pid, 'heartbeat_age': age, 'alive': alive}
+
+    def writer_alive(self):
+        """
+        True while the writer's process runs and has sent a heartbeat in
+        the last BOOK_WRITER_TIMEOUT seconds. When False, the prices are
+        the last ones written, not live ones.
+        """
+        return self.writer_status()['alive']
+
+    def write_trace(self, tick_id, generate_ns, send_ns, receive_ns, write_ns):
+        """
+        Record the latency trace of the tick that was just written.
+        Used by the OrderBook after updating prices.
+        """
+        self.trace_view[0] = (tick_id, generate_ns, send_ns, receive_ns, write_ns)
+
+    def read_trace(self):
+        """
+        Read the latency trace of the last tick written.
+
+        Returns:
+            dict: tick_id, generate_ns, send_ns, receive_ns and write_ns
+            (all 0 if no tick has been traced yet).
+        """
+        trace = self.trace_view[0]
+        return {name: int(trace[name]) for name, _ in self.trace_dtype}
+
+    def version(self):
+        """
+        The current book version: how many updates have been written.
+        Pass it to changes_since() on the next poll.
+        """
+        return int(self.version_view[0])
+
+    def changes_since(self, version):
+        """
+        Returns the rows that changed after the given version.
+
+        Conflating: a row updated several times since then shows up once,
+        with its latest price. No lock, dict or symbol decoding; a row
+        written while this runs may be reported again on the next call.
+
+        Args:
+            version (int): The version returned by the previous call
+                (0 for everything that was ever written).
+
+        Returns:
+            tuple: (new_version, indices, prices) where indices is an int
+            array of rows (see self.symbols) and prices their prices.
+        """
+        # Read the version first: every row written up to it already has its seq
+        current = int(self.version_view[0])
+        if current == version:
+            return current, np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+        self._check_generation()
+        indices = np.flatnonzero(self.seq_array[:self.num_symbols] > version)
+        return current, indices, self.prices[indices]
+
+    def symbol_ids(self, symbols):
+        """
+        Looks up the ids (rows) of several symbols at once, e.g. to index
+        price_view() with.
+
+        Returns:
+            np.ndarray: int32 ids in the order given, -1 for an unknown symbol.
+        """
+        self._check_generation()
+        lookup = self.symbol_to_index.get
+        return np.fromiter((lookup(symbol, -1) for symbol in symbols), dtype=np.int32, count=len(symbols))
+
+    def price_view(self):
+        """
+        Every symbol's price as a read-only view on the shared column
+        (row i is self.symbols[i]): no copy, no dict, no lock. Values
+        change under the caller as the writer updates them; copy the
+        slice needed for a consistent picture.
+
+        The view belongs to the current data block: once the book grows
+        (changes_since() / symbol_ids() remap), ask for a new one.
+
+        Returns:
+            np.ndarray: float64 ('records') or float32 ('compact') prices.
+        """
+        self._check_generation()
+        view = self.prices[:self.num_symbols]
+        view.flags.writeable = False
+        return view
+
+    def quote_view(self):
+        """
+        The best bids and asks as read-only views, like price_view().
+
+        Returns:
+            tuple: (bids, asks) arrays, NaN where a side has no live quote.
+        """
+        self._check_generation()
+        bids, asks = self.bids[:self.num_symbols], self.asks[:self.num_symbols]
+        bids.flags.writeable = asks.flags.writeable = False
+        return bids, asks
+
     def get_all_prices(self):
         """
         Returns a copy of all data as a dictionary.
-        Safer for reading multiple values.
+        Safer for reading multiple values. For many symbols, price_view()
+        avoids building one Python float and dict entry per row.
+        """
+        self._check_generation()
+        with self.lock:
+            # Copy just the prices; symbol names are decoded once per remap
+            prices = self.prices[:self.num_symbols].tolist()
+
+        return dict(zip(self.symbols, prices))
+
+    def save_snapshot(self, path):
+        """
+        Writes every row (symbol, price, bid, ask) to an .npz file that
+        load_snapshot() can warm-start a new book from. The file is
+        replaced atomically, so a crash mid-write keeps the previous one.
+
+        Args:
+            path (str): Where to write the snapshot.
         """
+        self._check_generation()
         with self.lock:
-            # Create a deep copy to avoid issues outside the lock
-            data_copy = np.copy(self.price_array)
-        
-        return {
-            row['symbol'].decode('utf-8'): row['price'] for row in data_copy
-        }
+            # The same records in either layout
+            rows = np.empty(self.num_symbols, dtype=self.dtype)
+            for field, column in zip(('symbol', 'price', 'bid', 'ask'), self._columns()):
+                rows[field] = column[:self.num_symbols]
+            version = int(self.version_view[0])
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, rows=rows, version=version, saved_at=time.time())
+        os.replace(tmp_path, path)
+
+    def load_snapshot(self, path):
+        """
+        Restores the prices saved by save_snapshot() (writer only), so
+        that readers see the last known prices instead of 0.0 until every
+        symbol has ticked again. Symbols not in the book are added.
+
+        Args:
+            path (str): The snapshot file.
+
+        Returns:
+            tuple: (rows restored, age of the snapshot in seconds), or
+            (0, None) if there is no snapshot file.
+        """
+        if not self.writable:
+            raise ValueError("Only the writer (create=True) can load a snapshot.")
+        try:
+            with np.load(path) as snapshot:
+                rows = snapshot['rows']
+                saved_at = float(snapshot['saved_at'])
+        except FileNotFoundError:
+            return 0, None
+
+        symbols = [symbol.decode('utf-8') for symbol in rows['symbol']]
+        indices = np.array(self.add_symbols(symbols), dtype=np.intp)
+        with self.lock:
+            version = self.version_view[0] + 1
+            # Bid / ask stay NaN: they only ever show live venue quotes
+            self.prices[indices] = rows['price']
+            self.seq_array[indices] = version
+            self.version_view[0] = version
+        return len(indices), time.time() - saved_at
 
     def close(self):
         """
         Close the shared memory object.
         This "detaches" the process from the memory block.
         """
+        self._unmap_data()
+        if self.writable and self.header is not None and self.writer_pid_view[0] == self.pid:
+            # A clean exit: readers need not wait for the heartbeat to run out
+            self.writer_pid_view[0] = 0
+        self.header = self.trace_view = self.version_view = self.generation_view = None
+        self.writer_pid_view = self.heartbeat_view = None
+        for shm in (self.data_shm, self.previous_data_shm, self.symbol_shm, self.previous_symbol_shm,
+                    *self.retired_shms):
+            if shm:
+                try:
+                    shm.close()
+                except BufferError:
+                    pass  # A caller still holds a view; the mapping goes with it
+        self.data_shm = self.previous_data_shm = self.symbol_shm = self.previous_symbol_shm = None
+        self.retired_shms = []
         if self.shm:
             self.shm.close()
-            print(f"Detached from shared memory block '{self.name}'.")
+            kind = 'price book file' if self.directory else 'shared memory block'
+            print(f"Detached from {kind} '{self.location}'.")
 
     def unlink(self):
         """
-        Request that the shared memory block be destroyed.
-        Only the *creator* (OrderBook) should call this on exit.
+        Request that the shared memory block be destroyed, together with
+        its data blocks. Only the *creator* (OrderBook) should call this on exit.
+        A book kept in files is left in place on purpose: the next writer
+        resumes it.
         """
+        if self.directory:
+            print(f"Price book files of '{self.location}' kept for the next writer.")
+            return
         if self.shm:
+            segment_id = self.segment_id
+            if self.header is not None:
+                # The writer may have grown the book since we last looked
+                segment_id = int(self.header[0]['segment_id'])
+            for old_id in (segment_id, segment_id - 1):
+                if old_id >= 0:
+                    self._unlink_block(data_segment_name(self.name, old_id))
+                    self._unlink_block(symbol_segment_name(self.name, old_id))
             try:
                 self.shm.unlink() # Destroy the block
                 print(f"Shared memory block '{self.name}' destroyed.")
             except FileNotFoundError:
-                pass # Already destroyed, which is fine
\ No newline at end of file
+                pass # Already destroyed, which is fine
+
+
+# --- Per-symbol blocks with a sequence lock ---
+# Slots shared by the int64 header of every SeqlockBlock
+SEQLOCK_VERSION, SEQLOCK_NUM_SYMBOLS, SEQLOCK_CAPACITY = range(3)
+
+
+def symbols_bytes(capacity):
+    """Bytes of a symbol column, rounded up to keep the arrays after it 8-byte aligned."""
+    return (capacity * MAX_SYMBOL_BYTES + 7) // 8 * 8
+
+
+class SeqlockBlock:
+    """
+    Base of the fixed-capacity blocks with one row per symbol (positions,
+    sentiment, features, bars): an int64 header starting with version,
+    num_symbols and capacity, then a symbol column, then the subclass's
+    arrays. The block is shared memory, or a memory-mapped file when a
+    path is given.
+
+    'version' is a sequence lock: the writer makes it odd while it writes
+    and even again when done, and a reader retries until it saw the same
+    even version before and after copying (see consistent_read()).
+
+    A subclass opens the block with __init__(), fills in its header when
+    self.created, calls check_size(), maps its arrays after map_symbols()
+    and ends with finish_attach(). A writer that finds the version odd
+    (its predecessor died mid-write) calls repair() before reopening the
+    lock, so readers never get the half-written state.
+    """
+    KIND = 'Seqlock'  # For messages, e.g. 'Sentiment'
+    HEADER_SLOTS = 8
+    HEADER_BYTES = 64
+
+    def __init__(self, name, create, size, path=None):
+        """
+        Args:
+            name (str): The shared memory block name.
+            create (bool): Create the block (or attach to a leftover one)
+                as the writer; False attaches as a reader.
+            size (int): Bytes of a new block.
+            path (str): Map this file instead of shared memory.
+
+        Raises:
+            FileNotFoundError: If a reader attaches before the block exists.
+        """
+        self.name = name
+        self.path = path
+        self.writable = create
+        self.created = False
+        if path:
+            self.shm = FileBlock(path, size if create else None)
+            self.created = self.shm.created
+        elif create:
+            try:
+                self.shm = SharedMemory(name=name, create=True, size=size)
+                self.created = True
+            except FileExistsError:
+                # Kept alive by the supervisor: carry on with what is in it
+                self.shm = SharedMemory(name=name, create=False)
+        else:
+            self.shm = SharedMemory(name=name, create=False)
+            untrack_shared_memory(self.shm)
+        self.header = np.ndarray((self.HEADER_SLOTS,), dtype=np.int64, buffer=self.shm.buf)
+        self.symbol_to_index = {}
+
+    @property
+    def location(self):
+        return self.path or self.name
+
+    def check_size(self, expected):
+        """
+        Raises:
+            ValueError: If the block is smaller than its header says.
+        """
+        if self.shm.size < expected:
+            raise ValueError(
+                f"{self.KIND} block '{self.location}' is {self.shm.size} bytes, expected {expected}. "
+                "Is a process from an older version still running?"
+            )
+
+    def map_symbols(self, capacity):
+        """
+        Maps the symbol column after the header.
+
+        Returns:
+            int: The offset of the first array after it.
+        """
+        self.symbols = np.ndarray((capacity,), dtype=f'S{MAX_SYMBOL_BYTES}', buffer=self.shm.buf,
+                                  offset=self.HEADER_BYTES)
+        return self.HEADER_BYTES + symbols_bytes(capacity)
+
+    def finish_attach(self):
+        """Reads the symbol names and, as the writer, repairs a torn write."""
+        # The version slot again, as a plain memoryview: the lock is taken
+        # on every write and read, and numpy scalar access costs 4x as much.
+        # Taken last, so a block that fails its checks can still be closed.
+        self._version = self.shm.buf[:8].cast('q')
+        self._refresh_symbols()
+        if self.writable and not self.created and self.header[SEQLOCK_VERSION] & 1:
+            self.repair()
+            self.header[SEQLOCK_VERSION] += 1
+            print(f"[{self.KIND}] Block '{self.location}' was left mid-write; repaired and reopened.")
+
+    def repair(self):
+        """
+        Makes the block consistent after a writer died mid-write (writer
+        only, with the lock still odd). Subclasses rebuild what the
+        interrupted write may have left half done; rows and derived
+        values they cannot check are kept.
+        """
+
+    def _refresh_symbols(self):
+        """[Internal] Picks up the symbols the writer appended since the last call."""
+        num_symbols = int(self.header[SEQLOCK_NUM_SYMBOLS])
+        start = len(self.symbol_to_index)
+        if num_symbols > start:
+            names = [raw.decode('utf-8') for raw in self.symbols[start:num_symbols].tolist()]
+            self.symbol_to_index.update(zip(names, range(start, num_symbols)))
+
+    @property
+    def num_symbols(self):
+        return int(self.header[SEQLOCK_NUM_SYMBOLS])
+
+    def version(self):
+        """The current version; it changes with every write."""
+        return self._version[0]
+
+    def index_of(self, symbol):
+        """A symbol's row, or None if the writer never saw it."""
+        idx = self.symbol_to_index.get(symbol)
+        if idx is None:
+            self._refresh_symbols()
+            idx = self.symbol_to_index.get(symbol)
+        return idx
+
+    # --- Writer side ---
+
+    def begin_write(self):
+        """Opens a write: readers retry until end_write()."""
+        self._version[0] += 1
+
+    def end_write(self):
+        """Publishes the write opened by begin_write()."""
+        self._version[0] += 1
+
+    # --- Reader side ---
+
+    def consistent_read(self, read, retries=1000):
+        """
+        Calls read() until it ran without the writer in between.
+
+        Returns:
+            What read() returned.
+
+        Raises:
+            RuntimeError: If the writer never paused long enough to read.
+        """
+        version = self._version
+        for _ in range(retries):
+            before = version[0]
+            if before & 1:
+                # Mid-write: let a writer that lost its CPU finish
+                os.sched_yield()
+                continue
+            result = read()
+            if version[0] == before:
+                return result
+        raise RuntimeError(f"{self.KIND} block '{self.location}' kept changing while being read.")
+
+    def close(self):
+        self._version.release()
+        self.header = self.symbols = None
+        self.shm.close()
+
+    def unlink(self):
+        """Destroys a shared memory block; a file-backed block is kept on purpose."""
+        if not self.path:
+            # Readers in processes sharing our resource tracker untrack the block there
+            unlink_untracked_shared_memory(self.name)
+
+
+class PollBackoff:
+    """
+    Sleeps between polls of a shared block: min_interval right after a
+    change, doubling on every idle poll up to max_interval. A busy block
+    is polled at full speed; an idle one costs a few wakeups a second
+    instead of one per millisecond.
+    """
+    def __init__(self, min_interval, max_interval):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.interval = min_interval
+
+    def idle(self):
+        """Nothing new: sleeps, and waits longer next time."""
+        time.sleep(self.interval)
+        self.interval = min(self.interval * 2, self.max_interval)
+
+    def reset(self):
+        """Something changed: poll at full speed again."""
+        self.interval = self.min_interval
@@ -0,0 +1,324 @@
+"""
+Discrete-Event Simulation
+
+Runs the whole pipeline in one process on a virtual clock: the Gateway's
+generate_price_data() / generate_news_data(), the OrderBook's
+parse_fragments() / publish_best() (which moves a FeatureEngine), the
+Strategy's make_decision() and the OrderManager's apply_order() are
+wired together through in-memory queues instead of sockets. Nobody
+sleeps: the clock jumps straight to the next event, so a trading day of
+1 s ticks runs in seconds, and a seed makes every run the same.
+
+Each component keeps its production code path; only the transport and
+the clock are simulated. The price book, positions and metrics are
+private shared memory blocks of the run (see config.SIM_SHM_NAME), as are
+the features the Strategy reads its moving averages from, so a
+simulation can run next to the live system.
+
+Usage:
+    python simulation.py                      # One trading day (config.SIM_DURATION)
+    python simulation.py --duration 86400 --seed 7
+    python simulation.py --price-interval 0.1 --link-latency 0.00005
+"""
+
+import argparse
+import contextlib
+import heapq
+import io
+import itertools
+import time
+from collections import deque
+
+import numpy as np
+
+# --- Make the "Play Button" work ---
+import sys
+import os
+current_file_path = os.path.abspath(__file__)
+project_root = os.path.dirname(current_file_path)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+import gateway
+from gateway import generate_price_data, generate_news_data, seed_price_walk
+from orderbook import VenueFeed, parse_fragments, publish_best
+from news_ingest import parse_news_event
+from strategy import attach_features, make_decision, sample_price
+from order_manager import apply_order
+from order_store_utils import OrderStore
+from shared_memory_utils import SharedPriceBook, unlink_untracked_shared_memory
+from feature_utils import SharedFeatureBook, FeatureEngine
+from position_utils import SharedPositionBook, PositionKeeper
+from consolidation_utils import ConsolidatedQuotes
+from metrics_utils import SharedMetrics
+from network_utils import format_tick_header
+from latency_utils import LatencyTracer
+from config import (
+    PRICE_PORT, PRICE_INTERVAL, NEWS_INTERVAL, VENUE_STALE_AFTER, SYMBOLS, TRADE_QUANTITY,
+    SIM_DURATION, SIM_SEED, SIM_LINK_LATENCY, SIM_SHM_NAME,
+)
+
+
+class VirtualClock:
+    """
+    Simulated time: a queue of callbacks ordered by when they are due.
+    run() jumps from one event to the next; events due at the same time
+    run in the order they were scheduled, which keeps runs repeatable.
+    """
+    def __init__(self, start_ns=0):
+        self.now_ns = start_ns
+        self._events = []
+        self._order = itertools.count()
+
+    def schedule(self, delay_ns, callback, *args):
+        """Runs callback(*args) delay_ns after the current virtual time."""
+        heapq.heappush(self._events, (self.now_ns + delay_ns, next(self._order), callback, args))
+
+    def run(self, until_ns):
+        """
+        Runs every event due up to until_ns (including the ones those
+        schedule), then moves the clock to until_ns.
+
+        Returns:
+            int: The number of events run.
+        """
+        events = self._events
+        count = 0
+        while events and events[0][0] <= until_ns:
+            self.now_ns, _, callback, args = heapq.heappop(events)
+            callback(*args)
+            count += 1
+        self.now_ns = until_ns
+        return count
+
+
+class Link:
+    """An in-memory queue standing in for a socket, delivering after a fixed virtual latency."""
+    def __init__(self, clock, latency_ns, handler):
+        self.clock = clock
+        self.latency_ns = latency_ns
+        self.handler = handler
+        self.queue = deque()
+
+    def send(self, message):
+        self.queue.append(message)
+        self.clock.schedule(self.latency_ns, self._deliver)
+
+    def _deliver(self):
+        # The latency is the same for every message, so FIFO order holds
+        self.handler(self.queue.popleft())
+
+
+class Simulation:
+    """
+    One simulated run: a venue, an OrderBook, a news ingest, a Strategy
+    trading SYMBOLS[0] and an OrderManager, connected by Links.
+    """
+    def __init__(self, seed=SIM_SEED, price_interval=PRICE_INTERVAL, news_interval=NEWS_INTERVAL,
+                 link_latency=SIM_LINK_LATENCY, name=None):
+        """
+        Args:
+            seed (int): Seed of the price walk, spreads and news scores.
+            price_interval (float): Virtual seconds between price ticks.
+            news_interval (float): Virtual seconds between news rounds.
+            link_latency (float): Virtual seconds each Link takes.
+            name (str): Prefix of the run's shared memory blocks.
+        """
+        self.name = name or f"{SIM_SHM_NAME}_{os.getpid()}"
+        self.price_interval_ns = int(price_interval * 1e9)
+        self.news_interval_ns = int(news_interval * 1e9)
+        self.clock = VirtualClock()
+        link_latency_ns = int(link_latency * 1e9)
+        self.price_link = Link(self.clock, link_latency_ns, self.on_price_tick)
+        self.news_link = Link(self.clock, link_latency_ns, self.on_news_event)
+        self.order_link = Link(self.clock, link_latency_ns, self.on_order)
+
+        seed_price_walk(seed)
+        self.tick_id = 0
+
+        # OrderBook
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.book = SharedPriceBook(name=f"{self.name}_prices", create=True)
+        self.quotes = ConsolidatedQuotes(1, self.book.capacity, int(VENUE_STALE_AFTER * 1e9))
+        self.venue = VenueFeed(0, PRICE_PORT)
+        self.tracer = LatencyTracer("simulation", enabled=False)  # Virtual stamps stay out of the traces
+        self.metrics = SharedMetrics("orderbook", name=f"{self.name}_metrics")
+        self.feature_book = SharedFeatureBook(name=f"{self.name}_features", create=True)
+        self.feature_engine = FeatureEngine(self.feature_book, self.book)
+
+        # OrderManager
+        self.positions = SharedPositionBook(name=f"{self.name}_positions", create=True)
+        self.keeper = PositionKeeper(self.positions, self.book)
+        self.orders = OrderStore()
+        self.order_metrics = SharedMetrics("ordermanager", name=f"{self.name}_metrics")
+
+        # Strategy: the feature block's averages, or (without both windows) its own
+        self.trade_symbol = SYMBOLS[0]
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.features, self.feature_columns = attach_features(f"{self.name}_features")
+        self.sentiment = {}
+        self.price_history = []
+        self.price_version = self.book.version()
+        self.position = None
+        self.order_ids = itertools.count(1)
+
+        self.news_events = 0
+        self.fills = []  # (virtual ns, side, price) of every order filled
+
+    # --- Gateway ---
+
+    def publish_prices(self):
+        """A price tick: the Gateway's quotes, framed as on the wire, to the OrderBook."""
+        self.tick_id += 1
+        generate_price_data()
+        header = format_tick_header(self.tick_id, self.clock.now_ns, self.clock.now_ns).encode('utf-8')
+        self.price_link.send([header, *gateway.quote_fragments])
+        self.clock.schedule(self.price_interval_ns, self.publish_prices)
+
+    def publish_news(self):
+        """A news round: one sentiment event per symbol."""
+        for event in generate_news_data():
+            self.news_link.send(event)
+        self.clock.schedule(self.news_interval_ns, self.publish_news)
+
+    # --- OrderBook ---
+
+    def on_price_tick(self, fragments):
+        receive_ns = self.clock.now_ns
+        indices, bids, asks, seqs = parse_fragments(
+            self.venue, fragments, self.book, self.tracer, self.metrics, receive_ns)
+        if not indices:
+            return
+        self.quotes.ensure_capacity(self.book.capacity)
+        indices = np.array(indices, dtype=np.intp)
+        self.quotes.set_quotes(self.venue.index, indices, bids, asks, receive_ns, seqs)
+        publish_best(self.book, self.quotes, indices, receive_ns, self.feature_engine)
+        # The OrderManager's mark loop, on every book change
+        self.keeper.mark_to_market(self.book.version())
+        if self.features is None:
+            # The Strategy's poll loop, which sees every write here
+            self.price_version = sample_price(self.book, self.trade_symbol, self.price_version, self.price_history)
+
+    # --- News ingest and Strategy ---
+
+    def on_news_event(self, message):
+        symbol, score, _ = parse_news_event(message)
+        self.sentiment[symbol] = score
+        self.news_events += 1
+        if symbol == self.trade_symbol:
+            self.decide(score)
+
+    def decide(self, sentiment):
+        """The Strategy's reaction to a sentiment event for its symbol."""
+        price = self.book.read(self.trade_symbol)
+        if price is None:
+            return
+        price = float(price)
+        decision, _ = make_decision(self.trade_symbol, price, sentiment, self.position,
+                                    self.price_history, self.features, self.feature_columns)
+        if decision is None:
+            return
+        # No client_order_id: an in-memory queue never loses an order, so nothing is resent
+        self.order_link.send({
+            "symbol": self.trade_symbol,
+            "side": decision["side"],
+            "quantity": TRADE_QUANTITY,
+            "price": price,
+            "sentiment": sentiment,
+            "position_before": self.position,
+            "position_after": decision["desired_position"],
+            "reason": decision["reason"],
+            "order_id": next(self.order_ids),
+            "timestamp_ns": self.clock.now_ns,
+        })
+        self.position = decision["desired_position"]
+
+    # --- OrderManager ---
+
+    def on_order(self, order):
+        apply_order(order, self.clock.now_ns, self.keeper, self.orders, self.order_metrics)
+        self.fills.append((self.clock.now_ns, order["side"], order["price"]))
+
+    # --- Driver ---
+
+    def run(self, duration=SIM_DURATION):
+        """
+        Runs the simulation for duration virtual seconds.
+
+        Returns:
+            dict: What happened (see summary()).
+        """
+        self.clock.schedule(self.price_interval_ns, self.publish_prices)
+        self.clock.schedule(self.news_interval_ns, self.publish_news)
+        start = time.perf_counter()
+        events = self.clock.run(int(duration * 1e9))
+        elapsed = time.perf_counter() - start
+        result = self.summary()
+        result.update(events=events, wall_seconds=elapsed)
+        return result
+
+    def summary(self):
+        """
+        Returns:
+            dict: virtual_seconds, ticks, news_events, orders, the order
+            store's state counts, the traded symbol's position and the
+            portfolio totals.
+        """
+        snapshot = self.positions.snapshot()
+        return {
+            'virtual_seconds': self.clock.now_ns / 1e9,
+            'ticks': self.tick_id,
+            'news_events': self.news_events,
+            'orders': len(self.fills),
+            'order_states': self.orders.state_counts(),
+            'position': self.positions.position(self.trade_symbol),
+            'totals': snapshot['totals'],
+        }
+
+    def close(self):
+        """Destroys the run's shared memory blocks."""
+        self.order_metrics.close()
+        self.metrics.close()
+        # The second writer untracked the block in this process
+        unlink_untracked_shared_memory(f"{self.name}_metrics")
+        if self.features is not None:
+            self.features.close()
+        self.feature_book.close()
+        # ...and so did the Strategy's reader
+        unlink_untracked_shared_memory(f"{self.name}_features")
+        self.positions.close()
+        self.positions.unlink()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.book.unlink()
+            self.book.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=SIM_DURATION, help="Virtual seconds to simulate.")
+    parser.add_argument('--seed', type=int, default=SIM_SEED)
+    parser.add_argument('--price-interval', type=float, default=PRICE_INTERVAL)
+    parser.add_argument('--news-interval', type=float, default=NEWS_INTERVAL)
+    parser.add_argument('--link-latency', type=float, default=SIM_LINK_LATENCY,
+                        help="Virtual seconds each hop takes.")
+    args = parser.parse_args()
+
+    simulation = Simulation(args.seed, args.price_interval, args.news_interval, args.link_latency)
+    try:
+        result = simulation.run(args.duration)
+    finally:
+        simulation.close()
+
+    speedup = result['virtual_seconds'] / result['wall_seconds'] if result['wall_seconds'] else 0.0
+    print(f"[Simulation] {result['virtual_seconds']:.0f} virtual s in {result['wall_seconds']:.2f} s "
+          f"({speedup:.0f}x real time, {result['events']} events)")
+    print(f"[Simulation] ticks={result['ticks']} news_events={result['news_events']} orders={result['orders']}")
+    position = result['position'] or {'quantity': 0.0, 'avg_price': 0.0}
+    totals = result['totals']
+    print(f"[Simulation] {simulation.trade_symbol}: quantity={position['quantity']:.0f} "
+          f"avg_price={position['avg_price']:.2f}")
+    print(f"[Simulation] realized_pnl={totals['realized_pnl']:.2f} unrealized_pnl={totals['unrealized_pnl']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
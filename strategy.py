@@ -1,15 +1,23 @@
 """
 Strategy Process
 
-Reads latest prices from shared memory (written by OrderBook),
-connects to the Gateway's news feed to receive sentiment, and
+Reads latest prices (written by the OrderBook) and per-symbol
+sentiment (written by the news ingest stage) from shared memory, and
 sends orders to the OrderManager based on a pluggable strategy
-function.
+function. Every new sentiment event for the traded symbol triggers one
+decision; there is no socket on the read side.
+
+The moving averages come precomputed from the OrderBook's feature block
+(feature_utils) when it keeps SHORT_WINDOW and LONG_WINDOW; otherwise the
+Strategy keeps its own price history. Both count the same samples: one
+per write of the symbol's price to the book (the Strategy's own history
+sees the writes between two of its polls as one).
+
+The order link reconnects on its own when an order is not acknowledged
+within ORDER_ACK_TIMEOUT (unacknowledged orders are sent again).
 """
 
-import socket
 import time
-import json
 from statistics import mean
 
 # --- Make the "Play Button" work ---
@@ -20,21 +28,36 @@ project_root = os.path.dirname(current_file_path)
 sys.path.insert(0, project_root)
 # --- End of fix ---
 
-from shared_memory_utils import SharedPriceBook
-from network_utils import send_message, receive_messages
+from shared_memory_utils import SharedPriceBook, PollBackoff
+from sentiment_utils import SharedSentimentBook
+from feature_utils import SharedFeatureBook
+from network_utils import AcknowledgedSender, link_address
+from order_codec_utils import get_order_codec, order_id_sequence
+from latency_utils import (
+    LatencyTracer, now_ns, hop_name, SHM_WRITE, STRATEGY_READ, ORDER_SEND, NEWS_EVENT
+)
+from logging_utils import get_logger
+from metrics_utils import SharedMetrics, ORDERS_SENT, RECONNECTS
+from profiling_utils import install_profiler, stage_timers, STAGE_DECISION
+from tuning_utils import ProcessTuning, warm_up
 from config import (
-    HOST,
-    NEWS_PORT,
     ORDER_PORT,
     SHARED_MEMORY_NAME,
+    SENTIMENT_SHM_NAME,
+    SENTIMENT_POLL_INTERVAL,
+    SENTIMENT_POLL_MAX_INTERVAL,
+    FEATURE_SHM_NAME,
     SYMBOLS,
     SHORT_WINDOW,
     LONG_WINDOW,
     BULLISH_THRESHOLD,
     BEARISH_THRESHOLD,
     TRADE_QUANTITY,  # add this in config.py
+    STRATEGY_ID,
 )
 
+log = get_logger("Strategy")
+
 
 def ma_news_strategy_decision(
     price_history,
@@ -45,10 +68,14 @@ def ma_news_strategy_decision(
     long_window=LONG_WINDOW,
     bullish_threshold=BULLISH_THRESHOLD,
     bearish_threshold=BEARISH_THRESHOLD,
+    moving_averages=None,
 ):
     """
     Moving average crossover + news sentiment strategy.
 
+    moving_averages, if given, is the (short, long) pair to use instead of
+    averaging price_history (e.g. read from the shared feature block).
+
     Returns:
         None if no action should be taken, or a dict:
             {
@@ -58,11 +85,13 @@ def ma_news_strategy_decision(
             }
     """
 
-    if len(price_history) < long_window:
+    if moving_averages is not None:
+        short_ma, long_ma_val = moving_averages
+    elif len(price_history) < long_window:
         return None
-
-    short_ma = mean(price_history[-short_window:])
-    long_ma_val = mean(price_history[-long_window:])
+    else:
+        short_ma = mean(price_history[-short_window:])
+        long_ma_val = mean(price_history[-long_window:])
 
     if short_ma > long_ma_val:
         price_signal = "BUY"
@@ -78,12 +107,12 @@ def ma_news_strategy_decision(
     else:
         news_signal = "HOLD"
 
-    print(
-        f"[Strategy] price={price:.2f}, short_ma={short_ma:.2f}, "
-        f"long_ma={long_ma_val:.2f}, sentiment={sentiment}, "
-        f"price_signal={price_signal}, news_signal={news_signal}, "
-        f"position={position}"
+    log.debug(
+        "[Strategy] price=%.2f, short_ma=%.2f, long_ma=%.2f, sentiment=%s, "
+        "price_signal=%s, news_signal=%s, position=%s",
+        price, short_ma, long_ma_val, sentiment, price_signal, news_signal, position
     )
+    log.count("evaluations")
 
     if price_signal == "BUY" and news_signal == "BUY":
         desired_position = "LONG"
@@ -97,7 +126,7 @@ def ma_news_strategy_decision(
         return None
 
     if position == desired_position:
-        print("[Strategy] Desired position matches current position. No new order.")
+        log.debug("[Strategy] Desired position matches current position. No new order.")
         return None
 
     return {
@@ -107,20 +136,134 @@ def ma_news_strategy_decision(
     }
 
 
-def run_strategy():
+def sample_price(book, symbol, version, price_history):
+    """
+    Appends the symbol's price to price_history if the book wrote it
+    since version, keeping the last LONG_WINDOW samples. The fallback
+    for the feature block, which takes the same samples as they are
+    written.
+
+    Returns:
+        int: The book version to pass next time.
+    """
+    current, rows, prices = book.changes_since(version)
+    if current != version:
+        idx = book.symbol_to_index.get(symbol)
+        for row, price in zip(rows.tolist(), prices.tolist()):
+            if row == idx and price > 0:
+                price_history.append(price)
+                if len(price_history) > LONG_WINDOW:
+                    price_history.pop(0)
+    return current
+
+
+def read_moving_averages(features, symbol, columns):
+    """
+    Reads the short and long SMA of a symbol from the feature block.
+
+    Args:
+        columns: The column() of the short and of the long SMA.
+
+    Returns:
+        tuple: (short_ma, long_ma), or None until the long window is full.
+
+    Raises:
+        RuntimeError: If the writer never paused long enough to read.
+    """
+    result = features.read(symbol)
+    if result is None or result[1] < LONG_WINDOW:
+        return None
+    row = result[0]
+    return float(row[columns[0]]), float(row[columns[1]])
+
+
+def attach_features(name=FEATURE_SHM_NAME):
+    """
+    Attaches to the feature block if it keeps both SMA windows.
+
+    Args:
+        name (str): The block's name (the simulation runs its own).
+
+    Returns:
+        tuple: (features, columns), or (None, None) to fall back to our
+        own price history.
+    """
+    try:
+        features = SharedFeatureBook(name=name)
+    except FileNotFoundError:
+        print(f"[Strategy] Feature memory '{name}' not found; averaging prices ourselves.")
+        return None, None
+    try:
+        columns = (features.column('sma', SHORT_WINDOW), features.column('sma', LONG_WINDOW))
+    except KeyError as e:
+        print(f"[Strategy] {e.args[0]} Averaging prices ourselves.")
+        features.close()
+        return None, None
+    print(f"[Strategy] Reading SMA {SHORT_WINDOW} / {LONG_WINDOW} from '{name}'.")
+    return features, columns
+
+
+def make_decision(symbol, price, sentiment, position, price_history, features=None, columns=None):
+    """
+    One decision of the Strategy, shared by run_strategy() and the
+    simulation: the moving averages come from the feature block if
+    features is given, otherwise from price_history.
+
+    Args:
+        columns: The column() of the short and of the long SMA (with features).
+
+    Returns:
+        tuple: (decision, (short_ma, long_ma)), or (None, None) if there
+        is nothing to do (including while the averages warm up).
+
+    Raises:
+        RuntimeError: If the feature block's writer never paused long enough to read.
+    """
+    moving_averages = None
+    if features is not None:
+        moving_averages = read_moving_averages(features, symbol, columns)
+        if moving_averages is None:
+            log.debug("[Strategy] Features of %s not warmed up yet. Skipping tick.", symbol)
+            return None, None
+
+    decision_start_ns = now_ns()
+    decision = ma_news_strategy_decision(
+        price_history=price_history,
+        price=price,
+        sentiment=sentiment,
+        position=position,
+        moving_averages=moving_averages,
+    )
+    stage_timers.add(STAGE_DECISION, now_ns() - decision_start_ns)
+
+    if decision is None:
+        return None, None
+    return decision, moving_averages or (
+        mean(price_history[-SHORT_WINDOW:]), mean(price_history[-LONG_WINDOW:])
+    )
+
+
+def run_strategy(ready_event=None):
     """
     Orchestration function for the Strategy process.
 
-    - Attaches to shared memory
-    - Connects to news feed and OrderManager
-    - Maintains price history and position
-    - On each news tick:
+    - Attaches to the price and sentiment shared memory
+    - Connects to the OrderManager
+    - Reads moving averages from the feature block (or keeps a price
+      history) and maintains the position
+    - On each new sentiment event for the traded symbol:
         * reads latest price
-        * calls ma_news_strategy_decision
+        * calls make_decision (ma_news_strategy_decision)
         * if decision exists, sends an order
+
+    Args:
+        ready_event: Optional multiprocessing.Event, set once the Strategy
+            is attached and connected (used by the main.py supervisor).
     """
 
     print("[Strategy] Starting...")
+    tuning = ProcessTuning("strategy")
+    tuning.apply()
 
     if not SYMBOLS:
         print("[Strategy] No symbols configured in SYMBOLS. Exiting.")
@@ -137,103 +280,171 @@ def run_strategy():
         return
 
     print(f"[Strategy] Attached to SharedPriceBook '{SHARED_MEMORY_NAME}'.")
-
-    # Connect to news feed once
     try:
-        news_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        news_socket.connect((HOST, NEWS_PORT))
-        print(f"[Strategy] Connected to news feed at {HOST}:{NEWS_PORT}.")
-    except OSError as e:
-        print(f"[Strategy] Could not connect to news feed: {e}")
+        sentiment_book = SharedSentimentBook(name=SENTIMENT_SHM_NAME)
+    except FileNotFoundError:
+        print(f"[Strategy] Sentiment memory '{SENTIMENT_SHM_NAME}' not found. Is NewsIngest running?")
         book.close()
         return
+    features, feature_columns = attach_features()
+    metrics = SharedMetrics("strategy")
 
-    # Connect to OrderManager once
-    try:
-        order_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        order_socket.connect((HOST, ORDER_PORT))
-        print(f"[Strategy] Connected to OrderManager at {HOST}:{ORDER_PORT}.")
-    except OSError as e:
-        print(f"[Strategy] Could not connect to OrderManager: {e}")
-        news_socket.close()
-        book.close()
-        return
+    def count_reconnect(connection):
+        if connection.connects > 1:
+            metrics.inc(RECONNECTS)
+
+    # Retries with backoff until the OrderManager is up
+    order_conn = AcknowledgedSender(link_address(ORDER_PORT), "Strategy", on_connect=count_reconnect)
+    order_conn.try_connect()
 
     price_history = []
     position = None
+    codec = get_order_codec()
+    # Unique across Strategy processes (STRATEGY_ID in the top bits) and restarts
+    order_ids = order_id_sequence(STRATEGY_ID, time.time_ns())
+    tracer = LatencyTracer("strategy")
+    install_profiler("strategy")
+
+    # Run the decision once per branch so the first real tick is not the first call
+    warm_history = [100.0 + i for i in range(LONG_WINDOW)]
+    for warm_sentiment in (BULLISH_THRESHOLD + 1, BEARISH_THRESHOLD - 1, 50):
+        warm_up(ma_news_strategy_decision, warm_history, warm_history[-1], warm_sentiment, None, repeat=1)
+    warm_up(codec.encode_frame, {
+        "symbol": trade_symbol, "side": "BUY", "quantity": TRADE_QUANTITY, "price": 0.0,
+        "trace": {"tick_id": 0},
+    })
+    tuning.finish_warmup()
+
+    if ready_event:
+        ready_event.set()
+
+    # Only events (and, without the feature block, prices) written after we started count
+    price_version = book.version()
+    sentiment_version = sentiment_book.version()
+    last_seq = (sentiment_book.read(trade_symbol) or (0, 0, 0))[2]
+    writer_alive = True
+    backoff = PollBackoff(SENTIMENT_POLL_INTERVAL, SENTIMENT_POLL_MAX_INTERVAL)
 
     try:
-        for news_msg in receive_messages(news_socket):
+        while True:
+            # Collect acks, resend what was lost, reconnect if needed
+            order_conn.poll()
+            if features is None:
+                price_version = sample_price(book, trade_symbol, price_version, price_history)
+            version = sentiment_book.version()
+            if version == sentiment_version:
+                backoff.idle()
+                continue
+            backoff.reset()
             try:
-                sentiment_str = news_msg.decode("utf-8").strip()
-                sentiment = int(sentiment_str)
-            except ValueError:
-                print(f"[Strategy] Could not parse sentiment from message: {news_msg!r}")
+                event = sentiment_book.read(trade_symbol)
+            except RuntimeError as e:
+                # NewsIngest died mid-write; its restart repairs the block.
+                # The version stays unseen, so the event is read then.
+                log.warning("[Strategy] %s", e)
+                backoff.idle()
                 continue
-
-            price = book.read(trade_symbol)
-            if price is None:
-                print(f"[Strategy] No price available yet for {trade_symbol}. Skipping tick.")
+            sentiment_version = version
+            if event is None or event[2] == last_seq:
+                continue  # News about other symbols
+            sentiment, event_ns, last_seq = event
+
+            # A dead OrderBook leaves its last prices in the book: no trading on those
+            if not book.writer_alive():
+                if writer_alive:
+                    status = book.writer_status()
+                    log.warning("[Strategy] OrderBook (pid %s) stopped writing prices; not trading until it is back.",
+                                status['pid'] or '?')
+                    writer_alive = False
                 continue
-
-            price = float(price)
-
-            price_history.append(price)
-            if len(price_history) > LONG_WINDOW:
-                price_history.pop(0)
-
-            decision = ma_news_strategy_decision(
-                price_history=price_history,
-                price=price,
-                sentiment=sentiment,
-                position=position,
-            )
-
-            if decision is None:
-                continue
-
-            side = decision["side"]
-            desired_position = decision["desired_position"]
-            reason = decision["reason"]
-
-            short_ma = mean(price_history[-SHORT_WINDOW:])
-            long_ma = mean(price_history[-LONG_WINDOW:])
-
-            order = {
-                "symbol": trade_symbol,
-                "side": side,
-                "quantity": TRADE_QUANTITY,
-                "price": price,
-                "sentiment": sentiment,
-                "short_ma": short_ma,
-                "long_ma": long_ma,
-                "position_before": position,
-                "position_after": desired_position,
-                "reason": reason,
-                "timestamp": time.time(),
-            }
-
-            try:
-                order_bytes = json.dumps(order).encode("utf-8")
-                send_message(order_socket, order_bytes)
+            if not writer_alive:
+                log.info("[Strategy] OrderBook is writing prices again.")
+                writer_alive = True
+
+            # No GC pause between reading the price and sending the order
+            with tuning.hot_loop():
+                price = book.read(trade_symbol)
+                read_ns = now_ns()
+                trace = book.read_trace()
+                if trace["write_ns"]:
+                    # Age of the price when we read it (shm write -> strategy read)
+                    tracer.record(hop_name(SHM_WRITE, STRATEGY_READ), trace["write_ns"], read_ns)
+                # Age of the news when it drove this decision (includes the poll wait)
+                tracer.record(hop_name(NEWS_EVENT, STRATEGY_READ), event_ns, read_ns)
+
+                if price is None:
+                    log.debug("[Strategy] No price available yet for %s. Skipping tick.", trade_symbol)
+                    continue
+
+                price = float(price)
+
+                try:
+                    decision, moving_averages = make_decision(
+                        trade_symbol, price, sentiment, position, price_history, features, feature_columns)
+                except RuntimeError as e:
+                    log.warning("[Strategy] %s", e)
+                    continue
+
+                if decision is None:
+                    continue
+
+                side = decision["side"]
+                desired_position = decision["desired_position"]
+                reason = decision["reason"]
+                short_ma, long_ma = moving_averages
+
+                order = {
+                    "symbol": trade_symbol,
+                    "side": side,
+                    "quantity": TRADE_QUANTITY,
+                    "price": price,
+                    "sentiment": sentiment,
+                    "short_ma": short_ma,
+                    "long_ma": long_ma,
+                    "position_before": position,
+                    "position_after": desired_position,
+                    "reason": reason,
+                    "client_order_id": next(order_ids),
+                    "strategy_id": STRATEGY_ID,
+                    "timestamp_ns": time.time_ns(),
+                    "trace": {
+                        "tick_id": trace["tick_id"],
+                        "generate_ns": trace["generate_ns"],
+                        "read_ns": read_ns,
+                    },
+                }
+
+                send_ns = now_ns()
+                order["trace"]["send_ns"] = send_ns
+                # Queued (not lost) if the OrderManager is away right now
+                dropped = order_conn.dropped
+                if not order_conn.send_message(codec.encode_frame(order), order["client_order_id"]):
+                    if order_conn.dropped > dropped:
+                        log.warning("[Strategy] Send queue full; order %s dropped", order["client_order_id"])
+                    else:
+                        log.warning("[Strategy] OrderManager unreachable; order %s queued (%d waiting)",
+                                    order["client_order_id"], len(order_conn.pending))
+                tracer.record(hop_name(STRATEGY_READ, ORDER_SEND), read_ns, send_ns)
+                metrics.inc(ORDERS_SENT)
+                metrics.observe(send_ns - read_ns)
 
                 t2 = time.time()
 
-                print(
-                    f"[Strategy-Perf] t2={t2:.6f} "
-                    f"symbol={trade_symbol} price={price:.2f} "
-                    f"sentiment={sentiment} side={side}"
+                log.info(
+                    "[Strategy-Perf] t2=%.6f symbol=%s price=%.2f sentiment=%s side=%s",
+                    t2, trade_symbol, price, sentiment, side
                 )
-
-                print(f"[Strategy] Sent order: {order}")
+                log.debug("[Strategy] Sent order: %s", order)
+                log.count("orders")
                 position = desired_position
-            except OSError as e:
-                print(f"[Strategy] Error sending order: {e}")
-                break
 
+    except KeyboardInterrupt:
+        print("\n[Strategy] Shutting down...")
     finally:
-        news_socket.close()
-        order_socket.close()
+        order_conn.close()
+        sentiment_book.close()
+        if features is not None:
+            features.close()
         book.close()
         print("[Strategy] Closed connections and detached from shared memory.")
 
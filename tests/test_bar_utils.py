@@ -0,0 +1,139 @@
+"""
+Unit test for bar_utils.py
+"""
+
+import contextlib
+import io
+import tempfile
+import unittest
+
+import numpy as np
+
+# --- Make the Play Button work ---
+import sys
+import os
+
+current_file_path = os.path.abspath(__file__)
+tests_dir = os.path.dirname(current_file_path)
+project_root = os.path.dirname(tests_dir)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+from bar_utils import SharedBarBook, parse_bar_frame
+from shared_memory_utils import unlink_untracked_shared_memory
+
+BAR_SHM = f"test_bars_{os.getpid()}"
+SECOND = 1_000_000_000
+
+
+class TestBars(unittest.TestCase):
+
+    def setUp(self):
+        self.blocks = []
+
+    def tearDown(self):
+        for bars in self.blocks:
+            bars.close()
+            if not bars.path:
+                unlink_untracked_shared_memory(bars.name)
+
+    def open(self, frame, **kwargs):
+        bars = SharedBarBook(frame, create=True, path=kwargs.pop('path', ''), **kwargs)
+        self.blocks.append(bars)
+        bars.sync_symbols(['AAPL', 'MSFT'])
+        return bars
+
+    def test_parse_bar_frame(self):
+        self.assertEqual(parse_bar_frame('250ms'), (250_000_000, 0))
+        self.assertEqual(parse_bar_frame('1m'), (60 * SECOND, 0))
+        self.assertEqual(parse_bar_frame('100t'), (0, 100))
+        for bad in ('', '0s', '1h', 's', '1.5s'):
+            with self.assertRaises(ValueError):
+                parse_bar_frame(bad)
+
+    def test_time_bars(self):
+        bars = self.open('1s', name=f"{BAR_SHM}_1s", capacity=4, depth=3)
+        bars.ROW_BY_ROW_MAX = 1  # Batches of one row by row, the others vectorized
+        t0 = 1000 * SECOND
+        bars.add_ticks([0, 1], [100.0, 50.0], t0 + 1)
+        bars.add_ticks([0], [102.0], t0 + SECOND // 2)
+        bars.add_ticks([0, 1], [99.0, 0.0], t0 + SECOND - 1)  # MSFT without a price: skipped
+        self.assertEqual(bars.latest('AAPL'), {
+            'open': 100.0, 'high': 102.0, 'low': 99.0, 'close': 99.0,
+            'volume': 3, 'start_ns': t0, 'end_ns': t0 + SECOND - 1,
+        })
+        self.assertEqual(bars.latest('MSFT')['volume'], 1)
+
+        # The first tick of a later second starts the next bar; gaps make no bars
+        self.assertEqual(bars.add_ticks([0], [101.0], t0 + 3 * SECOND), 1)
+        for step in range(4, 7):
+            bars.add_ticks([0], [100.0 + step], t0 + step * SECOND)
+        history = bars.history('AAPL')
+        # Only the last depth bars are kept, oldest first
+        np.testing.assert_array_equal(history['start_ns'], [t0 + 4 * SECOND, t0 + 5 * SECOND, t0 + 6 * SECOND])
+        np.testing.assert_array_equal(history['open'], [104.0, 105.0, 106.0])
+        self.assertEqual(len(bars.history('AAPL', 2)['open']), 2)
+
+        reader = SharedBarBook('1s', name=f"{BAR_SHM}_1s", path='')
+        try:
+            self.assertEqual(reader.latest('AAPL')['open'], 106.0)
+            self.assertIsNone(reader.latest('TSLA'))
+            bars.sync_symbols(['AAPL', 'MSFT', 'TSLA'])
+            self.assertIsNone(reader.latest('TSLA'))  # Known, but no ticks yet
+            self.assertEqual(len(reader.history('TSLA')['open']), 0)
+        finally:
+            reader.close()
+        with self.assertRaises(ValueError):
+            SharedBarBook('1m', name=f"{BAR_SHM}_1s", create=True, path='')
+
+    def test_tick_bars_in_a_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, '3t.bars')
+            bars = self.open('3t', path=path, capacity=4, depth=8)
+            bars.ROW_BY_ROW_MAX = 0
+            # Vectorized over the batch: both rows move on together
+            for i in range(7):
+                bars.add_ticks([0, 1], [100.0 + i, 200.0 - i], (i + 1) * SECOND)
+            history = bars.history('MSFT')
+            np.testing.assert_array_equal(history['volume'], [3, 3, 1])
+            np.testing.assert_array_equal(history['high'], [200.0, 197.0, 194.0])
+            np.testing.assert_array_equal(history['low'], [198.0, 195.0, 194.0])
+            np.testing.assert_array_equal(history['start_ns'], [SECOND, 4 * SECOND, 7 * SECOND])
+            bars.close()
+            self.blocks.remove(bars)
+
+            # The bars outlive the writer: a new one carries on with them (row by row)
+            restarted = self.open('3t', path=path)
+            restarted.add_ticks([0, 1], [50.0, 210.0], 8 * SECOND)
+            self.assertEqual(restarted.add_ticks([1, 1], [190.0, 0.0], 9 * SECOND), 0)
+            reader = SharedBarBook('3t', path=path)
+            try:
+                self.assertEqual(reader.latest('AAPL')['volume'], 2)
+                self.assertEqual(reader.latest('AAPL')['low'], 50.0)
+                self.assertEqual(len(reader.history('AAPL')['open']), 3)
+                msft = reader.latest('MSFT')
+                self.assertEqual((msft['open'], msft['high'], msft['low'], msft['close']), (194.0, 210.0, 190.0, 190.0))
+
+                # Killed mid-batch with a close above the high: the next writer widens the bar
+                restarted.begin_write()
+                restarted.close_[0, (restarted.bar_count[0] - 1) % restarted.depth] = 200.0
+                restarted.close()
+                self.blocks.remove(restarted)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    repaired = self.open('3t', path=path)
+                self.assertEqual(repaired.version() % 2, 0)
+                self.assertEqual(reader.latest('AAPL')['high'], 200.0)
+
+                # A new run numbers its symbols differently: MSFT's row now belongs to TSLA
+                with contextlib.redirect_stdout(io.StringIO()) as out:
+                    self.assertEqual(repaired.sync_symbols(['AAPL', 'TSLA']), 2)
+                self.assertIn("'MSFT' in row 1", out.getvalue())
+                self.assertIsNone(reader.latest('MSFT'))
+                self.assertIsNone(reader.latest('TSLA'))  # Known, but no ticks yet
+                self.assertEqual(reader.latest('AAPL')['volume'], 2)
+            finally:
+                reader.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
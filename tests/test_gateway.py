@@ -0,0 +1,77 @@
+"""
+Unit test for the subscription filtering in gateway.py
+"""
+
+import socket
+import threading
+import time
+import unittest
+
+# --- Make the Play Button work ---
+import sys
+import os
+
+current_file_path = os.path.abspath(__file__)
+tests_dir = os.path.dirname(current_file_path)
+project_root = os.path.dirname(tests_dir)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+import gateway
+from network_utils import MessageFramer, send_subscription, format_subscription, SUBSCRIBE, UNSUBSCRIBE
+from config import SYMBOLS, MESSAGE_DELIMITER
+
+
+class TestSubscriptions(unittest.TestCase):
+
+    def setUp(self):
+        self.clients = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        for client_socket in list(self.clients):
+            gateway.drop_client(client_socket, self.clients, self.lock, "Test")
+
+    def test_only_subscribed_symbols_are_sent(self):
+        gateway.generate_price_data()
+        header = b"#7,1,2"
+        full = MESSAGE_DELIMITER.join([header, *gateway.quote_fragments])
+        first, last = SYMBOLS[0], SYMBOLS[-1]
+
+        client = object()
+        gateway.apply_subscription(client, format_subscription(UNSUBSCRIBE), "Test")
+        gateway.apply_subscription(client, format_subscription(SUBSCRIBE, [last, 'NOPE']), "Test")
+        mask = gateway.subscriptions.pop(client)
+        self.assertEqual(gateway.subscribed_indices(mask), (len(SYMBOLS) - 1,))
+
+        cache = {}
+        payload = gateway.filtered_payload(mask, full, header, gateway.quote_fragments, cache)
+        self.assertEqual(payload.split(MESSAGE_DELIMITER), [header, gateway.latest_quotes[last].encode()])
+        self.assertIs(gateway.filtered_payload(mask, full, header, gateway.quote_fragments, cache), payload)
+        self.assertIs(gateway.filtered_payload(gateway.ALL_SYMBOLS, full, header, [], cache), full)
+        # Nothing subscribed: the header alone keeps the tick ids continuous
+        self.assertEqual(gateway.filtered_payload(0, full, header, gateway.quote_fragments, cache), header)
+        self.assertNotIn(first.encode(), payload)
+
+    def test_control_messages_and_hang_ups(self):
+        threading.Thread(target=gateway.control_loop, daemon=True).start()
+        server_side, client_side = socket.socketpair()
+        with self.lock:
+            self.clients.append(server_side)
+            gateway.control_selector.register(server_side, gateway.selectors.EVENT_READ,
+                                              (MessageFramer(), self.clients, self.lock, "Test"))
+        send_subscription(client_side, [SYMBOLS[1]])
+        deadline = time.monotonic() + 2.0
+        while gateway.subscriptions.get(server_side) != 1 << 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(gateway.subscriptions.get(server_side), 1 << 1)
+
+        client_side.close()
+        while self.clients and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.clients, [])
+        self.assertNotIn(server_side, gateway.subscriptions)
+
+
+if __name__ == '__main__':
+    unittest.main()
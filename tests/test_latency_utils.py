@@ -0,0 +1,93 @@
+"""
+Unit test for latency_utils.py
+"""
+
+import unittest
+import tempfile
+
+# --- Make the Play Button work ---
+import sys
+import os
+
+current_file_path = os.path.abspath(__file__)
+tests_dir = os.path.dirname(current_file_path)
+project_root = os.path.dirname(tests_dir)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+from latency_utils import (
+    LatencyHistogram,
+    LatencyTracer,
+    bucket_index,
+    bucket_upper_bound,
+    load_trace_dir,
+    NUM_BUCKETS,
+)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_bucket_bounds_contain_value(self):
+        """Every value must land in a bucket whose bounds contain it (within ~1.6%)."""
+        for value in [0, 1, 127, 128, 129, 255, 256, 1000, 123456, 10**9, 3 * 10**12]:
+            index = bucket_index(value)
+            upper = bucket_upper_bound(index)
+            self.assertGreaterEqual(upper, value)
+            self.assertLessEqual(upper - value, max(1, value) / 64 + 1)
+
+    def test_huge_values_are_clamped(self):
+        self.assertEqual(bucket_index(2**60), NUM_BUCKETS - 1)
+
+    def test_percentiles(self):
+        hist = LatencyHistogram()
+        for value in range(1, 1001):
+            hist.record(value * 1000)  # 1us .. 1ms
+
+        self.assertEqual(hist.total(), 1000)
+        self.assertAlmostEqual(hist.percentile(50), 500_000, delta=500_000 / 64)
+        self.assertAlmostEqual(hist.percentile(99), 990_000, delta=990_000 / 64)
+        self.assertAlmostEqual(hist.max(), 1_000_000, delta=1_000_000 / 64)
+
+    def test_empty_histogram(self):
+        hist = LatencyHistogram()
+        self.assertEqual(hist.percentile(99.9), 0)
+        self.assertEqual(hist.max(), 0)
+
+    def test_merge_and_round_trip(self):
+        a = LatencyHistogram()
+        b = LatencyHistogram()
+        a.record(100)
+        b.record(100)
+        b.record(5000)
+
+        a.merge(LatencyHistogram.from_dict(b.to_dict()))
+        self.assertEqual(a.total(), 3)
+        self.assertEqual(a.counts[bucket_index(100)], 2)
+
+
+class TestLatencyTracer(unittest.TestCase):
+
+    def test_dump_and_merge_across_processes(self):
+        """Dumps from two 'processes' must merge hop by hop."""
+        with tempfile.TemporaryDirectory() as trace_dir:
+            gateway = LatencyTracer("gateway", enabled=True, trace_dir=trace_dir)
+            orderbook = LatencyTracer("orderbook", enabled=True, trace_dir=trace_dir)
+            gateway.record("a->b", 0, 1000)
+            orderbook.record("a->b", 0, 3000)
+            orderbook.record("b->c", 0, 2000)
+
+            gateway.dump()
+            orderbook.dump()
+
+            merged = load_trace_dir(trace_dir)
+            self.assertEqual(merged["a->b"].total(), 2)
+            self.assertEqual(merged["b->c"].total(), 1)
+
+    def test_disabled_tracer_records_nothing(self):
+        tracer = LatencyTracer("gateway", enabled=False)
+        tracer.record("a->b", 0, 1000)
+        self.assertEqual(tracer.histograms, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
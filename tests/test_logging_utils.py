@@ -0,0 +1,79 @@
+"""
+Unit test for logging_utils.py
+"""
+
+import io
+import unittest
+
+# --- Make the Play Button work ---
+import sys
+import os
+
+current_file_path = os.path.abspath(__file__)
+tests_dir = os.path.dirname(current_file_path)
+project_root = os.path.dirname(tests_dir)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+from logging_utils import AsyncLogger, DEBUG, INFO, _noop
+
+
+class TestAsyncLogger(unittest.TestCase):
+
+    def make_logger(self, **kwargs):
+        self.stream = io.StringIO()
+        kwargs.setdefault('summary_interval', 0)
+        return AsyncLogger("Test", stream=self.stream, **kwargs)
+
+    def test_records_are_formatted_on_flush(self):
+        log = self.make_logger(level=INFO)
+        log.info("[Test] price=%.2f symbol=%s", 150.256, "AAPL")
+
+        # Nothing is written until the background side flushes
+        log.flush()
+        self.assertEqual(self.stream.getvalue(), "[Test] price=150.26 symbol=AAPL\n")
+
+    def test_disabled_level_is_a_noop(self):
+        log = self.make_logger(level=INFO)
+        self.assertIs(log.debug, _noop)
+        self.assertFalse(log.debug_enabled)
+
+        log.debug("[Test] %s", "hidden")
+        log.flush()
+        self.assertEqual(self.stream.getvalue(), "")
+
+        log.set_level(DEBUG)
+        log.debug("[Test] %s", "shown")
+        log.flush()
+        self.assertIn("shown", self.stream.getvalue())
+
+    def test_full_ring_drops_oldest(self):
+        log = self.make_logger(level=INFO, ring_size=3)
+        for i in range(5):
+            log.info("msg %d", i)
+        log.flush()
+
+        self.assertEqual(self.stream.getvalue().split(), ["msg", "2", "msg", "3", "msg", "4"])
+        self.assertEqual(log.dropped, 2)
+
+    def test_summary_replaces_per_event_lines(self):
+        log = self.make_logger(level=INFO, summary_interval=1e-9)
+        for _ in range(10):
+            log.count("updates")
+        log.gauge("last_tick", 42)
+        log.flush()
+
+        output = self.stream.getvalue()
+        self.assertIn("[Test] summary", output)
+        self.assertIn("updates=10", output)
+        self.assertIn("last_tick=42", output)
+
+    def test_bad_record_does_not_raise(self):
+        log = self.make_logger(level=INFO)
+        log.info("%d", "not a number")
+        log.flush()
+        self.assertIn("Bad log record", self.stream.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
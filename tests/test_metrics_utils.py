@@ -0,0 +1,76 @@
+"""
+Unit test for metrics_utils.py
+"""
+
+import unittest
+
+# --- Make the Play Button work ---
+import sys
+import os
+
+current_file_path = os.path.abspath(__file__)
+tests_dir = os.path.dirname(current_file_path)
+project_root = os.path.dirname(tests_dir)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+from metrics_utils import (
+    SharedMetrics,
+    format_prometheus,
+    TICKS_SENT,
+    CLIENT_COUNT,
+)
+
+TEST_METRICS_NAME = f"test_metrics_{os.getpid()}"
+
+
+class TestSharedMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.writer = SharedMetrics("gateway", name=TEST_METRICS_NAME)
+
+    def tearDown(self):
+        self.writer.close()
+        self.writer.unlink()
+
+    def test_viewer_sees_writer_updates(self):
+        self.writer.inc(TICKS_SENT)
+        self.writer.inc(TICKS_SENT, 2)
+        self.writer.set(CLIENT_COUNT, 5)
+        self.writer.observe(1500)
+
+        viewer = SharedMetrics(name=TEST_METRICS_NAME)
+        try:
+            snapshot = viewer.snapshot()
+        finally:
+            viewer.close()
+
+        gateway = snapshot["gateway"]
+        self.assertEqual(gateway["pid"], os.getpid())
+        self.assertEqual(gateway["counters"]["ticks_sent"], 3)
+        self.assertEqual(gateway["counters"]["client_count"], 5)
+        self.assertEqual(gateway["histogram"].total(), 1)
+        # Other processes have not started, so their rows are empty
+        self.assertEqual(snapshot["strategy"]["pid"], 0)
+
+    def test_second_writer_attaches_to_same_block(self):
+        other = SharedMetrics("orderbook", name=TEST_METRICS_NAME)
+        try:
+            other.inc(TICKS_SENT)
+            self.assertEqual(self.writer.snapshot()["orderbook"]["counters"]["ticks_sent"], 1)
+        finally:
+            other.close()
+
+    def test_prometheus_format(self):
+        self.writer.inc(TICKS_SENT, 7)
+        self.writer.set(CLIENT_COUNT, 2)
+        text = format_prometheus(self.writer.snapshot())
+
+        self.assertIn('trading_ticks_sent_total{process="gateway"} 7', text)
+        self.assertIn('trading_client_count{process="gateway"} 2', text)
+        self.assertIn('# TYPE trading_latency_seconds summary', text)
+        self.assertNotIn('process="strategy"', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
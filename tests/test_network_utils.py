@@ -2,6 +2,8 @@
 Unit test for network_utils.py
 """
 
+import contextlib
+import io
 import unittest
 import socket
 import threading
@@ -26,7 +28,17 @@ sys.path.insert(0, project_root)
 
 
 # Change this line back:
-from network_utils import send_message, receive_messages
+from network_utils import (
+    send_message, receive_messages, MessageFramer, SequenceTracker, RetransmitBuffer,
+    format_recovery_request, parse_recovery_request,
+    format_subscription, parse_subscription, send_subscription, SUBSCRIBE, UNSUBSCRIBE,
+    format_tick_header, parse_tick_header, is_snapshot_header,
+    create_multicast_sender, create_multicast_receiver,
+    ResilientConnection, AcknowledgedSender, format_ack_frame, FRAME_HEADER, ACK_STRUCT,
+    apply_socket_options, create_server_socket, create_client_socket,
+    start_client_connect, finish_client_connect,
+    parse_address, link_address, SEQPACKET_RECORD_SIZE,
+)
 # Not: from ..network_utils import ...
 
 from config import MESSAGE_DELIMITER
@@ -158,5 +170,357 @@ class TestNetworkUtils(unittest.TestCase):
         self.assertEqual(self.received_messages, messages_to_send)
         print("TestNetworkUtils: All messages received correctly.")
 
+
+class TestMessageFramer(unittest.TestCase):
+
+    def test_partial_and_multiple_messages(self):
+        framer = MessageFramer()
+        self.assertEqual(framer.feed(b"AAPL,15"), [])
+        self.assertEqual(framer.feed(b"0.00" + MESSAGE_DELIMITER + b"MSFT"), [b"AAPL,150.00"])
+        self.assertEqual(
+            framer.feed(b",320.50" + MESSAGE_DELIMITER + b"X" + MESSAGE_DELIMITER),
+            [b"MSFT,320.50", b"X"]
+        )
+        self.assertEqual(framer.buffer, b"")
+
+class TestSequencedFeed(unittest.TestCase):
+
+    def test_sequence_gaps(self):
+        tracker = SequenceTracker()
+        self.assertIsNone(tracker.observe(10))  # Joining mid-stream is not a gap
+        self.assertIsNone(tracker.observe(11))
+        self.assertEqual(tracker.observe(15), (12, 14))
+        self.assertEqual(tracker.missed, 3)
+        # The publisher restarted its numbering
+        self.assertIsNone(tracker.observe(1))
+        self.assertEqual(tracker.restarts, 1)
+        self.assertIsNone(tracker.observe(2))
+
+    def test_retransmit_buffer(self):
+        buffer = RetransmitBuffer(size=3)
+        for seq in range(1, 6):
+            buffer.append(seq, f"tick{seq}".encode())
+        self.assertEqual(buffer.get(3, 4), [b"tick3", b"tick4"])
+        self.assertIsNone(buffer.get(1, 4))  # Tick 1 and 2 are gone
+        self.assertIsNone(buffer.get(5, 6))  # Tick 6 was never sent
+        self.assertEqual(buffer.latest(), (5, b"tick5"))
+
+        # A restarted numbering drops the old ticks
+        buffer.append(1, b"new1")
+        self.assertEqual(buffer.latest(), (1, b"new1"))
+        self.assertIsNone(buffer.get(4, 4))
+
+    def test_snapshot_header(self):
+        header = format_tick_header(42, 1, 2, snapshot=True)
+        self.assertTrue(is_snapshot_header(header))
+        self.assertEqual(parse_tick_header(header), (42, 1, 2))
+        self.assertFalse(is_snapshot_header(format_tick_header(42, 1, 2)))
+
+    def test_recovery_requests(self):
+        self.assertEqual(parse_recovery_request(format_recovery_request(3, 9)), (3, 9))
+        self.assertIsNone(parse_recovery_request(format_recovery_request()))
+        with self.assertRaises(ValueError):
+            parse_recovery_request(b"X,1,2")
+
+    def test_subscriptions(self):
+        self.assertEqual(parse_subscription(format_subscription(SUBSCRIBE, ['AAPL', 'MSFT'])),
+                         (SUBSCRIBE, ['AAPL', 'MSFT']))
+        self.assertEqual(parse_subscription(format_subscription(UNSUBSCRIBE)), (UNSUBSCRIBE, []))
+        with self.assertRaises(ValueError):
+            parse_subscription(b"SUBSCRIBE,AAPL")
+
+        left, right = socket.socketpair()
+        try:
+            send_subscription(left, ['GOOGL'])
+            self.assertEqual(MessageFramer().feed(right.recv(1024)), [b"UNSUB", b"SUB,GOOGL"])
+        finally:
+            left.close()
+            right.close()
+
+    def test_multicast_reaches_every_receiver(self):
+        group, port = '239.255.0.77', 9998
+        try:
+            receivers = [create_multicast_receiver(group, port) for _ in range(2)]
+        except OSError as e:
+            self.skipTest(f"No multicast on this host: {e}")
+        sender = create_multicast_sender()
+        try:
+            for receiver in receivers:
+                receiver.settimeout(2.0)
+            sender.sendto(b"#1,2,3*AAPL,1,2" + MESSAGE_DELIMITER, (group, port))
+            for receiver in receivers:
+                self.assertEqual(receiver.recv(1024), b"#1,2,3*AAPL,1,2" + MESSAGE_DELIMITER)
+        finally:
+            sender.close()
+            for receiver in receivers:
+                receiver.close()
+
+
+class TestSocketOptions(unittest.TestCase):
+
+    def test_profile_is_applied(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            apply_socket_options(sock, nodelay=True, sndbuf=32768, rcvbuf=32768)
+            self.assertEqual(sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY), 1)
+            # Linux reports double the requested size (bookkeeping overhead)
+            self.assertGreaterEqual(sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF), 32768)
+            apply_socket_options(sock, nodelay=False, sndbuf=0, rcvbuf=0)
+            self.assertEqual(sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY), 0)
+        finally:
+            sock.close()
+
+    def test_reuseport_acceptors_share_a_port(self):
+        if not hasattr(socket, 'SO_REUSEPORT'):
+            self.skipTest("No SO_REUSEPORT on this platform")
+        first = create_server_socket(f"tcp://{TEST_HOST}:0", reuseport=True)
+        port = first.getsockname()[1]
+        second = create_server_socket(f"tcp://{TEST_HOST}:{port}", reuseport=True)
+        try:
+            with self.assertRaises(OSError):
+                create_server_socket(f"tcp://{TEST_HOST}:{port}", reuseport=False)
+        finally:
+            first.close()
+            second.close()
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), "No Unix domain sockets")
+class TestTransports(unittest.TestCase):
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("tcp://127.0.0.1:9000"),
+                         (socket.AF_INET, socket.SOCK_STREAM, ('127.0.0.1', 9000)))
+        self.assertEqual(parse_address("unix:///tmp/a.sock"),
+                         (socket.AF_UNIX, socket.SOCK_STREAM, '/tmp/a.sock'))
+        self.assertEqual(parse_address("unix+seqpacket://@feed"),
+                         (socket.AF_UNIX, socket.SOCK_SEQPACKET, '\0feed'))
+        for bad in ("127.0.0.1:9000", "tcp://127.0.0.1", "udp://x:1"):
+            with self.assertRaises(ValueError):
+                parse_address(bad)
+        self.assertEqual(link_address(9000, 'seqpacket', socket_dir='@'), "unix+seqpacket://@trading-9000")
+
+    def test_messages_over_every_unix_transport(self):
+        import tempfile
+        # Bigger than one seqpacket record, so it has to be split and reassembled
+        big = b"x" * (SEQPACKET_RECORD_SIZE * 2 + 10)
+        with tempfile.TemporaryDirectory() as socket_dir:
+            for transport, directory in (('unix', socket_dir), ('seqpacket', socket_dir), ('seqpacket', '@')):
+                with self.subTest(transport=transport, directory=directory):
+                    address = link_address(os.getpid() % 10000, transport, socket_dir=directory)
+                    server = create_server_socket(address)
+                    client = create_client_socket(address)
+                    conn, _ = server.accept()
+                    try:
+                        for message in (b"one", big, b""):
+                            send_message(client, message)
+                        client.close()
+                        self.assertEqual(list(receive_messages(conn)), [b"one", big, b""])
+                    finally:
+                        server.close()
+
+    def test_live_unix_path_is_not_taken_over(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as socket_dir:
+            address = link_address(os.getpid() % 10000, 'unix', socket_dir=socket_dir)
+            server = create_server_socket(address)
+            try:
+                with self.assertRaises(OSError):
+                    create_server_socket(address)
+                # The first server still gets the connections
+                client = create_client_socket(address)
+                server.accept()[0].close()
+                client.close()
+            finally:
+                server.close()
+            # Once it is gone, its stale socket file is replaced
+            create_server_socket(address).close()
+
+    def test_non_blocking_connect(self):
+        import selectors
+        import tempfile
+        with tempfile.TemporaryDirectory() as socket_dir:
+            address = link_address(os.getpid() % 10000, 'unix', socket_dir=socket_dir)
+            # Nobody listens yet: the connect fails at once
+            with self.assertRaises(OSError):
+                start_client_connect(address)
+            for live in (address, "tcp://127.0.0.1:0"):
+                server = create_server_socket(live)
+                if live.startswith('tcp'):
+                    live = "tcp://127.0.0.1:%d" % server.getsockname()[1]
+                client = start_client_connect(live)
+                try:
+                    with selectors.DefaultSelector() as selector:
+                        selector.register(client, selectors.EVENT_WRITE)
+                        self.assertTrue(selector.select(timeout=2.0))
+                    finish_client_connect(client)
+                    conn, _ = server.accept()
+                    client.setblocking(True)
+                    send_message(client, b"hello")
+                    client.close()
+                    self.assertEqual(list(receive_messages(conn)), [b"hello"])
+                    conn.close()
+                finally:
+                    client.close()
+                    server.close()
+
+
+def read_exactly(sock, size):
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("closed")
+        data += chunk
+    return data
+
+
+def wait_until(condition, poll=None, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        if poll:
+            poll()
+        time.sleep(0.005)
+    return True
+
+
+class TestResilientConnections(unittest.TestCase):
+
+    def setUp(self):
+        self.listener = socket.create_server((TEST_HOST, 0))
+        self.listener.settimeout(2.0)
+        self.port = self.listener.getsockname()[1]
+
+    def tearDown(self):
+        self.listener.close()
+
+    def test_silent_feed_reconnects_and_resubscribes(self):
+        subscribed = []
+        conn = ResilientConnection(f"tcp://{TEST_HOST}:{self.port}", "Test", heartbeat_timeout=0.1,
+                                   on_connect=lambda c: subscribed.append(c.connects))
+        messages = conn.messages()
+        try:
+            conn.connect(timeout=1.0)
+            first, _ = self.listener.accept()
+            # A heartbeat, a message, then silence (socket left open)
+            first.sendall(MESSAGE_DELIMITER + b"one" + MESSAGE_DELIMITER)
+            self.assertEqual([next(messages), next(messages)], [b"", b"one"])
+
+            # The next read times out, reconnects and carries on
+            accepter = threading.Thread(
+                target=lambda: self.listener.accept()[0].sendall(b"two" + MESSAGE_DELIMITER))
+            accepter.start()
+            self.assertEqual(next(messages), b"two")
+            accepter.join()
+            self.assertEqual(subscribed, [1, 2])
+            first.close()
+        finally:
+            conn.close()
+
+    def test_unacknowledged_orders_are_resent(self):
+        def frame(message_id):
+            return FRAME_HEADER.pack(ACK_STRUCT.size) + ACK_STRUCT.pack(message_id)
+
+        def read_ids(sock, count):
+            data = read_exactly(sock, count * len(frame(0)))
+            return [ACK_STRUCT.unpack_from(data, i * len(frame(0)) + FRAME_HEADER.size)[0]
+                    for i in range(count)]
+
+        sender = AcknowledgedSender(f"tcp://{TEST_HOST}:{self.port}", "Test", ack_timeout=0.2)
+        try:
+            self.assertTrue(sender.send_message(frame(1), 1))
+            self.assertTrue(sender.send_message(frame(2), 2))
+            first, _ = self.listener.accept()
+            self.assertEqual(read_ids(first, 2), [1, 2])
+            first.sendall(format_ack_frame(1))
+            self.assertTrue(wait_until(lambda: len(sender.unacked) == 1, sender.poll))
+
+            # The OrderManager goes away before acknowledging order 2
+            first.close()
+            sender.send_message(frame(3), 3)
+            self.assertTrue(wait_until(lambda: sender.connects == 2, sender.poll))
+
+            second, _ = self.listener.accept()
+            self.assertEqual(read_ids(second, 2), [2, 3])
+            second.sendall(format_ack_frame(2) + format_ack_frame(3))
+            self.assertTrue(wait_until(lambda: not sender.unacked, sender.poll))
+            second.close()
+        finally:
+            sender.close()
+
+    def test_rejected_order_is_resent_after_later_acks(self):
+        def frame(message_id):
+            return FRAME_HEADER.pack(ACK_STRUCT.size) + ACK_STRUCT.pack(message_id)
+
+        sender = AcknowledgedSender(f"tcp://{TEST_HOST}:{self.port}", "Test", ack_timeout=0.2)
+        try:
+            sender.send_message(frame(1), 1)
+            sender.send_message(frame(2), 2)
+            first, _ = self.listener.accept()
+            read_exactly(first, 2 * len(frame(0)))
+            # The OrderManager could not book order 1 and booked order 2. A
+            # heartbeat, a frame of another size and half a frame come along
+            first.sendall(FRAME_HEADER.pack(0) + FRAME_HEADER.pack(3) + b"abc" + format_ack_frame(2)
+                          + format_ack_frame(9)[:5])
+            self.assertTrue(wait_until(lambda: [m for m, _, _ in sender.unacked] == [1], sender.poll))
+
+            # Order 1 is overdue: it goes out again on a new connection
+            self.assertTrue(wait_until(lambda: sender.connects == 2, sender.poll))
+            second, _ = self.listener.accept()
+            data = read_exactly(second, len(frame(0)))
+            self.assertEqual(ACK_STRUCT.unpack_from(data, FRAME_HEADER.size)[0], 1)
+            self.assertEqual(sender.resent, 1)
+            second.sendall(format_ack_frame(1))
+            self.assertTrue(wait_until(lambda: not sender.unacked, sender.poll))
+            first.close()
+            second.close()
+        finally:
+            sender.close()
+
+    def test_requeue_overflow_is_counted(self):
+        def frame(message_id):
+            return FRAME_HEADER.pack(ACK_STRUCT.size) + ACK_STRUCT.pack(message_id)
+
+        sender = AcknowledgedSender(f"tcp://{TEST_HOST}:{self.port}", "Test", max_pending=3)
+        try:
+            sender.send_message(frame(1), 1)
+            sender.send_message(frame(2), 2)
+            conn, _ = self.listener.accept()
+            self.assertEqual(len(sender.unacked), 2)
+            # The link drops with 1 and 2 unacknowledged and 3, 4 queued
+            conn.close()
+            sender.disconnect("test")
+            sender.retry_at = float('inf')
+            sender.send_message(frame(3), 3)
+            sender.send_message(frame(4), 4)
+            sender.retry_at = 0.0
+            self.assertTrue(sender.try_connect())
+            conn, _ = self.listener.accept()
+            # Only 3 fit: the resent orders go first and the newest is dropped
+            self.assertEqual(sender.dropped, 1)
+            self.assertEqual([message_id for message_id, _, _ in sender.unacked], [1, 2, 3])
+            conn.close()
+        finally:
+            sender.close()
+
+    def test_overflow_while_disconnected_drops_the_new_order(self):
+        def frame(message_id):
+            return FRAME_HEADER.pack(ACK_STRUCT.size) + ACK_STRUCT.pack(message_id)
+
+        sender = AcknowledgedSender(f"tcp://{TEST_HOST}:{self.port}", "Test", max_pending=2)
+        sender.retry_at = float('inf')  # The OrderManager is away
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertFalse(sender.send_message(frame(1), 1))
+                self.assertFalse(sender.send_message(frame(2), 2))
+                self.assertFalse(sender.send_message(frame(3), 3))
+            # The oldest queued orders stay; the one that did not fit is counted
+            self.assertEqual([message_id for message_id, _ in sender.pending], [1, 2])
+            self.assertEqual(sender.dropped, 1)
+        finally:
+            sender.close()
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,91 @@
+"""
+Unit test for order_store_utils.py
+"""
+
+import unittest
+
+# --- Make the Play Button work ---
+import sys
+import os
+
+current_file_path = os.path.abspath(__file__)
+tests_dir = os.path.dirname(current_file_path)
+project_root = os.path.dirname(tests_dir)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+from order_store_utils import OrderStore, NEW, PARTIALLY_FILLED, FILLED, REJECTED
+
+
+def make_order(client_order_id, symbol='AAPL', side='BUY', quantity=10, strategy_id=0):
+    return {'symbol': symbol, 'side': side, 'quantity': quantity, 'price': 100.0 + client_order_id,
+            'client_order_id': client_order_id, 'strategy_id': strategy_id}
+
+
+class TestOrderStore(unittest.TestCase):
+
+    def setUp(self):
+        self.store = OrderStore(capacity=4)  # Small, so the tests grow it
+
+    def test_indexes_and_lookup(self):
+        for i in range(1, 11):
+            self.store.add(make_order(i, symbol='AAPL' if i % 2 else 'MSFT', strategy_id=i % 3), 1000 + i)
+        self.assertEqual(len(self.store), 10)
+        self.assertGreaterEqual(self.store.capacity, 10)
+
+        order = self.store.get(7)
+        self.assertEqual((order['symbol'], order['side'], order['state']), ('AAPL', 'BUY', 'NEW'))
+        self.assertEqual(order['price'], 107.0)
+        self.assertIsNone(self.store.get(99))
+
+        self.assertEqual(self.store.by_symbol('MSFT').tolist(), [1, 3, 5, 7, 9])
+        self.assertEqual(self.store.by_strategy(0).tolist(), [2, 5, 8])
+        self.assertEqual(len(self.store.by_symbol('TSLA')), 0)
+        # [start, end) over receive times
+        self.assertEqual(self.store.between(1003, 1006).tolist(), [2, 3, 4])
+        values = self.store.column_values(self.store.by_symbol('MSFT'), ['client_order_id'])
+        self.assertEqual(values['client_order_id'].tolist(), [2, 4, 6, 8, 10])
+
+        with self.assertRaises(ValueError):
+            self.store.add(make_order(7), 2000)
+        with self.assertRaises(ValueError):
+            self.store.add(dict(make_order(11), side='HOLD'), 2000)
+
+    def test_states_and_open_exposure(self):
+        buy = self.store.add(make_order(1, quantity=10), 1)
+        sell = self.store.add(make_order(2, side='SELL', quantity=4, symbol='MSFT'), 2)
+        gone = self.store.add(make_order(3, quantity=5), 3)
+        # Racing threads: an earlier stamp is stored as the last one
+        late = self.store.add(make_order(4, quantity=1), 2)
+        self.assertEqual(self.store.get(4)['receive_ns'], 3)
+
+        self.assertEqual(self.store.fill(buy, 6, 10), PARTIALLY_FILLED)
+        self.store.cancel(gone, 11)
+        self.assertEqual(self.store.fill(late, 1, 12), FILLED)
+        with self.assertRaises(ValueError):
+            self.store.fill(late, 1, 13)
+
+        self.assertEqual(self.store.open_orders().tolist(), [buy, sell])
+        self.assertEqual(self.store.open_orders(NEW).tolist(), [sell])
+        self.assertEqual(self.store.open_exposure(), {'AAPL': 4, 'MSFT': -4})
+        counts = self.store.state_counts()
+        self.assertEqual((counts['NEW'], counts['PARTIALLY_FILLED'], counts['FILLED'], counts['CANCELED']),
+                         (1, 1, 1, 1))
+        self.assertEqual(self.store.records([gone])[0]['state'], 'CANCELED')
+        self.assertEqual(self.store.get(3)['update_ns'], 11)
+
+    def test_resend_of_a_rejected_order(self):
+        first = self.store.add(make_order(1), 1)
+        self.store.cancel(first, 2, REJECTED)
+        self.assertEqual(self.store.open_exposure(), {})
+        # The resend is stored anew; the rejected attempt stays
+        again = self.store.add(make_order(1), 3)
+        self.assertEqual(self.store.row_of(1), again)
+        self.assertEqual(self.store.records([first])[0]['state'], 'REJECTED')
+        self.store.fill(again, 10, 4)
+        with self.assertRaises(ValueError):
+            self.store.add(make_order(1), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Unit test for position_utils.py
+"""
+
+import unittest
+
+import numpy as np
+
+# --- Make the Play Button work ---
+import sys
+import os
+
+current_file_path = os.path.abspath(__file__)
+tests_dir = os.path.dirname(current_file_path)
+project_root = os.path.dirname(tests_dir)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+from position_utils import SharedPositionBook, PositionKeeper
+from shared_memory_utils import SharedPriceBook, unlink_untracked_shared_memory
+
+PRICE_SHM = f"test_positions_prices_{os.getpid()}"
+POSITION_SHM = f"test_positions_{os.getpid()}"
+
+
+class TestPositions(unittest.TestCase):
+
+    def setUp(self):
+        self.book = SharedPriceBook(name=PRICE_SHM, create=True, capacity=4)
+        self.book.add_symbols(['AAPL', 'MSFT'])
+        self.positions = SharedPositionBook(name=POSITION_SHM, create=True, capacity=8)
+        self.keeper = PositionKeeper(self.positions, self.book)
+
+    def tearDown(self):
+        self.book.unlink()
+        self.book.close()
+        # The reader below untracks the block in this process
+        self.positions.close()
+        unlink_untracked_shared_memory(POSITION_SHM)
+
+    def test_average_price_and_realized_pnl(self):
+        keeper = self.keeper
+        keeper.apply_fill('AAPL', 'BUY', 10, 100.0)
+        keeper.apply_fill('AAPL', 'BUY', 10, 110.0)
+        self.assertEqual(self.positions.position('AAPL')['avg_price'], 105.0)
+
+        self.assertEqual(keeper.apply_fill('AAPL', 'SELL', 5, 115.0), 50.0)
+        # Selling through zero realizes the rest and opens a short at the fill price
+        self.assertEqual(keeper.apply_fill('AAPL', 'SELL', 25, 95.0), -150.0)
+        position = self.positions.position('AAPL')
+        self.assertEqual(position['quantity'], -10)
+        self.assertEqual(position['avg_price'], 95.0)
+        self.assertEqual(position['realized_pnl'], -100.0)
+
+        self.assertEqual(keeper.apply_fill('AAPL', 'BUY', 10, 90.0), 50.0)
+        position = self.positions.position('AAPL')
+        self.assertEqual((position['quantity'], position['avg_price']), (0, 0.0))
+        self.assertIsNone(self.positions.position('MSFT'))
+        with self.assertRaises(ValueError):
+            keeper.apply_fill('AAPL', 'HOLD', 10, 90.0)
+
+    def test_mark_to_market(self):
+        keeper = self.keeper
+        keeper.apply_fill('AAPL', 'BUY', 10, 100.0)
+        keeper.apply_fill('MSFT', 'SELL', 5, 300.0)
+        keeper.apply_fill('TSLA', 'BUY', 1, 200.0)  # Not in the price book
+
+        self.book.update('AAPL', 102.0)
+        self.book.update('MSFT', 310.0)
+        self.assertEqual(keeper.mark_to_market(self.book.version()), 20.0 - 50.0)
+
+        snapshot = self.positions.snapshot()
+        self.assertEqual(snapshot['symbols'], ['AAPL', 'MSFT', 'TSLA'])
+        np.testing.assert_array_equal(snapshot['unrealized_pnl'], [20.0, -50.0, 0.0])
+        self.assertTrue(np.isnan(snapshot['mark'][2]))
+        # TSLA has no price and counts at cost
+        self.assertEqual(snapshot['totals']['net_exposure'], 1020.0 - 1550.0 + 200.0)
+        self.assertEqual(snapshot['totals']['gross_exposure'], 1020.0 + 1550.0 + 200.0)
+        self.assertEqual(snapshot['book_version'], self.book.version())
+        self.assertEqual(snapshot['fills'], 3)
+
+        # A fill between marks moves the totals by that row only
+        keeper.apply_fill('AAPL', 'SELL', 10, 104.0)
+        totals = self.positions.snapshot()['totals']
+        self.assertEqual(totals['realized_pnl'], 40.0)
+        self.assertEqual(totals['unrealized_pnl'], -50.0)
+        self.assertEqual(totals['net_exposure'], -1550.0 + 200.0)
+
+    def test_reader_and_restart_see_the_same_positions(self):
+        self.keeper.apply_fill('MSFT', 'BUY', 7, 300.0)
+        reader = SharedPositionBook(name=POSITION_SHM)
+        try:
+            self.assertEqual(reader.position('MSFT')['quantity'], 7)
+            # A restarted writer attaches to the block and carries on
+            restarted = PositionKeeper(SharedPositionBook(name=POSITION_SHM, create=True), self.book)
+            restarted.apply_fill('MSFT', 'BUY', 3, 310.0)
+            self.assertEqual(reader.position('MSFT')['quantity'], 10)
+            self.assertEqual(reader.snapshot()['symbols'], ['MSFT'])
+            restarted.positions.close()
+
+            # A writer that died mid-write leaves the lock odd until the next one attaches
+            totals = reader.snapshot()['totals']
+            self.positions.begin_write()
+            self.positions.totals[:] = 12345.0  # Half-updated totals
+            with self.assertRaises(RuntimeError):
+                reader.snapshot(retries=10)
+            SharedPositionBook(name=POSITION_SHM, create=True).close()
+            self.assertEqual(reader.position('MSFT')['quantity'], 10)
+            # The next writer rebuilt the totals from the rows
+            self.assertEqual(reader.snapshot()['totals'], totals)
+        finally:
+            reader.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""
+Unit test for sentiment_utils.py
+"""
+
+import unittest
+
+# --- Make the Play Button work ---
+import sys
+import os
+
+current_file_path = os.path.abspath(__file__)
+tests_dir = os.path.dirname(current_file_path)
+project_root = os.path.dirname(tests_dir)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+from sentiment_utils import SharedSentimentBook
+from news_ingest import parse_news_event
+from config import SYMBOLS
+
+SENTIMENT_SHM = f"test_sentiment_{os.getpid()}"
+
+
+class TestSentimentBook(unittest.TestCase):
+
+    def setUp(self):
+        self.writer = SharedSentimentBook(name=SENTIMENT_SHM, create=True, capacity=16)
+        self.reader = SharedSentimentBook(name=SENTIMENT_SHM)
+
+    def tearDown(self):
+        self.reader.close()
+        self.writer.unlink()
+        self.writer.close()
+
+    def test_update_and_read(self):
+        self.assertEqual(self.reader.read(SYMBOLS[0]), (0, 0, 0))
+        version = self.writer.update(SYMBOLS[0], 72, 1_000)
+        self.assertEqual(self.reader.read(SYMBOLS[0]), (72, 1_000, version))
+        self.assertEqual(self.reader.version(), version)
+        self.assertIsNone(self.reader.read('TSLA'))
+
+        # A writer that died mid-write: readers give up until the next one attaches
+        self.writer.header[0] += 1
+        with self.assertRaises(RuntimeError):
+            self.reader.read(SYMBOLS[0], retries=10)
+        SharedSentimentBook(name=SENTIMENT_SHM, create=True).close()
+        self.assertEqual(self.reader.read(SYMBOLS[0])[0], 72)
+        # ...and every row with an event counts as changed again
+        _, indices, values, _ = self.reader.changes_since(version)
+        self.assertEqual((indices.tolist(), values.tolist()), ([self.reader.index_of(SYMBOLS[0])], [72]))
+
+    def test_changes_since_conflates_and_sees_new_symbols(self):
+        start = self.reader.version()
+        self.writer.update(SYMBOLS[1], 10, 1)
+        self.writer.update(SYMBOLS[1], 20, 2)
+        self.writer.update('TSLA', 90, 3)  # Appended by the writer
+
+        version, indices, values, timestamps = self.reader.changes_since(start)
+        self.assertEqual(indices.tolist(), [self.reader.index_of(SYMBOLS[1]), self.reader.index_of('TSLA')])
+        self.assertEqual(values.tolist(), [20, 90])
+        self.assertEqual(timestamps.tolist(), [2, 3])
+        self.assertEqual(self.reader.read('TSLA')[0], 90)
+        self.assertEqual(len(self.reader.changes_since(version)[1]), 0)
+
+    def test_parse_news_event(self):
+        self.assertEqual(parse_news_event(b"AAPL,72,123"), ('AAPL', 72, 123))
+        self.assertEqual(parse_news_event(b"AAPL,72"), ('AAPL', 72, 0))
+        with self.assertRaises(ValueError):
+            parse_news_event(b"72")
+
+
+if __name__ == '__main__':
+    unittest.main()
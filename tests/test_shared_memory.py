@@ -7,6 +7,7 @@ successfully write and read from the SharedPriceBook.
 
 import unittest
 import multiprocessing as mp
+import tempfile
 import time
 
 # --- This is the new part to make the Play Button work ---
@@ -55,6 +56,13 @@ def reader_process_task(shm_name, symbol, result_queue):
         print(f"[Reader Process] Error: {e}")
         result_queue.put(e)
 
+def crashing_writer_task(directory, name):
+    """Writes a price and dies without closing, like a killed OrderBook."""
+    book = SharedPriceBook(name=name, create=True, directory=directory)
+    book.update('AAPL', 123.0)
+    book.heartbeat()
+    os._exit(1)
+
 # === Main Test Case ===
 
 class TestSharedPriceBook(unittest.TestCase):
@@ -66,7 +74,7 @@ class TestSharedPriceBook(unittest.TestCase):
         """
         print("\n[Main Process] Creating SharedPriceBook...")
         # Create the shared memory block
-        self.book = SharedPriceBook(name=SHARED_MEMORY_NAME, create=True)
+        self.book = SharedPriceBook(name=SHARED_MEMORY_NAME, create=True, layout='records')
         self.shm_name = self.book.name
         self.result_queue = mp.Queue()
 
@@ -158,6 +166,216 @@ class TestSharedPriceBook(unittest.TestCase):
         # Verify it's the latest price
         self.assertEqual(read_price, final_price)
 
+    def test_changes_since(self):
+        """
+        Tests that changes_since() returns only the rows written after a
+        version, once each, with their latest prices.
+        """
+        version, indices, prices = self.book.changes_since(self.book.version())
+        self.assertEqual(len(indices), 0)
+
+        self.book.update('MSFT', 300.0)
+        self.book.update('AAPL', 150.0)
+        self.book.update('MSFT', 301.5)
+
+        new_version, indices, prices = self.book.changes_since(version)
+        self.assertEqual(new_version, version + 3)
+        changed = {self.book.symbols[i]: p for i, p in zip(indices, prices)}
+        self.assertEqual(changed, {'AAPL': 150.0, 'MSFT': 301.5})
+
+        # Nothing new since the last poll
+        _, indices, _ = self.book.changes_since(new_version)
+        self.assertEqual(len(indices), 0)
+
+        # The trace header does not disturb the version
+        self.book.write_trace(7, 1, 2, 3, 4)
+        self.assertEqual(self.book.version(), new_version)
+        self.assertEqual(self.book.read_trace()['tick_id'], 7)
+
+    def test_update_quotes(self):
+        """
+        Tests that consolidated quotes set bid / ask and the mid price,
+        and that a side without a quote keeps the last price.
+        """
+        import numpy as np
+        aapl, msft = self.book.symbol_to_index['AAPL'], self.book.symbol_to_index['MSFT']
+        self.book.update('MSFT', 300.0)
+
+        self.book.update_quotes(
+            np.array([aapl, msft]), np.array([149.9, np.nan]), np.array([150.1, 300.2])
+        )
+        self.assertEqual(self.book.read_quote('AAPL'), (149.9, 150.1))
+        self.assertAlmostEqual(self.book.read('AAPL'), 150.0)
+        self.assertEqual(self.book.read('MSFT'), 300.0)
+
+        _, indices, _ = self.book.changes_since(self.book.version() - 1)
+        self.assertEqual(sorted(indices.tolist()), sorted([aapl, msft]))
+
+    def test_new_symbols_grow_the_book_under_a_reader(self):
+        """
+        Tests that a reader attached before the writer adds symbols (and
+        outgrows its data block) remaps on its own and keeps the old prices.
+        """
+        reader = SharedPriceBook(name=self.shm_name, create=False)
+        try:
+            self.book.update('AAPL', 150.0)
+            version = reader.version()
+            start_capacity = self.book.capacity
+
+            new_symbols = [f"NEW{i}" for i in range(start_capacity)]
+            for i, symbol in enumerate(new_symbols):
+                self.book.update(symbol, 10.0 + i)
+
+            self.assertGreater(self.book.capacity, start_capacity)
+            # Direct index users follow the writer through refresh()
+            self.assertNotIn('NEW3', reader.symbol_to_index)
+            reader.refresh()
+            self.assertEqual(reader.prices[reader.symbol_to_index['NEW3']], 13.0)
+            self.assertEqual(reader.read('NEW3'), 13.0)
+            self.assertEqual(reader.read('AAPL'), 150.0)
+            self.assertEqual(reader.symbols, self.book.symbols)
+
+            _, indices, prices = reader.changes_since(version)
+            self.assertEqual(len(indices), len(new_symbols))
+            self.assertEqual(reader.symbols[indices[0]], 'NEW0')
+            self.assertEqual(prices[-1], 10.0 + len(new_symbols) - 1)
+        finally:
+            reader.close()
+
+        with self.assertRaises(ValueError):
+            self.book.add_symbol('TOO_LONG_SYMBOL')
+
+    def test_warm_start_from_snapshot(self):
+        """
+        Tests that a new book restores the symbols and prices of a saved
+        snapshot, growing once for all of them.
+        """
+        extra = [f"SNAP{i}" for i in range(2 * self.book.capacity)]
+        for i, symbol in enumerate(extra):
+            self.book.update(symbol, 1.0 + i)
+        self.book.update('AAPL', 150.0)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'book.npz')
+            self.assertEqual(self.book.load_snapshot(path), (0, None))
+            self.book.save_snapshot(path)
+
+            warm = SharedPriceBook(name=f"{self.shm_name}_warm", create=True)
+            try:
+                restored, age = warm.load_snapshot(path)
+                self.assertEqual(restored, len(SYMBOLS) + len(extra))
+                self.assertLess(age, 60)
+                self.assertEqual(warm.symbols, self.book.symbols)
+                self.assertEqual(warm.read('AAPL'), 150.0)
+                self.assertEqual(warm.read(extra[-1]), float(len(extra)))
+                # Restored prices count as changes for pollers
+                _, indices, _ = warm.changes_since(0)
+                self.assertEqual(len(indices), restored)
+            finally:
+                warm.close()
+                warm.unlink()
+
+    def test_compact_layout(self):
+        """
+        Tests the struct-of-arrays layout: float32 columns, a separate
+        symbol table that grows with the book, array views and int32 ids.
+        """
+        import numpy as np
+        name = f"{self.shm_name}_compact"
+        compact = SharedPriceBook(name=name, create=True, capacity=4, layout='compact')
+        # Readers follow the block's layout, whatever they asked for
+        reader = SharedPriceBook(name=name, create=False, layout='records')
+        try:
+            self.assertEqual(reader.layout, 'compact')
+            self.assertEqual(reader.prices.dtype, np.float32)
+            held = reader.price_view()  # Outlives the growth below
+
+            extra = [f"OPT{i}" for i in range(10)]
+            rows = np.array(compact.add_symbols(extra), dtype=np.intp)
+            self.assertGreater(compact.capacity, 4)
+            compact.update_quotes(rows, 100.0 + rows, 100.02 + rows)
+
+            ids = reader.symbol_ids(['OPT3', 'NOPE', 'AAPL'])
+            self.assertEqual(ids.dtype, np.int32)
+            self.assertEqual(ids.tolist(), [reader.symbol_to_index['OPT3'], -1, 0])
+            prices = reader.price_view()
+            self.assertEqual(len(prices), len(SYMBOLS) + len(extra))
+            self.assertAlmostEqual(float(prices[ids[0]]), 100.01 + ids[0], places=3)
+            with self.assertRaises(ValueError):
+                prices[0] = 1.0  # Read-only
+            bids, asks = reader.quote_view()
+            self.assertTrue(np.isnan(bids[0]))
+            self.assertAlmostEqual(float(asks[ids[0]]), 100.02 + ids[0], places=3)
+            self.assertEqual(len(held), len(SYMBOLS))
+
+            # Snapshots are the same records in either layout
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                path = os.path.join(tmp_dir, 'book.npz')
+                compact.save_snapshot(path)
+                restored, _ = self.book.load_snapshot(path)
+            self.assertEqual(restored, len(SYMBOLS) + len(extra))
+            self.assertAlmostEqual(self.book.read('OPT9'), 100.01 + rows[-1], places=3)
+        finally:
+            del held
+            reader.close()
+            compact.close()
+            compact.unlink()
+        self.assertFalse(os.path.exists(f"/dev/shm/{name}_symbols1"))
+
+    def test_file_book_resumes_after_a_crash(self):
+        """
+        Tests that a file-backed book outlives a crashed writer: readers
+        see the writer is gone, and the next writer resumes the prices in
+        place, unless the header is not a price book's.
+        """
+        name = f"{self.shm_name}_file"
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            writer = mp.Process(target=crashing_writer_task, args=(tmp_dir, name))
+            writer.start()
+            writer.join()
+
+            reader = SharedPriceBook(name=name, directory=tmp_dir)
+            try:
+                status = reader.writer_status()
+                self.assertEqual(status['pid'], writer.pid)
+                self.assertFalse(status['alive'])  # Its process is gone
+                self.assertEqual(reader.read('AAPL'), 123.0)
+
+                resumed = SharedPriceBook(name=name, create=True, directory=tmp_dir)
+                self.assertFalse(resumed.created)  # In place, not a new book
+                self.assertEqual(resumed.read('AAPL'), 123.0)
+                self.assertEqual(resumed.version(), 1)
+                resumed.heartbeat()
+                self.assertTrue(reader.writer_alive())
+                # A stamp ahead of the monotonic clock was taken before a reboot
+                stamp = int(resumed.heartbeat_view[0])
+                resumed.heartbeat_view[0] = stamp + 10**15
+                self.assertIsNone(reader.writer_status()['heartbeat_age'])
+                self.assertFalse(reader.writer_alive())
+                resumed.heartbeat()
+                resumed.update('MSFT', 321.0)
+                self.assertEqual(reader.read('MSFT'), 321.0)
+                resumed.close()
+                resumed.unlink()  # Keeps the files
+                # A clean exit releases the book without waiting for the heartbeat to expire
+                self.assertFalse(reader.writer_alive())
+
+                path = os.path.join(tmp_dir, f"{name}.book")
+                with open(path, 'r+b') as f:
+                    f.seek(reader.header.dtype.fields['magic'][1])
+                    f.write(bytes(8))
+                # Segments of generations the unsound header no longer points at
+                for stale in (f"{name}_data7.book", f"{name}_symbols7.book", "other_data1.book"):
+                    open(os.path.join(tmp_dir, stale), 'wb').close()
+                fresh = SharedPriceBook(name=name, create=True, directory=tmp_dir)
+                self.assertTrue(fresh.created)
+                self.assertEqual(fresh.read('AAPL'), 0.0)
+                fresh.close()
+                self.assertEqual(sorted(os.listdir(tmp_dir)),
+                                 sorted([f"{name}.book", f"{name}_data0.book", "other_data1.book"]))
+            finally:
+                reader.close()
+
 if __name__ == '__main__':
     # We must use 'spawn' or 'forkserver' for multiprocessing on Windows/macOS
     mp.set_start_method('spawn')
@@ -0,0 +1,82 @@
+"""
+Unit test for simulation.py
+"""
+
+import random
+import unittest
+
+# --- Make the Play Button work ---
+import sys
+import os
+
+current_file_path = os.path.abspath(__file__)
+tests_dir = os.path.dirname(current_file_path)
+project_root = os.path.dirname(tests_dir)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+from simulation import Simulation, VirtualClock
+from config import TRADE_QUANTITY
+
+SIM_NAME = f"test_sim_{os.getpid()}"
+
+
+def simulate(seed, duration=900, own_history=False):
+    """Runs one simulation; returns its fills and summary."""
+    simulation = Simulation(seed=seed, price_interval=1.0, news_interval=3.0, name=SIM_NAME)
+    try:
+        if own_history:
+            # As a Strategy that found no feature block with both windows
+            simulation.features.close()
+            simulation.features = None
+        result = simulation.run(duration)
+        return simulation.fills, result
+    finally:
+        simulation.close()
+
+
+class TestSimulation(unittest.TestCase):
+
+    def test_virtual_clock_order(self):
+        clock = VirtualClock()
+        seen = []
+        clock.schedule(20, seen.append, 'late')
+        clock.schedule(10, seen.append, 'first')
+        clock.schedule(10, seen.append, 'second')  # Same time: in scheduling order
+        clock.schedule(10, lambda: clock.schedule(5, seen.append, 'nested'))
+        self.assertEqual(clock.run(15), 4)
+        self.assertEqual(seen, ['first', 'second', 'nested'])
+        self.assertEqual(clock.now_ns, 15)
+        clock.run(30)
+        self.assertEqual(seen[-1], 'late')
+
+    def test_runs_are_repeatable(self):
+        fills, result = simulate(seed=3)
+        self.assertEqual(result['ticks'], 900)
+        self.assertEqual(result['virtual_seconds'], 900)
+        self.assertGreater(len(fills), 0)
+        # Orders reached the OrderManager and were booked as fills
+        signed = sum(TRADE_QUANTITY if side == 'BUY' else -TRADE_QUANTITY for _, side, _ in fills)
+        self.assertEqual(result['position']['quantity'], signed)
+
+        again, _ = simulate(seed=3)
+        self.assertEqual(again, fills)
+        other, _ = simulate(seed=4)
+        self.assertNotEqual(other, fills)
+
+    def test_seed_leaves_the_random_module_alone(self):
+        random.seed(42)
+        expected = random.random()
+        random.seed(42)
+        simulate(seed=3, duration=60)
+        self.assertEqual(random.random(), expected)
+
+    def test_feature_block_and_own_history_trade_alike(self):
+        fills, _ = simulate(seed=5)
+        self.assertGreater(len(fills), 0)
+        own, _ = simulate(seed=5, own_history=True)
+        self.assertEqual(own, fills)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Unit test for the moving averages of strategy.py
+"""
+
+import contextlib
+import io
+import unittest
+
+import numpy as np
+
+# --- Make the Play Button work ---
+import sys
+import os
+
+current_file_path = os.path.abspath(__file__)
+tests_dir = os.path.dirname(current_file_path)
+project_root = os.path.dirname(tests_dir)
+sys.path.insert(0, project_root)
+# --- End of fix ---
+
+from strategy import ma_news_strategy_decision, read_moving_averages, sample_price
+from feature_utils import SharedFeatureBook, FeatureEngine
+from shared_memory_utils import SharedPriceBook
+from config import SHORT_WINDOW, LONG_WINDOW, BULLISH_THRESHOLD, BEARISH_THRESHOLD
+
+PRICE_SHM = f"test_strategy_prices_{os.getpid()}"
+FEATURE_SHM = f"test_strategy_features_{os.getpid()}"
+
+
+class TestMovingAverages(unittest.TestCase):
+
+    def setUp(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.book = SharedPriceBook(name=PRICE_SHM, create=True, capacity=4)
+        self.book.add_symbols(['AAPL', 'MSFT'])
+        self.features = SharedFeatureBook(name=FEATURE_SHM, create=True, capacity=4,
+                                          windows=[SHORT_WINDOW, LONG_WINDOW])
+        self.engine = FeatureEngine(self.features, self.book)
+
+    def tearDown(self):
+        self.features.unlink()
+        self.features.close()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.book.unlink()
+            self.book.close()
+
+    def test_feature_and_fallback_paths_decide_alike(self):
+        columns = (self.features.column('sma', SHORT_WINDOW), self.features.column('sma', LONG_WINDOW))
+        row = self.book.symbol_to_index['AAPL']
+        history = []
+        version = self.book.version()
+        rng = np.random.default_rng(11)
+        # Up, then down, so both crossovers happen
+        walk = 100.0 + np.cumsum(np.r_[rng.normal(0.3, 0.5, 40), rng.normal(-0.3, 0.5, 40)])
+        decisions = 0
+        for step, price in enumerate(walk.tolist()):
+            # How the OrderBook writes a mid and moves the features
+            self.book.update('AAPL', price)
+            self.engine.update([row], [price])
+            if step % 3 == 0:
+                self.book.update('MSFT', 50.0)  # Other symbols' writes are not samples
+                self.engine.update([self.book.symbol_to_index['MSFT']], [50.0])
+            version = sample_price(self.book, 'AAPL', version, history)
+
+            moving_averages = read_moving_averages(self.features, 'AAPL', columns)
+            for sentiment in (BULLISH_THRESHOLD + 1, BEARISH_THRESHOLD - 1):
+                fallback = ma_news_strategy_decision(history, price, sentiment, None)
+                if moving_averages is None:
+                    # Not warmed up: neither path decides
+                    self.assertIsNone(fallback)
+                    continue
+                self.assertAlmostEqual(moving_averages[0], np.mean(history[-SHORT_WINDOW:]))
+                self.assertAlmostEqual(moving_averages[1], np.mean(history[-LONG_WINDOW:]))
+                featured = ma_news_strategy_decision([], price, sentiment, None, moving_averages=moving_averages)
+                self.assertEqual(featured, fallback)
+                decisions += fallback is not None
+        self.assertEqual(len(history), LONG_WINDOW)
+        self.assertGreater(decisions, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+"""
+Runtime tuning for the latency-critical processes.
+
+Each process creates a ProcessTuning with its name and:
+- calls apply() first thing, before it starts any threads (threads
+  inherit the CPU affinity and scheduling policy of their creator),
+- calls finish_warmup() once its startup work is done (sockets
+  connected, shared memory attached, hot functions run once), and
+- wraps each pass of its hot loop in hot_loop().
+
+The settings per process live in config.PROCESS_TUNING.
+"""
+
+import contextlib
+import gc
+import os
+
+from config import TUNING_ENABLED, PROCESS_TUNING
+from logging_utils import get_logger
+
+log = get_logger("Tuning")
+
+GC_DEFAULT = 'default'
+GC_FREEZE = 'freeze'
+GC_DISABLE = 'disable'
+GC_MODES = (GC_DEFAULT, GC_FREEZE, GC_DISABLE)
+
+
+def parse_cpu_list(spec):
+    """
+    Parses a CPU list in the usual Linux format.
+
+    Args:
+        spec (str): e.g. "3", "0-1" or "0-1,4".
+
+    Returns:
+        set: CPU numbers, or None if spec is empty.
+
+    Raises:
+        ValueError: If spec is malformed.
+    """
+    if spec is None or not str(spec).strip():
+        return None
+    cpus = set()
+    for part in str(spec).split(','):
+        part = part.strip()
+        if '-' in part:
+            low, high = part.split('-')
+            cpus.update(range(int(low), int(high) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+
+def set_cpu_affinity(cpus):
+    """
+    Pins the calling thread (and every thread it starts later) to the given CPUs.
+
+    Returns:
+        bool: True if the affinity was changed.
+    """
+    if not cpus or not hasattr(os, 'sched_setaffinity'):
+        return False
+    available = os.sched_getaffinity(0)
+    usable = set(cpus) & available
+    if not usable:
+        log.warning("[Tuning] CPUs %s not available (have %s). Affinity unchanged.",
+                    sorted(cpus), sorted(available))
+        return False
+    os.sched_setaffinity(0, usable)
+    return True
+
+
+def set_scheduling(realtime_priority=0, nice=0):
+    """
+    Switches to SCHED_FIFO at the given priority, or adjusts the nice value.
+
+    Falls back to normal scheduling if the process lacks the privilege.
+
+    Returns:
+        str: Description of the policy now in effect.
+    """
+    if realtime_priority and hasattr(os, 'sched_setscheduler'):
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(realtime_priority))
+            return f"SCHED_FIFO({realtime_priority})"
+        except (PermissionError, OSError) as e:
+            log.warning("[Tuning] SCHED_FIFO(%d) not permitted (%s). Using normal scheduling.",
+                        realtime_priority, e)
+    if nice:
+        try:
+            return f"nice {os.nice(nice)}"
+        except (PermissionError, OSError) as e:
+            log.warning("[Tuning] Could not change nice value by %d: %s", nice, e)
+    return "normal"
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """
+    Keeps the cyclic garbage collector out of a block of code.
+
+    If enough allocations piled up inside the block to have triggered a
+    collection, a young-generation collection runs right after it, once
+    the latency-critical work is done.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+            if gc.get_count()[0] >= gc.get_threshold()[0]:
+                gc.collect(0)
+
+
+def warm_up(func, *args, repeat=100, **kwargs):
+    """
+    Calls func a few times so lazy imports, caches and first-call
+    allocations happen at startup instead of on the first real tick.
+    """
+    for _ in range(repeat):
+        func(*args, **kwargs)
+
+
+class ProcessTuning:
+    """
+    Applies the config.PROCESS_TUNING settings for one process.
+    """
+    def __init__(self, process_name, settings=None, enabled=TUNING_ENABLED):
+        """
+        Args:
+            process_name (str): Key into PROCESS_TUNING.
+            settings (dict): Overrides the configured settings (benchmarks).
+            enabled (bool): If False, every method is a no-op.
+        """
+        self.process_name = process_name
+        self.settings = dict(PROCESS_TUNING.get(process_name, {}))
+        if settings:
+            self.settings.update(settings)
+        self.enabled = enabled
+        self.gc_mode = self.settings.get('gc', GC_DEFAULT) if enabled else GC_DEFAULT
+        if self.gc_mode not in GC_MODES:
+            raise ValueError(f"Unknown gc mode '{self.gc_mode}' for {process_name}")
+
+    def apply(self):
+        """
+        Sets CPU affinity, scheduling policy and GC thresholds.
+        Call before the process starts any threads.
+
+        Returns:
+            dict: What was applied, for logging and benchmarks.
+        """
+        applied = {'cpus': None, 'scheduling': 'normal', 'gc': self.gc_mode}
+        if not self.enabled:
+            return applied
+
+        cpus = parse_cpu_list(self.settings.get('cpus'))
+        if set_cpu_affinity(cpus):
+            applied['cpus'] = sorted(os.sched_getaffinity(0))
+        applied['scheduling'] = set_scheduling(
+            self.settings.get('realtime_priority', 0), self.settings.get('nice', 0)
+        )
+        threshold = self.settings.get('gc_threshold')
+        if threshold:
+            gc.set_threshold(*threshold)
+        applied['gc_threshold'] = gc.get_threshold()
+
+        log.info("[Tuning] %s: cpus=%s scheduling=%s gc=%s threshold=%s",
+                 self.process_name, applied['cpus'] or 'all', applied['scheduling'],
+                 self.gc_mode, applied['gc_threshold'])
+        return applied
+
+    def finish_warmup(self):
+        """
+        Collects startup garbage and freezes everything still alive, so
+        later collections only look at objects created by the hot loop.
+        """
+        if self.gc_mode == GC_DEFAULT:
+            return
+        gc.collect()
+        gc.freeze()
+        log.info("[Tuning] %s: %d startup objects frozen out of the GC.",
+                 self.process_name, gc.get_freeze_count())
+
+    def hot_loop(self):
+        """
+        Context manager for one pass of the hot loop: pauses the GC in
+        'disable' mode, does nothing otherwise.
+        """
+        if self.gc_mode == GC_DISABLE:
+            return gc_paused()
+        return contextlib.nullcontext()